@@ -1,9 +1,43 @@
 import typer
 from pathlib import Path
 
-from mini_git.commands import AddCommand, InitCommand
+from mini_git.commands import (
+    AddCommand,
+    ArchiveCommand,
+    BitmapCommand,
+    BlameCommand,
+    CheckoutCommand,
+    CloneCommand,
+    CommitCommand,
+    CommitGraphCommand,
+    CompressionBenchCommand,
+    DiffCommand,
+    FetchCommand,
+    FsckCommand,
+    GcCommand,
+    GrepCommand,
+    InitCommand,
+    LogCommand,
+    MergeBaseCommand,
+    MergeCommand,
+    MergeTreeCommand,
+    PackRefsCommand,
+    PushCommand,
+    ReflogCommand,
+    RepackCommand,
+    RestoreCommand,
+    RevListCommand,
+    SparseCheckoutCommand,
+    WriteTreeCommand,
+)
 
 app = typer.Typer()
+sparse_checkout_app = typer.Typer()
+app.add_typer(sparse_checkout_app, name="sparse-checkout")
+commit_graph_app = typer.Typer()
+app.add_typer(commit_graph_app, name="commit-graph")
+bitmap_app = typer.Typer()
+app.add_typer(bitmap_app, name="bitmap")
 
 
 @app.command()
@@ -19,11 +53,333 @@ def init():
 
 @app.command()
 def add(path: Path):
-    # TODO: enable directory path
     command = AddCommand()
     command.execute(path)
 
 
+@app.command("write-tree")
+def write_tree():
+    command = WriteTreeCommand()
+    command.execute()
+
+
+@app.command()
+def commit(message: str = typer.Option(..., "--message", "-m")):
+    command = CommitCommand()
+    command.execute(message)
+
+
+@app.command()
+def log(
+    args: list[str] | None = typer.Argument(None, help="[<revision>...] [<path>...]"),
+    bloom_stats: bool = typer.Option(False, "--bloom-stats"),
+    oneline: bool = typer.Option(False, "--oneline"),
+    fmt: str | None = typer.Option(None, "--format", "--pretty"),
+    max_count: int | None = typer.Option(None, "--max-count", "-n"),
+):
+    command = LogCommand()
+    command.execute(
+        args,
+        bloom_stats=bloom_stats,
+        # --oneline は --pretty=oneline に --abbrev-commit を加えたもの
+        fmt=fmt or ("%h %s" if oneline else "medium"),
+        max_count=max_count,
+    )
+
+
+@app.command()
+def diff(
+    old: str,
+    new: str,
+    paths: list[str] | None = typer.Argument(None),
+    name_status: bool = typer.Option(False, "--name-status"),
+    name_only: bool = typer.Option(False, "--name-only"),
+    find_renames: bool = typer.Option(False, "--find-renames", "-M"),
+    find_copies: bool = typer.Option(False, "--find-copies", "-C"),
+    min_score: int = typer.Option(50, "--min-score"),
+    rename_limit: int = typer.Option(1000, "--rename-limit"),
+    diff_algorithm: str = typer.Option("myers", "--diff-algorithm"),
+    histogram: bool = typer.Option(False, "--histogram"),
+    unified: int = typer.Option(3, "--unified", "-U"),
+):
+    command = DiffCommand()
+    command.execute(
+        old,
+        new,
+        paths,
+        name_only=name_only,
+        name_status=name_status,
+        algorithm="histogram" if histogram else diff_algorithm,
+        context=unified,
+        find_renames=find_renames or find_copies,
+        find_copies=find_copies,
+        min_score=min_score,
+        rename_limit=rename_limit,
+    )
+
+
+@app.command()
+def blame(
+    args: list[str] = typer.Argument(..., help="[<revision>] <path>"),
+    cache: bool = typer.Option(True, "--cache/--no-cache"),
+):
+    if len(args) > 2:
+        raise typer.BadParameter("expected [<revision>] <path>")
+    rev = args[0] if len(args) == 2 else "HEAD"
+    command = BlameCommand()
+    command.execute(args[-1], rev=rev, use_cache=cache)
+
+
+@app.command("rev-list")
+def rev_list(
+    revs: list[str],
+    objects: bool = typer.Option(False, "--objects"),
+    count: bool = typer.Option(False, "--count"),
+    use_bitmap_index: bool = typer.Option(
+        True, "--use-bitmap-index/--no-use-bitmap-index"
+    ),
+):
+    command = RevListCommand()
+    command.execute(
+        revs, objects=objects, count=count, use_bitmap_index=use_bitmap_index
+    )
+
+
+@app.command()
+def reflog(
+    ref: str = typer.Argument("HEAD"),
+    max_count: int | None = typer.Option(None, "--max-count", "-n"),
+):
+    command = ReflogCommand()
+    command.execute(ref, max_count=max_count)
+
+
+@app.command("merge-base")
+def merge_base(
+    first: str,
+    second: str,
+    is_ancestor: bool = typer.Option(False, "--is-ancestor"),
+):
+    command = MergeBaseCommand()
+    raise typer.Exit(command.execute(first, second, is_ancestor=is_ancestor))
+
+
+@app.command("merge-tree")
+def merge_tree(
+    branch1: str,
+    branch2: str,
+    merge_base: str | None = typer.Option(None, "--merge-base"),
+):
+    command = MergeTreeCommand()
+    raise typer.Exit(command.execute(branch1, branch2, merge_base=merge_base))
+
+
+@app.command()
+def merge(
+    rev: str,
+    message: str | None = typer.Option(None, "--message", "-m"),
+):
+    command = MergeCommand()
+    raise typer.Exit(command.execute(rev, message=message))
+
+
+@app.command()
+def checkout(
+    target: str,
+    force: bool = typer.Option(False, "--force", "-f"),
+    jobs: int | None = typer.Option(None, "--jobs", "-j"),
+):
+    command = CheckoutCommand()
+    command.execute(target, force=force, jobs=jobs)
+
+
+@app.command()
+def restore(
+    paths: list[Path] | None = typer.Argument(None),
+    source: str | None = typer.Option(None, "--source", "-s"),
+    jobs: int | None = typer.Option(None, "--jobs", "-j"),
+):
+    command = RestoreCommand()
+    command.execute(paths, source=source, jobs=jobs)
+
+
+@app.command()
+def clone(
+    source: Path,
+    directory: Path | None = typer.Argument(None),
+    hardlinks: bool = typer.Option(True, "--hardlinks/--no-hardlinks"),
+    shared: bool = typer.Option(False, "--shared", "-s"),
+    jobs: int | None = typer.Option(None, "--jobs", "-j"),
+):
+    command = CloneCommand()
+    command.execute(source, directory, hardlinks=hardlinks, jobs=jobs, shared=shared)
+
+
+@app.command()
+def fetch(
+    remote: str = typer.Argument("origin"),
+    refspecs: list[str] | None = typer.Argument(None),
+    window: int = typer.Option(10, "--window"),
+    depth: int = typer.Option(50, "--depth"),
+):
+    # 別のリポジトリ（パスか remote 名）から足りない object だけを受け取る
+    command = FetchCommand()
+    raise typer.Exit(command.execute(remote, refspecs, window, depth))
+
+
+@app.command()
+def push(
+    remote: str = typer.Argument("origin"),
+    refspecs: list[str] | None = typer.Argument(None),
+    force: bool = typer.Option(False, "--force", "-f"),
+    window: int = typer.Option(10, "--window"),
+    depth: int = typer.Option(50, "--depth"),
+):
+    command = PushCommand()
+    raise typer.Exit(command.execute(remote, refspecs, force, window, depth))
+
+
+@app.command("compression-bench")
+def compression_bench(
+    levels: list[int] | None = typer.Option(None, "--level", "-l"),
+    sample: int = typer.Option(2000, "--sample"),
+    apply: bool = typer.Option(False, "--apply"),
+):
+    # リポジトリ自身の object で zlib の level ごとの速さと圧縮率を測る
+    command = CompressionBenchCommand()
+    command.execute(levels, sample=sample, apply=apply)
+
+
+@app.command()
+def archive(
+    tree_ish: str,
+    fmt: str | None = typer.Option(None, "--format"),
+    output: Path | None = typer.Option(None, "--output", "-o"),
+    prefix: str = typer.Option("", "--prefix"),
+    jobs: int | None = typer.Option(None, "--jobs", "-j"),
+):
+    # worktree を作らずに tree から tar / tar.gz / zip を書き出す
+    command = ArchiveCommand()
+    raise typer.Exit(command.execute(tree_ish, fmt, output, prefix, jobs))
+
+
+@app.command()
+def grep(
+    pattern: str,
+    args: list[str] | None = typer.Argument(None, help="[<tree-ish>] [<path>...]"),
+    ignore_case: bool = typer.Option(False, "--ignore-case", "-i"),
+    fixed: bool = typer.Option(False, "--fixed-strings", "-F"),
+    line_number: bool = typer.Option(False, "--line-number", "-n"),
+    files_with_matches: bool = typer.Option(False, "--files-with-matches", "-l"),
+    count: bool = typer.Option(False, "--count", "-c"),
+    cached: bool = typer.Option(False, "--cached"),
+    jobs: int | None = typer.Option(None, "--jobs", "-j"),
+):
+    command = GrepCommand()
+    raise typer.Exit(
+        command.execute(
+            pattern,
+            args,
+            ignore_case=ignore_case,
+            fixed=fixed,
+            line_number=line_number,
+            files_with_matches=files_with_matches,
+            count=count,
+            cached=cached,
+            jobs=jobs,
+        )
+    )
+
+
+@app.command()
+def fsck(
+    jobs: int | None = typer.Option(None, "--jobs", "-j"),
+    connectivity: bool = typer.Option(True, "--connectivity/--no-connectivity"),
+    progress: bool | None = typer.Option(None, "--progress/--no-progress"),
+):
+    command = FsckCommand()
+    raise typer.Exit(
+        command.execute(jobs=jobs, connectivity=connectivity, show_progress=progress)
+    )
+
+
+@app.command()
+def gc(
+    prune: str = typer.Option("2.weeks.ago", "--prune"),
+    window: int = typer.Option(10, "--window"),
+    depth: int = typer.Option(50, "--depth"),
+):
+    command = GcCommand()
+    command.execute(prune_expire=prune, window=window, depth=depth)
+
+
+@app.command()
+def repack(
+    window: int = typer.Option(10, "--window"),
+    depth: int = typer.Option(50, "--depth"),
+    geometric: int | None = typer.Option(None, "--geometric"),
+    write_midx: bool = typer.Option(True, "--write-midx/--no-write-midx"),
+    write_bitmap: bool = typer.Option(True, "--write-bitmap/--no-write-bitmap"),
+):
+    if geometric is not None:
+        # 小さい pack だけをまとめ、multi-pack-index と bitmap を差分で更新する
+        command = RepackCommand()
+        command.execute(
+            geometric,
+            window=window,
+            depth=depth,
+            write_midx=write_midx,
+            write_bitmap=write_bitmap,
+        )
+        return
+    # 到達不能な object は消さずに残す（git repack -A -d 相当）
+    command = GcCommand()
+    command.execute(prune_expire="never", window=window, depth=depth)
+
+
+@app.command("pack-refs")
+def pack_refs(
+    all_refs: bool = typer.Option(False, "--all"),
+    prune: bool = typer.Option(True, "--prune/--no-prune"),
+):
+    command = PackRefsCommand()
+    command.execute(all_refs=all_refs, prune=prune)
+
+
+@sparse_checkout_app.command("set")
+def sparse_checkout_set(dirs: list[str]):
+    command = SparseCheckoutCommand()
+    command.execute("set", dirs)
+
+
+@sparse_checkout_app.command("list")
+def sparse_checkout_list():
+    command = SparseCheckoutCommand()
+    command.execute("list")
+
+
+@sparse_checkout_app.command("disable")
+def sparse_checkout_disable():
+    command = SparseCheckoutCommand()
+    command.execute("disable")
+
+
+@commit_graph_app.command("write")
+def commit_graph_write(
+    changed_paths: bool | None = typer.Option(
+        None, "--changed-paths/--no-changed-paths"
+    ),
+):
+    command = CommitGraphCommand()
+    command.execute(changed_paths=changed_paths)
+
+
+@bitmap_app.command("write")
+def bitmap_write(interval: int = typer.Option(100, "--interval")):
+    command = BitmapCommand()
+    command.execute(interval=interval)
+
+
 def main():
     app()
 
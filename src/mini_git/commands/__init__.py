@@ -1,8 +1,58 @@
 # commands/__init__.py
 from mini_git.commands.add import AddCommand
+from mini_git.commands.archive import ArchiveCommand
+from mini_git.commands.bitmap import BitmapCommand
+from mini_git.commands.blame import BlameCommand
+from mini_git.commands.checkout import CheckoutCommand
+from mini_git.commands.clone import CloneCommand
+from mini_git.commands.commit import CommitCommand
+from mini_git.commands.commit_graph import CommitGraphCommand
+from mini_git.commands.compression_bench import CompressionBenchCommand
+from mini_git.commands.diff import DiffCommand
+from mini_git.commands.fetch import FetchCommand
+from mini_git.commands.fsck import FsckCommand
+from mini_git.commands.gc import GcCommand
+from mini_git.commands.grep import GrepCommand
 from mini_git.commands.init import InitCommand
+from mini_git.commands.log import LogCommand
+from mini_git.commands.merge import MergeCommand
+from mini_git.commands.merge_base import MergeBaseCommand
+from mini_git.commands.merge_tree import MergeTreeCommand
+from mini_git.commands.pack_refs import PackRefsCommand
+from mini_git.commands.push import PushCommand
+from mini_git.commands.reflog import ReflogCommand
+from mini_git.commands.repack import RepackCommand
+from mini_git.commands.restore import RestoreCommand
+from mini_git.commands.rev_list import RevListCommand
+from mini_git.commands.sparse_checkout import SparseCheckoutCommand
+from mini_git.commands.write_tree import WriteTreeCommand
 
 __all__ = [
     "AddCommand",
+    "ArchiveCommand",
+    "BitmapCommand",
+    "BlameCommand",
+    "CheckoutCommand",
+    "CloneCommand",
+    "CommitCommand",
+    "CommitGraphCommand",
+    "CompressionBenchCommand",
+    "DiffCommand",
+    "FetchCommand",
+    "FsckCommand",
+    "GcCommand",
+    "GrepCommand",
     "InitCommand",
+    "LogCommand",
+    "MergeCommand",
+    "MergeBaseCommand",
+    "MergeTreeCommand",
+    "PackRefsCommand",
+    "PushCommand",
+    "ReflogCommand",
+    "RepackCommand",
+    "RestoreCommand",
+    "RevListCommand",
+    "SparseCheckoutCommand",
+    "WriteTreeCommand",
 ]
@@ -1,4 +1,4 @@
-from mini_git.services import RepoContext, AddService
+from mini_git.services import RepoContext, AddService, SparseService
 
 
 class AddCommand:
@@ -13,4 +13,15 @@ class AddCommand:
         # ファイルの親ディレクトリからリポジトリを探索
         repo_context = RepoContext.require_repo(path.parent if path.is_file() else path)
         add_service = AddService(repo_context.object_store)
-        add_service.add_object(path)
+        sparse_service = SparseService(
+            repo_context.index_store, repo_context.tree_store, repo_context.sparse_store
+        )
+        if path.is_dir():
+            add_service.add_directory(
+                path, repo_context.worktree, repo_context.index_store, sparse_service
+            )
+            return
+        oid = add_service.add_object(path)
+        add_service.stage(
+            path, oid, repo_context.worktree, repo_context.index_store, sparse_service
+        )
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+from mini_git.services import ArchiveService, RepoContext, RevParseService
+from mini_git.services.archive_service import format_for
+from mini_git.types import ObjectType
+
+
+class ArchiveCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        tree_ish: str,
+        fmt: str | None = None,
+        output: Path | None = None,
+        prefix: str = "",
+        jobs: int | None = None,
+    ) -> int:
+        repo_context = RepoContext.require_repo(Path.cwd())
+        rev_parse = RevParseService(repo_context.ref_store, repo_context.object_store)
+        # annotated tag は指す先の commit まで辿る（git archive と同じ）
+        oid, typ = rev_parse.peel(rev_parse.resolve(tree_ish))
+        tree = rev_parse.peel_to_tree(oid)
+        # 時刻は commit の committer 時刻に固定し、同じ commit からは同じ archive を
+        # 作る。tree を直接渡されたときは 0（zip では 1980-01-01）にする
+        commit_oid = None
+        mtime = 0
+        if typ == ObjectType.COMMIT.value:
+            commit_oid = oid
+            mtime = repo_context.commit_store.read_lazy(oid).commit_time
+        fmt = fmt or (output is not None and format_for(output.name)) or "tar"
+        service = ArchiveService(
+            repo_context.object_store, repo_context.tree_store, workers=jobs
+        )
+        if output is None:
+            service.write(tree, sys.stdout.buffer, fmt, prefix, mtime, commit_oid)
+            sys.stdout.buffer.flush()
+            return 0
+        with open(output, "wb") as out:
+            service.write(tree, out, fmt, prefix, mtime, commit_oid)
+        return 0
@@ -0,0 +1,16 @@
+from pathlib import Path
+from mini_git.services import CommitService, ReachabilityService, RepoContext
+from mini_git.services.reachability_service import BITMAP_INTERVAL
+
+
+class BitmapCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, interval: int = BITMAP_INTERVAL):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        service = ReachabilityService(
+            CommitService(repo_context.commit_store, repo_context.ref_store)
+        )
+        objects, bitmaps = service.write_bitmaps(interval=interval)
+        print(f"Wrote {bitmaps} bitmaps covering {objects} objects")
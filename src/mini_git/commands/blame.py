@@ -0,0 +1,56 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from mini_git.services import BlameService, CommitService, RepoContext, RevParseService
+from mini_git.storage.blame_cache import BlameCache
+from mini_git.utils.line_diff import split_lines
+
+
+def _author(ident: str) -> tuple[str, str]:
+    # "Name <email> <epoch> <tz>" から名前と git blame の iso 形式の日時を取り出す
+    rest, stamp, tz = ident.rsplit(" ", 2)
+    sign = -1 if tz.startswith("-") else 1
+    offset = timedelta(hours=int(tz[1:3]), minutes=int(tz[3:5])) * sign
+    t = datetime.fromtimestamp(int(stamp), timezone(offset))
+    return rest.rsplit(" <", 1)[0], f"{t:%Y-%m-%d %H:%M:%S} {tz}"
+
+
+class BlameCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, path: str, rev: str = "HEAD", use_cache: bool = True):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        rev_parse = RevParseService(repo_context.ref_store, repo_context.object_store)
+        commit_service = CommitService(
+            repo_context.commit_store, repo_context.ref_store
+        )
+        cache = BlameCache(repo_context.git_path) if use_cache else None
+        target = (Path.cwd() / path).resolve().relative_to(repo_context.worktree)
+        service = BlameService(commit_service, cache)
+        oid = rev_parse.resolve(rev)
+        hunks = service.blame(oid, target.as_posix())
+
+        blob = repo_context.tree_store.lookup_path(
+            commit_service.info(oid).tree, target.as_posix()
+        )
+        if blob is None:
+            raise RuntimeError(f"no such path '{target.as_posix()}' in {oid}")
+        lines = split_lines(repo_context.object_store.read(blob.oid)[1])
+        authors = {
+            h.commit: _author(repo_context.commit_store.read_commit(h.commit).author)
+            for h in hunks
+        }
+        name_width = max((len(a[0]) for a in authors.values()), default=0)
+        digits = len(str(len(lines)))
+        out = sys.stdout.buffer
+        for h in hunks:
+            # 親の無い commit は git と同じく境界として ^ を付ける
+            root = not commit_service.info(h.commit).parents
+            label = "^" + h.commit[:7] if root else h.commit[:8]
+            name, date = authors[h.commit]
+            for i in range(h.final_start, h.final_start + h.num_lines):
+                line = lines[i] if lines[i].endswith(b"\n") else lines[i] + b"\n"
+                prefix = f"{label} ({name:<{name_width}} {date} {i + 1:>{digits}}) "
+                out.write(prefix.encode() + line)
+        out.flush()
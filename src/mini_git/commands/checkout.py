@@ -0,0 +1,39 @@
+from pathlib import Path
+from mini_git.services import CheckoutService, RepoContext, RevParseService
+from mini_git.types import ObjectType
+
+
+class CheckoutCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, target: str, force: bool = False, jobs: int | None = None):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        rev_parse = RevParseService(repo_context.ref_store, repo_context.object_store)
+        oid = rev_parse.resolve(target)
+        tree_oid = rev_parse.peel_to_tree(oid)
+        service = CheckoutService(
+            repo_context.worktree,
+            repo_context.index_store,
+            repo_context.tree_store,
+            repo_context.sparse_store,
+            workers=jobs or repo_context.config.get_int("checkout.workers"),
+        )
+        result = service.checkout_tree(tree_oid, force=force)
+
+        ref_store = repo_context.ref_store
+        current = ref_store.symbolic_target("HEAD")
+        moving_from = (
+            current.removeprefix("refs/heads/")
+            if current is not None
+            else (ref_store.resolve("HEAD") or "HEAD")
+        )
+        reflog_message = f"checkout: moving from {moving_from} to {target}"
+        name = ref_store.dwim(target)
+        if name is not None and name.startswith("refs/heads/"):
+            ref_store.set_symbolic("HEAD", name, reflog_message)
+            print(f"Switched to branch '{name.removeprefix('refs/heads/')}'")
+        elif repo_context.object_store.stat(oid)[0] == ObjectType.COMMIT.value:
+            ref_store.update("HEAD", oid, message=reflog_message)
+            print(f"HEAD is now at {oid[:7]}")
+        print(f"Updated {result.written} files, removed {result.removed} files")
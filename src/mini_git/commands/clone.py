@@ -0,0 +1,26 @@
+from pathlib import Path
+from mini_git.services import CloneService
+
+
+class CloneCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        source: Path,
+        directory: Path | None = None,
+        hardlinks: bool = True,
+        jobs: int | None = None,
+        shared: bool = False,
+    ):
+        if directory is None:
+            directory = Path.cwd() / source.resolve().name.removesuffix(".git")
+        print(f"Cloning into '{directory.name}'...")
+        service = CloneService(hardlinks=hardlinks, workers=jobs, shared=shared)
+        result = service.clone(source, directory)
+        print(
+            f"Objects: {result.linked} hardlinked, {result.reflinked} reflinked,"
+            f" {result.copied} copied"
+        )
+        print(f"Checked out {result.checked_out} files")
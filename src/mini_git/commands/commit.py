@@ -0,0 +1,24 @@
+from pathlib import Path
+from mini_git.services import CommitService, RepoContext
+
+
+class CommitCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, message: str):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        # tree は batch で書き、ref を更新する前に 1 回だけ同期する
+        with repo_context.object_store.batch():
+            tree = repo_context.tree_store.write_index(repo_context.index_store)
+        service = CommitService(
+            repo_context.commit_store, repo_context.ref_store, repo_context.config
+        )
+        ref_store = repo_context.ref_store
+        root = ref_store.resolve("HEAD") is None
+        oid = service.commit(tree, message)
+        branch = (ref_store.symbolic_target("HEAD") or "HEAD").removeprefix(
+            "refs/heads/"
+        )
+        label = f"{branch} (root-commit)" if root else branch
+        print(f"[{label} {oid[:7]}] {message.splitlines()[0] if message else ''}")
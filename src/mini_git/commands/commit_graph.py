@@ -0,0 +1,13 @@
+from pathlib import Path
+from mini_git.services import CommitService, RepoContext
+
+
+class CommitGraphCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, changed_paths: bool | None = None):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        service = CommitService(repo_context.commit_store, repo_context.ref_store)
+        count = service.write_graph(changed_paths=changed_paths)
+        print(f"Wrote commit-graph with {count} commits")
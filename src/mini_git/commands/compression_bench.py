@@ -0,0 +1,42 @@
+from pathlib import Path
+from mini_git.services import CompressionService, RepoContext
+from mini_git.services.compression_service import (
+    BENCH_LEVELS,
+    DEFAULT_SAMPLE_OBJECTS,
+    LevelStats,
+)
+
+
+def _table(title: str, stats: list[LevelStats]) -> None:
+    print(f"{title} ({stats[0].objects} objects, {stats[0].raw_bytes} bytes)")
+    print("  level   MiB/s   ratio")
+    for s in stats:
+        print(f"  {s.level:>5} {s.throughput:>7.1f} {s.ratio:>7.1%}")
+
+
+class CompressionBenchCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        levels: list[int] | None = None,
+        sample: int = DEFAULT_SAMPLE_OBJECTS,
+        apply: bool = False,
+    ):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        service = CompressionService(repo_context.object_store)
+        result = service.benchmark(levels or BENCH_LEVELS, max_objects=sample)
+        if not result.overall or not result.overall[0].objects:
+            print("No objects to measure")
+            return
+        _table("All objects", result.overall)
+        if result.media:
+            _table("Already-compressed blobs", result.media)
+        print("Suggested settings:")
+        for key, value in result.suggestions.items():
+            print(f"  {key} = {value}")
+            if apply:
+                repo_context.config.set(key, value)
+        if apply:
+            print("Applied to .git/config")
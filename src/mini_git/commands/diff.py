@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+from mini_git.services import DiffService, RepoContext, RevParseService
+
+
+class DiffCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        old: str,
+        new: str,
+        paths: list[str] | None = None,
+        name_only: bool = False,
+        name_status: bool = False,
+        algorithm: str = "myers",
+        context: int = 3,
+        find_renames: bool = False,
+        find_copies: bool = False,
+        min_score: int = 50,
+        rename_limit: int = 1000,
+    ):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        rev_parse = RevParseService(repo_context.ref_store, repo_context.object_store)
+        service = DiffService(repo_context.tree_store)
+        entries = service.diff_trees(
+            rev_parse.resolve_tree(old), rev_parse.resolve_tree(new), paths
+        )
+        if find_renames:
+            entries = service.find_renames(
+                entries, find_copies, min_score, rename_limit
+            )
+        if not (name_only or name_status):
+            out = sys.stdout.buffer
+            for line in service.iter_patch(entries, algorithm, context):
+                out.write(line)
+            out.flush()
+            return
+        for d in entries:
+            if name_only:
+                print(d.path)
+            elif d.old_path is not None:
+                print(f"{d.status}{d.score:03d}\t{d.old_path}\t{d.path}")
+            else:
+                print(f"{d.status}\t{d.path}")
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+from mini_git.services import RepoContext, TransportService
+from mini_git.services.gc_service import DEFAULT_DEPTH, DEFAULT_WINDOW
+from mini_git.services.transport_service import RefUpdate, TransportResult
+
+
+def _short(ref: str) -> str:
+    for prefix in ("refs/heads/", "refs/tags/", "refs/remotes/"):
+        if ref.startswith(prefix):
+            return ref[len(prefix) :]
+    return ref
+
+
+def format_update(u: RefUpdate) -> str:
+    # git fetch / push と同じ 1 行の表示
+    src, dst = _short(u.src) or "(delete)", _short(u.dst)
+    kind = "tag" if u.dst.startswith("refs/tags/") else "branch"
+    # 更新で書き換えたものは old / new の両方がある
+    old, new = (u.old or "")[:7], (u.new or "")[:7]
+    if u.status == "new":
+        return f" * [new {kind}]{' ' * max(1, 10 - len(kind))}{src} -> {dst}"
+    if u.status == "deleted":
+        return f" - [deleted]         {dst}"
+    if u.status == "fast-forward":
+        return f"   {old}..{new}  {src} -> {dst}"
+    if u.status == "forced":
+        return f" + {old}...{new} {src} -> {dst}  (forced update)"
+    if u.status == "rejected":
+        return f" ! [rejected]        {src} -> {dst} ({u.reason})"
+    return f" = [up to date]      {src} -> {dst}"
+
+
+def report(header: str, result: TransportResult) -> int:
+    # 何も変わらなければ git と同じく何も出さない
+    changed = [u for u in result.updates if u.status != "up to date"]
+    stats = result.stats
+    if stats.objects:
+        print(
+            f"Transferred {stats.objects} objects ({stats.deltas} deltas,"
+            f" {stats.thin_bases} thin bases), {stats.bytes} bytes;"
+            f" negotiated {stats.haves} haves, {stats.common} common",
+            file=sys.stderr,
+        )
+    if changed:
+        print(f"{header} {result.url}", file=sys.stderr)
+        for u in changed:
+            print(format_update(u), file=sys.stderr)
+    return 1 if any(u.status == "rejected" for u in result.updates) else 0
+
+
+class FetchCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        remote: str = "origin",
+        refspecs: list[str] | None = None,
+        window: int = DEFAULT_WINDOW,
+        depth: int = DEFAULT_DEPTH,
+    ) -> int:
+        repo_context = RepoContext.require_repo(Path.cwd())
+        service = TransportService(repo_context, window, depth)
+        return report("From", service.fetch(remote, refspecs))
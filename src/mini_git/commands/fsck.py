@@ -0,0 +1,75 @@
+import sys
+import time
+from pathlib import Path
+from mini_git.services import CommitService, FsckService, RepoContext
+from mini_git.services.fsck_service import FsckProgress
+
+# 進捗の表示間隔（秒）
+PROGRESS_INTERVAL = 0.5
+
+
+def _rate(progress: FsckProgress) -> str:
+    elapsed = max(progress.elapsed, 1e-9)
+    return (
+        f"{progress.checked / elapsed:,.0f} objects/s,"
+        f" {progress.bytes / elapsed / (1 << 20):.1f} MiB/s"
+    )
+
+
+class FsckCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        jobs: int | None = None,
+        connectivity: bool = True,
+        show_progress: bool | None = None,
+    ) -> int:
+        repo_context = RepoContext.require_repo(Path.cwd())
+        commit_service = CommitService(
+            repo_context.commit_store, repo_context.ref_store, repo_context.config
+        )
+        service = FsckService(commit_service, repo_context.index_store, workers=jobs)
+        # git と同じく端末に出すときだけ進捗を表示する
+        if show_progress is None:
+            show_progress = sys.stderr.isatty()
+        last = 0.0
+
+        def report(progress: FsckProgress) -> None:
+            nonlocal last
+            now = time.perf_counter()
+            if now - last < PROGRESS_INTERVAL and progress.checked < progress.total:
+                return
+            last = now
+            percent = progress.checked * 100 // max(progress.total, 1)
+            sys.stderr.write(
+                f"\rChecking objects: {percent}% ({progress.checked}/{progress.total})"
+                f", {_rate(progress)}"
+            )
+            sys.stderr.flush()
+
+        result = service.fsck(
+            report if show_progress else None, connectivity=connectivity
+        )
+        if show_progress:
+            sys.stderr.write(", done.\n")
+        for issue in result.issues:
+            print(issue.message)
+        t = result.timings
+        counts = ", ".join(f"{n} {typ}s" for typ, n in sorted(result.counts.items()))
+        summary = FsckProgress(
+            result.checked, result.checked, result.bytes, t["objects"]
+        )
+        print(
+            f"Checked {result.checked} objects ({counts}) in {t['objects']:.2f}s"
+            f" ({_rate(summary)})",
+            file=sys.stderr,
+        )
+        if connectivity:
+            print(
+                f"Reachable from refs: {result.reachable} objects"
+                f" ({t['connectivity']:.2f}s)",
+                file=sys.stderr,
+            )
+        return 1 if result.issues else 0
@@ -0,0 +1,46 @@
+from pathlib import Path
+from mini_git.services import CommitService, GcService, RepoContext
+from mini_git.services.gc_service import DEFAULT_DEPTH, DEFAULT_WINDOW
+from mini_git.storage.blame_cache import BlameCache
+
+
+def _mib(size: int) -> str:
+    return f"{size / (1 << 20):.2f} MiB"
+
+
+class GcCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        prune_expire: str = "2.weeks.ago",
+        window: int = DEFAULT_WINDOW,
+        depth: int = DEFAULT_DEPTH,
+    ):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        commit_service = CommitService(
+            repo_context.commit_store, repo_context.ref_store, repo_context.config
+        )
+        service = GcService(
+            commit_service,
+            repo_context.index_store,
+            BlameCache(repo_context.git_path),
+        )
+        result = service.gc(prune_expire, window=window, depth=depth)
+        t = result.timings
+        print(f"Enumerating objects: {result.packed}, done ({t['enumerate']:.2f}s)")
+        print(
+            f"Writing pack: {result.packed} objects, {result.deltas} deltas"
+            f" ({t['pack']:.2f}s)"
+        )
+        print(
+            f"Pruned {result.pruned} unreachable objects,"
+            f" loosened {result.loosened} ({t['prune']:.2f}s)"
+        )
+        saved = result.size_before - result.size_after
+        ratio = saved / result.size_before if result.size_before else 0.0
+        print(
+            f"Object directory: {_mib(result.size_before)} -> "
+            f"{_mib(result.size_after)} ({ratio:.0%} smaller)"
+        )
@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+from mini_git.services import GrepService, RepoContext, RevParseService
+from mini_git.services.grep_service import GrepPattern, display_path
+
+
+class GrepCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        pattern: str,
+        args: list[str] | None = None,
+        ignore_case: bool = False,
+        fixed: bool = False,
+        line_number: bool = False,
+        files_with_matches: bool = False,
+        count: bool = False,
+        cached: bool = False,
+        jobs: int | None = None,
+    ) -> int:
+        repo_context = RepoContext.require_repo(Path.cwd())
+        # worktree 内での cwd の位置。pathspec の既定にし、出力もここからの相対にする
+        cwd = Path.cwd().resolve()
+        base = ""
+        if cwd.is_relative_to(repo_context.worktree):
+            base = cwd.relative_to(repo_context.worktree).as_posix()
+            base = "" if base == "." else base
+        rev_parse = RevParseService(repo_context.ref_store, repo_context.object_store)
+        # 最初の引数が worktree に無く revision として解決できれば tree-ish とみなす
+        rev: str | None = None
+        tree: str | None = None
+        paths: list[str] = []
+        for arg in args or []:
+            target = (Path.cwd() / arg).resolve()
+            if rev is None and not paths and not target.exists():
+                try:
+                    tree = rev_parse.resolve_tree(arg)
+                    rev = arg
+                    continue
+                except RuntimeError:
+                    pass
+            rel = target.relative_to(repo_context.worktree).as_posix()
+            paths.append("" if rel == "." else rel)
+        # git grep と同じく、pathspec が無ければ cwd の下だけを探す
+        if not paths and base:
+            paths = [base]
+
+        service = GrepService(
+            repo_context.object_store,
+            repo_context.tree_store,
+            repo_context.worktree,
+            workers=jobs,
+        )
+        if tree is not None:
+            targets = service.tree_targets(tree, paths or None)
+        else:
+            targets = service.index_targets(
+                repo_context.index_store, paths or None, cached=cached
+            )
+        # git grep と同じく revision を検索したときは "<rev>:" を前に付ける
+        label = f"{rev}:" if rev is not None else ""
+        out = sys.stdout.buffer
+        found = False
+        for path, matches in service.grep(
+            GrepPattern(pattern, ignore_case, fixed), targets
+        ):
+            found = True
+            name = (label + display_path(path, base)).encode("utf-8", "surrogateescape")
+            if files_with_matches:
+                out.write(name + b"\n")
+            elif count:
+                out.write(name + b":" + str(len(matches)).encode() + b"\n")
+            else:
+                for m in matches:
+                    number = f"{m.line_no}:".encode() if line_number else b""
+                    out.write(name + b":" + number + m.line + b"\n")
+        out.flush()
+        return 0 if found else 1
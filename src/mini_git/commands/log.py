@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+from mini_git.services import CommitService, LogService, RepoContext, RevParseService
+from mini_git.services.commit_service import BloomStats
+from mini_git.services.log_service import parse_format
+
+
+class LogCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        args: list[str] | None = None,
+        bloom_stats: bool = False,
+        fmt: str = "medium",
+        max_count: int | None = None,
+    ):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        rev_parse = RevParseService(repo_context.ref_store, repo_context.object_store)
+        # worktree に存在せず revision として解決できる引数だけを revision とみなす
+        revs: list[str] = []
+        paths: list[str] = []
+        for arg in args or []:
+            target = (Path.cwd() / arg).resolve()
+            if not paths and not target.exists():
+                try:
+                    revs.append(rev_parse.resolve(arg))
+                    continue
+                except RuntimeError:
+                    pass
+            paths.append(target.relative_to(repo_context.worktree).as_posix())
+        if not revs:
+            revs = [rev_parse.resolve("HEAD")]
+
+        service = CommitService(repo_context.commit_store, repo_context.ref_store)
+        stats = BloomStats()
+        fmt, between, end = parse_format(fmt)
+        entries = LogService(service).iter_log(revs, fmt, max_count, paths, stats)
+        for i, entry in enumerate(entries):
+            sys.stdout.write((between if i else "") + entry + end)
+            if i == 0:
+                # 最初の 1 件はすぐに見えるようにする（以降はバッファに任せる）
+                sys.stdout.flush()
+        if bloom_stats and paths:
+            print(
+                f"bloom: {stats.definitely_not} definitely not, {stats.maybe} maybe,"
+                f" {stats.false_positive} false positive,"
+                f" {stats.filter_not_present} without filter"
+                f" (false positive rate {stats.false_positive_rate:.2%})",
+                file=sys.stderr,
+            )
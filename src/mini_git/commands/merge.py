@@ -0,0 +1,70 @@
+from pathlib import Path
+from mini_git.services import (
+    CheckoutService,
+    CommitService,
+    MergeService,
+    RepoContext,
+    RevParseService,
+)
+
+
+class MergeCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, rev: str, message: str | None = None) -> int:
+        repo_context = RepoContext.require_repo(Path.cwd())
+        ref_store = repo_context.ref_store
+        rev_parse = RevParseService(ref_store, repo_context.object_store)
+        commit_service = CommitService(
+            repo_context.commit_store, ref_store, repo_context.config
+        )
+        head = ref_store.resolve("HEAD")
+        if head is None:
+            raise RuntimeError("cannot merge into an empty branch")
+        theirs = rev_parse.resolve(rev)
+        if commit_service.is_ancestor(theirs, head):
+            print("Already up to date.")
+            return 0
+
+        index_tree = repo_context.tree_store.write_index(repo_context.index_store)
+        if index_tree != commit_service.info(head).tree:
+            raise RuntimeError(
+                "Your local changes would be overwritten by merge."
+                " Please commit them before you merge."
+            )
+        checkout = CheckoutService(
+            repo_context.worktree,
+            repo_context.index_store,
+            repo_context.tree_store,
+            repo_context.sparse_store,
+            workers=repo_context.config.get_int("checkout.workers"),
+        )
+
+        if commit_service.is_ancestor(head, theirs):
+            checkout.checkout_tree(commit_service.info(theirs).tree)
+            ref_store.update(
+                ref_store.symbolic_target("HEAD") or "HEAD",
+                theirs,
+                message=f"merge {rev}: Fast-forward",
+            )
+            print(f"Updating {head[:7]}..{theirs[:7]}\nFast-forward")
+            return 0
+
+        result = MergeService(commit_service).merge_commits(head, theirs, ("HEAD", rev))
+        if not result.clean:
+            # 衝突した状態は worktree に書かず、何も変えずに終わる
+            for c in result.conflicts:
+                print(f"CONFLICT ({c.kind}): {c.message}")
+            print("Automatic merge failed; no changes were made.")
+            return 1
+        checkout.checkout_tree(result.tree)
+        kind = "branch" if ref_store.dwim(rev) else "commit"
+        oid = commit_service.commit(
+            result.tree,
+            message or f"Merge {kind} '{rev}'",
+            (theirs,),
+            f"merge {rev}: Merge made by the three-way strategy.",
+        )
+        print(f"Merge made by a three-way merge: {oid[:7]}")
+        return 0
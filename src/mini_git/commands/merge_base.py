@@ -0,0 +1,22 @@
+from pathlib import Path
+from mini_git.services import CommitService, RepoContext, RevParseService
+
+
+class MergeBaseCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, first: str, second: str, is_ancestor: bool = False) -> int:
+        # git merge-base と同じく結果を終了コードでも返す
+        repo_context = RepoContext.require_repo(Path.cwd())
+        rev_parse = RevParseService(repo_context.ref_store, repo_context.object_store)
+        a = rev_parse.resolve(first)
+        b = rev_parse.resolve(second)
+        service = CommitService(repo_context.commit_store, repo_context.ref_store)
+        if is_ancestor:
+            return 0 if service.is_ancestor(a, b) else 1
+        bases = service.merge_bases(a, b)
+        if not bases:
+            return 1
+        print(bases[0])
+        return 0
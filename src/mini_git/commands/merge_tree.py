@@ -0,0 +1,34 @@
+from pathlib import Path
+from mini_git.services import CommitService, MergeService, RepoContext, RevParseService
+
+
+class MergeTreeCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, ours: str, theirs: str, merge_base: str | None = None) -> int:
+        # git merge-tree --write-tree と同じく、worktree と index には触れずに
+        # 結果の tree を書いて oid を出す。衝突があれば終了コード 1
+        repo_context = RepoContext.require_repo(Path.cwd())
+        rev_parse = RevParseService(repo_context.ref_store, repo_context.object_store)
+        service = MergeService(
+            CommitService(repo_context.commit_store, repo_context.ref_store)
+        )
+        a, b = rev_parse.resolve(ours), rev_parse.resolve(theirs)
+        labels = (ours, theirs)
+        if merge_base is not None:
+            result = service.merge_trees(
+                rev_parse.resolve_tree(merge_base),
+                rev_parse.resolve_tree(ours),
+                rev_parse.resolve_tree(theirs),
+                labels,
+            )
+        else:
+            result = service.merge_commits(a, b, labels)
+        print(result.tree)
+        if result.clean:
+            return 0
+        print()
+        for c in result.conflicts:
+            print(f"CONFLICT ({c.kind}): {c.message}")
+        return 1
@@ -0,0 +1,12 @@
+from pathlib import Path
+from mini_git.services import RepoContext
+
+
+class PackRefsCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, all_refs: bool = False, prune: bool = True):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        count = repo_context.ref_store.pack_refs(all_refs=all_refs, prune=prune)
+        print(f"Packed {count} refs")
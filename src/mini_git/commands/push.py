@@ -0,0 +1,21 @@
+from pathlib import Path
+from mini_git.commands.fetch import report
+from mini_git.services import RepoContext, TransportService
+from mini_git.services.gc_service import DEFAULT_DEPTH, DEFAULT_WINDOW
+
+
+class PushCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        remote: str = "origin",
+        refspecs: list[str] | None = None,
+        force: bool = False,
+        window: int = DEFAULT_WINDOW,
+        depth: int = DEFAULT_DEPTH,
+    ) -> int:
+        repo_context = RepoContext.require_repo(Path.cwd())
+        service = TransportService(repo_context, window, depth)
+        return report("To", service.push(remote, refspecs, force=force))
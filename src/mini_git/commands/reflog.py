@@ -0,0 +1,19 @@
+from itertools import islice
+from pathlib import Path
+from mini_git.services import RepoContext
+
+
+class ReflogCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, ref: str = "HEAD", max_count: int | None = None) -> None:
+        repo_context = RepoContext.require_repo(Path.cwd())
+        ref_store = repo_context.ref_store
+        name = ref_store.dwim(ref) or ref
+        if not ref_store.reflog.path(name).is_file():
+            raise RuntimeError(f"no reflog for '{ref}'")
+        # 新しい順に末尾から読むので、-n で打ち切れば古い行は読まない
+        entries = ref_store.reflog.iter_reverse(name)
+        for i, entry in enumerate(islice(entries, max_count)):
+            print(f"{entry.new[:7]} {ref}@{{{i}}}: {entry.message}")
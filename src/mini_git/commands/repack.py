@@ -0,0 +1,50 @@
+import time
+from pathlib import Path
+from mini_git.services import (
+    CommitService,
+    GcService,
+    ReachabilityService,
+    RepoContext,
+)
+from mini_git.services.gc_service import DEFAULT_DEPTH, DEFAULT_WINDOW
+
+
+class RepackCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        factor: int,
+        window: int = DEFAULT_WINDOW,
+        depth: int = DEFAULT_DEPTH,
+        write_midx: bool = True,
+        write_bitmap: bool = True,
+    ):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        commit_service = CommitService(
+            repo_context.commit_store, repo_context.ref_store, repo_context.config
+        )
+        service = GcService(commit_service, repo_context.index_store)
+        result = service.geometric_repack(factor, window, depth, midx=write_midx)
+        t = result.timings
+        print(
+            f"Rolled up {result.rolled} packs, kept {result.kept}"
+            f" ({t['enumerate']:.2f}s)"
+        )
+        print(
+            f"Writing pack: {result.packed} objects, {result.deltas} deltas"
+            f" ({t['pack']:.2f}s)"
+        )
+        if write_midx:
+            print(f"Multi-pack-index: {result.midx_objects} objects ({t['midx']:.2f}s)")
+        if write_bitmap:
+            # 既にある bitmap は残し、新しい commit の分だけ足す
+            start = time.perf_counter()
+            objects, bitmaps = ReachabilityService(commit_service).write_bitmaps(
+                incremental=True
+            )
+            print(
+                f"Bitmaps: {bitmaps} commits covering {objects} objects"
+                f" ({time.perf_counter() - start:.2f}s)"
+            )
@@ -0,0 +1,34 @@
+from pathlib import Path
+from mini_git.services import CheckoutService, RepoContext, RevParseService
+
+
+class RestoreCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        paths: list[Path] | None = None,
+        source: str | None = None,
+        jobs: int | None = None,
+    ):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        source_tree = None
+        if source is not None:
+            rev_parse = RevParseService(
+                repo_context.ref_store, repo_context.object_store
+            )
+            source_tree = rev_parse.resolve_tree(source)
+        pathspecs = [
+            (Path.cwd() / p).resolve().relative_to(repo_context.worktree)
+            for p in paths or []
+        ]
+        service = CheckoutService(
+            repo_context.worktree,
+            repo_context.index_store,
+            repo_context.tree_store,
+            repo_context.sparse_store,
+            workers=jobs or repo_context.config.get_int("checkout.workers"),
+        )
+        count = service.restore(pathspecs, source_tree)
+        print(f"Restored {count} files")
@@ -0,0 +1,39 @@
+from pathlib import Path
+from mini_git.services import (
+    CommitService,
+    ReachabilityService,
+    RepoContext,
+    RevParseService,
+)
+
+
+class RevListCommand:
+    def __init__(self):
+        pass
+
+    def execute(
+        self,
+        revs: list[str],
+        objects: bool = False,
+        count: bool = False,
+        use_bitmap_index: bool = True,
+    ):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        rev_parse = RevParseService(repo_context.ref_store, repo_context.object_store)
+        tips = [rev_parse.resolve(rev) for rev in revs]
+        service = CommitService(repo_context.commit_store, repo_context.ref_store)
+        if objects:
+            reachable = ReachabilityService(service).reachable(
+                tips, use_bitmaps=use_bitmap_index
+            )
+            if count:
+                print(len(reachable))
+            else:
+                for oid in sorted(reachable.oids()):
+                    print(oid)
+            return
+        if count:
+            print(sum(1 for _ in service.walk(tips)))
+        else:
+            for oid in service.walk(tips):
+                print(oid)
@@ -0,0 +1,28 @@
+from pathlib import Path
+from mini_git.services import RepoContext, SparseService
+
+
+class SparseCheckoutCommand:
+    def __init__(self):
+        pass
+
+    def execute(self, action: str, dirs: list[str] | None = None):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        sparse_store = repo_context.sparse_store
+        service = SparseService(
+            repo_context.index_store, repo_context.tree_store, sparse_store
+        )
+        if action == "list":
+            for d in sparse_store.directories():
+                print(d)
+            return
+        if action == "set":
+            sparse_store.set(dirs or [])
+        elif action == "disable":
+            sparse_store.disable()
+        else:
+            raise ValueError(f"Unknown sparse-checkout action: {action}")
+        written, removed = service.apply(
+            repo_context.worktree, repo_context.object_store
+        )
+        print(f"Updated worktree: {written} files written, {removed} files removed")
@@ -0,0 +1,12 @@
+from pathlib import Path
+from mini_git.services import RepoContext
+
+
+class WriteTreeCommand:
+    def __init__(self):
+        pass
+
+    def execute(self):
+        repo_context = RepoContext.require_repo(Path.cwd())
+        oid = repo_context.tree_store.write_index(repo_context.index_store)
+        print(oid)
@@ -1,12 +1,44 @@
 from pydantic import BaseModel, ConfigDict
 from pathlib import Path
+from typing import NamedTuple
 
 
 class IndexEntry(BaseModel):
     path: Path
     mode: int
     oid: str
+    # worktree ファイルの stat 情報（変更検出で再ハッシュを省くため）
+    mtime_ns: int | None = None
+    size: int | None = None
 
     model_config = ConfigDict(
         frozen=True,
     )
+
+
+# IndexEntry.mode と同じく 8 進表記をそのまま整数にした値
+TREE_MODE = 40000
+
+
+# tree の展開では大量に生成されるため、検証なしの軽量な NamedTuple にする
+class TreeEntry(NamedTuple):
+    name: str
+    mode: int
+    oid: str
+
+    @property
+    def is_tree(self) -> bool:
+        return self.mode == TREE_MODE
+
+
+class Commit(NamedTuple):
+    tree: str
+    parents: tuple[str, ...]
+    # "Name <email> <epoch> <tz>" 形式のまま保持する
+    author: str
+    committer: str
+    message: str
+
+    @property
+    def commit_time(self) -> int:
+        return int(self.committer.rsplit(" ", 2)[1])
@@ -1,4 +1,39 @@
 from .repo_context import RepoContext
 from .add_service import AddService
+from .archive_service import ArchiveService
+from .blame_service import BlameService
+from .checkout_service import CheckoutService
+from .clone_service import CloneService
+from .commit_service import CommitService
+from .compression_service import CompressionService
+from .diff_service import DiffService
+from .fsck_service import FsckService
+from .gc_service import GcService
+from .grep_service import GrepService
+from .log_service import LogService
+from .merge_service import MergeService
+from .reachability_service import ReachabilityService
+from .rev_parse_service import RevParseService
+from .sparse_service import SparseService
+from .transport_service import TransportService
 
-__all__ = ["RepoContext", "AddService"]
+__all__ = [
+    "RepoContext",
+    "AddService",
+    "ArchiveService",
+    "BlameService",
+    "CheckoutService",
+    "CloneService",
+    "CommitService",
+    "CompressionService",
+    "DiffService",
+    "FsckService",
+    "GcService",
+    "GrepService",
+    "LogService",
+    "MergeService",
+    "ReachabilityService",
+    "RevParseService",
+    "SparseService",
+    "TransportService",
+]
@@ -1,4 +1,8 @@
+import os
+from mini_git.models import IndexEntry, TREE_MODE
+from mini_git.services.sparse_service import SparseService
 from mini_git.storage import ObjectStore
+from mini_git.storage.index_store import IndexStore
 from pathlib import Path
 from mini_git.types import ObjectType
 
@@ -11,3 +15,78 @@ class AddService:
         data = path.read_bytes()
         object_id = self.object_store.write(ObjectType.BLOB, data)
         return object_id
+
+    @staticmethod
+    def _entry(path: Path, rel: Path, oid: str) -> IndexEntry:
+        st = path.stat()
+        return IndexEntry(
+            path=rel,
+            mode=100755 if st.st_mode & 0o111 else 100644,
+            oid=oid,
+            mtime_ns=st.st_mtime_ns,
+            size=st.st_size,
+        )
+
+    def stage(
+        self,
+        path: Path,
+        oid: str,
+        worktree: Path,
+        index_store: IndexStore,
+        sparse_service: SparseService | None = None,
+    ) -> IndexEntry:
+        rel = path.resolve().relative_to(worktree)
+        # sparse ディレクトリ配下に追加する場合は、そのディレクトリだけ先に展開する
+        if sparse_service is not None and index_store.is_sparse():
+            sparse_service.expand_path(rel)
+        entry = self._entry(path, rel, oid)
+        index_store.add_or_update(entry)
+        return entry
+
+    @staticmethod
+    def iter_files(directory: Path) -> list[Path]:
+        # .git を除いた通常ファイルをパス順に列挙する
+        files = []
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = sorted(d for d in dirnames if d != ".git")
+            for name in sorted(filenames):
+                path = Path(dirpath) / name
+                if path.is_file() and not path.is_symlink():
+                    files.append(path)
+        return files
+
+    def add_directory(
+        self,
+        directory: Path,
+        worktree: Path,
+        index_store: IndexStore,
+        sparse_service: SparseService | None = None,
+    ) -> tuple[list[IndexEntry], list[str]]:
+        # git add <dir> と同じく、配下のファイルを追加し、消えたファイルは index
+        # から外す。blob は batch の中で書いて同期を 1 回にまとめ、index は最後に
+        # 1 回だけ置き換える（core.fsyncMethod=batch のとき）
+        rel_dir = directory.resolve().relative_to(worktree)
+        if sparse_service is not None and index_store.is_sparse():
+            # 対象に重なる sparse ディレクトリだけ展開する
+            sparse_service.expand_path(rel_dir)
+            for e in list(index_store.all()):
+                if e.mode == TREE_MODE and rel_dir in e.path.parents:
+                    sparse_service.expand_path(e.path)
+        entries = []
+        with self.object_store.batch():
+            for path in self.iter_files(directory):
+                rel = path.resolve().relative_to(worktree)
+                entries.append(self._entry(path, rel, self.add_object(path)))
+        added = {e.path.as_posix() for e in entries}
+        prefix = "" if rel_dir == Path(".") else rel_dir.as_posix() + "/"
+        removed = [
+            key
+            for key in index_store.snapshot()[0]
+            if key.startswith(prefix)
+            and not key.endswith("/")
+            and key not in added
+            and not (worktree / key).exists()
+            and (sparse_service is None or sparse_service.sparse_store.contains(key))
+        ]
+        index_store.update_many(entries, removed)
+        return entries, removed
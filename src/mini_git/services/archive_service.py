@@ -0,0 +1,224 @@
+import gzip
+import os
+import tarfile
+import time
+import zipfile
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, NamedTuple
+from mini_git.models import TREE_MODE
+from mini_git.services.checkout_service import (
+    EXECUTABLE_MODE,
+    GITLINK_MODE,
+    SYMLINK_MODE,
+)
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.object_store import ObjectStore
+
+FORMATS = ("tar", "tar.gz", "zip")
+# 出力ファイル名から形式を決める（git archive -o と同じ）
+EXTENSIONS = {".tar": "tar", ".tar.gz": "tar.gz", ".tgz": "tar.gz", ".zip": "zip"}
+# これ以下の blob は worker で丸ごと伸長して先読みする。大きいものは書き込み側で
+# ブロック単位に流し、全体をメモリに載せない
+PREFETCH_MAX_SIZE = 256 << 10
+# 先読みする blob の数（worker 数あたり）
+PREFETCH_PER_WORKER = 8
+# gzip -n と同じく名前と時刻を入れず、既定の level で圧縮する
+GZIP_LEVEL = 6
+# git archive と同じく umask 002 を適用した mode で書く
+FILE_MODE = 0o664
+EXEC_MODE = 0o775
+DIR_MODE = 0o775
+# zip の日付は 1980 年より前を表せない
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+class ArchiveEntry(NamedTuple):
+    # path はディレクトリなら末尾 "/" 付き。oid は blob のときだけ
+    path: str
+    mode: int
+    oid: str | None
+
+
+class ArchiveResult(NamedTuple):
+    files: int
+    bytes: int
+
+
+def format_for(filename: str) -> str | None:
+    for ext, fmt in EXTENSIONS.items():
+        if filename.endswith(ext):
+            return fmt
+    return None
+
+
+class _ContentReader:
+    # 先読み済みの本体か iter_content の断片を tarfile に read() で渡す
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self.chunks = chunks
+        self.buffer = b""
+
+    def read(self, n: int = -1) -> bytes:
+        while n < 0 or len(self.buffer) < n:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if n < 0:
+            out, self.buffer = self.buffer, b""
+        else:
+            out, self.buffer = self.buffer[:n], self.buffer[n:]
+        return out
+
+
+class ArchiveService:
+    def __init__(
+        self,
+        object_store: ObjectStore,
+        tree_store: TreeStore,
+        workers: int | None = None,
+    ) -> None:
+        self.object_store = object_store
+        self.tree_store = tree_store
+        self.workers = workers
+
+    def iter_entries(self, tree_oid: str, prefix: str = "") -> Iterator[ArchiveEntry]:
+        # tree の順に、ディレクトリを中身より先に出す（git archive と同じ）
+        for e in self.tree_store.iter_tree(tree_oid):
+            path = prefix + e.name
+            if e.mode == TREE_MODE:
+                yield ArchiveEntry(path + "/", e.mode, None)
+                yield from self.iter_entries(e.oid, path + "/")
+            elif e.mode == GITLINK_MODE:
+                # submodule は中身の無いディレクトリにする
+                yield ArchiveEntry(path + "/", e.mode, None)
+            else:
+                yield ArchiveEntry(path, e.mode, e.oid)
+
+    def _prefetch(self, oid: str) -> tuple[int, bytes | None]:
+        # (サイズ, 本体)。大きい blob は本体を返さず、書くときに流す
+        _, size = self.object_store.stat(oid)
+        if size > PREFETCH_MAX_SIZE:
+            return size, None
+        return size, self.object_store.read(oid)[1]
+
+    def _iter_blobs(
+        self, entries: Iterator[ArchiveEntry]
+    ) -> Iterator[tuple[ArchiveEntry, int, Iterator[bytes]]]:
+        # blob の stat と伸長を worker に先行させ、結果は tree の順に受け取る。
+        # 投入済みの数を抑えるので、先読みに使うメモリは一定
+        workers = self.workers or min(32, (os.cpu_count() or 1) + 4)
+        limit = workers * PREFETCH_PER_WORKER
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending: deque[tuple[ArchiveEntry, Future | None]] = deque()
+            while True:
+                while len(pending) < limit:
+                    entry = next(entries, None)
+                    if entry is None:
+                        break
+                    future = None
+                    if entry.oid is not None:
+                        future = pool.submit(self._prefetch, entry.oid)
+                    pending.append((entry, future))
+                if not pending:
+                    return
+                entry, future = pending.popleft()
+                if future is None or entry.oid is None:
+                    yield entry, 0, iter(())
+                    continue
+                size, data = future.result()
+                if data is None:
+                    yield entry, size, self.object_store.iter_content(entry.oid)
+                else:
+                    yield entry, size, iter((data,))
+
+    # --- 形式ごとの書き出し ---
+    def write(
+        self,
+        tree_oid: str,
+        out: BinaryIO,
+        fmt: str = "tar",
+        prefix: str = "",
+        mtime: int = 0,
+        commit_oid: str | None = None,
+    ) -> ArchiveResult:
+        if fmt not in FORMATS:
+            raise RuntimeError(f"unknown archive format '{fmt}'")
+        entries = self._iter_blobs(self.iter_entries(tree_oid, prefix))
+        if fmt == "zip":
+            return self._write_zip(entries, out, mtime)
+        if fmt == "tar.gz":
+            with gzip.GzipFile(
+                filename="", mode="wb", compresslevel=GZIP_LEVEL, fileobj=out, mtime=0
+            ) as gz:
+                return self._write_tar(entries, gz, mtime, commit_oid)
+        return self._write_tar(entries, out, mtime, commit_oid)
+
+    @staticmethod
+    def _write_tar(
+        entries: Iterator[tuple[ArchiveEntry, int, Iterator[bytes]]],
+        out: BinaryIO | gzip.GzipFile,
+        mtime: int,
+        commit_oid: str | None,
+    ) -> ArchiveResult:
+        # "w|" はシークしないストリーム書き込み。commit から作るときは git と同じく
+        # pax の global header に commit id を残す（git get-tar-commit-id で読める）
+        pax = {"comment": commit_oid} if commit_oid else {}
+        files = size = 0
+        with tarfile.open(
+            fileobj=out, mode="w|", format=tarfile.PAX_FORMAT, pax_headers=pax
+        ) as tar:
+            for entry, length, chunks in entries:
+                info = tarfile.TarInfo(entry.path)
+                info.mtime = mtime
+                info.uname = info.gname = "root"
+                if entry.oid is None:
+                    info.type = tarfile.DIRTYPE
+                    info.mode = DIR_MODE
+                    tar.addfile(info)
+                    continue
+                files += 1
+                size += length
+                if entry.mode == SYMLINK_MODE:
+                    info.type = tarfile.SYMTYPE
+                    info.mode = 0o777
+                    info.linkname = b"".join(chunks).decode("utf-8", "surrogateescape")
+                    tar.addfile(info)
+                    continue
+                info.mode = EXEC_MODE if entry.mode == EXECUTABLE_MODE else FILE_MODE
+                info.size = length
+                tar.addfile(info, _ContentReader(chunks))
+        return ArchiveResult(files, size)
+
+    @staticmethod
+    def _write_zip(
+        entries: Iterator[tuple[ArchiveEntry, int, Iterator[bytes]]],
+        out: BinaryIO,
+        mtime: int,
+    ) -> ArchiveResult:
+        # シークできない出力には data descriptor 付きで書かれる
+        date_time = max(time.gmtime(mtime)[:6], ZIP_EPOCH)
+        files = size = 0
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+            for entry, length, chunks in entries:
+                info = zipfile.ZipInfo(entry.path, date_time)
+                info.create_system = 3  # Unix。external_attr の上位に mode を入れる
+                if entry.oid is None:
+                    info.external_attr = (0o40000 | DIR_MODE) << 16 | 0x10
+                    zf.writestr(info, b"")
+                    continue
+                files += 1
+                size += length
+                if entry.mode == SYMLINK_MODE:
+                    info.external_attr = 0o120777 << 16
+                    zf.writestr(info, b"".join(chunks))
+                    continue
+                mode = EXEC_MODE if entry.mode == EXECUTABLE_MODE else FILE_MODE
+                info.external_attr = (0o100000 | mode) << 16
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.file_size = length
+                with zf.open(info, "w", force_zip64=length >= zipfile.ZIP64_LIMIT) as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+        return ArchiveResult(files, size)
@@ -0,0 +1,180 @@
+import heapq
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable
+from mini_git.services.commit_service import CommitService
+from mini_git.storage.blame_cache import BlameCache, BlameHunk
+from mini_git.utils.line_diff import Edit, myers_diff, split_lines
+
+# (final_start, orig_start, count): 対象ファイルの final_start 行目からの count 行が、
+# いま疑っている commit の版では orig_start 行目から始まる
+LineRange = tuple[int, int, int]
+
+
+class BlameService:
+    def __init__(self, commit_service: CommitService, cache: BlameCache | None) -> None:
+        self.commit_service = commit_service
+        self.tree_store = commit_service.tree_store
+        self.object_store = commit_service.object_store
+        self.cache = cache
+        # 行 id は blame 全体で共有し、各 blob は一度だけ分割する
+        self._ids: dict[bytes, int] = {}
+        self._lines: dict[str, array] = {}
+        self._blobs: dict[tuple[str, str], str | None] = {}
+
+    def _blob(self, commit: str, path: str) -> str | None:
+        key = (commit, path)
+        if key not in self._blobs:
+            entry = self.tree_store.lookup_path(
+                self.commit_service.info(commit).tree, path
+            )
+            self._blobs[key] = (
+                entry.oid if entry is not None and not entry.is_tree else None
+            )
+        return self._blobs[key]
+
+    def _line_ids(self, blob: str) -> array:
+        ids = self._lines.get(blob)
+        if ids is None:
+            lines = split_lines(self.object_store.read(blob)[1])
+            table = self._ids
+            ids = self._lines[blob] = array(
+                "I", (table.setdefault(line, len(table)) for line in lines)
+            )
+        return ids
+
+    def blame(self, commit: str, path: str) -> list[BlameHunk]:
+        path = path.strip("/")
+        cached = self.cache.get(commit, path) if self.cache is not None else None
+        if cached is not None:
+            return cached
+        blob = self._blob(commit, path)
+        if blob is None:
+            raise RuntimeError(f"no such path '{path}' in {commit}")
+        count = len(self._line_ids(blob))
+
+        hunks: list[BlameHunk] = []
+        pending: dict[str, list[LineRange]] = {}
+        queue: list[tuple[int, str]] = []
+
+        def suspect(oid: str, ranges: list[LineRange]) -> None:
+            if not ranges:
+                return
+            if oid not in pending:
+                pending[oid] = []
+                heapq.heappush(queue, (-self.commit_service.info(oid).commit_time, oid))
+            pending[oid] += ranges
+
+        suspect(commit, [(0, 0, count)] if count else [])
+        # 新しい commit から順に、行の範囲を親へ渡していく
+        while queue:
+            _, oid = heapq.heappop(queue)
+            ranges = sorted(pending.pop(oid))
+            cached = (
+                self.cache.get(oid, path)
+                if self.cache is not None and oid != commit
+                else None
+            )
+            if cached is not None:
+                hunks += _resolve(ranges, cached)
+                continue
+            parents = self.commit_service.info(oid).parents
+            # path に触れていない commit は diff せずに範囲ごと第一親へ渡す
+            if parents and not self.commit_service.touches(oid, [path]):
+                if (oid, path) in self._blobs:
+                    self._blobs.setdefault((parents[0], path), self._blobs[oid, path])
+                suspect(parents[0], ranges)
+                continue
+            blob = self._blob(oid, path)
+            if blob is None:
+                # 行を渡されるのは path を持つ commit だけ
+                raise RuntimeError(f"no such path '{path}' in {oid}")
+            same = next((p for p in parents if self._blob(p, path) == blob), None)
+            if same is not None:
+                suspect(same, ranges)
+                continue
+            for p in parents:
+                parent_blob = self._blob(p, path)
+                if parent_blob is None or not ranges:
+                    continue
+                edits = myers_diff(self._line_ids(parent_blob), self._line_ids(blob))
+                passed, ranges = _split(ranges, edits, len(self._line_ids(blob)))
+                suspect(p, passed)
+            hunks += (BlameHunk(oid, f, o, n) for f, o, n in ranges)
+
+        hunks = _coalesce(sorted(hunks, key=lambda h: h.final_start))
+        if self.cache is not None:
+            self.cache.put(commit, path, hunks)
+        return hunks
+
+
+def _split(
+    ranges: list[LineRange], edits: Iterable[Edit], b_len: int
+) -> tuple[list[LineRange], list[LineRange]]:
+    # 変更されていない区間にある行は親へ（親の版の行番号で）渡し、残りは手元に残す
+    blocks: list[tuple[int, int, int]] = []  # (b_start, b_end, a_start)
+    a_pos = b_pos = 0
+    for e in edits:
+        if e.b_start > b_pos:
+            blocks.append((b_pos, e.b_start, a_pos))
+        a_pos, b_pos = e.a_end, e.b_end
+    if b_len > b_pos:
+        blocks.append((b_pos, b_len, a_pos))
+    starts = [b[0] for b in blocks]
+
+    passed: list[LineRange] = []
+    kept: list[LineRange] = []
+    for final, orig, count in ranges:
+        pos, end = orig, orig + count
+        i = max(bisect_right(starts, pos) - 1, 0)
+        while pos < end:
+            if i < len(blocks) and blocks[i][0] <= pos < blocks[i][1]:
+                b_start, b_end, a_start = blocks[i]
+                n = min(end, b_end) - pos
+                passed.append((final + pos - orig, a_start + pos - b_start, n))
+                pos += n
+                i += 1
+                continue
+            while i < len(blocks) and blocks[i][1] <= pos:
+                i += 1
+            stop = min(end, blocks[i][0]) if i < len(blocks) else end
+            if stop > pos:
+                kept.append((final + pos - orig, pos, stop - pos))
+                pos = stop
+    return passed, kept
+
+
+def _resolve(ranges: list[LineRange], cached: list[BlameHunk]) -> list[BlameHunk]:
+    # cache にある commit の blame（その版の行番号）で範囲の持ち主を決める
+    starts = [h.final_start for h in cached]
+    out: list[BlameHunk] = []
+    for final, orig, count in ranges:
+        pos, end = orig, orig + count
+        i = max(bisect_right(starts, pos) - 1, 0)
+        while pos < end:
+            h = cached[i]
+            n = min(end, h.final_start + h.num_lines) - pos
+            out.append(
+                BlameHunk(
+                    h.commit, final + pos - orig, h.orig_start + pos - h.final_start, n
+                )
+            )
+            pos += n
+            i += 1
+    return out
+
+
+def _coalesce(hunks: list[BlameHunk]) -> list[BlameHunk]:
+    out: list[BlameHunk] = []
+    for h in hunks:
+        last = out[-1] if out else None
+        if (
+            last is not None
+            and last.commit == h.commit
+            and last.final_start + last.num_lines == h.final_start
+            and last.orig_start + last.num_lines == h.orig_start
+        ):
+            out[-1] = last._replace(num_lines=last.num_lines + h.num_lines)
+        else:
+            out.append(h)
+    return out
@@ -0,0 +1,211 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+from mini_git.models import IndexEntry, TREE_MODE
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.sparse_checkout_store import SparseCheckoutStore
+from mini_git.types import ObjectType
+
+SYMLINK_MODE = 120000
+EXECUTABLE_MODE = 100755
+GITLINK_MODE = 160000
+
+
+class CheckoutResult(NamedTuple):
+    written: int
+    removed: int
+
+
+class CheckoutService:
+    def __init__(
+        self,
+        worktree: Path,
+        index_store: IndexStore,
+        tree_store: TreeStore,
+        sparse_store: SparseCheckoutStore,
+        workers: int | None = None,
+    ) -> None:
+        self.worktree = worktree
+        self.index_store = index_store
+        self.tree_store = tree_store
+        self.object_store = tree_store.object_store
+        self.sparse_store = sparse_store
+        self.workers = workers
+
+    # --- tree の展開と worktree の比較 ---
+    def _flatten(
+        self, tree_oid: str, cache_tree: dict[str, str] | None = None
+    ) -> dict[str, IndexEntry]:
+        # cone 外のディレクトリは展開せず sparse エントリのまま扱う。
+        # 展開したディレクトリの tree oid は cache_tree に記録する
+        out: dict[str, IndexEntry] = {}
+        stack = [(tree_oid, "")]
+        while stack:
+            oid, prefix = stack.pop()
+            if cache_tree is not None:
+                cache_tree[prefix.rstrip("/")] = oid
+            for e in self.tree_store.read_tree(oid):
+                path = prefix + e.name
+                if not e.is_tree:
+                    out[path] = IndexEntry(path=Path(path), mode=e.mode, oid=e.oid)
+                elif self.sparse_store.collapse_root(path + "/") is not None:
+                    out[path] = IndexEntry(path=Path(path), mode=TREE_MODE, oid=e.oid)
+                else:
+                    stack.append((e.oid, path + "/"))
+        return out
+
+    def _on_disk(self, e: IndexEntry) -> bool:
+        return e.mode not in (TREE_MODE, GITLINK_MODE) and self.sparse_store.contains(
+            e.path.as_posix()
+        )
+
+    def _matches(self, e: IndexEntry) -> bool | None:
+        # None: ファイルが無い / True: e.oid と同じ内容 / False: 内容が異なる
+        file = self.worktree / e.path
+        try:
+            st = os.lstat(file)
+        except FileNotFoundError:
+            return None
+        if (
+            e.mtime_ns is not None
+            and st.st_mtime_ns == e.mtime_ns
+            and st.st_size == e.size
+        ):
+            return True
+        if os.path.islink(file):
+            raw = os.readlink(file).encode()
+        elif file.is_file():
+            raw = file.read_bytes()
+        else:
+            return False
+        return ObjectStore.hash_object(ObjectType.BLOB, raw) == e.oid
+
+    # --- worktree への書き出し ---
+    def _write_entry(self, e: IndexEntry) -> IndexEntry:
+        _, raw = self.object_store.read(e.oid)
+        file = self.worktree / e.path
+        if file.is_symlink() or (e.mode == SYMLINK_MODE and file.exists()):
+            file.unlink()
+        if e.mode == SYMLINK_MODE:
+            os.symlink(raw, file)
+        else:
+            file.write_bytes(raw)
+            st_mode = file.stat().st_mode
+            if e.mode == EXECUTABLE_MODE:
+                file.chmod(st_mode | 0o111)
+            elif st_mode & 0o111:
+                file.chmod(st_mode & ~0o111)
+        st = os.lstat(file)
+        return e.model_copy(update={"mtime_ns": st.st_mtime_ns, "size": st.st_size})
+
+    def _write_entries(self, entries: list[IndexEntry]) -> list[IndexEntry]:
+        # 親ディレクトリは浅い順に直列で作り、blob の伸長と書き込みだけを並列化する
+        dirs = sorted({e.path.parent for e in entries}, key=lambda d: len(d.parts))
+        for d in dirs:
+            (self.worktree / d).mkdir(parents=True, exist_ok=True)
+        if len(entries) < 2:
+            return [self._write_entry(e) for e in entries]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(self._write_entry, entries))
+
+    def _remove_files(self, paths: list[str]) -> None:
+        parents = set()
+        for p in paths:
+            file = self.worktree / p
+            if file.is_symlink() or file.is_file():
+                file.unlink()
+            parents.add(file.parent)
+        for d in sorted(parents, key=lambda d: len(d.parts), reverse=True):
+            while d != self.worktree and d.is_dir() and not any(d.iterdir()):
+                d.rmdir()
+                d = d.parent
+
+    # --- パブリックAPI ---
+    def checkout_tree(self, tree_oid: str, force: bool = False) -> CheckoutResult:
+        current = {e.path.as_posix(): e for e in self.index_store.all()}
+        cache_tree: dict[str, str] = {}
+        target = self._flatten(tree_oid, cache_tree)
+
+        removals = [p for p in current if p not in target]
+        changes = [
+            e
+            for p, e in target.items()
+            if p not in current or (current[p].oid, current[p].mode) != (e.oid, e.mode)
+        ]
+
+        if not force:
+            conflicts = []
+            for p in removals + [e.path.as_posix() for e in changes]:
+                cur = current.get(p)
+                if (
+                    cur is not None
+                    and self._on_disk(cur)
+                    and self._matches(cur) is False
+                ):
+                    conflicts.append(p)
+            for e in changes:
+                p = e.path.as_posix()
+                if p not in current and self._on_disk(e):
+                    if self._matches(e) is False:
+                        conflicts.append(p)
+            if conflicts:
+                raise RuntimeError(
+                    "Your local changes to the following files would be overwritten"
+                    " by checkout:\n" + "\n".join(f"\t{p}" for p in sorted(conflicts))
+                )
+
+        # 削除 → ディレクトリ作成 → 並列書き込みの順で、差分のあるパスだけを触る
+        self._remove_files(
+            [p for p in removals if self._on_disk(current[p])]
+            + [
+                e.path.as_posix()
+                for e in changes
+                if e.path.as_posix() in current
+                and not self._on_disk(e)
+                and self._on_disk(current[e.path.as_posix()])
+            ]
+        )
+        written = self._write_entries([e for e in changes if self._on_disk(e)])
+
+        index = {p: current.get(p, e) for p, e in target.items()}
+        for e in changes:
+            index[e.path.as_posix()] = e
+        for e in written:
+            index[e.path.as_posix()] = e
+        # index は target tree と一致するので、その tree oid を cache tree にできる
+        self.index_store.write_all(index.values(), cache_tree)
+        return CheckoutResult(written=len(written), removed=len(removals))
+
+    def restore(
+        self, pathspecs: list[Path] | None = None, source_tree: str | None = None
+    ) -> int:
+        # source_tree が無ければ index の内容で worktree を戻す（git restore 相当）
+        index = {e.path.as_posix(): e for e in self.index_store.all()}
+        source = index if source_tree is None else self._flatten(source_tree)
+
+        def selected(e: IndexEntry) -> bool:
+            if not self._on_disk(e):
+                return False
+            return not pathspecs or any(
+                e.path == spec or spec in e.path.parents for spec in pathspecs
+            )
+
+        targets = [e for e in source.values() if selected(e) and not self._matches(e)]
+        if not targets:
+            return 0
+        written = self._write_entries(targets)
+        # index と同じ内容を書いたときだけ stat 情報を更新する
+        updated = False
+        for e in written:
+            cur = index.get(e.path.as_posix())
+            if cur is not None and cur.oid == e.oid:
+                index[e.path.as_posix()] = e
+                updated = True
+        if updated:
+            # oid は変わらないので cache tree はそのまま使える
+            _, cache_tree = self.index_store.snapshot()
+            self.index_store.write_all(index.values(), cache_tree)
+        return len(written)
@@ -0,0 +1,144 @@
+import errno
+import fcntl
+import os
+import shutil
+from pathlib import Path
+from typing import NamedTuple
+from mini_git.services.checkout_service import CheckoutService
+from mini_git.services.repo_context import RepoContext
+from mini_git.services.rev_parse_service import RevParseService
+from mini_git.utils.fs import is_tmp_file
+
+# linux/fs.h の _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+class CloneResult(NamedTuple):
+    repo: RepoContext
+    linked: int
+    reflinked: int
+    copied: int
+    checked_out: int
+
+
+def find_git_dir(path: Path) -> Path:
+    # worktree 付きのリポジトリと bare リポジトリの両方を受け付ける
+    path = path.resolve()
+    if (path / ".git").is_dir():
+        return path / ".git"
+    if (path / "objects").is_dir() and (path / "HEAD").is_file():
+        return path
+    raise FileNotFoundError(f"'{path}' does not appear to be a git repository")
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            return True
+        except OSError as e:
+            if e.errno in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY):
+                return False
+            raise
+
+
+class CloneService:
+    def __init__(
+        self, hardlinks: bool = True, workers: int | None = None, shared: bool = False
+    ) -> None:
+        self.hardlinks = hardlinks
+        self.workers = workers
+        # shared なら object をコピーせず objects/info/alternates で参照する
+        self.shared = shared
+
+    def _link_objects(
+        self, src_objects: Path, dst_objects: Path
+    ) -> tuple[int, int, int]:
+        # loose object と pack は不変なので hardlink → reflink → copy の順に試す
+        linked = reflinked = copied = 0
+        can_link = self.hardlinks
+        can_reflink = True
+        for dirpath, dirnames, filenames in os.walk(src_objects):
+            rel = Path(dirpath).relative_to(src_objects)
+            target_dir = dst_objects / rel
+            target_dir.mkdir(parents=True, exist_ok=True)
+            for name in filenames:
+                if is_tmp_file(name) or name.endswith(".lock"):
+                    continue
+                src = Path(dirpath) / name
+                dst = target_dir / name
+                if can_link:
+                    try:
+                        os.link(src, dst)
+                        linked += 1
+                        continue
+                    except OSError as e:
+                        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                            raise
+                        # 別ファイルシステムなどでは以降も hardlink を試さない
+                        can_link = False
+                if can_reflink:
+                    if _reflink(src, dst):
+                        reflinked += 1
+                        continue
+                    can_reflink = False
+                shutil.copyfile(src, dst)
+                copied += 1
+        return linked, reflinked, copied
+
+    def clone(self, source: Path, dest: Path) -> CloneResult:
+        src_git = find_git_dir(source)
+        if dest.exists() and any(dest.iterdir()):
+            raise FileExistsError(
+                f"destination path '{dest}' already exists and is not an empty directory"
+            )
+        src_repo = RepoContext(src_git.parent, src_git)
+        src_head = src_repo.ref_store.symbolic_target("HEAD")
+        branch = src_head.removeprefix("refs/heads/") if src_head else "main"
+
+        repo = RepoContext.open_or_init_repo(dest, default_branch=branch)
+        if self.shared:
+            info = repo.git_path / "objects" / "info"
+            info.mkdir(parents=True, exist_ok=True)
+            (info / "alternates").write_text(f"{src_git / 'objects'}\n")
+            linked = reflinked = copied = 0
+            # alternates を読み直した RepoContext で checkout する
+            repo = RepoContext(repo.worktree, repo.git_path)
+        else:
+            linked, reflinked, copied = self._link_objects(
+                src_git / "objects", repo.git_path / "objects"
+            )
+
+        # 元リポジトリのブランチは refs/remotes/origin/ に、タグはそのまま複製する
+        refs = repo.ref_store
+        url = str(src_git.parent if src_git.name == ".git" else src_git)
+        reflog_message = f"clone: from {url}"
+        with refs.transaction() as tx:
+            for name, oid in src_repo.ref_store.iter_refs("refs/heads/"):
+                remote = "refs/remotes/origin/" + name.removeprefix("refs/heads/")
+                tx.update(remote, oid, message=reflog_message)
+            for name, oid in src_repo.ref_store.iter_refs("refs/tags/"):
+                tx.update(name, oid, message=reflog_message)
+        repo.config.set("remote.origin.url", url)
+        repo.config.set("remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*")
+
+        head_oid = src_repo.ref_store.resolve("HEAD")
+        checked_out = 0
+        if head_oid is not None:
+            refs.set_symbolic(
+                "refs/remotes/origin/HEAD", f"refs/remotes/origin/{branch}"
+            )
+            refs.update(f"refs/heads/{branch}", head_oid, message=reflog_message)
+            refs.set_symbolic("HEAD", f"refs/heads/{branch}")
+            repo.config.set(f"branch.{branch}.remote", "origin")
+            repo.config.set(f"branch.{branch}.merge", f"refs/heads/{branch}")
+            tree = RevParseService(refs, repo.object_store).peel_to_tree(head_oid)
+            checkout = CheckoutService(
+                repo.worktree,
+                repo.index_store,
+                repo.tree_store,
+                repo.sparse_store,
+                workers=self.workers,
+            )
+            checked_out = checkout.checkout_tree(tree).written
+        return CloneResult(repo, linked, reflinked, copied, checked_out)
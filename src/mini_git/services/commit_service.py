@@ -0,0 +1,308 @@
+import heapq
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple
+from mini_git.models import Commit
+from mini_git.services.commit_store import CommitStore
+from mini_git.services.diff_service import DiffService
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.commit_graph import (
+    GENERATION_INFINITY,
+    CommitGraph,
+    GraphCommit,
+    write_commit_graph,
+)
+from mini_git.storage.config_store import ConfigStore, identity
+from mini_git.storage.ref_store import RefStore
+from mini_git.types import ObjectType
+from mini_git.utils.bloom import BloomSettings, create_filter, maybe_contains
+
+# merge-base の塗り分けに使うフラグ
+_PARENT1 = 1
+_PARENT2 = 2
+_STALE = 4
+
+
+class CommitInfo(NamedTuple):
+    tree: str
+    parents: tuple[str, ...]
+    commit_time: int
+    generation: int
+
+
+class BloomStats:
+    # path 指定の log で Bloom filter がどれだけ効いたかを数える
+    def __init__(self) -> None:
+        self.filter_not_present = 0
+        self.definitely_not = 0
+        self.maybe = 0
+        self.false_positive = 0
+
+    @property
+    def false_positive_rate(self) -> float:
+        # 実際には変更の無かった commit のうち、filter が "maybe" と答えた割合
+        negatives = self.definitely_not + self.false_positive
+        return self.false_positive / negatives if negatives else 0.0
+
+
+class CommitService:
+    def __init__(
+        self,
+        commit_store: CommitStore,
+        ref_store: RefStore,
+        config: ConfigStore | None = None,
+    ) -> None:
+        self.commit_store = commit_store
+        self.object_store = commit_store.object_store
+        self.ref_store = ref_store
+        self.tree_store = TreeStore(self.object_store)
+        self.diff_service = DiffService(self.tree_store)
+        self.config = config
+        self.graph_path = self.object_store.object_dir / "info" / "commit-graph"
+        self._graph: CommitGraph | None = None
+        self._graph_loaded = False
+        self._info: dict[str, CommitInfo] = {}
+
+    # --- commit の作成 ---
+    def identity(self, kind: str = "committer") -> str:
+        return identity(kind, self.config)
+
+    def commit(
+        self,
+        tree: str,
+        message: str,
+        merge_parents: tuple[str, ...] = (),
+        reflog_message: str | None = None,
+    ) -> str:
+        # HEAD（が指すブランチ）を親にして commit を作り、HEAD を進める。
+        # merge_parents は merge commit の 2 つ目以降の親
+        head = self.ref_store.resolve("HEAD")
+        parents = ((head,) if head else ()) + merge_parents
+        if not message.endswith("\n"):
+            message += "\n"
+        commit = Commit(
+            tree, parents, self.identity("author"), self.identity("committer"), message
+        )
+        oid = self.commit_store.write_commit(commit)
+        if reflog_message is None:
+            kind = "merge" if merge_parents else "initial" if not head else None
+            subject = message.split("\n", 1)[0]
+            reflog_message = (
+                f"commit ({kind}): {subject}" if kind else f"commit: {subject}"
+            )
+        self.ref_store.update(
+            self.ref_store.symbolic_target("HEAD") or "HEAD",
+            oid,
+            message=reflog_message,
+        )
+        return oid
+
+    # --- commit-graph ---
+    @property
+    def graph(self) -> CommitGraph | None:
+        if not self._graph_loaded:
+            self._graph = CommitGraph.open(self.graph_path)
+            self._graph_loaded = True
+        return self._graph
+
+    def info(self, oid: str) -> CommitInfo:
+        # graph にあれば object を読まずに済ませる。無い commit の generation は無限大
+        cached = self._info.get(oid)
+        if cached is not None:
+            return cached
+        graph = self.graph
+        pos = graph.lookup(oid) if graph is not None else None
+        if graph is not None and pos is not None:
+            info = CommitInfo(
+                graph.tree(pos),
+                tuple(graph.oid(p) for p in graph.parents(pos)),
+                graph.commit_time(pos),
+                graph.generation(pos),
+            )
+        else:
+            # 走査に要るのはヘッダだけなので、メッセージは decode しない
+            commit = self.commit_store.read_lazy(oid)
+            info = CommitInfo(
+                commit.tree, commit.parents, commit.commit_time, GENERATION_INFINITY
+            )
+        self._info[oid] = info
+        return info
+
+    def ref_tips(self) -> list[str]:
+        tips = [oid for _, oid in self.ref_store.iter_refs("refs/")]
+        head = self.ref_store.resolve("HEAD")
+        if head is not None:
+            tips.append(head)
+        return tips
+
+    def write_graph(
+        self, tips: Iterable[str] | None = None, changed_paths: bool | None = None
+    ) -> int:
+        # ref から到達できる commit をすべて集めて書き直す（既存 graph の内容も再利用）。
+        # changed_paths が None なら既存 graph に Bloom filter があるときだけ書く
+        commits: dict[str, GraphCommit] = {}
+        stack = list(self.ref_tips() if tips is None else tips)
+        graph = self.graph
+        while stack:
+            oid = stack.pop()
+            if oid in commits:
+                continue
+            pos = graph.lookup(oid) if graph is not None else None
+            if graph is not None and pos is not None:
+                entry = GraphCommit(
+                    oid,
+                    graph.tree(pos),
+                    tuple(graph.oid(p) for p in graph.parents(pos)),
+                    graph.commit_time(pos),
+                )
+            else:
+                if self.object_store.stat(oid)[0] != ObjectType.COMMIT.value:
+                    continue  # タグ付けされた tree や blob は対象外
+                c = self.commit_store.read_commit(oid)
+                entry = GraphCommit(oid, c.tree, c.parents, c.commit_time)
+            commits[oid] = entry
+            stack.extend(p for p in entry.parents if p not in commits)
+
+        old_settings = graph.bloom_settings if graph is not None else None
+        if changed_paths is None:
+            changed_paths = old_settings is not None
+        settings = old_settings or BloomSettings()
+        filters: dict[str, bytes] | None = None
+        # 既存の filter を再利用できるのは、同じ設定で書かれた graph があるときだけ
+        reuse = graph if old_settings is not None else None
+        if changed_paths:
+            filters = {}
+            for oid, c in commits.items():
+                pos = reuse.lookup(oid) if reuse is not None else None
+                data = None
+                if reuse is not None and pos is not None:
+                    data = reuse.bloom_filter(pos)
+                if data is None:
+                    # 第一親との差分だけを登録する（root は空の tree との差分）
+                    parent = commits[c.parents[0]].tree if c.parents else None
+                    data = create_filter(
+                        self.diff_service.changed_paths(parent, c.tree), settings
+                    )
+                filters[oid] = data
+        count = write_commit_graph(self.graph_path, commits.values(), filters, settings)
+        if self._graph is not None:
+            self._graph.close()
+        self._graph_loaded = False
+        self._info.clear()
+        return count
+
+    # --- 履歴の走査 ---
+    def walk(self, tips: Iterable[str]) -> Iterator[str]:
+        # commit 日時の新しい順（git log の既定順）に祖先を列挙する
+        seen: set[str] = set()
+        queue: list[tuple[int, str]] = []
+        for oid in tips:
+            if oid not in seen:
+                seen.add(oid)
+                heapq.heappush(queue, (-self.info(oid).commit_time, oid))
+        while queue:
+            _, oid = heapq.heappop(queue)
+            yield oid
+            for p in self.info(oid).parents:
+                if p not in seen:
+                    seen.add(p)
+                    heapq.heappush(queue, (-self.info(p).commit_time, p))
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        # ancestor より generation の小さい commit の先に ancestor は現れない
+        gen = self.info(ancestor).generation
+        cutoff = 0 if gen == GENERATION_INFINITY else gen
+        seen = {descendant}
+        stack = [descendant]
+        while stack:
+            oid = stack.pop()
+            if oid == ancestor:
+                return True
+            for p in self.info(oid).parents:
+                if p not in seen and self.info(p).generation >= cutoff:
+                    seen.add(p)
+                    stack.append(p)
+        return False
+
+    def merge_bases(self, a: str, b: str) -> list[str]:
+        if a == b:
+            return [a]
+        flags: dict[str, int] = {a: _PARENT1, b: _PARENT2}
+        queue: list[tuple[int, int, str]] = []
+
+        def push(oid: str) -> None:
+            info = self.info(oid)
+            heapq.heappush(queue, (-info.generation, -info.commit_time, oid))
+
+        push(a)
+        push(b)
+        results: list[str] = []
+        # generation の大きい順に処理し、未到達の非 STALE が無くなったら打ち切る
+        while any(not flags[oid] & _STALE for _, _, oid in queue):
+            _, _, oid = heapq.heappop(queue)
+            f = flags[oid] & (_PARENT1 | _PARENT2 | _STALE)
+            if f & (_PARENT1 | _PARENT2) == _PARENT1 | _PARENT2 and not f & _STALE:
+                if oid not in results:
+                    results.append(oid)
+                f |= _STALE
+            for p in self.info(oid).parents:
+                if flags.get(p, 0) & f == f:
+                    continue
+                flags[p] = flags.get(p, 0) | f
+                push(p)
+        # 他の候補の祖先になっている候補を取り除く
+        return [
+            r
+            for r in results
+            if not any(o != r and self.is_ancestor(r, o) for o in results)
+        ]
+
+    # --- path 指定の履歴 ---
+    def _bloom_verdict(self, oid: str, paths: list[str]) -> bool | None:
+        # None: filter が無い / False: 確実に変更なし / True: 変更があるかもしれない
+        graph = self.graph
+        if graph is None or graph.bloom_settings is None:
+            return None
+        settings = graph.bloom_settings
+        pos = graph.lookup(oid)
+        data = graph.bloom_filter(pos) if pos is not None else None
+        if data is None:
+            return None
+        return any(maybe_contains(data, p, settings) for p in paths)
+
+    def changes_paths(self, oid: str, paths: list[str]) -> bool:
+        # 第一親と比べて paths のどれかのエントリが変わっているか
+        info = self.info(oid)
+        parent_tree = self.info(info.parents[0]).tree if info.parents else None
+        for p in paths:
+            new = self.tree_store.lookup_path(info.tree, p)
+            old = self.tree_store.lookup_path(parent_tree, p) if parent_tree else None
+            if new != old:
+                return True
+        return False
+
+    def touches(self, oid: str, paths: list[str]) -> bool:
+        # Bloom filter が "確実に変更なし" と答えれば tree を読まない
+        if self._bloom_verdict(oid, paths) is False:
+            return False
+        return self.changes_paths(oid, paths)
+
+    def walk_paths(
+        self, tips: Iterable[str], paths: list[str], stats: BloomStats | None = None
+    ) -> Iterator[str]:
+        # Bloom filter が "確実に変更なし" と答えた commit は tree を読まずに飛ばす
+        stats = stats if stats is not None else BloomStats()
+        paths = [p.strip("/") for p in paths]
+        for oid in self.walk(tips):
+            verdict = self._bloom_verdict(oid, paths)
+            if verdict is False:
+                stats.definitely_not += 1
+                continue
+            changed = self.changes_paths(oid, paths)
+            if verdict is None:
+                stats.filter_not_present += 1
+            else:
+                stats.maybe += 1
+                if not changed:
+                    stats.false_positive += 1
+            if changed:
+                yield oid
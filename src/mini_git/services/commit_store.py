@@ -0,0 +1,129 @@
+from mini_git.models import Commit
+from mini_git.storage.object_store import ObjectStore
+from mini_git.types import ObjectType
+
+
+def serialize_commit(commit: Commit) -> bytes:
+    lines = [f"tree {commit.tree}"]
+    lines += [f"parent {p}" for p in commit.parents]
+    lines += [f"author {commit.author}", f"committer {commit.committer}"]
+    return ("\n".join(lines) + "\n\n" + commit.message).encode()
+
+
+def parse_commit(raw: bytes) -> Commit:
+    header, _, message = raw.partition(b"\n\n")
+    tree = author = committer = ""
+    parents = []
+    for line in header.split(b"\n"):
+        # gpgsig などの複数行ヘッダの継続行は空白で始まる
+        if not line or line[:1] == b" ":
+            continue
+        key, _, value = line.partition(b" ")
+        if key == b"tree":
+            tree = value.decode()
+        elif key == b"parent":
+            parents.append(value.decode())
+        elif key == b"author":
+            author = value.decode()
+        elif key == b"committer":
+            committer = value.decode()
+    if not tree:
+        raise RuntimeError("Corrupt commit: missing tree")
+    return Commit(tree, tuple(parents), author, committer, message.decode())
+
+
+class LazyCommit:
+    # commit object の生データをそのまま持ち、要求されたヘッダだけを探す。
+    # メッセージは subject / body が要るまで decode しない
+    def __init__(self, raw: bytes) -> None:
+        self.raw = raw
+        end = raw.find(b"\n\n")
+        self._header_end = len(raw) if end < 0 else end
+        self._message_start = len(raw) if end < 0 else end + 2
+
+    def _find(self, key: bytes, start: int = 0) -> tuple[str, int] | None:
+        # 行頭の "<key> " を探す。gpgsig などの継続行は空白で始まるので誤一致しない
+        raw = self.raw
+        needle = key + b" "
+        if start == 0 and raw.startswith(needle):
+            pos = 0
+        else:
+            pos = raw.find(b"\n" + needle, max(start - 1, 0), self._header_end)
+            if pos < 0:
+                return None
+            pos += 1
+        eol = raw.find(b"\n", pos, self._header_end)
+        eol = self._header_end if eol < 0 else eol
+        return raw[pos + len(needle) : eol].decode(), eol
+
+    def header(self, key: str) -> str:
+        found = self._find(key.encode())
+        return found[0] if found else ""
+
+    @property
+    def tree(self) -> str:
+        tree = self.header("tree")
+        if not tree:
+            raise RuntimeError("Corrupt commit: missing tree")
+        return tree
+
+    @property
+    def parents(self) -> tuple[str, ...]:
+        parents = []
+        pos = 0
+        while (found := self._find(b"parent", pos)) is not None:
+            value, pos = found
+            parents.append(value)
+        return tuple(parents)
+
+    @property
+    def author(self) -> str:
+        return self.header("author")
+
+    @property
+    def committer(self) -> str:
+        return self.header("committer")
+
+    @property
+    def commit_time(self) -> int:
+        return int(self.committer.rsplit(" ", 2)[1])
+
+    def _subject_end(self) -> int:
+        # git の %s は最初の段落（空行まで）を 1 行につなげたもの
+        end = self.raw.find(b"\n\n", self._message_start)
+        return len(self.raw) if end < 0 else end
+
+    @property
+    def subject(self) -> str:
+        paragraph = self.raw[self._message_start : self._subject_end()]
+        return b" ".join(paragraph.split()).decode(errors="replace")
+
+    @property
+    def body(self) -> str:
+        return self.raw[self._subject_end() :].lstrip(b"\n").decode(errors="replace")
+
+    @property
+    def message(self) -> str:
+        return self.raw[self._message_start :].decode()
+
+
+class CommitStore:
+    object_store: ObjectStore
+
+    def __init__(self, object_store: ObjectStore) -> None:
+        self.object_store = object_store
+
+    def write_commit(self, commit: Commit) -> str:
+        return self.object_store.write(ObjectType.COMMIT, serialize_commit(commit))
+
+    def read_raw(self, oid: str) -> bytes:
+        typ, raw = self.object_store.read(oid)
+        if typ != ObjectType.COMMIT.value:
+            raise RuntimeError(f"{oid} is a {typ}, not a commit")
+        return raw
+
+    def read_commit(self, oid: str) -> Commit:
+        return parse_commit(self.read_raw(oid))
+
+    def read_lazy(self, oid: str) -> LazyCommit:
+        return LazyCommit(self.read_raw(oid))
@@ -0,0 +1,131 @@
+import time
+import zlib
+from collections.abc import Iterator, Sequence
+from typing import NamedTuple
+from mini_git.storage.compression import looks_compressed
+from mini_git.storage.object_store import ObjectStore
+
+BENCH_LEVELS = (0, 1, 3, 6, 9)
+# 計測に使う object の上限（数と伸長後の合計 byte 数）
+DEFAULT_SAMPLE_OBJECTS = 2000
+DEFAULT_SAMPLE_BYTES = 64 << 20
+# 最小サイズからこの倍率以内の level のうち最も速いものを勧める。
+# loose は書き込みの速さ、pack は長く残る大きさを優先する
+LOOSE_TOLERANCE = 1.15
+PACK_TOLERANCE = 1.02
+# level 1 でもこれ以上しか縮まない圧縮済みの内容は無圧縮で置くよう勧める
+MEDIA_MIN_SAVING = 0.03
+MIN_MEASURE_SECONDS = 0.05
+
+
+class LevelStats(NamedTuple):
+    level: int
+    objects: int
+    raw_bytes: int
+    compressed_bytes: int
+    seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.compressed_bytes / self.raw_bytes if self.raw_bytes else 1.0
+
+    @property
+    def throughput(self) -> float:
+        # 伸長後の byte 数で数えた MiB/s
+        return self.raw_bytes / max(self.seconds, 1e-9) / (1 << 20)
+
+
+class BenchResult(NamedTuple):
+    # 全体と、圧縮済みに見える blob（画像やアーカイブ）だけの集計
+    overall: list[LevelStats]
+    media: list[LevelStats]
+    # config のキー → 勧める値
+    suggestions: dict[str, str]
+
+
+def _fastest_within(stats: list[LevelStats], tolerance: float) -> LevelStats:
+    smallest = min(s.compressed_bytes for s in stats)
+    near = [s for s in stats if s.compressed_bytes <= smallest * tolerance]
+    return max(near, key=lambda s: s.throughput)
+
+
+def suggest(overall: list[LevelStats], media: list[LevelStats]) -> dict[str, str]:
+    suggestions: dict[str, str] = {}
+    if overall and overall[0].raw_bytes:
+        loose = _fastest_within(overall, LOOSE_TOLERANCE)
+        pack = _fastest_within(overall, PACK_TOLERANCE)
+        suggestions["core.looseCompression"] = str(loose.level)
+        suggestions["pack.compression"] = str(pack.level)
+    fast = next((s for s in media if s.level == 1), None)
+    if fast is not None and fast.raw_bytes and fast.ratio > 1 - MEDIA_MIN_SAVING:
+        suggestions["compression.media.type"] = "blob"
+        suggestions["compression.media.content"] = "compressed"
+        suggestions["compression.media.level"] = "0"
+    return suggestions
+
+
+class CompressionService:
+    def __init__(self, object_store: ObjectStore) -> None:
+        self.object_store = object_store
+
+    def _oids(self) -> Iterator[str]:
+        store = self.object_store
+        for oid, _ in store.loose_objects():
+            yield oid
+        for pack in store.packs():
+            yield from pack.iter_oids()
+
+    def sample(
+        self,
+        max_objects: int = DEFAULT_SAMPLE_OBJECTS,
+        max_bytes: int = DEFAULT_SAMPLE_BYTES,
+    ) -> list[tuple[str, bytes]]:
+        # リポジトリ全体から等間隔に (type, 本体) を取り出す
+        store = self.object_store
+        total = sum(1 for _ in store.loose_objects()) + sum(
+            p.count for p in store.packs()
+        )
+        stride = max(1, total // max(max_objects, 1))
+        samples: list[tuple[str, bytes]] = []
+        size = 0
+        for i, oid in enumerate(self._oids()):
+            if i % stride:
+                continue
+            typ, raw = store.read(oid)
+            if size + len(raw) > max_bytes and samples:
+                break
+            samples.append((typ, raw))
+            size += len(raw)
+            if len(samples) >= max_objects:
+                break
+        return samples
+
+    @staticmethod
+    def measure(samples: Sequence[tuple[str, bytes]], level: int) -> LevelStats:
+        # loose object と同じくヘッダを付けて圧縮する。標本が小さいと時間が
+        # 計れないので、MIN_MEASURE_SECONDS に達するまで繰り返して平均する
+        data = [f"{typ} {len(raw)}\0".encode() + raw for typ, raw in samples]
+        raw_bytes = sum(len(d) for d in data)
+        compressed = passes = 0
+        start = time.perf_counter()
+        while True:
+            compressed = sum(len(zlib.compress(d, level)) for d in data)
+            passes += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_MEASURE_SECONDS or not data:
+                break
+        return LevelStats(level, len(samples), raw_bytes, compressed, elapsed / passes)
+
+    def benchmark(
+        self,
+        levels: Sequence[int] = BENCH_LEVELS,
+        max_objects: int = DEFAULT_SAMPLE_OBJECTS,
+        max_bytes: int = DEFAULT_SAMPLE_BYTES,
+    ) -> BenchResult:
+        samples = self.sample(max_objects, max_bytes)
+        media = [
+            (t, raw) for t, raw in samples if t == "blob" and looks_compressed(raw)
+        ]
+        overall = [self.measure(samples, level) for level in levels]
+        media_stats = [self.measure(media, level) for level in levels] if media else []
+        return BenchResult(overall, media_stats, suggest(overall, media_stats))
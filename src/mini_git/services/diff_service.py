@@ -0,0 +1,324 @@
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from itertools import chain
+from typing import NamedTuple
+from mini_git.models import TreeEntry
+from mini_git.services.checkout_service import GITLINK_MODE, SYMLINK_MODE
+from mini_git.services.tree_store import TreeStore, tree_sort_key
+from mini_git.utils.line_diff import (
+    ALGORITHMS,
+    DiffAlgorithm,
+    intern_lines,
+    split_lines,
+    unified_hunks,
+)
+from mini_git.utils.similarity import fingerprint, similarity_score
+
+# git の -M / diff.renameLimit の既定値と同じ
+RENAME_SCORE = 50
+RENAME_LIMIT = 1000
+# git と同じく空のファイルは rename の対象にしない
+EMPTY_BLOB = "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391"
+NULL_OID = "0" * 40
+# git と同じく先頭 8000 バイトに NUL があればバイナリとみなす
+BINARY_PROBE = 8000
+
+
+class DiffEntry(NamedTuple):
+    # status は git diff --name-status と同じ A / D / M / T / R / C
+    status: str
+    path: str
+    old_mode: int | None
+    old_oid: str | None
+    new_mode: int | None
+    new_oid: str | None
+    # R / C のときだけ、元のパスと類似度 (0-100)
+    old_path: str | None = None
+    score: int | None = None
+
+
+def _oid(oid: str | None) -> str:
+    # 削除・追加・変更のエントリには、その側の oid が必ずある
+    if oid is None:
+        raise RuntimeError("diff entry has no object id")
+    return oid
+
+
+def _kind(mode: int) -> int:
+    # 通常ファイルと実行ファイルの違いは M、symlink や gitlink への変化は T
+    return mode if mode in (SYMLINK_MODE, GITLINK_MODE) else 0
+
+
+class DiffService:
+    def __init__(self, tree_store: TreeStore) -> None:
+        self.tree_store = tree_store
+
+    def _entries(self, oid: str | None) -> Iterator[TreeEntry]:
+        return self.tree_store.iter_tree(oid) if oid else iter(())
+
+    @staticmethod
+    def _wanted(path: str, is_tree: bool, pathspecs: list[str] | None) -> bool:
+        # ディレクトリは pathspec の途中でも降りる必要がある
+        if not pathspecs:
+            return True
+        for spec in pathspecs:
+            if path == spec or path.startswith(spec + "/"):
+                return True
+            if is_tree and spec.startswith(path + "/"):
+                return True
+        return False
+
+    def diff_trees(
+        self,
+        old: str | None,
+        new: str | None,
+        pathspecs: list[str] | None = None,
+        prefix: str = "",
+    ) -> Iterator[DiffEntry]:
+        # 両方の tree を git の並び順のまま突き合わせ、oid が同じ subtree は読まない
+        if old == new:
+            return
+        specs = [p.strip("/") for p in pathspecs] if pathspecs else None
+        a_iter, b_iter = self._entries(old), self._entries(new)
+        a, b = next(a_iter, None), next(b_iter, None)
+        while a is not None or b is not None:
+            if a is not None and (b is None or tree_sort_key(a) < tree_sort_key(b)):
+                yield from self._one_side(a, prefix, specs, deleted=True)
+                a = next(a_iter, None)
+            elif b is not None and (a is None or tree_sort_key(b) < tree_sort_key(a)):
+                yield from self._one_side(b, prefix, specs, deleted=False)
+                b = next(b_iter, None)
+            elif a is not None and b is not None:
+                if a != b:
+                    yield from self._both(a, b, prefix, specs)
+                a, b = next(a_iter, None), next(b_iter, None)
+
+    def _one_side(
+        self, e: TreeEntry, prefix: str, specs: list[str] | None, deleted: bool
+    ) -> Iterator[DiffEntry]:
+        path = prefix + e.name
+        if not self._wanted(path, e.is_tree, specs):
+            return
+        if e.is_tree:
+            old, new = (e.oid, None) if deleted else (None, e.oid)
+            yield from self.diff_trees(old, new, specs, path + "/")
+        elif deleted:
+            yield DiffEntry("D", path, e.mode, e.oid, None, None)
+        else:
+            yield DiffEntry("A", path, None, None, e.mode, e.oid)
+
+    def _both(
+        self, a: TreeEntry, b: TreeEntry, prefix: str, specs: list[str] | None
+    ) -> Iterator[DiffEntry]:
+        # 同じ名前・同じ種類（tree 同士か blob 同士）のエントリ
+        path = prefix + a.name
+        if not self._wanted(path, a.is_tree, specs):
+            return
+        if a.is_tree:
+            yield from self.diff_trees(a.oid, b.oid, specs, path + "/")
+        else:
+            status = "T" if _kind(a.mode) != _kind(b.mode) else "M"
+            yield DiffEntry(status, path, a.mode, a.oid, b.mode, b.oid)
+
+    def changed_paths(self, old: str | None, new: str | None) -> list[str]:
+        return [d.path for d in self.diff_trees(old, new)]
+
+    def find_renames(
+        self,
+        entries: Iterable[DiffEntry],
+        copies: bool = False,
+        min_score: int = RENAME_SCORE,
+        rename_limit: int = RENAME_LIMIT,
+    ) -> list[DiffEntry]:
+        # 削除と追加を組にして R にする。copies なら変更されたファイルも元にして C を作る
+        result: list[DiffEntry] = []
+        deleted: list[DiffEntry] = []
+        added: list[DiffEntry] = []
+        modified: list[DiffEntry] = []
+        for d in entries:
+            if (
+                d.status == "D"
+                and d.old_mode != GITLINK_MODE
+                and d.old_oid != EMPTY_BLOB
+            ):
+                deleted.append(d)
+            elif (
+                d.status == "A"
+                and d.new_mode != GITLINK_MODE
+                and d.new_oid != EMPTY_BLOB
+            ):
+                added.append(d)
+            else:
+                result.append(d)
+                if copies and d.status == "M":
+                    modified.append(d)
+
+        # 1. 完全一致: oid の hash map で組にするので移動が何千あっても線形
+        by_oid: dict[str, list[DiffEntry]] = {}
+        for d in reversed(deleted):
+            by_oid.setdefault(_oid(d.old_oid), []).append(d)
+        copy_src = {d.old_oid: d for d in (*modified, *deleted)} if copies else {}
+        used: set[str] = set()
+        rest: list[DiffEntry] = []
+        for a in added:
+            candidates = by_oid.get(_oid(a.new_oid))
+            if candidates:
+                src = candidates.pop()
+                used.add(src.path)
+                result.append(self._paired("R", src, a, 100))
+            elif a.new_oid in copy_src:
+                result.append(self._paired("C", copy_src[a.new_oid], a, 100))
+            else:
+                rest.append(a)
+        sources = [d for d in deleted if d.path not in used]
+        if copies:
+            sources += modified + [d for d in deleted if d.path in used]
+
+        # 2. 類似度: 組の数が上限を超えるなら git と同じく諦める
+        pairs: list[tuple[int, int, int]] = []
+        if rest and sources and len(rest) * len(sources) <= rename_limit**2:
+            pairs = self._similar(sources, rest, min_score)
+        # 類似度の高い組から採用する。削除されたファイルは一度だけ R の元になれる
+        taken: set[int] = set()
+        for score, di, si in sorted(pairs, key=lambda p: (-p[0], p[1], p[2])):
+            if di in taken:
+                continue
+            src = sources[si]
+            if src.status == "D" and src.path not in used:
+                used.add(src.path)
+                status = "R"
+            elif copies:
+                status = "C"
+            else:
+                continue
+            taken.add(di)
+            result.append(self._paired(status, src, rest[di], score))
+        result += (d for i, d in enumerate(rest) if i not in taken)
+        result += (d for d in deleted if d.path not in used)
+        result.sort(key=lambda d: d.path)
+        return result
+
+    @staticmethod
+    def _paired(status: str, src: DiffEntry, dst: DiffEntry, score: int) -> DiffEntry:
+        return DiffEntry(
+            status,
+            dst.path,
+            src.old_mode,
+            src.old_oid,
+            dst.new_mode,
+            dst.new_oid,
+            old_path=src.path,
+            score=score,
+        )
+
+    def _similar(
+        self, sources: list[DiffEntry], dests: list[DiffEntry], min_score: int
+    ) -> list[tuple[int, int, int]]:
+        # (score, dests の位置, sources の位置) を返す
+        store = self.tree_store.object_store
+        src_sizes = [store.stat(_oid(d.old_oid))[1] for d in sources]
+        dst_sizes = [store.stat(_oid(d.new_oid))[1] for d in dests]
+
+        def close(a: int, b: int) -> bool:
+            # サイズ比だけで min_score に届かない組は中身を読まずに捨てる
+            return min(a, b) * 100 >= max(a, b) * min_score
+
+        def has_close(sizes: list[int], size: int) -> bool:
+            # sizes は昇順。size と比べて close になる範囲に 1 つでもあるか
+            lo = -(-size * min_score // 100)
+            i = bisect_left(sizes, lo)
+            return i < len(sizes) and close(sizes[i], size)
+
+        # 断片 hash → それを含む source の転置索引。断片を共有しない組は比べない
+        sorted_dst = sorted(dst_sizes)
+        fps: dict[int, dict[int, int]] = {}
+        index: dict[int, list[int]] = {}
+        for si, d in enumerate(sources):
+            if not has_close(sorted_dst, src_sizes[si]):
+                continue
+            fps[si] = fp = fingerprint(store.read(_oid(d.old_oid))[1])
+            for h in fp:
+                index.setdefault(h, []).append(si)
+        sorted_src = sorted(src_sizes[si] for si in fps)
+
+        pairs: list[tuple[int, int, int]] = []
+        for di, d in enumerate(dests):
+            if not has_close(sorted_src, dst_sizes[di]):
+                continue
+            copied: dict[int, int] = {}
+            for h, count in fingerprint(store.read(_oid(d.new_oid))[1]).items():
+                for si in index.get(h, ()):
+                    copied[si] = copied.get(si, 0) + min(count, fps[si][h])
+            for si, n in copied.items():
+                if not close(src_sizes[si], dst_sizes[di]):
+                    continue
+                score = similarity_score(n, src_sizes[si], dst_sizes[di])
+                if score >= min_score:
+                    pairs.append((score, di, si))
+        return pairs
+
+    def _content(self, mode: int | None, oid: str | None) -> bytes:
+        if oid is None:
+            return b""
+        if mode == GITLINK_MODE:
+            return f"Subproject commit {oid}\n".encode()
+        return self.tree_store.object_store.read(oid)[1]
+
+    def iter_patch(
+        self,
+        entries: Iterable[DiffEntry],
+        algorithm: str = "myers",
+        context: int = 3,
+    ) -> Iterator[bytes]:
+        # git diff と同じ形式の patch を 1 行ずつ返す
+        diff = ALGORITHMS.get(algorithm)
+        if diff is None:
+            raise RuntimeError(f"unknown diff algorithm: {algorithm}")
+        for d in entries:
+            if d.status == "T":
+                # 種類の変化は git と同じく削除と追加に分けて出す
+                yield from self._file_patch(
+                    DiffEntry("D", d.path, d.old_mode, d.old_oid, None, None),
+                    diff,
+                    context,
+                )
+                d = DiffEntry("A", d.path, None, None, d.new_mode, d.new_oid)
+            yield from self._file_patch(d, diff, context)
+
+    def _file_patch(
+        self, d: DiffEntry, diff: DiffAlgorithm, context: int
+    ) -> Iterator[bytes]:
+        old_path = d.old_path or d.path
+        yield f"diff --git a/{old_path} b/{d.path}\n".encode()
+        if d.old_mode is None:
+            yield f"new file mode {d.new_mode:06d}\n".encode()
+        elif d.new_mode is None:
+            yield f"deleted file mode {d.old_mode:06d}\n".encode()
+        elif d.old_mode != d.new_mode:
+            yield f"old mode {d.old_mode:06d}\nnew mode {d.new_mode:06d}\n".encode()
+        if d.old_path is not None:
+            verb = "rename" if d.status == "R" else "copy"
+            yield f"similarity index {d.score}%\n".encode()
+            yield f"{verb} from {d.old_path}\n{verb} to {d.path}\n".encode()
+        if d.old_oid == d.new_oid:
+            return
+        old_oid, new_oid = d.old_oid or NULL_OID, d.new_oid or NULL_OID
+        index = f"index {old_oid[:7]}..{new_oid[:7]}"
+        if d.old_mode == d.new_mode:
+            index += f" {d.new_mode:06d}"
+        yield index.encode() + b"\n"
+
+        old = self._content(d.old_mode, d.old_oid)
+        new = self._content(d.new_mode, d.new_oid)
+        a_label = f"a/{old_path}" if d.old_oid else "/dev/null"
+        b_label = f"b/{d.path}" if d.new_oid else "/dev/null"
+        if b"\0" in old[:BINARY_PROBE] or b"\0" in new[:BINARY_PROBE]:
+            yield f"Binary files {a_label} and {b_label} differ\n".encode()
+            return
+        a_lines, b_lines = split_lines(old), split_lines(new)
+        edits = diff(*intern_lines(a_lines, b_lines))
+        first = next(edits, None)
+        if first is None:
+            return
+        yield f"--- {a_label}\n+++ {b_label}\n".encode()
+        yield from unified_hunks(a_lines, b_lines, chain([first], edits), context)
@@ -0,0 +1,432 @@
+import hashlib
+import os
+import re
+import time
+import zlib
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import NamedTuple
+from mini_git.models import TREE_MODE
+from mini_git.services.checkout_service import (
+    EXECUTABLE_MODE,
+    GITLINK_MODE,
+    SYMLINK_MODE,
+)
+from mini_git.services.commit_service import CommitService
+from mini_git.services.commit_store import LazyCommit
+from mini_git.services.gc_service import GcService
+from mini_git.services.tree_store import iter_tree_entries, tree_sort_key
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.pack import HASH_LEN, PackFile
+
+# worker に 1 度に渡す object 数
+BATCH_SIZE = 256
+# worker 1 つあたりの投入済み batch の上限。列挙が先走っても保持する object は
+# workers * MAX_PENDING * BATCH_SIZE 個まで
+MAX_PENDING = 4
+# pack 全体の SHA-1 を計算するときに 1 度に読む量
+PACK_READ_SIZE = 1 << 20
+REGULAR_MODE = 100644
+VALID_MODES = {REGULAR_MODE, EXECUTABLE_MODE, SYMLINK_MODE, TREE_MODE, GITLINK_MODE}
+_HEX_RE = re.compile(rb"^[0-9a-f]{40}$")
+_IDENT_RE = re.compile(rb"^[^<>\n]*<[^<>\n]*> \d+ [+-]\d{4}$")
+_TAG_TYPES = {b"commit", b"tree", b"blob", b"tag"}
+
+
+class FsckIssue(NamedTuple):
+    oid: str
+    # git fsck と同じ書式の 1 行（"error in tree <oid>: ..." / "missing blob <oid>"）
+    message: str
+
+
+class FsckProgress(NamedTuple):
+    checked: int
+    total: int
+    # 伸長後の byte 数
+    bytes: int
+    elapsed: float
+
+
+class FsckResult(NamedTuple):
+    checked: int
+    # type → 個数
+    counts: dict[str, int]
+    bytes: int
+    reachable: int
+    issues: list[FsckIssue]
+    timings: dict[str, float]
+
+
+class _Checked(NamedTuple):
+    oid: str
+    type: str | None
+    size: int
+    issue: FsckIssue | None
+
+
+class _Location(NamedTuple):
+    # 検査する object の在処。where は loose なら path、pack なら (pack, offset)、
+    # chunk 保存の巨大 blob なら None
+    kind: str
+    oid: str
+    where: Path | tuple[PackFile, int] | None
+
+
+class _Visited:
+    # 到達性の検査で訪問した object の印。pack にある object は pack ごとの bit 列
+    # （1 object 1 bit）に、それ以外（loose や見つからない object）は 20 byte の
+    # bytes の集合に持つ。gc 後のリポジトリならほぼ全部が bit 列に収まる
+    def __init__(self, packs: Iterable[PackFile]) -> None:
+        self.packs = [(p, bytearray((p.count + 7) // 8)) for p in packs]
+        self.others: set[bytes] = set()
+        self.count = 0
+
+    def add(self, oid: str, key: bytes) -> bool:
+        # 初めて訪れたなら印を付けて True
+        for pack, bits in self.packs:
+            i = pack.position(oid)
+            if i is not None:
+                mask = 1 << (i & 7)
+                if bits[i >> 3] & mask:
+                    return False
+                bits[i >> 3] |= mask
+                self.count += 1
+                return True
+        if key in self.others:
+            return False
+        self.others.add(key)
+        self.count += 1
+        return True
+
+
+def _is_dotgit(name: str) -> bool:
+    # 大文字小文字を区別しないファイルシステムや NTFS でも .git になる名前
+    # （末尾の . と空白は NTFS で無視され、git~1 は短い名前）
+    lowered = name.lower()
+    return lowered.rstrip(". ") == ".git" or lowered == "git~1"
+
+
+def check_tree(raw: bytes) -> str | None:
+    # 戻り値は git fsck の msg-id 付きのエラー文（問題が無ければ None）
+    prev: bytes | None = None
+    names: set[str] = set()
+    try:
+        for e in iter_tree_entries(raw):
+            if len(e.oid) != 2 * HASH_LEN:
+                return "badTree: truncated tree entry"
+            if e.mode not in VALID_MODES:
+                return f"badFilemode: contains bad file modes ({e.mode})"
+            if not e.name or "/" in e.name:
+                return f"fullPathname: contains full pathnames ({e.name!r})"
+            if e.name == ".":
+                return "hasDot: contains '.'"
+            if e.name == "..":
+                return "hasDotdot: contains '..'"
+            if _is_dotgit(e.name):
+                return "hasDotgit: contains '.git'"
+            if e.name in names:
+                return f"duplicateEntries: contains duplicate file entries ({e.name})"
+            key = tree_sort_key(e)
+            if prev is not None and key < prev:
+                return "treeNotSorted: not properly sorted"
+            prev = key
+            names.add(e.name)
+    except (ValueError, UnicodeDecodeError):
+        return "badTree: could not parse tree entries"
+    return None
+
+
+def check_commit(raw: bytes) -> str | None:
+    header = raw.split(b"\n\n", 1)[0]
+    lines = iter(header.split(b"\n"))
+    line = next(lines, b"")
+    if not line.startswith(b"tree "):
+        return "missingTree: invalid format - expected 'tree' line"
+    if not _HEX_RE.match(line[5:]):
+        return "badTreeSha1: invalid 'tree' line format - bad sha1"
+    line = next(lines, b"")
+    while line.startswith(b"parent "):
+        if not _HEX_RE.match(line[7:]):
+            return "badParentSha1: invalid 'parent' line format - bad sha1"
+        line = next(lines, b"")
+    for name in ("author", "committer"):
+        if not line.startswith(f"{name} ".encode()):
+            return f"missing{name.title()}: invalid format - expected '{name}' line"
+        if not _IDENT_RE.match(line[len(name) + 1 :]):
+            return f"badDate: invalid {name} line"
+        line = next(lines, b"")
+    return None
+
+
+def check_tag(raw: bytes) -> str | None:
+    lines = raw.split(b"\n\n", 1)[0].split(b"\n")
+    expected = [(b"object ", "missingObject"), (b"type ", "missingType")]
+    expected.append((b"tag ", "missingTagEntry"))
+    for (prefix, msg_id), line in zip(expected, lines + [b""] * 3):
+        if not line.startswith(prefix):
+            return (
+                f"{msg_id}: invalid format - expected '{prefix.decode().strip()}' line"
+            )
+    if not _HEX_RE.match(lines[0][7:]):
+        return "badObjectSha1: invalid 'object' line format - bad sha1"
+    if lines[1][5:] not in _TAG_TYPES:
+        return "badType: invalid 'type' value"
+    tagger = next((x for x in lines[3:] if x.startswith(b"tagger ")), None)
+    if tagger is not None and not _IDENT_RE.match(tagger[7:]):
+        return "badDate: invalid tagger line"
+    return None
+
+
+_CHECKS: dict[str, Callable[[bytes], str | None]] = {
+    "tree": check_tree,
+    "commit": check_commit,
+    "tag": check_tag,
+}
+
+
+class FsckService:
+    def __init__(
+        self,
+        commit_service: CommitService,
+        index_store: IndexStore,
+        workers: int | None = None,
+    ) -> None:
+        self.commit_service = commit_service
+        self.object_store = commit_service.object_store
+        self.index_store = index_store
+        self.workers = workers
+
+    # --- object の列挙 ---
+    def _locations(self) -> Iterator[_Location]:
+        # ディレクトリと idx を順に読みながら 1 つずつ返す（全体を溜めない）
+        store = self.object_store
+        for oid, path in store.loose_objects():
+            yield _Location("loose", oid, path)
+        for pack in store.packs():
+            for key, offset in pack.iter_entries():
+                yield _Location("pack", key.hex(), (pack, offset))
+        for oid in store.chunk_store.iter_oids():
+            yield _Location("chunk", oid, None)
+
+    def _count(self) -> int:
+        store = self.object_store
+        return (
+            sum(1 for _ in store.loose_objects())
+            + sum(p.count for p in store.packs())
+            + sum(1 for _ in store.chunk_store.iter_oids())
+        )
+
+    # --- 1 object の検査（worker で動く） ---
+    def _inflate(self, location: _Location) -> tuple[str, bytes, int, str]:
+        # (type, 本体, サイズ, 計算した oid)
+        oid, where = location.oid, location.where
+        if isinstance(where, Path):
+            data = zlib.decompress(where.read_bytes())
+            nul = data.index(b"\0")
+            typ, size = data[:nul].decode().split(" ", 1)
+            if int(size) != len(data) - nul - 1:
+                raise RuntimeError("object size does not match header")
+            return typ, data[nul + 1 :], int(size), hashlib.sha1(data).hexdigest()
+        if where is None:
+            # 巨大 blob は chunk ごとに hash へ流し込み、全体を持たない
+            chunks = self.object_store.chunk_store
+            size = chunks.size(oid)
+            h = hashlib.sha1(f"blob {size}\0".encode())
+            written = 0
+            for piece in chunks.iter_content(oid):
+                h.update(piece)
+                written += len(piece)
+            if written != size:
+                raise RuntimeError("chunk sizes do not match manifest")
+            return "blob", b"", size, h.hexdigest()
+        pack, offset = where
+        typ, raw = pack.read_at(offset)
+        h = hashlib.sha1(f"{typ} {len(raw)}\0".encode())
+        h.update(raw)
+        return typ, raw, len(raw), h.hexdigest()
+
+    def _check(self, location: _Location) -> _Checked:
+        kind, oid, _ = location
+        try:
+            typ, raw, size, actual = self._inflate(location)
+        except (OSError, ValueError, RuntimeError, zlib.error) as e:
+            return _Checked(
+                oid,
+                None,
+                0,
+                FsckIssue(oid, f"error: {oid}: corrupt {kind} object ({e})"),
+            )
+        if actual != oid:
+            issue = FsckIssue(
+                oid, f"error: hash mismatch for {kind} object {oid} (got {actual})"
+            )
+            return _Checked(oid, typ, size, issue)
+        check = _CHECKS.get(typ)
+        problem = check(raw) if check is not None else None
+        if problem is not None:
+            issue = FsckIssue(oid, f"error in {typ} {oid}: {problem}")
+            return _Checked(oid, typ, size, issue)
+        return _Checked(oid, typ, size, None)
+
+    def _check_batch(self, batch: list[_Location]) -> list[_Checked]:
+        return [self._check(location) for location in batch]
+
+    def _check_pack(self, pack: PackFile) -> list[FsckIssue]:
+        # pack 末尾の SHA-1 と、idx に記録された pack の SHA-1 を照合する
+        data = pack.pack
+        end = len(data) - HASH_LEN
+        h = hashlib.sha1()
+        for start in range(0, end, PACK_READ_SIZE):
+            h.update(data[start : min(start + PACK_READ_SIZE, end)])
+        if h.digest() != data[end:]:
+            return [
+                FsckIssue("", f"error: {pack.pack_path.name} SHA-1 checksum mismatch")
+            ]
+        if pack.checksum != data[end:].hex():
+            return [
+                FsckIssue("", f"error: {pack.idx_path.name} does not match its pack")
+            ]
+        return self._check_crc(pack, end)
+
+    def _check_crc(self, pack: PackFile, end: int) -> list[FsckIssue]:
+        # idx に記録された entry ごとの CRC32 を照合する（git の verify_pack と同じ）。
+        # entry の終わりは offset 順で次の entry の始まり
+        data = pack.pack
+        order = array("I", sorted(range(pack.count), key=pack.offset))
+        issues = []
+        for k, i in enumerate(order):
+            start = pack.offset(i)
+            stop = pack.offset(order[k + 1]) if k + 1 < len(order) else end
+            if zlib.crc32(data[start:stop]) != pack.crc32(i):
+                oid = pack.oid(i)
+                issues.append(
+                    FsckIssue(
+                        oid,
+                        f"error: index CRC mismatch for object {oid}"
+                        f" from {pack.pack_path.name} at offset {start}",
+                    )
+                )
+        return issues
+
+    # --- 並列の検査 ---
+    def check_objects(
+        self, progress: Callable[[FsckProgress], None] | None = None
+    ) -> tuple[int, dict[str, int], int, list[FsckIssue]]:
+        # 列挙 → worker での伸長と SHA-1 → 集計を流れ作業にする。投入済みの batch を
+        # MAX_PENDING * workers に抑え、巨大なリポジトリでもメモリを一定に保つ
+        total = self._count() if progress is not None else 0
+        counts: dict[str, int] = {}
+        issues: list[FsckIssue] = []
+        checked = size = 0
+        start = time.perf_counter()
+        locations = self._locations()
+        # ThreadPoolExecutor の既定と同じ worker 数
+        workers = self.workers or min(32, (os.cpu_count() or 1) + 4)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            limit = workers * MAX_PENDING
+            pack_checks = [
+                pool.submit(self._check_pack, p) for p in self.object_store.packs()
+            ]
+            pending: set[Future] = set()
+            while True:
+                while len(pending) < limit:
+                    batch = list(islice(locations, BATCH_SIZE))
+                    if not batch:
+                        break
+                    pending.add(pool.submit(self._check_batch, batch))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        checked += 1
+                        size += result.size
+                        if result.type is not None:
+                            counts[result.type] = counts.get(result.type, 0) + 1
+                        if result.issue is not None:
+                            issues.append(result.issue)
+                if progress is not None:
+                    progress(
+                        FsckProgress(checked, total, size, time.perf_counter() - start)
+                    )
+            for f in pack_checks:
+                issues += f.result()
+        return checked, counts, size, issues
+
+    # --- ref からの到達性 ---
+    def check_connectivity(self, roots: Iterable[str]) -> tuple[int, list[FsckIssue]]:
+        # commit と tree だけを読み、blob は存在だけを確かめる。訪問済みの印は
+        # pack にある object なら 1 bit で済む（_Visited）
+        store = self.object_store
+        issues: list[FsckIssue] = []
+        seen = _Visited(store.packs())
+        stack: list[tuple[str, str | None, str]] = [(oid, None, "") for oid in roots]
+        while stack:
+            oid, expected, parent = stack.pop()
+            try:
+                key = bytes.fromhex(oid)
+            except ValueError:
+                continue  # 不正な oid を持つ object は check_objects で報告済み
+            if not seen.add(oid, key):
+                continue
+            if not store.exists(oid):
+                kind = expected or "object"
+                if parent:
+                    link = f"broken link from {parent} to {kind} {oid}"
+                    issues.append(FsckIssue(oid, link))
+                issues.append(FsckIssue(oid, f"missing {kind} {oid}"))
+                continue
+            if expected == "blob":
+                continue
+            try:
+                typ, raw = store.read(oid)
+                if expected is not None and typ != expected:
+                    message = f"error: object {oid} is a {typ}, not a {expected}"
+                    issues.append(FsckIssue(oid, message))
+                    continue
+                stack.extend(self._links(typ, oid, raw))
+            except (OSError, ValueError, RuntimeError, zlib.error):
+                # 壊れた object は check_objects で報告済み
+                continue
+        return seen.count, issues
+
+    def _links(
+        self, typ: str, oid: str, raw: bytes
+    ) -> list[tuple[str, str | None, str]]:
+        # (参照先, 期待する type, 参照元)
+        here = f"{typ} {oid}"
+        if typ == "commit":
+            commit = LazyCommit(raw)
+            parents = [(p, "commit", here) for p in commit.parents]
+            return [(commit.tree, "tree", here), *parents]
+        if typ == "tree":
+            return [
+                (e.oid, "tree" if e.mode == TREE_MODE else "blob", here)
+                for e in iter_tree_entries(raw)
+                if e.mode != GITLINK_MODE
+            ]
+        if typ == "tag":
+            return [(LazyCommit(raw).header("object"), None, here)]
+        return []
+
+    def fsck(
+        self,
+        progress: Callable[[FsckProgress], None] | None = None,
+        connectivity: bool = True,
+    ) -> FsckResult:
+        timings: dict[str, float] = {}
+        start = time.perf_counter()
+        checked, counts, size, issues = self.check_objects(progress)
+        timings["objects"] = time.perf_counter() - start
+        reachable = 0
+        if connectivity:
+            start = time.perf_counter()
+            # gc と同じく ref、HEAD、reflog、index を起点にする
+            roots = GcService(self.commit_service, self.index_store).roots()
+            reachable, missing = self.check_connectivity(roots)
+            issues += missing
+            timings["connectivity"] = time.perf_counter() - start
+        return FsckResult(checked, counts, size, reachable, issues, timings)
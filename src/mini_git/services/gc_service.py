@@ -0,0 +1,498 @@
+import os
+import re
+import time
+from collections import deque
+from collections.abc import Iterator
+from pathlib import Path
+from typing import NamedTuple
+from mini_git.models import TREE_MODE
+from mini_git.services.checkout_service import GITLINK_MODE
+from mini_git.services.commit_service import CommitService
+from mini_git.services.commit_store import LazyCommit
+from mini_git.storage.blame_cache import BlameCache
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.midx import (
+    MIDX_NAME,
+    merge_entries,
+    pack_entries,
+    write_midx,
+)
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.pack import PackFile, PackStreamWriter, PackWriter
+from mini_git.storage.reflog import ZERO_OID
+from mini_git.utils.delta import create_delta, delta_index
+from mini_git.utils.fs import prune_tmp_files
+
+# git の pack.window / pack.depth の既定値
+DEFAULT_WINDOW = 10
+DEFAULT_DEPTH = 50
+# これより小さい object は delta にしても得にならない
+MIN_DELTA_SIZE = 50
+DEFAULT_PRUNE_EXPIRE = "2.weeks.ago"
+_UNITS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+}
+_EXPIRE_RE = re.compile(r"^(\d+)\.(second|minute|hour|day|week)s?\.ago$")
+# delta を組む順序。同じ type どうしでしか delta にしない
+_TYPE_ORDER = {"commit": 0, "tree": 1, "blob": 2, "tag": 3}
+
+
+class GcResult(NamedTuple):
+    packed: int
+    deltas: int
+    pruned: int
+    loosened: int
+    size_before: int
+    size_after: int
+    # 段階名 → 秒
+    timings: dict[str, float]
+
+
+class GeometricResult(NamedTuple):
+    # まとめた pack と、そのまま残した pack の数
+    rolled: int
+    kept: int
+    packed: int
+    deltas: int
+    # multi-pack-index に載せた object 数（書かなかったときは 0）
+    midx_objects: int
+    timings: dict[str, float]
+
+
+class PackCandidate(NamedTuple):
+    oid: str
+    type: str
+    size: int
+    name_hash: int
+
+
+def parse_expire(value: str, now: float | None = None) -> float | None:
+    # "now" / "never" / "<n>.<単位>.ago" を時刻にする。None は「消さない」
+    now = time.time() if now is None else now
+    if value == "now":
+        return now
+    if value == "never":
+        return None
+    m = _EXPIRE_RE.match(value)
+    if m is None:
+        raise RuntimeError(f"invalid prune expiry '{value}'")
+    return now - int(m.group(1)) * _UNITS[m.group(2)]
+
+
+def name_hash(path: str) -> int:
+    # git の pack_name_hash。末尾の文字ほど重く効くので、拡張子の同じファイルが並ぶ
+    h = 0
+    for c in path.encode():
+        if c in b" \t\n\r\f\v":
+            continue
+        h = (h >> 2) + (c << 24) & 0xFFFFFFFF
+    return h
+
+
+def geometric_split(counts: list[int], factor: int, extra: int = 0) -> int:
+    # counts は昇順の object 数。先頭からいくつまとめれば残りが factor 倍ずつの
+    # 等比数列になるか（git repack --geometric と同じ手順）。extra は必ず
+    # まとめる側に入る object 数（loose object）
+    if factor < 2:
+        raise RuntimeError("geometric factor must be at least 2")
+    i = len(counts) - 1
+    while i > 0 and counts[i] >= factor * counts[i - 1]:
+        i -= 1
+    # 崩れていた組の大きい方も数列には入れない
+    split = i + 1 if i else 0
+    total = sum(counts[:split]) + extra
+    # まとめた結果より factor 倍以上大きい pack に当たるまで取り込む
+    while split < len(counts) and counts[split] < factor * total:
+        total += counts[split]
+        split += 1
+    return split
+
+
+def disk_usage(directory: Path) -> int:
+    # du と同じくブロック単位の使用量（loose object は小さなファイルが多く効く）
+    total = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_blocks * 512
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def pack_order(c: PackCandidate) -> tuple[int, int, int]:
+    # git と同じく type、名前、サイズの大きい順に並べ、近い object を窓に集める
+    return _TYPE_ORDER[c.type], c.name_hash, -c.size
+
+
+def write_objects(
+    store: ObjectStore,
+    writer: PackStreamWriter,
+    candidates: list[PackCandidate],
+    window: int = DEFAULT_WINDOW,
+    depth: int = DEFAULT_DEPTH,
+    thin_bases: dict[str, str] | None = None,
+) -> int:
+    # 直前の window 個の同じ type の object を base の候補にし、最も小さい
+    # delta を採る。base は必ず先に書かれている。thin_bases（oid → 受け手が
+    # 持っている同じパスの object）があれば、それも REF_DELTA の base の候補にする
+    recent: deque[list] = deque(maxlen=window)
+    depths: dict[str, int] = {}
+    deltas = 0
+    for c in candidates:
+        _, raw = store.read(c.oid)
+        best: tuple[str, bytes] | None = None
+        external = False
+        if len(raw) >= MIN_DELTA_SIZE:
+            # base が無いときの git と同じく、元の半分より小さい delta だけ採る
+            limit = len(raw) // 2 - 20
+            thin = thin_bases.get(c.oid) if thin_bases else None
+            if thin is not None:
+                _, base_raw = store.read(thin)
+                delta = create_delta(base_raw, raw, delta_index(base_raw), limit)
+                if delta is not None:
+                    best, external = (thin, delta), True
+            for slot in reversed(recent) if window else ():
+                base_oid, base_type, base_raw, index = slot
+                if base_type != c.type or depths[base_oid] >= depth:
+                    continue
+                if len(base_raw) < len(raw) // 32:
+                    continue
+                if index is None:
+                    index = slot[3] = delta_index(base_raw)
+                limit = len(best[1]) - 1 if best else limit
+                delta = create_delta(base_raw, raw, index, limit)
+                if delta is not None:
+                    best, external = (base_oid, delta), False
+        level = store.compression.level(c.type, raw, packed=True)
+        if best is None:
+            writer.add(c.oid, c.type, raw, level)
+            depths[c.oid] = 0
+        elif external:
+            writer.add_ref_delta(c.oid, best[0], best[1], level)
+            depths[c.oid] = 1
+            deltas += 1
+        else:
+            writer.add_delta(c.oid, best[0], best[1], level)
+            depths[c.oid] = depths[best[0]] + 1
+            deltas += 1
+        recent.append([c.oid, c.type, raw, None])
+    return deltas
+
+
+class GcService:
+    def __init__(
+        self,
+        commit_service: CommitService,
+        index_store: IndexStore,
+        blame_cache: BlameCache | None = None,
+    ) -> None:
+        self.commit_service = commit_service
+        self.object_store = commit_service.object_store
+        self.ref_store = commit_service.ref_store
+        self.tree_store = commit_service.tree_store
+        self.index_store = index_store
+        self.blame_cache = blame_cache
+
+    # --- 到達可能な object ---
+    def roots(self) -> Iterator[str]:
+        # ref、HEAD、reflog に残る値、index（と cache tree）から辿る
+        for _, oid in self.ref_store.iter_refs("refs/"):
+            yield oid
+        head = self.ref_store.resolve("HEAD")
+        if head is not None:
+            yield head
+        logs = self.ref_store.reflog.root
+        for dirpath, _, filenames in os.walk(logs):
+            for filename in filenames:
+                ref = (Path(dirpath) / filename).relative_to(logs).as_posix()
+                for entry in self.ref_store.reflog.iter_reverse(ref):
+                    yield from (o for o in (entry.old, entry.new) if o != ZERO_OID)
+        entries, cache_tree = self.index_store.snapshot()
+        for value in entries.values():
+            if value["mode"] != GITLINK_MODE:
+                yield value["oid"]
+        yield from cache_tree.values()
+
+    def reachable(self) -> dict[str, tuple[str, str]]:
+        # oid → (type, 辿ってきた path)。path は delta の組み合わせを決めるのに使う
+        found: dict[str, tuple[str, str]] = {}
+        stack: list[tuple[str, str | None, str]] = [
+            (oid, None, "") for oid in self.roots()
+        ]
+        while stack:
+            oid, typ, path = stack.pop()
+            if oid in found or not self.object_store.exists(oid):
+                continue
+            if typ is None:
+                typ = self.object_store.stat(oid)[0]
+            found[oid] = (typ, path)
+            if typ == "commit":
+                commit = LazyCommit(self.object_store.read(oid)[1])
+                stack.append((commit.tree, "tree", ""))
+                stack.extend((p, "commit", "") for p in commit.parents)
+            elif typ == "tree":
+                for e in self.tree_store.iter_tree(oid):
+                    if e.mode == GITLINK_MODE:
+                        continue
+                    kind = "tree" if e.mode == TREE_MODE else "blob"
+                    stack.append((e.oid, kind, f"{path}/{e.name}" if path else e.name))
+            elif typ == "tag":
+                target = LazyCommit(self.object_store.read(oid)[1]).header("object")
+                stack.append((target, None, ""))
+        return found
+
+    # --- pack の書き出し ---
+    def _candidates(self, objects: dict[str, tuple[str, str]]) -> list[PackCandidate]:
+        # alternates にしか無い object と chunk 保存の巨大 blob は pack に入れない
+        store = self.object_store
+        result = []
+        for oid, (typ, path) in objects.items():
+            if not store.is_local(oid):
+                continue
+            if typ == "blob" and store.chunk_store.has(oid):
+                continue
+            result.append(PackCandidate(oid, typ, store.stat(oid)[1], name_hash(path)))
+        result.sort(key=pack_order)
+        return result
+
+    def write_pack(
+        self,
+        candidates: list[PackCandidate],
+        window: int = DEFAULT_WINDOW,
+        depth: int = DEFAULT_DEPTH,
+    ) -> tuple[Path, int]:
+        writer = PackWriter(
+            self.object_store.pack_dir,
+            len(candidates),
+            durability=self.object_store.durability,
+        )
+        try:
+            deltas = write_objects(self.object_store, writer, candidates, window, depth)
+            return writer.finish(), deltas
+        except BaseException:
+            writer.abort()
+            raise
+
+    # --- gc 本体 ---
+    def gc(
+        self,
+        prune_expire: str = DEFAULT_PRUNE_EXPIRE,
+        window: int = DEFAULT_WINDOW,
+        depth: int = DEFAULT_DEPTH,
+    ) -> GcResult:
+        store = self.object_store
+        timings: dict[str, float] = {}
+        expire = parse_expire(prune_expire)
+        size_before = disk_usage(store.object_dir)
+
+        start = time.perf_counter()
+        objects = self.reachable()
+        candidates = self._candidates(objects)
+        timings["enumerate"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        old_packs = list(store.packs())
+        if candidates:
+            pack_path, deltas = self.write_pack(candidates, window, depth)
+        else:
+            pack_path, deltas = None, 0
+        timings["pack"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loosened, pruned = self._drop_old_packs(old_packs, pack_path, objects, expire)
+        packed = {c.oid for c in candidates}
+        for oid, path in list(store.loose_objects()):
+            if oid in packed:
+                path.unlink()
+            elif oid not in objects and expire is not None:
+                try:
+                    if path.stat().st_mtime < expire:
+                        path.unlink()
+                        pruned += 1
+                except FileNotFoundError:
+                    pass
+        if expire is not None:
+            # chunk 保存の巨大 blob は manifest と、使われなくなった chunk を消す
+            pruned += store.chunk_store.prune(objects, expire)
+            # 落ちたプロセスが残した一時ファイル（object・pack と .git 直下の index など）
+            prune_tmp_files(store.object_dir, expire)
+            prune_tmp_files(self.index_store.git_dir, expire, recursive=False)
+        self._remove_empty_fanouts()
+        if self.blame_cache is not None:
+            commits = {oid for oid, (typ, _) in objects.items() if typ == "commit"}
+            self.blame_cache.prune(commits, expire)
+        timings["prune"] = time.perf_counter() - start
+
+        return GcResult(
+            len(candidates),
+            deltas,
+            pruned,
+            loosened,
+            size_before,
+            disk_usage(store.object_dir),
+            timings,
+        )
+
+    def _drop_old_packs(
+        self,
+        old_packs: list[PackFile],
+        new_pack: Path | None,
+        reachable: dict[str, tuple[str, str]],
+        expire: float | None,
+    ) -> tuple[int, int]:
+        # 古い pack の到達不能な object は、pack が猶予期間内なら loose に戻して
+        # （mtime は pack のもの）次回以降の gc に判断を任せる。猶予期間を過ぎた
+        # pack のものは pack ごと消える。戻り値は (loose に戻した数, 消えた数)
+        store = self.object_store
+        loosened = dropped = 0
+        for pack in old_packs:
+            if new_pack is not None and pack.pack_path == new_pack:
+                continue
+            mtime = pack.pack_path.stat().st_mtime
+            keep = expire is None or mtime >= expire
+            for raw_oid, offset in pack.iter_entries():
+                oid = raw_oid.hex()
+                if oid in reachable or store.is_loose(oid):
+                    continue
+                if not keep:
+                    dropped += 1
+                    continue
+                path = store.write_loose(*pack.read_at(offset))
+                os.utime(path, (mtime, mtime))
+                loosened += 1
+            pack.idx_path.unlink()
+            pack.pack_path.unlink()
+        # pack が 1 つになるので multi-pack-index は要らない（古いものは壊れている）
+        (store.pack_dir / MIDX_NAME).unlink(missing_ok=True)
+        store.close_packs()
+        return loosened, dropped
+
+    # --- geometric repack ---
+    def geometric_repack(
+        self,
+        factor: int,
+        window: int = DEFAULT_WINDOW,
+        depth: int = DEFAULT_DEPTH,
+        midx: bool = True,
+    ) -> GeometricResult:
+        # 小さい pack と loose object だけを 1 つの pack にまとめる。大きい pack は
+        # 読みも書きもしないので、かかる時間は直近に増えた object の量で決まる
+        store = self.object_store
+        timings: dict[str, float] = {}
+
+        start = time.perf_counter()
+        packs = sorted(store.packs(), key=lambda p: p.count)
+        loose = self._loose_candidates(packs)
+        split = geometric_split([p.count for p in packs], factor, len(loose))
+        rolled, kept = packs[:split], packs[split:]
+        candidates = self._rollup_candidates(rolled, loose)
+        timings["enumerate"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # pack 1 つだけで loose object も無ければ書き直しても同じ
+        rewrite = bool(candidates) and (
+            len(rolled) > 1 or len(candidates) > sum(p.count for p in rolled)
+        )
+        pack_path, deltas = None, 0
+        if rewrite:
+            pack_path, deltas = self.write_pack(candidates, window, depth)
+        else:
+            rolled, kept = [], packs
+        timings["pack"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        midx_objects = 0
+        if midx:
+            new_pack = PackFile(pack_path.with_suffix(".idx")) if pack_path else None
+            try:
+                midx_objects = self._update_midx(rolled, kept, new_pack)
+            finally:
+                if new_pack is not None:
+                    new_pack.close()
+        else:
+            (store.pack_dir / MIDX_NAME).unlink(missing_ok=True)
+        timings["midx"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if rewrite:
+            packed = {c.oid for c in candidates}
+            for oid, path in list(store.loose_objects()):
+                if oid in packed:
+                    path.unlink()
+            for pack in rolled:
+                pack.idx_path.unlink()
+                pack.pack_path.unlink()
+            store.close_packs()
+            self._remove_empty_fanouts()
+        timings["prune"] = time.perf_counter() - start
+
+        return GeometricResult(
+            len(rolled),
+            len(kept),
+            len(candidates) if rewrite else 0,
+            deltas,
+            midx_objects,
+            timings,
+        )
+
+    def _loose_candidates(self, packs: list[PackFile]) -> dict[str, tuple[str, int]]:
+        # どの pack にも入っていない loose object
+        store = self.object_store
+        return {
+            oid: store.stat(oid)
+            for oid, _ in store.loose_objects()
+            if not any(oid in p for p in packs)
+        }
+
+    def _rollup_candidates(
+        self, rolled: list[PackFile], loose: dict[str, tuple[str, int]]
+    ) -> list[PackCandidate]:
+        # 到達可能性は調べない（消すのは gc の仕事）。path が分からないので
+        # type と大きさだけで並べる
+        found = dict(loose)
+        for pack in rolled:
+            for raw_oid, offset in pack.iter_entries():
+                oid = raw_oid.hex()
+                if oid not in found:
+                    found[oid] = pack.stat_at(offset)
+        result = [PackCandidate(oid, t, size, 0) for oid, (t, size) in found.items()]
+        result.sort(key=lambda c: (_TYPE_ORDER[c.type], -c.size))
+        return result
+
+    def _update_midx(
+        self,
+        rolled: list[PackFile],
+        kept: list[PackFile],
+        new_pack: PackFile | None,
+    ) -> int:
+        # 既存の multi-pack-index から消える pack の行を除き、新しい pack の idx と
+        # 併合する。残す pack の idx を読み直すのは、まだ載っていないものだけ
+        store = self.object_store
+        old = store.midx
+        gone = {p.idx_path.name for p in rolled}
+        covered = set(old.pack_names) - gone if old is not None else set()
+        names = [p.idx_path.name for p in kept]
+        if new_pack is None and old is not None and covered == set(names):
+            return old.count
+        sources = []
+        if new_pack is not None:
+            names.append(new_pack.idx_path.name)
+            # 重複した object は新しい pack のものを採る
+            sources.append(pack_entries(new_pack))
+        sources += [pack_entries(p) for p in kept if p.idx_path.name not in covered]
+        if old is not None and covered:
+            sources.append(e for e in old.iter_entries() if e[1] in covered)
+        return write_midx(store.pack_dir / MIDX_NAME, names, merge_entries(sources))
+
+    def _remove_empty_fanouts(self) -> None:
+        for fanout in self.object_store.object_dir.iterdir():
+            if len(fanout.name) == 2 and fanout.is_dir():
+                try:
+                    fanout.rmdir()
+                except OSError:
+                    pass
@@ -0,0 +1,198 @@
+import os
+import posixpath
+import re
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import NamedTuple
+from mini_git.models import TREE_MODE
+from mini_git.services.checkout_service import GITLINK_MODE, SYMLINK_MODE
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.object_store import ObjectStore
+
+# 1 つの worker にまとめて渡すパスの数
+BATCH_SIZE = 64
+# 投入しておく batch の数（worker 数あたり）。結果はパス順に受け取る
+MAX_PENDING = 4
+# git と同じく先頭 8000 byte に NUL があれば binary とみなして飛ばす
+BINARY_SNIFF_SIZE = 8000
+# これを含まなければ正規表現の特殊文字を持たない固定文字列
+_REGEX_META = frozenset(".^$*+?{}[]\\|()")
+
+
+class GrepTarget(NamedTuple):
+    # oid が None なら worktree のファイルを読む
+    path: str
+    oid: str | None
+
+
+class GrepMatch(NamedTuple):
+    line_no: int
+    line: bytes
+
+
+class GrepPattern:
+    # 本体は bytes のまま照合する（decode しない）
+    def __init__(
+        self, pattern: str, ignore_case: bool = False, fixed: bool = False
+    ) -> None:
+        raw = pattern.encode("utf-8", "surrogateescape")
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        self.regex = re.compile(re.escape(raw) if fixed else raw, flags)
+        # 固定文字列なら、正規表現を走らせる前に部分文字列の検索で候補を絞る
+        self.literal: bytes | None = None
+        if fixed or not _REGEX_META.intersection(pattern):
+            self.literal = raw.lower() if ignore_case else raw
+        self.ignore_case = ignore_case
+
+    def might_match(self, data: bytes) -> bool:
+        if self.literal is None:
+            return True
+        if self.ignore_case:
+            # ASCII 以外を含む pattern は lower() で揃わないことがあるので絞らない
+            return not self.literal.isascii() or self.literal in data.lower()
+        return self.literal in data
+
+    def search(self, data: bytes) -> list[GrepMatch]:
+        matches = []
+        line_no = 1
+        counted = pos = 0
+        while True:
+            m = self.regex.search(data, pos)
+            if m is None:
+                break
+            start = data.rfind(b"\n", 0, m.start()) + 1
+            end = data.find(b"\n", m.start())
+            if end < 0:
+                end = len(data)
+            # \s や [^x] は改行にも一致するので、行をまたいだら その行の中だけで
+            # 探し直す（git grep は 1 行ずつ照合する）
+            if m.end() > end and self.regex.search(data, start, end) is None:
+                pos = end + 1
+                if pos > len(data):
+                    break
+                continue
+            line_no += data.count(b"\n", counted, start)
+            counted = start
+            matches.append(GrepMatch(line_no, data[start:end]))
+            # 同じ行の 2 つ目以降の一致は数えない
+            pos = end + 1
+            if pos > len(data):
+                break
+        return matches
+
+
+def is_binary(data: bytes) -> bool:
+    return b"\0" in data[:BINARY_SNIFF_SIZE]
+
+
+def wanted(path: str, is_tree: bool, pathspecs: list[str] | None) -> bool:
+    # ディレクトリは pathspec の途中でも降りる必要がある
+    if not pathspecs:
+        return True
+    for spec in pathspecs:
+        if path == spec or path.startswith(spec + "/") or not spec:
+            return True
+        if is_tree and spec.startswith(path + "/"):
+            return True
+    return False
+
+
+def display_path(path: str, base: str) -> str:
+    # git grep と同じく、サブディレクトリから実行したときはそこからの相対パスで出す
+    return posixpath.relpath(path, base) if base else path
+
+
+class GrepService:
+    def __init__(
+        self,
+        object_store: ObjectStore,
+        tree_store: TreeStore,
+        worktree: Path | None = None,
+        workers: int | None = None,
+    ) -> None:
+        self.object_store = object_store
+        self.tree_store = tree_store
+        self.worktree = worktree
+        self.workers = workers
+
+    # --- 検索する対象 ---
+    def index_targets(
+        self,
+        index_store: IndexStore,
+        pathspecs: list[str] | None = None,
+        cached: bool = False,
+    ) -> Iterator[GrepTarget]:
+        # cached なら index の blob を、そうでなければ worktree のファイルを読む
+        raw, _ = index_store.snapshot()
+        for key in sorted(raw):
+            mode = raw[key]["mode"]
+            if mode in (TREE_MODE, GITLINK_MODE) or key.endswith("/"):
+                continue
+            if not wanted(key, False, pathspecs):
+                continue
+            if cached:
+                yield GrepTarget(key, raw[key]["oid"])
+            elif mode != SYMLINK_MODE:
+                yield GrepTarget(key, None)
+
+    def tree_targets(
+        self, tree_oid: str, pathspecs: list[str] | None = None, prefix: str = ""
+    ) -> Iterator[GrepTarget]:
+        # 過去の revision も checkout せずに tree から直接読む
+        for e in self.tree_store.iter_tree(tree_oid):
+            path = prefix + e.name
+            if not wanted(path, e.is_tree, pathspecs):
+                continue
+            if e.is_tree:
+                yield from self.tree_targets(e.oid, pathspecs, path + "/")
+            elif e.mode != GITLINK_MODE:
+                yield GrepTarget(path, e.oid)
+
+    # --- 並列の検索 ---
+    def _read(self, target: GrepTarget) -> bytes | None:
+        if target.oid is not None:
+            return self.object_store.read(target.oid)[1]
+        if self.worktree is None:
+            raise RuntimeError(f"no worktree to read '{target.path}' from")
+        try:
+            return (self.worktree / target.path).read_bytes()
+        except (FileNotFoundError, IsADirectoryError):
+            # sparse checkout で置いていないファイルなど
+            return None
+
+    def _search_batch(
+        self, pattern: GrepPattern, batch: list[GrepTarget]
+    ) -> list[tuple[str, list[GrepMatch]]]:
+        # 固定文字列を含まないものは正規表現を走らせず、binary は照合しない
+        results = []
+        for target in batch:
+            data = self._read(target)
+            if data is None or not pattern.might_match(data) or is_binary(data):
+                continue
+            matches = pattern.search(data)
+            if matches:
+                results.append((target.path, matches))
+        return results
+
+    def grep(
+        self, pattern: GrepPattern, targets: Iterable[GrepTarget]
+    ) -> Iterator[tuple[str, list[GrepMatch]]]:
+        # パスを batch に分けて worker で読み・伸長・照合し、パス順に返す
+        targets = iter(targets)
+        workers = self.workers or min(32, (os.cpu_count() or 1) + 4)
+        limit = workers * MAX_PENDING
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending: deque[Future] = deque()
+            while True:
+                while len(pending) < limit:
+                    batch = list(islice(targets, BATCH_SIZE))
+                    if not batch:
+                        break
+                    pending.append(pool.submit(self._search_batch, pattern, batch))
+                if not pending:
+                    return
+                yield from pending.popleft().result()
@@ -0,0 +1,160 @@
+import re
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from mini_git.services.commit_service import BloomStats, CommitInfo, CommitService
+from mini_git.services.commit_store import LazyCommit
+
+ABBREV = 7
+_PLACEHOLDER_RE = re.compile(r"%(an|ae|ad|at|cn|ce|cd|ct|[HhTtPpsbBn%])")
+
+
+def format_date(ident: str) -> str:
+    # "Name <email> <epoch> <tz>" の日時を git log の既定形式にする
+    stamp, tz = ident.rsplit(" ", 2)[1:]
+    sign = -1 if tz.startswith("-") else 1
+    offset = timedelta(hours=int(tz[1:3]), minutes=int(tz[3:5])) * sign
+    t = datetime.fromtimestamp(int(stamp), timezone(offset))
+    return f"{t:%a %b} {t.day} {t:%H:%M:%S %Y} {tz}"
+
+
+def _name(ident: str) -> str:
+    return ident.rsplit(" <", 1)[0]
+
+
+def _email(ident: str) -> str:
+    return ident.rsplit(" <", 1)[1].split(">", 1)[0]
+
+
+def _stamp(ident: str) -> str:
+    return ident.rsplit(" ", 2)[1]
+
+
+def _merge_line(info: CommitInfo) -> str:
+    if len(info.parents) < 2:
+        return ""
+    return "Merge: " + " ".join(p[:ABBREV] for p in info.parents) + "\n"
+
+
+def _indented(message: str) -> str:
+    return "\n".join(f"    {line}" for line in message.rstrip("\n").split("\n"))
+
+
+class _Entry:
+    # 1 commit 分の値。graph にあるものは object を読まずに返し、
+    # それ以外が初めて要ったときにだけ commit object を読む
+    def __init__(self, service: CommitService, oid: str) -> None:
+        self.service = service
+        self.oid = oid
+        self.info = service.info(oid)
+        self._commit: LazyCommit | None = None
+
+    @property
+    def commit(self) -> LazyCommit:
+        if self._commit is None:
+            self._commit = self.service.commit_store.read_lazy(self.oid)
+        return self._commit
+
+
+# プレースホルダ → 値。H / h / T / t / P / p / ct は commit-graph だけで決まる
+_FIELDS: dict[str, Callable[[_Entry], str]] = {
+    "H": lambda e: e.oid,
+    "h": lambda e: e.oid[:ABBREV],
+    "T": lambda e: e.info.tree,
+    "t": lambda e: e.info.tree[:ABBREV],
+    "P": lambda e: " ".join(e.info.parents),
+    "p": lambda e: " ".join(p[:ABBREV] for p in e.info.parents),
+    "ct": lambda e: str(e.info.commit_time),
+    "an": lambda e: _name(e.commit.author),
+    "ae": lambda e: _email(e.commit.author),
+    "ad": lambda e: format_date(e.commit.author),
+    "at": lambda e: _stamp(e.commit.author),
+    "cn": lambda e: _name(e.commit.committer),
+    "ce": lambda e: _email(e.commit.committer),
+    "cd": lambda e: format_date(e.commit.committer),
+    "s": lambda e: e.commit.subject,
+    "b": lambda e: e.commit.body,
+    "B": lambda e: e.commit.message,
+    "n": lambda e: "\n",
+    "%": lambda e: "%",
+}
+
+Formatter = Callable[[_Entry], str]
+
+
+def _medium(e: _Entry) -> str:
+    # git log の既定の書式
+    return (
+        f"commit {e.oid}\n{_merge_line(e.info)}"
+        f"Author: {e.commit.author.rsplit(' ', 2)[0]}\n"
+        f"Date:   {format_date(e.commit.author)}\n\n"
+        f"{_indented(e.commit.message)}"
+    )
+
+
+# git log の名前付き書式
+PRETTY_FORMATS: dict[str, str | Formatter] = {
+    "oneline": "%H %s",
+    "medium": _medium,
+}
+
+
+def parse_format(fmt: str) -> tuple[str, str, str]:
+    # --format の値を (書式, commit 間に置くもの, 各 commit の後に置くもの) に分ける。
+    # "format:" は commit 間に、"tformat:" と % を含む書式は各 commit の後に改行を
+    # 置く。それ以外は git と同じく名前付きの書式とみなし、知らない名前は断る
+    if fmt.startswith("format:"):
+        return fmt.removeprefix("format:"), "\n", ""
+    if fmt.startswith("tformat:"):
+        return fmt.removeprefix("tformat:"), "", "\n"
+    if "%" in fmt:
+        return fmt, "", "\n"
+    if fmt not in PRETTY_FORMATS:
+        raise RuntimeError(f"invalid --pretty format: {fmt}")
+    # medium は commit 間を空行で区切る
+    return fmt, "\n" if fmt == "medium" else "", "\n"
+
+
+def compile_format(fmt: str) -> Formatter:
+    # 書式は 1 度だけ解析し、commit ごとには決まった関数の列を呼ぶだけにする
+    named = PRETTY_FORMATS.get(fmt, fmt)
+    if not isinstance(named, str):
+        return named
+    fmt = named
+    parts: list[str | Callable[[_Entry], str]] = []
+    pos = 0
+    for m in _PLACEHOLDER_RE.finditer(fmt):
+        if m.start() > pos:
+            parts.append(fmt[pos : m.start()])
+        parts.append(_FIELDS[m.group(1)])
+        pos = m.end()
+    if pos < len(fmt):
+        parts.append(fmt[pos:])
+
+    def render(entry: _Entry) -> str:
+        return "".join(p if isinstance(p, str) else p(entry) for p in parts)
+
+    return render
+
+
+class LogService:
+    def __init__(self, commit_service: CommitService) -> None:
+        self.commit_service = commit_service
+
+    def iter_log(
+        self,
+        tips: Iterable[str],
+        fmt: str = "medium",
+        max_count: int | None = None,
+        paths: list[str] | None = None,
+        stats: BloomStats | None = None,
+    ) -> Iterator[str]:
+        # commit 日時の優先度付きキューを辿りながら 1 件ずつ整形して返す。
+        # 先頭の数件を出すのに履歴全体を読むことはない
+        service = self.commit_service
+        render = compile_format(fmt)
+        oids = service.walk_paths(tips, paths, stats) if paths else service.walk(tips)
+        # git と同じく負の件数は無制限
+        limit = max_count if max_count is None or max_count >= 0 else None
+        for oid in islice(oids, limit):
+            yield render(_Entry(service, oid))
@@ -0,0 +1,210 @@
+from typing import NamedTuple
+from mini_git.models import TREE_MODE, TreeEntry
+from mini_git.services.checkout_service import GITLINK_MODE, SYMLINK_MODE
+from mini_git.services.commit_service import CommitService
+from mini_git.services.diff_service import BINARY_PROBE
+from mini_git.types import ObjectType
+from mini_git.utils.merge3 import merge_lines
+
+
+class MergeConflict(NamedTuple):
+    # kind は git の "CONFLICT (<kind>)" と同じ: content / add/add / modify/delete
+    # / file/directory / mode
+    path: str
+    kind: str
+    message: str
+
+
+class MergeResult(NamedTuple):
+    tree: str
+    conflicts: list[MergeConflict]
+
+    @property
+    def clean(self) -> bool:
+        return not self.conflicts
+
+
+class MergeService:
+    def __init__(self, commit_service: CommitService) -> None:
+        self.commit_service = commit_service
+        self.tree_store = commit_service.tree_store
+        self.object_store = commit_service.object_store
+
+    def merge_commits(
+        self, ours: str, theirs: str, labels: tuple[str, str] = ("ours", "theirs")
+    ) -> MergeResult:
+        # merge base は commit-graph の generation 番号を使って探す
+        bases = self.commit_service.merge_bases(ours, theirs)
+        info = self.commit_service.info
+        return self.merge_trees(
+            self._virtual_base(bases), info(ours).tree, info(theirs).tree, labels
+        )
+
+    def _virtual_base(self, bases: list[str]) -> str | None:
+        # merge base が複数あるときは、それらを先に merge した tree を base にする
+        if not bases:
+            return None
+        info = self.commit_service.info
+        tree = info(bases[0]).tree
+        for other in bases[1:]:
+            inner = self.commit_service.merge_bases(bases[0], other)
+            tree = self.merge_trees(
+                self._virtual_base(inner), tree, info(other).tree
+            ).tree
+        return tree
+
+    def merge_trees(
+        self,
+        base: str | None,
+        ours: str | None,
+        theirs: str | None,
+        labels: tuple[str, str] = ("ours", "theirs"),
+    ) -> MergeResult:
+        # worktree にも index にも触れず、結果の tree を object として書くだけ
+        conflicts: list[MergeConflict] = []
+        tree = self._merge_tree(base, ours, theirs, "", labels, conflicts)
+        if tree is None:
+            tree = self.tree_store.write_tree([])
+        return MergeResult(tree, conflicts)
+
+    def _merge_tree(
+        self,
+        base: str | None,
+        ours: str | None,
+        theirs: str | None,
+        prefix: str,
+        labels: tuple[str, str],
+        conflicts: list[MergeConflict],
+    ) -> str | None:
+        # oid が揃っているか片側しか変わっていない subtree は読まずに決まる
+        if ours == theirs:
+            return ours
+        if base == ours:
+            return theirs
+        if base == theirs:
+            return ours
+        sides = [
+            {e.name: e for e in self.tree_store.iter_tree(oid)} if oid else {}
+            for oid in (base, ours, theirs)
+        ]
+        entries = []
+        for name in sorted(sides[0].keys() | sides[1].keys() | sides[2].keys()):
+            e = self._merge_entry(
+                name,
+                sides[0].get(name),
+                sides[1].get(name),
+                sides[2].get(name),
+                prefix,
+                labels,
+                conflicts,
+            )
+            if e is not None:
+                entries.append(e)
+        return self.tree_store.write_tree(entries) if entries else None
+
+    def _merge_entry(
+        self,
+        name: str,
+        b: TreeEntry | None,
+        o: TreeEntry | None,
+        t: TreeEntry | None,
+        prefix: str,
+        labels: tuple[str, str],
+        conflicts: list[MergeConflict],
+    ) -> TreeEntry | None:
+        if o == t:
+            return o
+        if b == o:
+            return t
+        if b == t:
+            return o
+        path = prefix + name
+        # 両側で変わったエントリ。ディレクトリどうし（片側の削除を含む）は中へ降りる
+        if all(e is None or e.is_tree for e in (o, t)):
+            oid = self._merge_tree(
+                b.oid if b is not None and b.is_tree else None,
+                o.oid if o is not None else None,
+                t.oid if t is not None else None,
+                path + "/",
+                labels,
+                conflicts,
+            )
+            return TreeEntry(name, TREE_MODE, oid) if oid else None
+        if o is None or t is None:
+            if t is not None:
+                kept, deleted_in, modified_in = t, labels[0], labels[1]
+            elif o is not None:
+                kept, deleted_in, modified_in = o, labels[1], labels[0]
+            else:
+                return None
+            if kept.is_tree:
+                # ファイルの削除とディレクトリの追加
+                return self._merge_entry(name, None, o, t, prefix, labels, conflicts)
+            conflicts.append(
+                MergeConflict(
+                    path,
+                    "modify/delete",
+                    f"{path} deleted in {deleted_in} and modified in {modified_in}."
+                    f"  Version {modified_in} of {path} left in tree.",
+                )
+            )
+            return kept
+        if o.is_tree or t.is_tree:
+            conflicts.append(
+                MergeConflict(
+                    path,
+                    "file/directory",
+                    f"{path} is a directory in one side and a file in the other.",
+                )
+            )
+            return o
+        return self._merge_file(name, b, o, t, path, labels, conflicts)
+
+    def _merge_file(
+        self,
+        name: str,
+        b: TreeEntry | None,
+        o: TreeEntry,
+        t: TreeEntry,
+        path: str,
+        labels: tuple[str, str],
+        conflicts: list[MergeConflict],
+    ) -> TreeEntry:
+        base_mode = b.mode if b is not None else None
+        if o.mode == t.mode or t.mode == base_mode:
+            mode = o.mode
+        elif o.mode == base_mode:
+            mode = t.mode
+        else:
+            conflicts.append(
+                MergeConflict(path, "mode", f"{path} has conflicting file modes.")
+            )
+            mode = o.mode
+
+        base_oid = b.oid if b is not None and not b.is_tree else None
+        if o.oid == t.oid or t.oid == base_oid:
+            return TreeEntry(name, mode, o.oid)
+        if o.oid == base_oid:
+            return TreeEntry(name, mode, t.oid)
+
+        kind = "content" if base_oid is not None else "add/add"
+        special = (SYMLINK_MODE, GITLINK_MODE)
+        if o.mode in special or t.mode in special:
+            conflicts.append(MergeConflict(path, kind, f"Merge conflict in {path}"))
+            return o
+        contents = [
+            self.object_store.read(oid)[1] if oid else b""
+            for oid in (base_oid, o.oid, t.oid)
+        ]
+        if any(b"\0" in c[:BINARY_PROBE] for c in contents):
+            conflicts.append(
+                MergeConflict(path, "content", f"Cannot merge binary files: {path}")
+            )
+            return o
+        merged = merge_lines(
+            contents[0], contents[1], contents[2], labels[0], labels[1]
+        )
+        if merged.conflicts:
+            conflicts.append(MergeConflict(path, kind, f"Merge conflict in {path}"))
+        oid = self.object_store.write(ObjectType.BLOB, merged.content)
+        return TreeEntry(name, mode, oid)
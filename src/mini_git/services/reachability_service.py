@@ -0,0 +1,210 @@
+from collections.abc import Iterable
+from mini_git.services.checkout_service import GITLINK_MODE
+from mini_git.services.commit_service import CommitService
+from mini_git.storage.bitmap_index import BitmapIndex, write_bitmap_index
+from mini_git.types import ObjectType
+
+# この間隔ごとの commit と ref の先端に bitmap を持たせる
+BITMAP_INTERVAL = 100
+
+
+class ReachableObjects:
+    # bitmap の位置で表せる object はビット集合、それ以外は oid の集合で持つ
+    def __init__(self, index: BitmapIndex | None) -> None:
+        self.index = index
+        self.bits = 0
+        self.extra: set[str] = set()
+
+    def _pos(self, oid: str) -> int | None:
+        return self.index.position(oid) if self.index is not None else None
+
+    def __contains__(self, oid: str) -> bool:
+        pos = self._pos(oid)
+        if pos is None:
+            return oid in self.extra
+        return bool(self.bits >> pos & 1)
+
+    def add(self, oid: str) -> None:
+        pos = self._pos(oid)
+        if pos is None:
+            self.extra.add(oid)
+        else:
+            self.bits |= 1 << pos
+
+    def __len__(self) -> int:
+        return self.bits.bit_count() + len(self.extra)
+
+    def oids(self) -> set[str]:
+        found = (
+            set(self.index.iter_oids(self.bits)) if self.index is not None else set()
+        )
+        return found | self.extra
+
+
+class ReachabilityService:
+    def __init__(self, commit_service: CommitService) -> None:
+        self.commit_service = commit_service
+        self.tree_store = commit_service.tree_store
+        object_dir = commit_service.object_store.object_dir
+        self.bitmap_path = object_dir / "info" / "reachability.bitmap"
+        self._index: BitmapIndex | None = None
+        self._index_loaded = False
+
+    @property
+    def index(self) -> BitmapIndex | None:
+        if not self._index_loaded:
+            self._index = BitmapIndex.open(self.bitmap_path)
+            self._index_loaded = True
+        return self._index
+
+    def _topo_order(self, tips: list[str], stop: Iterable[str] = ()) -> list[str]:
+        # 親が子より先に並ぶ順序（深い履歴でも再帰しない）。stop の commit は
+        # 並べず、その先も辿らない
+        info = self.commit_service.info
+        order: list[str] = []
+        done: set[str] = set(stop)
+        for tip in tips:
+            stack = [(tip, False)]
+            while stack:
+                oid, expanded = stack.pop()
+                if oid in done:
+                    continue
+                if expanded:
+                    done.add(oid)
+                    order.append(oid)
+                    continue
+                stack.append((oid, True))
+                stack.extend((p, False) for p in info(oid).parents if p not in done)
+        return order
+
+    def write_bitmaps(
+        self,
+        tips: Iterable[str] | None = None,
+        interval: int = BITMAP_INTERVAL,
+        incremental: bool = False,
+    ) -> tuple[int, int]:
+        # 古い commit から順に object の位置を割り当てるので、古い commit の bitmap
+        # ほど先頭側に 1 が連続して EWAH でよく縮む。incremental なら既存の位置と
+        # bitmap をそのまま残し、新しい object を末尾に足す
+        tips = [
+            oid
+            for oid in (self.commit_service.ref_tips() if tips is None else tips)
+            if self.commit_service.object_store.stat(oid)[0] == ObjectType.COMMIT.value
+        ]
+        info = self.commit_service.info
+        positions: dict[str, int] = {}
+        oids: list[str] = []
+        types = {t: 0 for t in (ObjectType.COMMIT, ObjectType.TREE, ObjectType.BLOB)}
+        reaches: dict[str, int] = {}
+        bitmaps: dict[str, int] = {}
+        index = self.index if incremental else None
+        if index is not None:
+            oids = [index.oid(pos) for pos in range(len(index))]
+            positions = {oid: pos for pos, oid in enumerate(oids)}
+            types.update(index.types)
+            for oid in index.commits():
+                bitmap = index.bitmap(oid)
+                if bitmap is not None:
+                    bitmaps[oid] = reaches[oid] = bitmap
+        order = self._topo_order(tips, stop=bitmaps)
+
+        def add(oid: str, typ: ObjectType, reach: int) -> int:
+            pos = positions.get(oid)
+            if pos is None:
+                pos = positions[oid] = len(oids)
+                oids.append(oid)
+                types[typ] |= 1 << pos
+            return reach | (1 << pos)
+
+        def add_tree(tree: str, reach: int) -> int:
+            stack = [tree]
+            while stack:
+                oid = stack.pop()
+                pos = positions.get(oid)
+                # 既に含まれている tree の配下はすべて含まれている
+                if pos is not None and reach >> pos & 1:
+                    continue
+                reach = add(oid, ObjectType.TREE, reach)
+                for e in self.tree_store.read_tree(oid):
+                    if e.mode == GITLINK_MODE:
+                        continue
+                    if e.is_tree:
+                        stack.append(e.oid)
+                    else:
+                        reach = add(e.oid, ObjectType.BLOB, reach)
+            return reach
+
+        children: dict[str, int] = {}
+        for oid in order:
+            for p in info(oid).parents:
+                children[p] = children.get(p, 0) + 1
+        selected = set(tips) | set(order[interval - 1 :: interval])
+        for oid in order:
+            commit = info(oid)
+            reach = 0
+            for p in commit.parents:
+                reach |= reaches[p]
+                # 子をすべて処理した親のビット集合は捨てる
+                children[p] -= 1
+                if children[p] == 0 and p not in selected and p not in bitmaps:
+                    del reaches[p]
+            reach = add(oid, ObjectType.COMMIT, reach)
+            reach = add_tree(commit.tree, reach)
+            reaches[oid] = reach
+            if oid in selected:
+                bitmaps[oid] = reach
+
+        write_bitmap_index(self.bitmap_path, oids, types, bitmaps)
+        if self._index is not None:
+            self._index.close()
+        self._index_loaded = False
+        return len(oids), len(bitmaps)
+
+    def reachable(
+        self, tips: Iterable[str], use_bitmaps: bool = True
+    ) -> ReachableObjects:
+        # bitmap のある commit は OR するだけ。無い commit からは bitmap のある
+        # commit に突き当たるまで辿る
+        index = self.index if use_bitmaps else None
+        result = ReachableObjects(index)
+        tips = list(tips)
+        seen: set[str] = set()
+        stack: list[str] = []
+        for tip in tips:
+            bitmap = index.bitmap(tip) if index is not None else None
+            if bitmap is not None:
+                result.bits |= bitmap
+                seen.add(tip)
+            else:
+                stack.append(tip)
+        while stack:
+            oid = stack.pop()
+            if oid in seen:
+                continue
+            seen.add(oid)
+            bitmap = index.bitmap(oid) if index is not None else None
+            if bitmap is not None:
+                result.bits |= bitmap
+                continue
+            if oid in result:
+                continue  # OR 済みの bitmap に含まれている
+            result.add(oid)
+            commit = self.commit_service.info(oid)
+            self._add_tree(commit.tree, result)
+            stack.extend(commit.parents)
+        return result
+
+    def _add_tree(self, tree: str, result: ReachableObjects) -> None:
+        stack = [tree]
+        while stack:
+            oid = stack.pop()
+            if oid in result:
+                continue
+            result.add(oid)
+            for e in self.tree_store.read_tree(oid):
+                if e.mode == GITLINK_MODE:
+                    continue
+                if e.is_tree:
+                    stack.append(e.oid)
+                elif e.oid not in result:
+                    result.add(e.oid)
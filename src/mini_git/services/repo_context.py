@@ -1,17 +1,44 @@
 from pathlib import Path
-from mini_git.storage import ObjectStore, GitDir
+from mini_git.services.commit_store import CommitStore
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage import ObjectStore, GitDir, ConfigStore
+from mini_git.storage.compression import CompressionPolicy
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.ref_store import RefStore
+from mini_git.storage.sparse_checkout_store import SparseCheckoutStore
+from mini_git.utils.fs import Durability
 
 
 class RepoContext:
     worktree: Path
     git_path: Path
+    config: ConfigStore
+    durability: Durability
     object_store: ObjectStore
-    # refs
+    index_store: IndexStore
+    tree_store: TreeStore
+    commit_store: CommitStore
+    sparse_store: SparseCheckoutStore
+    ref_store: RefStore
 
     def __init__(self, worktree: Path, git_path: Path) -> None:
         self.worktree = worktree
         self.git_path = git_path
-        self.object_store = ObjectStore(git_path)
+        self.config = ConfigStore(git_path)
+        # object・index・ref で同じものを使い、batch の同期を共有する
+        self.durability = Durability.from_config(self.config)
+        # alternates はここで一度だけ解析し、以降は ObjectStore が保持する
+        self.object_store = ObjectStore.with_alternates(
+            git_path,
+            large_object_threshold=self.config.get_int("mgit.largeObjectThreshold"),
+            compression=CompressionPolicy.from_config(self.config),
+            durability=self.durability,
+        )
+        self.index_store = IndexStore(git_path, durability=self.durability)
+        self.tree_store = TreeStore(self.object_store)
+        self.commit_store = CommitStore(self.object_store)
+        self.sparse_store = SparseCheckoutStore(git_path)
+        self.ref_store = RefStore(git_path, self.config, self.durability)
 
     @classmethod
     def require_repo(cls, start: Path | None = None) -> "RepoContext":
@@ -26,11 +53,7 @@ class RepoContext:
         cls, path: Path, default_branch: str = "main"
     ) -> "RepoContext":
         git_dir = GitDir.ensure_layout(path)
-        # head = git_dir.git_path / "HEAD"
-        # if not head.exists():
-        #     head.write_text(f"ref: refs/heads/{default_branch}\n", encoding="utf-8")
-        return cls(
-            worktree=git_dir.worktree,
-            git_path=git_dir.git_path,
-            # refs=RefStore(gd.git_path),
-        )
+        repo = cls(worktree=git_dir.worktree, git_path=git_dir.git_path)
+        if repo.ref_store.read_raw("HEAD") is None:
+            repo.ref_store.set_symbolic("HEAD", f"refs/heads/{default_branch}")
+        return repo
@@ -0,0 +1,98 @@
+import re
+from mini_git.services.commit_store import LazyCommit, parse_commit
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.ref_store import RefStore
+from mini_git.types import ObjectType
+
+_HEX_RE = re.compile(r"^[0-9a-f]{4,40}$")
+# "main~2^2" のような祖先指定の接尾辞
+_SUFFIX_RE = re.compile(r"([~^])(\d*)$")
+# "main@{2}" のような reflog 指定（ref を省くと今のブランチ）
+_REFLOG_RE = re.compile(r"^(.*)@\{(\d+)\}$")
+
+
+class RevParseService:
+    def __init__(self, ref_store: RefStore, object_store: ObjectStore) -> None:
+        self.ref_store = ref_store
+        self.object_store = object_store
+
+    def resolve(self, rev: str) -> str:
+        m = _SUFFIX_RE.search(rev)
+        if m and m.start() > 0:
+            oid = self.resolve(rev[: m.start()])
+            n = int(m.group(2)) if m.group(2) else 1
+            if m.group(1) == "~":
+                for _ in range(n):
+                    oid = self._parent(oid, 1, rev)
+                return oid
+            return oid if n == 0 else self._parent(oid, n, rev)
+        m = _REFLOG_RE.match(rev)
+        if m:
+            return self._reflog(m.group(1), int(m.group(2)))
+        name = self.ref_store.dwim(rev)
+        if name is not None:
+            oid = self.ref_store.resolve(name)
+            if oid is None:
+                raise RuntimeError(f"'{rev}' does not point to a commit yet")
+            return oid
+        if _HEX_RE.match(rev):
+            if len(rev) == 40:
+                return rev
+            matches = self.object_store.iter_prefix(rev)
+            if len(matches) == 1:
+                return matches[0]
+            if len(matches) > 1:
+                raise RuntimeError(f"short object ID {rev} is ambiguous")
+        raise RuntimeError(f"unknown revision '{rev}'")
+
+    def _reflog(self, ref: str, n: int) -> str:
+        if ref:
+            name = self.ref_store.dwim(ref)
+        else:
+            name = self.ref_store.symbolic_target("HEAD") or "HEAD"
+        if name is None:
+            raise RuntimeError(f"unknown revision '{ref}@{{{n}}}'")
+        # 末尾から読むので、最近の n 件を辿る分しか読まない
+        reflog = self.ref_store.reflog
+        oid = reflog.nth(name, n)
+        if oid is None:
+            shown = ref or name.removeprefix("refs/heads/")
+            raise RuntimeError(
+                f"log for '{shown}' only has {reflog.count(name)} entries"
+            )
+        return oid
+
+    def _parent(self, oid: str, n: int, rev: str) -> str:
+        typ, raw = self.object_store.read(oid)
+        if typ != ObjectType.COMMIT.value:
+            raise RuntimeError(f"{oid} is a {typ}, not a commit")
+        parents = parse_commit(raw).parents
+        if len(parents) < n:
+            raise RuntimeError(f"unknown revision '{rev}'")
+        return parents[n - 1]
+
+    def peel(self, oid: str) -> tuple[str, str]:
+        # annotated tag を辿って (指す先の oid, type) を返す
+        typ = self.object_store.stat(oid)[0]
+        while typ == "tag":
+            target = LazyCommit(self.object_store.read(oid)[1]).header("object")
+            if not target:
+                raise RuntimeError(f"Corrupt tag {oid}: missing object")
+            oid = target
+            typ = self.object_store.stat(oid)[0]
+        return oid, typ
+
+    def peel_to_tree(self, oid: str) -> str:
+        oid, _ = self.peel(oid)
+        typ, raw = self.object_store.read(oid)
+        if typ == ObjectType.COMMIT.value:
+            first = raw.split(b"\n", 1)[0]
+            if not first.startswith(b"tree "):
+                raise RuntimeError(f"Corrupt commit {oid}: missing tree")
+            return first[5:].decode()
+        if typ != ObjectType.TREE.value:
+            raise RuntimeError(f"{oid} is a {typ}, not a tree-ish")
+        return oid
+
+    def resolve_tree(self, rev: str) -> str:
+        return self.peel_to_tree(self.resolve(rev))
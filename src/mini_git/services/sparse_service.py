@@ -0,0 +1,109 @@
+from pathlib import Path
+from mini_git.models import IndexEntry, TREE_MODE
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.sparse_checkout_store import SparseCheckoutStore
+from mini_git.types import ObjectType
+
+
+class SparseService:
+    def __init__(
+        self,
+        index_store: IndexStore,
+        tree_store: TreeStore,
+        sparse_store: SparseCheckoutStore,
+    ) -> None:
+        self.index_store = index_store
+        self.tree_store = tree_store
+        self.sparse_store = sparse_store
+
+    def _expand_entry(self, e: IndexEntry) -> list[IndexEntry]:
+        if e.mode != TREE_MODE:
+            return [e]
+        return list(self.tree_store.iter_files(e.oid, e.path))
+
+    def sparsify(self) -> int:
+        # cone 外のディレクトリを tree oid 1 つのエントリに畳む
+        if not self.sparse_store.is_enabled():
+            return self.expand()
+        kept: list[IndexEntry] = []
+        collapsed: dict[str, str] = {}
+        buckets: dict[str, list[IndexEntry]] = {}
+        pending = list(self.index_store.all())
+        while pending:
+            e = pending.pop()
+            path = e.path.as_posix()
+            is_dir = e.mode == TREE_MODE
+            root = self.sparse_store.collapse_root(f"{path}/" if is_dir else path)
+            if root is None:
+                if is_dir:
+                    # cone に入ったディレクトリは展開し直して再判定する
+                    pending.extend(self._expand_entry(e))
+                else:
+                    kept.append(e)
+            elif is_dir and root == path:
+                collapsed[root] = e.oid
+            else:
+                rel = Path(path[len(root) + 1 :])
+                buckets.setdefault(root, []).append(
+                    IndexEntry(path=rel, mode=e.mode, oid=e.oid)
+                )
+        for root, items in buckets.items():
+            collapsed[root] = self.tree_store.write_index_tree(items)
+        kept.extend(
+            IndexEntry(path=Path(root), mode=TREE_MODE, oid=oid)
+            for root, oid in collapsed.items()
+        )
+        self.index_store.write_all(kept)
+        return len(kept)
+
+    def expand(self) -> int:
+        entries = [x for e in self.index_store.all() for x in self._expand_entry(e)]
+        self.index_store.write_all(entries)
+        return len(entries)
+
+    def expand_path(self, path: Path) -> bool:
+        # sparse ディレクトリ配下のパスを更新する前に、そのディレクトリだけ展開する
+        entries = list(self.index_store.all())
+        target = None
+        for e in entries:
+            if e.mode == TREE_MODE and (e.path == path or e.path in path.parents):
+                target = e
+                break
+        if target is None:
+            return False
+        entries.remove(target)
+        entries.extend(self._expand_entry(target))
+        self.index_store.write_all(entries)
+        return True
+
+    def apply(self, worktree: Path, object_store: ObjectStore) -> tuple[int, int]:
+        # 現在の cone に合わせて worktree を更新し、index を sparse 化し直す
+        self.expand()
+        written = removed = 0
+        for e in self.index_store.all():
+            file = worktree / e.path
+            if self.sparse_store.contains(e.path.as_posix()):
+                if not file.exists():
+                    file.parent.mkdir(parents=True, exist_ok=True)
+                    _, raw = object_store.read(e.oid)
+                    file.write_bytes(raw)
+                    if e.mode == 100755:
+                        file.chmod(0o755)
+                    written += 1
+            elif file.is_file():
+                # 変更のあるファイルは消さずに残す
+                raw = file.read_bytes()
+                if ObjectStore.hash_object(ObjectType.BLOB, raw) == e.oid:
+                    file.unlink()
+                    _prune_empty_dirs(file.parent, worktree)
+                    removed += 1
+        self.sparsify()
+        return written, removed
+
+
+def _prune_empty_dirs(directory: Path, stop: Path) -> None:
+    while directory != stop and directory.is_dir() and not any(directory.iterdir()):
+        directory.rmdir()
+        directory = directory.parent
@@ -0,0 +1,523 @@
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+from mini_git.models import TREE_MODE
+from mini_git.services.checkout_service import GITLINK_MODE
+from mini_git.services.clone_service import find_git_dir
+from mini_git.services.commit_service import CommitService
+from mini_git.services.commit_store import LazyCommit
+from mini_git.services.gc_service import (
+    DEFAULT_DEPTH,
+    DEFAULT_WINDOW,
+    PackCandidate,
+    name_hash,
+    pack_order,
+    write_objects,
+)
+from mini_git.services.repo_context import RepoContext
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.pack import PackStreamWriter, index_pack
+from mini_git.utils.fs import write_atomic
+
+# have は最初に 16 個送り、ACK を見てから倍々に増やす（git fetch-pack と同じ）
+HAVE_BATCH = 16
+MAX_HAVE_BATCH = 1024
+# ACK の無い have がこれだけ続いたら、それ以上遡らずに打ち切る（git の MAX_IN_VAIN）
+MAX_IN_VAIN = 256
+
+
+class Refspec(NamedTuple):
+    # "+refs/heads/*:refs/remotes/origin/*" のような対応。dst が空なら FETCH_HEAD だけ
+    src: str
+    dst: str
+    force: bool
+
+    def map(self, name: str) -> str | None:
+        # name が src に合えば対応する dst を返す（"*" は 1 つだけ）
+        if "*" not in self.src:
+            return self.dst if name == self.src else None
+        prefix, _, suffix = self.src.partition("*")
+        if (
+            len(name) < len(prefix) + len(suffix)
+            or not name.startswith(prefix)
+            or not name.endswith(suffix)
+        ):
+            return None
+        return self.dst.replace("*", name[len(prefix) : len(name) - len(suffix)], 1)
+
+
+class RefUpdate(NamedTuple):
+    src: str
+    dst: str
+    old: str | None
+    new: str | None
+    # "new" / "fast-forward" / "forced" / "deleted" / "up to date" / "rejected"
+    status: str
+    reason: str = ""
+
+
+class TransferStats(NamedTuple):
+    objects: int
+    deltas: int
+    # thin pack の delta の base として受け手が手元から補った object の数
+    thin_bases: int
+    # pipe を流れた pack の byte 数
+    bytes: int
+    haves: int
+    common: int
+
+
+class TransportResult(NamedTuple):
+    url: str
+    updates: list[RefUpdate]
+    stats: TransferStats
+
+
+def parse_refspec(spec: str) -> Refspec:
+    force = spec.startswith("+")
+    src, _, dst = spec.removeprefix("+").partition(":")
+    stars = src.count("*")
+    if stars > 1 or dst.count("*") != (stars if dst else 0):
+        raise RuntimeError(f"invalid refspec '{spec}'")
+    return Refspec(src, dst, force)
+
+
+def peel(store: ObjectStore, oid: str) -> tuple[str, str]:
+    # annotated tag を辿って (指す先の oid, type) を返す
+    typ = store.stat(oid)[0]
+    while typ == "tag":
+        oid = LazyCommit(store.read(oid)[1]).header("object")
+        typ = store.stat(oid)[0]
+    return oid, typ
+
+
+def _expand(name: str, refs: dict[str, str]) -> str:
+    # 短縮名を ref 名にする。相手にも手元にも無ければブランチとみなす
+    if not name or name == "HEAD" or name.startswith("refs/"):
+        return name
+    for prefix in ("refs/heads/", "refs/tags/"):
+        if prefix + name in refs:
+            return prefix + name
+    return "refs/heads/" + name
+
+
+def negotiate(receiver: CommitService, sender: ObjectStore) -> tuple[set[str], int]:
+    # 受け手が自分の commit を新しい順に have として送り、送り手が持っていれば
+    # ACK（共通の commit）とする。ACK した commit の祖先はもう送らない。
+    # 戻り値は (共通の commit, 送った have の数)
+    common: set[str] = set()
+    # oid → 共通と分かっているか
+    state: dict[str, bool] = {}
+    queue: list[tuple[int, str]] = []
+    # キューにある、共通と分かっていない commit の数。0 になれば残りはすべて
+    # 共通の commit の祖先なので止める
+    non_common = 0
+    # have として送った commit
+    asked: set[str] = set()
+
+    def push(oid: str, is_common: bool) -> None:
+        nonlocal non_common
+        if oid in state:
+            if is_common and not state[oid]:
+                state[oid] = True
+                if oid not in asked:
+                    non_common -= 1
+            return
+        state[oid] = is_common
+        non_common += not is_common
+        heapq.heappush(queue, (-receiver.info(oid).commit_time, oid))
+
+    for tip in receiver.ref_tips():
+        tip, typ = peel(receiver.object_store, tip)
+        if typ == "commit":
+            push(tip, False)
+    in_vain = 0
+    batch = HAVE_BATCH
+    while non_common and in_vain < MAX_IN_VAIN:
+        sent: list[str] = []
+        while queue and len(sent) < batch:
+            _, oid = heapq.heappop(queue)
+            if state[oid]:
+                for parent in receiver.info(oid).parents:
+                    push(parent, True)
+                continue
+            non_common -= 1
+            asked.add(oid)
+            sent.append(oid)
+        acked = {oid for oid in sent if sender.exists(oid)}
+        in_vain = 0 if acked else in_vain + len(sent)
+        common |= acked
+        for oid in sent:
+            for parent in receiver.info(oid).parents:
+                push(parent, oid in acked)
+        batch = min(batch * 2, MAX_HAVE_BATCH)
+    return common, len(asked)
+
+
+def commit_range(
+    commits: CommitService, wants: list[str], common: set[str]
+) -> tuple[list[str], set[str]]:
+    # wants から辿れて common から辿れない commit と、その境界にある common 側の
+    # commit（受け手が tree ごと持っている）を返す。キューに興味のある commit が
+    # 無くなった時点で止めるので、共通の履歴の奥までは読まない
+    uninteresting: dict[str, bool] = {}
+    queue: list[tuple[int, str]] = []
+    # キューにある興味のある entry の数。0 になれば止める
+    interesting = 0
+    result: list[str] = []
+    found: set[str] = set()
+
+    def push(oid: str, flag: bool) -> None:
+        nonlocal interesting
+        previous = uninteresting.get(oid)
+        if previous is None:
+            interesting += not flag
+        elif previous or not flag:
+            return  # 同じ印で積んである
+        elif oid not in found:
+            # まだキューにある興味のある entry が common 側から辿れた
+            interesting -= 1
+        uninteresting[oid] = flag
+        heapq.heappush(queue, (-commits.info(oid).commit_time, oid))
+
+    for oid in wants:
+        push(oid, False)
+    for oid in common:
+        push(oid, True)
+    while interesting:
+        _, oid = heapq.heappop(queue)
+        flag = uninteresting[oid]
+        if not flag and oid not in found:
+            interesting -= 1
+            found.add(oid)
+            result.append(oid)
+        for parent in commits.info(oid).parents:
+            push(parent, flag)
+    result = [oid for oid in result if not uninteresting[oid]]
+    edges = {
+        parent
+        for oid in result
+        for parent in commits.info(oid).parents
+        if uninteresting.get(parent)
+    }
+    return result, edges
+
+
+def enumerate_objects(
+    commits: CommitService, wants: list[str], common: set[str]
+) -> tuple[dict[str, tuple[str, str]], dict[str, str]]:
+    # 送る object（oid → (type, path)）と、thin pack で base にできる受け手側の
+    # object（送る oid → 境界の commit で同じパスにあった oid）
+    store = commits.object_store
+    trees = commits.tree_store
+    objects: dict[str, tuple[str, str]] = {}
+    commit_wants: list[str] = []
+    roots: list[tuple[str, str]] = []
+    for oid in wants:
+        # tag は object ごと送り、指す先を辿る
+        typ = store.stat(oid)[0]
+        while typ == "tag":
+            objects[oid] = ("tag", "")
+            oid = LazyCommit(store.read(oid)[1]).header("object")
+            typ = store.stat(oid)[0]
+        if typ == "commit":
+            commit_wants.append(oid)
+        else:
+            roots.append((oid, typ))
+    commit_wants = [oid for oid in commit_wants if oid not in common]
+    range_commits, edges = commit_range(commits, commit_wants, common)
+
+    # 境界の tree にある object は受け手が持っているので送らない
+    known: set[str] = set()
+    edge_paths: dict[str, tuple[str, str]] = {}
+    for edge in edges:
+        stack = [(commits.info(edge).tree, "")]
+        while stack:
+            tree, path = stack.pop()
+            if tree in known:
+                continue
+            known.add(tree)
+            edge_paths.setdefault(path, (tree, "tree"))
+            for e in trees.iter_tree(tree):
+                if e.mode == GITLINK_MODE:
+                    continue
+                child = f"{path}/{e.name}" if path else e.name
+                if e.mode == TREE_MODE:
+                    stack.append((e.oid, child))
+                else:
+                    known.add(e.oid)
+                    edge_paths.setdefault(child, (e.oid, "blob"))
+
+    def add_tree(tree: str, path: str) -> None:
+        stack = [(tree, path)]
+        while stack:
+            tree, path = stack.pop()
+            if tree in known or tree in objects:
+                continue
+            objects[tree] = ("tree", path)
+            for e in trees.iter_tree(tree):
+                if e.mode == GITLINK_MODE or e.oid in known or e.oid in objects:
+                    continue
+                child = f"{path}/{e.name}" if path else e.name
+                if e.mode == TREE_MODE:
+                    stack.append((e.oid, child))
+                else:
+                    objects[e.oid] = ("blob", child)
+
+    for oid in range_commits:
+        objects[oid] = ("commit", "")
+        add_tree(commits.info(oid).tree, "")
+    for oid, typ in roots:
+        if typ == "tree":
+            add_tree(oid, "")
+        elif oid not in known:
+            objects[oid] = (typ, "")
+
+    thin = {}
+    for oid, (typ, path) in objects.items():
+        base = edge_paths.get(path) if typ in ("tree", "blob") else None
+        if base is not None and base[1] == typ and base[0] != oid:
+            thin[oid] = base[0]
+    return objects, thin
+
+
+def open_repo(path: Path) -> RepoContext:
+    git_dir = find_git_dir(path)
+    return RepoContext(git_dir.parent, git_dir)
+
+
+class TransportService:
+    def __init__(
+        self,
+        repo: RepoContext,
+        window: int = DEFAULT_WINDOW,
+        depth: int = DEFAULT_DEPTH,
+    ) -> None:
+        self.repo = repo
+        self.window = window
+        self.depth = depth
+
+    # --- remote ---
+    def remote(self, remote: str) -> tuple[str, str | None, str | None]:
+        # remote 名かパスを (URL, 設定の fetch refspec, remote 名) にする。パスが
+        # 設定済みの remote の URL と同じなら、その remote として扱う
+        config = self.repo.config
+        url = config.get(f"remote.{remote}.url")
+        if url is not None:
+            return url, config.get(f"remote.{remote}.fetch"), remote
+        resolved = Path(remote).resolve()
+        for name in config.subsections("remote"):
+            url = config.get(f"remote.{name}.url")
+            if url is not None and Path(url).resolve() == resolved:
+                return url, config.get(f"remote.{name}.fetch"), name
+        return str(resolved), None, None
+
+    # --- object の受け渡し ---
+    def transfer(
+        self, sender: RepoContext, receiver: RepoContext, wants: list[str]
+    ) -> TransferStats:
+        # have/want で共通の commit を決め、足りない object だけを thin pack にして
+        # pipe に流す。受け手は同時に読みながら index-pack する
+        wants = sorted({oid for oid in wants if not receiver.object_store.exists(oid)})
+        if not wants:
+            return TransferStats(0, 0, 0, 0, 0, 0)
+        sender_commits = CommitService(sender.commit_store, sender.ref_store)
+        receiver_commits = CommitService(receiver.commit_store, receiver.ref_store)
+        common, haves = negotiate(receiver_commits, sender.object_store)
+        objects, thin = enumerate_objects(sender_commits, wants, common)
+        store = sender.object_store
+        candidates = sorted(
+            (
+                PackCandidate(oid, typ, store.stat(oid)[1], name_hash(path))
+                for oid, (typ, path) in objects.items()
+            ),
+            key=pack_order,
+        )
+        receiving = receiver.object_store
+
+        def read_base(oid: str) -> tuple[str, bytes] | None:
+            return receiving.read(oid) if receiving.exists(oid) else None
+
+        r, w = os.pipe()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            sending = pool.submit(self._send, store, candidates, thin, w)
+            try:
+                with os.fdopen(r, "rb") as inp:
+                    result = index_pack(
+                        inp, receiving.pack_dir, read_base, receiving.durability
+                    )
+            except BaseException:
+                # 送り手の失敗で pipe が途切れたのなら、その原因のほうを報告する
+                error = sending.exception()
+                if error is not None and not isinstance(error, BrokenPipeError):
+                    raise error from None
+                raise
+            deltas = sending.result()
+        receiving.close_packs()
+        return TransferStats(
+            result.objects - result.thin_bases,
+            deltas,
+            result.thin_bases,
+            result.received,
+            haves,
+            len(common),
+        )
+
+    def _send(
+        self,
+        store: ObjectStore,
+        candidates: list[PackCandidate],
+        thin: dict[str, str],
+        fd: int,
+    ) -> int:
+        with os.fdopen(fd, "wb") as out:
+            writer = PackStreamWriter(out, len(candidates))
+            deltas = write_objects(
+                store, writer, candidates, self.window, self.depth, thin
+            )
+            writer.write_checksum()
+        return deltas
+
+    # --- ref の更新 ---
+    @staticmethod
+    def update_refs(
+        repo: RepoContext,
+        updates: list[tuple[str, str, str | None, bool]],
+        message: str,
+        protect_head: bool = False,
+    ) -> list[RefUpdate]:
+        # updates は (src, dst, new, force)。new が None なら削除。fast-forward で
+        # ないものと既存の tag の書き換えは force が無ければ断る
+        refs = repo.ref_store
+        commits = CommitService(repo.commit_store, refs)
+        head = refs.symbolic_target("HEAD") if protect_head else None
+        results: list[RefUpdate] = []
+        with refs.transaction() as tx:
+            for src, dst, new, force in updates:
+                old = refs.resolve(dst)
+                status, reason = "", ""
+                if dst == head:
+                    status, reason = "rejected", "branch is currently checked out"
+                elif new is None:
+                    status = "deleted" if old is not None else "up to date"
+                elif old == new:
+                    status = "up to date"
+                elif old is None:
+                    status = "new"
+                elif dst.startswith("refs/tags/") and not force:
+                    status, reason = "rejected", "would clobber existing tag"
+                elif (
+                    repo.object_store.exists(old)
+                    and repo.object_store.stat(old)[0] == "commit"
+                    and repo.object_store.stat(new)[0] == "commit"
+                    and commits.is_ancestor(old, new)
+                ):
+                    status = "fast-forward"
+                elif force:
+                    status = "forced"
+                else:
+                    status, reason = "rejected", "non-fast-forward"
+                results.append(RefUpdate(src, dst, old, new, status, reason))
+                if status == "deleted":
+                    tx.delete(dst, old, message)
+                elif new is not None and status in ("new", "fast-forward", "forced"):
+                    tx.update(dst, new, old, f"{message}: {status}")
+        return results
+
+    # --- fetch / push ---
+    def fetch(self, remote: str, refspecs: list[str] | None = None) -> TransportResult:
+        url, configured, name = self.remote(remote)
+        source = open_repo(Path(url))
+        remote_refs = dict(source.ref_store.iter_refs("refs/"))
+        head = source.ref_store.resolve("HEAD")
+        if head is not None:
+            remote_refs["HEAD"] = head
+        if refspecs:
+            specs = [parse_refspec(s) for s in refspecs]
+        else:
+            # remote の設定が無いパスからは git と同じく HEAD を FETCH_HEAD にだけ取る
+            specs = [parse_refspec(configured or "HEAD")]
+        wanted: list[tuple[str, str, str, bool]] = []
+        for spec in specs:
+            if "*" in spec.src:
+                for ref, oid in remote_refs.items():
+                    dst = spec.map(ref)
+                    if dst is not None:
+                        wanted.append((ref, dst, oid, spec.force))
+                continue
+            ref = _expand(spec.src, remote_refs)
+            if ref not in remote_refs:
+                raise RuntimeError(f"couldn't find remote ref {spec.src}")
+            dst = _expand(spec.dst, remote_refs) if spec.dst else ""
+            wanted.append((ref, dst, remote_refs[ref], spec.force))
+
+        stats = self.transfer(source, self.repo, [oid for _, _, oid, _ in wanted])
+        label = name or url
+        lines = []
+        for ref, _, oid, _ in wanted:
+            kind = "tag" if ref.startswith("refs/tags/") else "branch"
+            short = ref.removeprefix("refs/heads/").removeprefix("refs/tags/")
+            what = "" if ref == "HEAD" else f"{kind} '{short}' of "
+            lines.append(f"{oid}\t\t{what}{url}\n")
+        write_atomic(self.repo.git_path / "FETCH_HEAD", "".join(lines).encode())
+        updates = self.update_refs(
+            self.repo,
+            [(ref, dst, oid, force) for ref, dst, oid, force in wanted if dst],
+            f"fetch {label}",
+        )
+        return TransportResult(url, updates, stats)
+
+    def push(
+        self, remote: str, refspecs: list[str] | None = None, force: bool = False
+    ) -> TransportResult:
+        url, _, name = self.remote(remote)
+        target = open_repo(Path(url))
+        refs = self.repo.ref_store
+        local_refs = dict(refs.iter_refs("refs/"))
+        if refspecs:
+            specs = [parse_refspec(s) for s in refspecs]
+        else:
+            # 既定は今のブランチを同じ名前へ（push.default=current）
+            branch = refs.symbolic_target("HEAD")
+            if branch is None:
+                raise RuntimeError("You are not currently on a branch.")
+            specs = [Refspec(branch, branch, False)]
+        pushes: list[tuple[str, str, str | None, bool]] = []
+        for spec in specs:
+            if "*" in spec.src:
+                for ref, oid in local_refs.items():
+                    dst = spec.map(ref)
+                    if dst is not None:
+                        pushes.append((ref, dst, oid, spec.force or force))
+                continue
+            if not spec.src:
+                # ":dst" は相手の ref を消す
+                pushes.append(("", _expand(spec.dst, {}), None, True))
+                continue
+            ref = refs.dwim(spec.src)
+            oid = None if ref is None else refs.resolve(ref)
+            if ref is None or oid is None:
+                raise RuntimeError(f"src refspec {spec.src} does not match any")
+            dst = _expand(spec.dst or ref, local_refs)
+            pushes.append((ref, dst, oid, spec.force or force))
+
+        # 相手の checkout 中のブランチは worktree とずれるので書き換えない
+        bare = target.git_path.name != ".git"
+        new_oids = [oid for _, _, oid, _ in pushes if oid is not None]
+        stats = self.transfer(self.repo, target, new_oids)
+        updates = self.update_refs(target, pushes, "push", protect_head=not bare)
+        if name is not None:
+            # 受け入れられたブランチは手元の remote-tracking ref にも反映する
+            tracking = [
+                (f"refs/remotes/{name}/" + u.dst.removeprefix("refs/heads/"), u.new)
+                for u in updates
+                if u.dst.startswith("refs/heads/")
+                and u.new is not None
+                and u.status in ("new", "fast-forward", "forced")
+            ]
+            with refs.transaction() as tx:
+                for local, new in tracking:
+                    tx.update(local, new, message="update by push")
+        return TransportResult(url, updates, stats)
@@ -1,5 +1,159 @@
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from mini_git.models import IndexEntry, TreeEntry, TREE_MODE
+from mini_git.storage.index_store import IndexStore
 from mini_git.storage.object_store import ObjectStore
+from mini_git.types import ObjectType
+
+
+def tree_sort_key(entry: TreeEntry) -> bytes:
+    # git は tree 名を "name/" として比較する
+    name = entry.name.encode()
+    return name + b"/" if entry.is_tree else name
+
+
+def serialize_tree(entries: Iterable[TreeEntry]) -> bytes:
+    return b"".join(
+        f"{e.mode} {e.name}\0".encode() + bytes.fromhex(e.oid)
+        for e in sorted(entries, key=tree_sort_key)
+    )
+
+
+def iter_tree_entries(raw: bytes) -> Iterator[TreeEntry]:
+    # memoryview 越しに 1 エントリずつ切り出す（呼び出し側が止めればそこで終わる）
+    view = memoryview(raw)
+    i = 0
+    while i < len(raw):
+        sp = raw.index(b" ", i)
+        nul = raw.index(b"\0", sp)
+        yield TreeEntry(
+            str(view[sp + 1 : nul], "utf-8"),
+            int(view[i:sp]),
+            view[nul + 1 : nul + 21].hex(),
+        )
+        i = nul + 21
+
+
+def parse_tree(raw: bytes) -> list[TreeEntry]:
+    return list(iter_tree_entries(raw))
 
 
 class TreeStore:
     object_store: ObjectStore
+
+    def __init__(self, object_store: ObjectStore) -> None:
+        self.object_store = object_store
+
+    def write_tree(self, entries: Iterable[TreeEntry]) -> str:
+        return self.object_store.write(ObjectType.TREE, serialize_tree(entries))
+
+    def _read_raw(self, oid: str) -> bytes:
+        typ, raw = self.object_store.read(oid)
+        if typ != ObjectType.TREE.value:
+            raise RuntimeError(f"{oid} is a {typ}, not a tree")
+        return raw
+
+    def read_tree(self, oid: str) -> list[TreeEntry]:
+        return parse_tree(self._read_raw(oid))
+
+    def iter_tree(self, oid: str) -> Iterator[TreeEntry]:
+        return iter_tree_entries(self._read_raw(oid))
+
+    def write_index_tree(
+        self, entries: Iterable[IndexEntry], cache_tree: dict[str, str] | None = None
+    ) -> str:
+        # mode 40000 のエントリ（sparse ディレクトリ）はそのまま subtree として扱う
+        items = {e.path.as_posix(): (e.mode, e.oid) for e in entries}
+        return self._build(sorted(items), items.__getitem__, cache_tree)
+
+    def write_index(self, index_store: IndexStore) -> str:
+        # index の cache tree を使い、変更のあったディレクトリだけ tree を作り直す
+        data, cache_tree = index_store.snapshot()
+        known = dict(cache_tree)
+
+        def lookup(key: str) -> tuple[int, str]:
+            v = data[key]
+            return int(v["mode"]), v["oid"]
+
+        oid = self._build(sorted(data), lookup, cache_tree)
+        if cache_tree != known:
+            index_store.set_cache_tree(cache_tree)
+        return oid
+
+    def _build(
+        self,
+        keys: list[str],
+        lookup: Callable[[str], tuple[int, str]],
+        cache_tree: dict[str, str] | None,
+    ) -> str:
+        # ソート済みのパスを 1 回だけ走査し、開いているディレクトリをスタックで持つ。
+        # cache tree に oid があるディレクトリは配下のエントリを二分探索で読み飛ばす。
+        cache = cache_tree if cache_tree is not None else {}
+        if "" in cache:
+            return cache[""]
+        pending: list[tuple[ObjectType, bytes]] = []
+        stack: list[tuple[str, list[TreeEntry]]] = [("", [])]
+
+        def close() -> None:
+            path, children = stack.pop()
+            raw = serialize_tree(children)
+            oid = ObjectStore.hash_object(ObjectType.TREE, raw)
+            pending.append((ObjectType.TREE, raw))
+            cache[path] = oid
+            stack[-1][1].append(TreeEntry(path.rpartition("/")[2], TREE_MODE, oid))
+
+        i = 0
+        n = len(keys)
+        while i < n:
+            key = keys[i]
+            dir_path, _, name = key.rstrip("/").rpartition("/")
+            while stack[-1][0] and not (
+                dir_path == stack[-1][0] or dir_path.startswith(stack[-1][0] + "/")
+            ):
+                close()
+            top = stack[-1][0]
+            rest = dir_path[len(top) + 1 :] if top else dir_path
+            skipped = False
+            for comp in rest.split("/") if rest else ():
+                sub = f"{top}/{comp}" if top else comp
+                if sub in cache:
+                    stack[-1][1].append(TreeEntry(comp, TREE_MODE, cache[sub]))
+                    # "sub/" で始まるキーは [sub + "/", sub + "0") の範囲に並ぶ
+                    i = bisect_left(keys, sub + "0", i)
+                    skipped = True
+                    break
+                stack.append((sub, []))
+                top = sub
+            if skipped:
+                continue
+            mode, oid = lookup(key)
+            stack[-1][1].append(TreeEntry(name, mode, oid))
+            i += 1
+        while len(stack) > 1:
+            close()
+        raw = serialize_tree(stack[0][1])
+        pending.append((ObjectType.TREE, raw))
+        oids = self.object_store.write_many(pending)
+        cache[""] = oids[-1]
+        return oids[-1]
+
+    def lookup_path(self, oid: str, path: str) -> TreeEntry | None:
+        # パスの各階層の tree だけを読んでエントリを探す
+        entry = None
+        for name in path.strip("/").split("/"):
+            if entry is not None and not entry.is_tree:
+                return None
+            tree = self.read_tree(entry.oid if entry is not None else oid)
+            entry = next((e for e in tree if e.name == name), None)
+            if entry is None:
+                return None
+        return entry
+
+    def iter_files(self, oid: str, prefix: Path | None = None) -> Iterator[IndexEntry]:
+        for e in self.read_tree(oid):
+            path = prefix / e.name if prefix else Path(e.name)
+            if e.is_tree:
+                yield from self.iter_files(e.oid, path)
+            else:
+                yield IndexEntry(path=path, mode=e.mode, oid=e.oid)
@@ -1,4 +1,6 @@
 from .git_dir import GitDir
 from .object_store import ObjectStore
+from .chunk_store import ChunkStore
+from .config_store import ConfigStore
 
-__all__ = ["GitDir", "ObjectStore"]
+__all__ = ["GitDir", "ObjectStore", "ChunkStore", "ConfigStore"]
@@ -0,0 +1,114 @@
+import hashlib
+import mmap
+import struct
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+from mini_git.types import ObjectType
+from mini_git.utils.ewah import ewah_decode, ewah_encode
+from mini_git.utils.fs import write_atomic
+
+# git の .bitmap と同じく EWAH 圧縮した到達可能性 bitmap を持つ。pack が無いので
+# ビットの並び順（object テーブル）をファイル自身に持たせる:
+#   "BITM" | u16 version | u16 flags | u32 object 数 | u32 entry 数
+#   | oid[object 数] | type bitmap (commit, tree, blob) | entry[entry 数] | SHA-1
+#   entry = u32 commit の位置 | EWAH
+SIGNATURE = b"BITM"
+BITMAP_VERSION = 1
+HASH_LEN = 20
+HEADER_SIZE = 16
+TYPE_ORDER = (ObjectType.COMMIT, ObjectType.TREE, ObjectType.BLOB)
+
+
+def write_bitmap_index(
+    path: Path,
+    oids: Sequence[str],
+    types: Mapping[ObjectType, int],
+    bitmaps: Mapping[str, int],
+) -> int:
+    # bitmaps は commit oid → ビット集合（oids の並び順での位置）
+    pos = {oid: i for i, oid in enumerate(oids)}
+    count = len(oids)
+    parts = [
+        SIGNATURE,
+        struct.pack(">HHII", BITMAP_VERSION, 0, count, len(bitmaps)),
+        b"".join(bytes.fromhex(oid) for oid in oids),
+    ]
+    parts += [ewah_encode(types.get(t, 0), count) for t in TYPE_ORDER]
+    for oid in sorted(bitmaps, key=pos.__getitem__):
+        parts.append(struct.pack(">I", pos[oid]))
+        parts.append(ewah_encode(bitmaps[oid], count))
+    body = b"".join(parts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, body + hashlib.sha1(body).digest())
+    return len(bitmaps)
+
+
+class BitmapIndex:
+    def __init__(self, data: mmap.mmap | bytes) -> None:
+        self.data = data
+        if data[:4] != SIGNATURE:
+            raise RuntimeError("bitmap index signature mismatch")
+        version, _, self.count, entries = struct.unpack_from(">HHII", data, 4)
+        if version != BITMAP_VERSION:
+            raise RuntimeError(f"unsupported bitmap index version {version}")
+        self._oids = HEADER_SIZE
+        offset = self._oids + self.count * HASH_LEN
+        self.types: dict[ObjectType, int] = {}
+        for t in TYPE_ORDER:
+            self.types[t], _, offset = ewah_decode(data, offset)
+        # commit ごとの bitmap は使うときまで伸長しない
+        self._entries: dict[int, int] = {}
+        for _ in range(entries):
+            commit_pos = struct.unpack_from(">I", data, offset)[0]
+            self._entries[commit_pos] = offset + 4
+            _, words = struct.unpack_from(">II", data, offset + 4)
+            offset += 4 + 8 + words * 8 + 4
+        self._positions: dict[bytes, int] | None = None
+
+    @classmethod
+    def open(cls, path: Path) -> "BitmapIndex | None":
+        try:
+            with open(path, "rb") as f:
+                if f.seek(0, 2) == 0:
+                    return None
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        return cls(data)
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def position(self, oid: str) -> int | None:
+        if self._positions is None:
+            raw = self.data[self._oids : self._oids + self.count * HASH_LEN]
+            self._positions = {
+                raw[i : i + HASH_LEN]: n
+                for n, i in enumerate(range(0, len(raw), HASH_LEN))
+            }
+        return self._positions.get(bytes.fromhex(oid))
+
+    def oid(self, pos: int) -> str:
+        off = self._oids + pos * HASH_LEN
+        return self.data[off : off + HASH_LEN].hex()
+
+    def commits(self) -> Iterable[str]:
+        return (self.oid(pos) for pos in self._entries)
+
+    def bitmap(self, commit_oid: str) -> int | None:
+        pos = self.position(commit_oid)
+        if pos is None or pos not in self._entries:
+            return None
+        return ewah_decode(self.data, self._entries[pos])[0]
+
+    def iter_oids(self, bits: int) -> Iterator[str]:
+        raw = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+        for i, byte in enumerate(raw):
+            if byte:
+                for b in range(8):
+                    if byte >> b & 1:
+                        yield self.oid(i * 8 + b)
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+from collections.abc import Container
+from pathlib import Path
+from typing import NamedTuple
+from mini_git.utils.fs import write_atomic
+
+
+class BlameHunk(NamedTuple):
+    # 対象ファイルの final_start 行目から num_lines 行は、commit の版の orig_start 行目から来た
+    commit: str
+    final_start: int
+    orig_start: int
+    num_lines: int
+
+
+class BlameCache:
+    # (commit, path) ごとの blame 結果。履歴は変わらないので無効化は要らないが、
+    # 到達できなくなった commit と長く使われていない結果は gc が消す。
+    # .git/blame-cache/<commit>/<sha1(path)> に JSON で置く:
+    #   {"commits": [oid, ...], "hunks": [[commits の位置, final, orig, num_lines], ...]}
+    # mtime は最後に使った時刻
+    def __init__(self, git_dir: Path) -> None:
+        self.root = git_dir / "blame-cache"
+
+    def _path(self, commit: str, path: str) -> Path:
+        return self.root / commit / hashlib.sha1(path.encode()).hexdigest()
+
+    def get(self, commit: str, path: str) -> list[BlameHunk] | None:
+        file = self._path(commit, path)
+        try:
+            data = json.loads(file.read_bytes())
+            os.utime(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        commits = data["commits"]
+        return [BlameHunk(commits[c], f, o, n) for c, f, o, n in data["hunks"]]
+
+    def put(self, commit: str, path: str, hunks: list[BlameHunk]) -> None:
+        index: dict[str, int] = {}
+        rows = [
+            [
+                index.setdefault(h.commit, len(index)),
+                h.final_start,
+                h.orig_start,
+                h.num_lines,
+            ]
+            for h in hunks
+        ]
+        data = {"commits": list(index), "hunks": rows}
+        file = self._path(commit, path)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(file, json.dumps(data, separators=(",", ":")).encode())
+
+    def prune(self, keep: Container[str], expire: float | None) -> int:
+        # keep に無い commit の結果と、expire より前から使われていない結果を消す
+        if not self.root.is_dir():
+            return 0
+        removed = 0
+        for commit_dir in self.root.iterdir():
+            reachable = commit_dir.name in keep
+            for file in commit_dir.iterdir():
+                try:
+                    if not reachable or (
+                        expire is not None and file.stat().st_mtime < expire
+                    ):
+                        file.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+            try:
+                commit_dir.rmdir()
+            except OSError:
+                pass
+        return removed
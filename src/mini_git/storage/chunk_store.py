@@ -0,0 +1,142 @@
+import hashlib
+import os
+import zlib
+from collections.abc import Container, Iterator
+from pathlib import Path
+
+from mini_git.utils.fastcdc import (
+    DEFAULT_AVG_SIZE,
+    DEFAULT_MAX_SIZE,
+    DEFAULT_MIN_SIZE,
+    iter_chunk_bounds,
+)
+from mini_git.utils.fs import Durability
+
+
+# 巨大 blob を content-defined chunk と manifest に分割して保存する。
+# chunk は内容の SHA-1 で objects/chunks/ に、manifest は元の blob oid で
+# objects/manifests/ に置く（blob oid 自体は通常の loose object と同じ）。
+class ChunkStore:
+    def __init__(
+        self,
+        object_dir: Path,
+        min_size: int = DEFAULT_MIN_SIZE,
+        avg_size: int = DEFAULT_AVG_SIZE,
+        max_size: int = DEFAULT_MAX_SIZE,
+        durability: Durability | None = None,
+    ) -> None:
+        self.chunk_dir = object_dir / "chunks"
+        self.manifest_dir = object_dir / "manifests"
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        self.durability = durability or Durability()
+
+    def _chunk_path(self, chunk_id: str) -> Path:
+        return self.durability.resolve(self.chunk_dir / chunk_id[:2] / chunk_id[2:])
+
+    def _manifest_path(self, oid: str) -> Path:
+        return self.durability.resolve(self.manifest_dir / oid[:2] / oid[2:])
+
+    def has(self, oid: str) -> bool:
+        return self._manifest_path(oid).is_file()
+
+    def write(self, oid: str, raw: bytes, level: int = 1) -> int:
+        # 戻り値は新たに書き込んだ chunk 数（既存 chunk は重複排除される）
+        view = memoryview(raw)
+        lines = [f"size {len(raw)}"]
+        written = 0
+        for start, end in iter_chunk_bounds(
+            view, self.min_size, self.avg_size, self.max_size
+        ):
+            chunk = view[start:end]
+            chunk_id = hashlib.sha1(chunk).hexdigest()
+            try:
+                # 使い回す chunk は mtime を新しくし、gc に古い chunk として消されない
+                # ようにする（git の freshen と同じ）
+                os.utime(self._chunk_path(chunk_id))
+            except FileNotFoundError:
+                path = self.chunk_dir / chunk_id[:2] / chunk_id[2:]
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self.durability.write(path, zlib.compress(chunk, level))
+                written += 1
+            lines.append(f"{chunk_id} {end - start}")
+        manifest = self.manifest_dir / oid[:2] / oid[2:]
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        self.durability.write(manifest, ("\n".join(lines) + "\n").encode())
+        return written
+
+    def _read_manifest(self, oid: str) -> tuple[int, list[tuple[str, int]]]:
+        text = self._manifest_path(oid).read_text(encoding="ascii")
+        header, *rest = text.splitlines()
+        size = int(header.split(" ", 1)[1])
+        chunks = []
+        for line in rest:
+            chunk_id, length = line.split(" ", 1)
+            chunks.append((chunk_id, int(length)))
+        return size, chunks
+
+    def iter_oids(self) -> Iterator[str]:
+        # manifest を持つ blob oid を列挙する
+        if not self.manifest_dir.is_dir():
+            return
+        for fanout in self.manifest_dir.iterdir():
+            if len(fanout.name) == 2 and fanout.is_dir():
+                for path in fanout.iterdir():
+                    if len(path.name) == 38:
+                        yield fanout.name + path.name
+
+    def prune(self, keep: Container[str], expire: float) -> int:
+        # keep に無く expire より古い manifest を消し、残った manifest のどれからも
+        # 使われていない古い chunk も消す。戻り値は消した blob の数
+        pruned = 0
+        used: set[str] = set()
+        for oid in list(self.iter_oids()):
+            path = self.manifest_dir / oid[:2] / oid[2:]
+            try:
+                if oid not in keep and path.stat().st_mtime < expire:
+                    path.unlink()
+                    pruned += 1
+                else:
+                    used.update(self.chunk_ids(oid))
+            except FileNotFoundError:
+                pass
+        if self.chunk_dir.is_dir():
+            for fanout in self.chunk_dir.iterdir():
+                if len(fanout.name) != 2 or not fanout.is_dir():
+                    continue
+                for path in fanout.iterdir():
+                    if fanout.name + path.name in used:
+                        continue
+                    try:
+                        if path.stat().st_mtime < expire:
+                            path.unlink()
+                    except FileNotFoundError:
+                        pass
+        for directory in (self.manifest_dir, self.chunk_dir):
+            if directory.is_dir():
+                for fanout in directory.iterdir():
+                    try:
+                        fanout.rmdir()
+                    except OSError:
+                        pass
+        return pruned
+
+    def size(self, oid: str) -> int:
+        with self._manifest_path(oid).open("rb") as f:
+            header = f.readline().decode("ascii")
+        return int(header.split(" ", 1)[1])
+
+    def chunk_ids(self, oid: str) -> list[str]:
+        return [chunk_id for chunk_id, _ in self._read_manifest(oid)[1]]
+
+    def iter_content(self, oid: str) -> Iterator[bytes]:
+        _, chunks = self._read_manifest(oid)
+        for chunk_id, length in chunks:
+            data = zlib.decompress(self._chunk_path(chunk_id).read_bytes())
+            if len(data) != length:
+                raise RuntimeError(f"Corrupt chunk {chunk_id} in {oid}")
+            yield data
+
+    def read(self, oid: str) -> bytes:
+        return b"".join(self.iter_content(oid))
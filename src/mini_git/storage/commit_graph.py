@@ -0,0 +1,262 @@
+import hashlib
+import mmap
+import struct
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+from mini_git.utils.bloom import BloomSettings
+from mini_git.utils.fs import write_atomic
+
+# git の commit-graph 形式（version 1, SHA-1）
+SIGNATURE = b"CGPH"
+GRAPH_VERSION = 1
+HASH_VERSION = 1
+HASH_LEN = 20
+CDAT_WIDTH = HASH_LEN + 16
+
+CHUNK_OID_FANOUT = b"OIDF"
+CHUNK_OID_LOOKUP = b"OIDL"
+CHUNK_COMMIT_DATA = b"CDAT"
+CHUNK_EXTRA_EDGES = b"EDGE"
+CHUNK_BLOOM_INDEXES = b"BIDX"
+CHUNK_BLOOM_DATA = b"BDAT"
+BLOOM_HEADER_SIZE = 12
+
+PARENT_NONE = 0x70000000
+EXTRA_EDGES = 0x80000000
+LAST_EDGE = 0x80000000
+# generation は 30 bit。graph に無い commit は INFINITY として扱う
+GENERATION_MAX = 0x3FFFFFFF
+GENERATION_INFINITY = 0xFFFFFFFF
+
+
+class GraphCommit(NamedTuple):
+    oid: str
+    tree: str
+    parents: tuple[str, ...]
+    commit_time: int
+
+
+def compute_generations(commits: dict[str, GraphCommit]) -> dict[str, int]:
+    # 親の generation の最大値 + 1（root は 1）。深い履歴でも再帰しない
+    gens: dict[str, int] = {}
+    for start in commits:
+        if start in gens:
+            continue
+        stack = [start]
+        while stack:
+            oid = stack[-1]
+            if oid in gens:
+                stack.pop()
+                continue
+            pending = [p for p in commits[oid].parents if p not in gens]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            gens[oid] = min(
+                GENERATION_MAX,
+                1 + max((gens[p] for p in commits[oid].parents), default=0),
+            )
+    return gens
+
+
+def write_commit_graph(
+    path: Path,
+    commits: Iterable[GraphCommit],
+    bloom_filters: dict[str, bytes] | None = None,
+    bloom_settings: BloomSettings = BloomSettings(),
+) -> int:
+    # commits は親を辿って閉じた集合であること（graph の外を指す親は書けない）。
+    # bloom_filters を渡すときは全 commit 分が必要
+    by_oid = {c.oid: c for c in commits}
+    oids = sorted(by_oid)
+    pos = {oid: i for i, oid in enumerate(oids)}
+    gens = compute_generations(by_oid)
+
+    fanout = bytearray(256 * 4)
+    counts = [0] * 256
+    for oid in oids:
+        counts[int(oid[:2], 16)] += 1
+    total = 0
+    for i in range(256):
+        total += counts[i]
+        struct.pack_into(">I", fanout, i * 4, total)
+
+    lookup = b"".join(bytes.fromhex(oid) for oid in oids)
+    cdat = bytearray()
+    edges: list[int] = []
+    for oid in oids:
+        c = by_oid[oid]
+        parents = [pos[p] for p in c.parents]
+        p1 = parents[0] if parents else PARENT_NONE
+        if len(parents) <= 1:
+            p2 = PARENT_NONE
+        elif len(parents) == 2:
+            p2 = parents[1]
+        else:
+            # octopus merge の 2 番目以降の親は EDGE chunk に置く
+            p2 = EXTRA_EDGES | len(edges)
+            edges += parents[1:-1] + [LAST_EDGE | parents[-1]]
+        time = c.commit_time & 0x3FFFFFFFF
+        cdat += bytes.fromhex(c.tree)
+        cdat += struct.pack(
+            ">IIII", p1, p2, (gens[oid] << 2) | (time >> 32), time & 0xFFFFFFFF
+        )
+
+    chunks = [
+        (CHUNK_OID_FANOUT, bytes(fanout)),
+        (CHUNK_OID_LOOKUP, lookup),
+        (CHUNK_COMMIT_DATA, bytes(cdat)),
+    ]
+    if edges:
+        chunks.append((CHUNK_EXTRA_EDGES, struct.pack(f">{len(edges)}I", *edges)))
+    if bloom_filters is not None:
+        # BIDX は各 commit の filter の終端オフセット（累積）を並べたもの
+        ends = []
+        end = 0
+        for oid in oids:
+            end += len(bloom_filters[oid])
+            ends.append(end)
+        chunks.append((CHUNK_BLOOM_INDEXES, struct.pack(f">{len(ends)}I", *ends)))
+        chunks.append(
+            (
+                CHUNK_BLOOM_DATA,
+                struct.pack(">III", *bloom_settings)
+                + b"".join(bloom_filters[oid] for oid in oids),
+            )
+        )
+
+    header = SIGNATURE + bytes([GRAPH_VERSION, HASH_VERSION, len(chunks), 0])
+    offset = len(header) + (len(chunks) + 1) * 12
+    table = bytearray()
+    for chunk_id, data in chunks:
+        table += chunk_id + struct.pack(">Q", offset)
+        offset += len(data)
+    table += b"\0\0\0\0" + struct.pack(">Q", offset)
+    body = header + bytes(table) + b"".join(data for _, data in chunks)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, body + hashlib.sha1(body).digest())
+    return len(oids)
+
+
+class CommitGraph:
+    def __init__(self, data: mmap.mmap | bytes) -> None:
+        self.data = data
+        if data[:4] != SIGNATURE:
+            raise RuntimeError("commit-graph signature mismatch")
+        if data[4] != GRAPH_VERSION or data[5] != HASH_VERSION:
+            raise RuntimeError(f"unsupported commit-graph version {data[4]}")
+        self.chunks: dict[bytes, tuple[int, int]] = {}
+        num_chunks = data[6]
+        for i in range(num_chunks):
+            entry = 8 + i * 12
+            chunk_id = bytes(data[entry : entry + 4])
+            start = struct.unpack_from(">Q", data, entry + 4)[0]
+            end = struct.unpack_from(">Q", data, entry + 16)[0]
+            self.chunks[chunk_id] = (start, end)
+        for required in (CHUNK_OID_FANOUT, CHUNK_OID_LOOKUP, CHUNK_COMMIT_DATA):
+            if required not in self.chunks:
+                raise RuntimeError(f"commit-graph is missing the {required} chunk")
+        self._fanout = self.chunks[CHUNK_OID_FANOUT][0]
+        self._lookup = self.chunks[CHUNK_OID_LOOKUP][0]
+        self._cdat = self.chunks[CHUNK_COMMIT_DATA][0]
+        self._edges = self.chunks.get(CHUNK_EXTRA_EDGES, (0, 0))[0]
+        self.count = struct.unpack_from(">I", data, self._fanout + 255 * 4)[0]
+        self.bloom_settings: BloomSettings | None = None
+        if CHUNK_BLOOM_INDEXES in self.chunks and CHUNK_BLOOM_DATA in self.chunks:
+            self._bidx = self.chunks[CHUNK_BLOOM_INDEXES][0]
+            self._bdat = self.chunks[CHUNK_BLOOM_DATA][0]
+            settings = BloomSettings(*struct.unpack_from(">III", data, self._bdat))
+            # 未知の hash version の filter は使わない
+            if settings.hash_version in (1, 2):
+                self.bloom_settings = settings
+
+    @classmethod
+    def open(cls, path: Path) -> "CommitGraph | None":
+        try:
+            with open(path, "rb") as f:
+                if f.seek(0, 2) == 0:
+                    return None
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        return cls(data)
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    # --- oid と位置の変換（fanout で範囲を絞ってから二分探索） ---
+    def lookup(self, oid: str) -> int | None:
+        key = bytes.fromhex(oid)
+        first = key[0]
+        lo = (
+            struct.unpack_from(">I", self.data, self._fanout + (first - 1) * 4)[0]
+            if first
+            else 0
+        )
+        hi = struct.unpack_from(">I", self.data, self._fanout + first * 4)[0]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off = self._lookup + mid * HASH_LEN
+            probe = self.data[off : off + HASH_LEN]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def oid(self, pos: int) -> str:
+        off = self._lookup + pos * HASH_LEN
+        return self.data[off : off + HASH_LEN].hex()
+
+    # --- commit データ ---
+    def tree(self, pos: int) -> str:
+        off = self._cdat + pos * CDAT_WIDTH
+        return self.data[off : off + HASH_LEN].hex()
+
+    def parents(self, pos: int) -> list[int]:
+        p1, p2 = struct.unpack_from(
+            ">II", self.data, self._cdat + pos * CDAT_WIDTH + HASH_LEN
+        )
+        if p1 == PARENT_NONE:
+            return []
+        if p2 == PARENT_NONE:
+            return [p1]
+        if not p2 & EXTRA_EDGES:
+            return [p1, p2]
+        result = [p1]
+        off = self._edges + (p2 & ~EXTRA_EDGES) * 4
+        while True:
+            edge = struct.unpack_from(">I", self.data, off)[0]
+            result.append(edge & ~LAST_EDGE)
+            if edge & LAST_EDGE:
+                return result
+            off += 4
+
+    def generation(self, pos: int) -> int:
+        off = self._cdat + pos * CDAT_WIDTH + HASH_LEN + 8
+        return struct.unpack_from(">I", self.data, off)[0] >> 2
+
+    def commit_time(self, pos: int) -> int:
+        off = self._cdat + pos * CDAT_WIDTH + HASH_LEN + 8
+        high, low = struct.unpack_from(">II", self.data, off)
+        return ((high & 0x3) << 32) | low
+
+    def bloom_filter(self, pos: int) -> bytes | None:
+        if self.bloom_settings is None:
+            return None
+        end = struct.unpack_from(">I", self.data, self._bidx + pos * 4)[0]
+        start = (
+            struct.unpack_from(">I", self.data, self._bidx + (pos - 1) * 4)[0]
+            if pos
+            else 0
+        )
+        base = self._bdat + BLOOM_HEADER_SIZE
+        return bytes(self.data[base + start : base + end])
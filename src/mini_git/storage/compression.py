@@ -0,0 +1,133 @@
+import zlib
+from collections.abc import Sequence
+from typing import NamedTuple
+from mini_git.storage.config_store import ConfigStore
+
+# git と同じく -1 は zlib の既定（6）、0 は無圧縮（stored ブロック）
+DEFAULT_LEVEL = zlib.Z_DEFAULT_COMPRESSION
+# core.looseCompression の既定。loose object は書き込みの速さを優先する
+DEFAULT_LOOSE_LEVEL = 1
+# 既に圧縮されている形式の先頭 byte 列（画像、動画、音声、アーカイブ）
+_MAGIC = (
+    b"\x89PNG\r\n\x1a\n",
+    b"\xff\xd8\xff",
+    b"GIF8",
+    b"PK\x03\x04",
+    b"\x1f\x8b",
+    b"\xfd7zXZ\x00",
+    b"(\xb5/\xfd",
+    b"BZh",
+    b"7z\xbc\xaf'\x1c",
+    b"Rar!\x1a\x07",
+    b"OggS",
+    b"fLaC",
+    b"ID3",
+    b"\x1aE\xdf\xa3",
+)
+# offset 4 から "ftyp" が続くのは MP4 / MOV / HEIC、RIFF の中の WEBP
+_FTYP = b"ftyp"
+_WEBP = b"WEBP"
+
+
+def looks_compressed(raw: bytes) -> bool:
+    return (
+        raw.startswith(_MAGIC)
+        or raw[4:8] == _FTYP
+        or (raw.startswith(b"RIFF") and raw[8:12] == _WEBP)
+    )
+
+
+def check_level(level: int, key: str) -> int:
+    if not -1 <= level <= 9:
+        raise RuntimeError(f"bad zlib compression level {level} for '{key}'")
+    return level
+
+
+class CompressionRule(NamedTuple):
+    name: str
+    level: int
+    # None は条件にしない
+    types: frozenset[str] | None = None
+    min_size: int = 0
+    max_size: int | None = None
+    compressed: bool | None = None
+
+    def matches(self, type: str, raw: bytes) -> bool:
+        if self.types is not None and type not in self.types:
+            return False
+        if len(raw) < self.min_size:
+            return False
+        if self.max_size is not None and len(raw) > self.max_size:
+            return False
+        return self.compressed is None or looks_compressed(raw) == self.compressed
+
+
+class CompressionPolicy:
+    # object を書くときの zlib の level を決める。規則を上から順に試し、
+    # 当てはまらなければ loose / pack の既定の level を使う
+    def __init__(
+        self,
+        loose_level: int = DEFAULT_LOOSE_LEVEL,
+        pack_level: int = DEFAULT_LEVEL,
+        rules: Sequence[CompressionRule] = (),
+    ) -> None:
+        self.loose_level = loose_level
+        self.pack_level = pack_level
+        self.rules = list(rules)
+
+    @classmethod
+    def from_config(cls, config: ConfigStore | None) -> "CompressionPolicy":
+        # core.compression は core.looseCompression と pack.compression の既定になる
+        #   [compression "media"]
+        #       type = blob            （カンマ区切り）
+        #       content = compressed   （compressed / uncompressed）
+        #       minSize = 1m
+        #       maxSize = 1g
+        #       level = 0
+        if config is None:
+            return cls()
+        core = config.get_int("core.compression")
+        if core is not None:
+            check_level(core, "core.compression")
+        loose = config.get_int("core.looseCompression")
+        if loose is None:
+            loose = DEFAULT_LOOSE_LEVEL if core is None else core
+        pack = config.get_int("pack.compression")
+        if pack is None:
+            pack = DEFAULT_LEVEL if core is None else core
+        rules = [_rule(config, name) for name in config.subsections("compression")]
+        return cls(
+            check_level(loose, "core.looseCompression"),
+            check_level(pack, "pack.compression"),
+            rules,
+        )
+
+    def level(self, type: str, raw: bytes, packed: bool = False) -> int:
+        for rule in self.rules:
+            if rule.matches(type, raw):
+                return rule.level
+        return self.pack_level if packed else self.loose_level
+
+    def compress_loose(self, type: str, raw: bytes, data: bytes) -> bytes:
+        # data はヘッダ付きの object 全体。規則は本体 raw で判定する
+        return zlib.compress(data, self.level(type, raw))
+
+
+def _rule(config: ConfigStore, name: str) -> CompressionRule:
+    key = f"compression.{name}"
+    level = config.get_int(f"{key}.level")
+    if level is None:
+        raise RuntimeError(f"missing '{key}.level'")
+    types = config.get(f"{key}.type")
+    min_size = config.get_int(f"{key}.minSize")
+    content = config.get(f"{key}.content")
+    if content not in (None, "compressed", "uncompressed"):
+        raise RuntimeError(f"bad value '{content}' for '{key}.content'")
+    return CompressionRule(
+        name,
+        check_level(level, f"{key}.level"),
+        frozenset(t.strip() for t in types.split(",")) if types else None,
+        0 if min_size is None else min_size,
+        config.get_int(f"{key}.maxSize"),
+        None if content is None else content == "compressed",
+    )
@@ -0,0 +1,177 @@
+import getpass
+import os
+import re
+import socket
+import time
+from pathlib import Path
+
+_SECTION_RE = re.compile(r'^\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+_SIZE_SUFFIX = {"k": 1024, "m": 1024**2, "g": 1024**3}
+
+
+class ConfigStore:
+    def __init__(self, git_dir: Path) -> None:
+        self.config_path = git_dir / "config"
+        self._values: dict[str, str] | None = None
+
+    # --- 読み込み（git config 形式のサブセット） ---
+    def _load(self) -> dict[str, str]:
+        if self._values is not None:
+            return self._values
+        values: dict[str, str] = {}
+        if self.config_path.is_file():
+            section = ""
+            for line in self.config_path.read_text(encoding="utf-8").splitlines():
+                line = line.strip()
+                if not line or line[0] in "#;":
+                    continue
+                m = _SECTION_RE.match(line)
+                if m:
+                    section = m.group(1).lower()
+                    if m.group(2) is not None:
+                        section += "." + m.group(2)
+                    line = line[m.end() :].strip()
+                    if not line:
+                        continue
+                name, sep, raw = line.partition("=")
+                value = _parse_value(raw) if sep else "true"
+                values[f"{section}.{name.strip().lower()}"] = value
+        self._values = values
+        return values
+
+    @staticmethod
+    def _normalize(key: str) -> str:
+        # section と変数名は大文字小文字を区別しない（subsection は区別する）
+        section, _, name = key.rpartition(".")
+        head, dot, sub = section.partition(".")
+        return f"{head.lower()}{dot}{sub}.{name.lower()}"
+
+    # --- パブリックAPI ---
+    def get(self, key: str, default: str | None = None) -> str | None:
+        return self._load().get(self._normalize(key), default)
+
+    def get_int(self, key: str, default: int | None = None) -> int | None:
+        value = self.get(key)
+        if value is None:
+            return default
+        value = value.strip().lower()
+        if value and value[-1] in _SIZE_SUFFIX:
+            return int(value[:-1]) * _SIZE_SUFFIX[value[-1]]
+        return int(value)
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = self.get(key)
+        if value is None:
+            return default
+        value = value.strip().lower()
+        if value in ("true", "yes", "on", "1"):
+            return True
+        if value in ("false", "no", "off", "0", ""):
+            return False
+        raise ValueError(f"bad boolean config value '{value}' for '{key}'")
+
+    def subsections(self, section: str) -> list[str]:
+        # [section "name"] の name をファイルに現れた順に返す
+        prefix = section.lower() + "."
+        found: dict[str, None] = {}
+        for key in self._load():
+            if key.startswith(prefix):
+                sub = key[len(prefix) :].rpartition(".")[0]
+                if sub:
+                    found[sub] = None
+        return list(found)
+
+    def set(self, key: str, value: str) -> None:
+        # 既存の行があれば置き換え、無ければ section 末尾（または新規 section）に追加
+        section, _, name = key.rpartition(".")
+        head, _, sub = section.partition(".")
+        header = f'[{head} "{sub}"]' if sub else f"[{head}]"
+        target = self._normalize(key).rpartition(".")[0]
+        lines = (
+            self.config_path.read_text(encoding="utf-8").splitlines()
+            if self.config_path.is_file()
+            else []
+        )
+        current = ""
+        insert_at = None
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            m = _SECTION_RE.match(stripped)
+            if m:
+                current = m.group(1).lower()
+                if m.group(2) is not None:
+                    current += "." + m.group(2)
+                if current == target:
+                    insert_at = i + 1
+                continue
+            if current != target:
+                continue
+            insert_at = i + 1
+            var = stripped.partition("=")[0].strip().lower()
+            if var == name.lower():
+                lines[i] = f"\t{name} = {value}"
+                break
+        else:
+            if insert_at is None:
+                lines += [header, f"\t{name} = {value}"]
+            else:
+                lines.insert(insert_at, f"\t{name} = {value}")
+        self.config_path.parent.mkdir(parents=True, exist_ok=True)
+        self.config_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        self._values = None
+
+
+def _parse_value(raw: str) -> str:
+    out = []
+    quoted = False
+    i = 0
+    raw = raw.strip()
+    while i < len(raw):
+        c = raw[i]
+        if c == '"':
+            quoted = not quoted
+        elif c == "\\" and i + 1 < len(raw):
+            i += 1
+            out.append({"n": "\n", "t": "\t"}.get(raw[i], raw[i]))
+        elif c in "#;" and not quoted:
+            break
+        else:
+            out.append(c)
+        i += 1
+    return "".join(out).strip()
+
+
+def _format_tz(offset: int) -> str:
+    sign = "-" if offset < 0 else "+"
+    offset = abs(offset) // 60
+    return f"{sign}{offset // 60:02d}{offset % 60:02d}"
+
+
+def identity(
+    kind: str = "committer", config: ConfigStore | None = None, strict: bool = True
+) -> str:
+    # GIT_AUTHOR_* / GIT_COMMITTER_* 環境変数、次に user.name / user.email。
+    # strict でなければ（reflog 用）ログイン名とホスト名で補う
+    prefix = f"GIT_{kind.upper()}_"
+    name = os.environ.get(prefix + "NAME") or (
+        config.get("user.name") if config else None
+    )
+    email = os.environ.get(prefix + "EMAIL") or (
+        config.get("user.email") if config else None
+    )
+    if (not name or not email) and not strict:
+        user = getpass.getuser()
+        name = name or user
+        email = email or f"{user}@{socket.gethostname()}"
+    if not name or not email:
+        raise RuntimeError(
+            "Author identity unknown: set user.name and user.email in config"
+        )
+    date = os.environ.get(prefix + "DATE")
+    if date:
+        stamp, _, tz = date.removeprefix("@").partition(" ")
+        stamp = f"{int(stamp)} {tz or '+0000'}"
+    else:
+        now = time.time()
+        stamp = f"{int(now)} {_format_tz(time.localtime(now).tm_gmtoff)}"
+    return f"{name} <{email}> {stamp}"
@@ -1,38 +1,117 @@
 import json
-import os
 from pathlib import Path
 from typing import Iterable
-from mini_git.models import IndexEntry
+from mini_git.models import IndexEntry, TREE_MODE
+from mini_git.utils.fs import Durability
+
+
+INDEX_VERSION = 2
 
 
 class IndexStore:
-    def __init__(self, git_dir: Path, filename: str = "index.json") -> None:
+    def __init__(
+        self,
+        git_dir: Path,
+        filename: str = "index.json",
+        durability: Durability | None = None,
+    ) -> None:
         self.git_dir = git_dir
+        self.durability = durability or Durability()
         self.index_path = git_dir / filename
         self.index_path.parent.mkdir(parents=True, exist_ok=True)
 
     # --- 読み書き（原子的更新） ---
-    def _load(self) -> dict[str, dict]:
+    def _read(self) -> tuple[dict[str, dict], dict[str, str]]:
         if not self.index_path.exists():
-            return {}
-        return json.loads(self.index_path.read_text(encoding="utf-8"))
+            return {}, {}
+        raw = json.loads(self.index_path.read_text(encoding="utf-8"))
+        if isinstance(raw.get("version"), int):
+            return raw["entries"], raw.get("cache_tree", {})
+        return raw, {}  # 旧形式（エントリだけの dict）
+
+    def _load(self) -> dict[str, dict]:
+        return self._read()[0]
+
+    def _save(
+        self, data: dict[str, dict], cache_tree: dict[str, str] | None = None
+    ) -> None:
+        payload = {
+            "version": INDEX_VERSION,
+            "entries": data,
+            "cache_tree": dict(sorted((cache_tree or {}).items())),
+        }
+        # batch 中の object を先に永続化してから index を置き換える
+        self.durability.publish(
+            self.index_path,
+            json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8"),
+        )
+
+    @staticmethod
+    def _invalidate(cache_tree: dict[str, str], key: str) -> None:
+        # 変更されたパスの祖先ディレクトリ（ルート "" を含む）の tree oid を捨てる
+        d = key.rstrip("/")
+        while d:
+            d = d.rpartition("/")[0]
+            cache_tree.pop(d, None)
+
+    @staticmethod
+    def _key(e: IndexEntry) -> str:
+        # sparse index のディレクトリエントリは git と同じく末尾 "/" 付きで保存
+        return f"{e.path}/" if e.mode == TREE_MODE else str(e.path)
 
-    def _save(self, data: dict[str, dict]) -> None:
-        tmp = self.index_path.with_suffix(self.index_path.suffix + ".tmp")
-        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-        os.replace(tmp, self.index_path)  # atomic
+    @staticmethod
+    def _value(e: IndexEntry) -> dict:
+        v: dict = {"mode": e.mode, "oid": e.oid}
+        if e.mtime_ns is not None:
+            v["mtime_ns"] = e.mtime_ns
+            v["size"] = e.size
+        return v
 
     # --- パブリックAPI ---
     def add_or_update(self, e: IndexEntry) -> None:
-        data = self._load()
-        data[str(e.path)] = {"mode": e.mode, "oid": e.oid}
-        self._save(data)
+        data, cache_tree = self._read()
+        key = self._key(e)
+        data[key] = self._value(e)
+        self._invalidate(cache_tree, key)
+        self._save(data, cache_tree)
+
+    def update_many(
+        self, entries: Iterable[IndexEntry], removed: Iterable[str] = ()
+    ) -> None:
+        # 複数のエントリを更新・削除して index を 1 回だけ書く
+        data, cache_tree = self._read()
+        for e in entries:
+            key = self._key(e)
+            data[key] = self._value(e)
+            self._invalidate(cache_tree, key)
+        for key in removed:
+            if data.pop(key, None) is not None:
+                self._invalidate(cache_tree, key)
+        self._save(dict(sorted(data.items())), cache_tree)
+
+    def write_all(
+        self, entries: Iterable[IndexEntry], cache_tree: dict[str, str] | None = None
+    ) -> None:
+        data = {self._key(e): self._value(e) for e in entries}
+        self._save(dict(sorted(data.items())), cache_tree)
+
+    def snapshot(self) -> tuple[dict[str, dict], dict[str, str]]:
+        # IndexEntry を作らずに生のエントリと cache tree を返す（write-tree 用）
+        return self._read()
+
+    def set_cache_tree(self, cache_tree: dict[str, str]) -> None:
+        data, _ = self._read()
+        self._save(data, cache_tree)
+
+    def is_sparse(self) -> bool:
+        return any(p.endswith("/") for p in self._load())
 
     def remove(self, path: str) -> None:
-        data = self._load()
+        data, cache_tree = self._read()
         if path in data:
             del data[path]
-            self._save(data)
+            self._invalidate(cache_tree, path)
+            self._save(data, cache_tree)
 
     def clear(self) -> None:
         self._save({})
@@ -40,4 +119,10 @@ class IndexStore:
     def all(self) -> Iterable[IndexEntry]:
         data = self._load()
         for p, v in data.items():
-            yield IndexEntry(path=Path(p), mode=int(v["mode"]), oid=v["oid"])
+            yield IndexEntry(
+                path=Path(p),
+                mode=int(v["mode"]),
+                oid=v["oid"],
+                mtime_ns=v.get("mtime_ns"),
+                size=v.get("size"),
+            )
@@ -0,0 +1,187 @@
+import bisect
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from mini_git.storage.pack import HASH_LEN, LARGE_OFFSET, PackFile
+
+# git の multi-pack-index v1。複数の pack の idx を 1 つの oid 表にまとめる
+#   "MIDX" | u8 version | u8 hash version | u8 chunk 数 | u8 base 数 | u32 pack 数
+#   | chunk 表 (u32 id, u64 offset)[chunk 数 + 1] | chunk... | SHA-1
+#   PNAM: idx のファイル名（NUL 終端、名前順、4 byte 境界まで詰める）
+#   OIDF: fan-out u32[256]  OIDL: oid[n]
+#   OOFF: (u32 pack 番号, u32 offset)[n]。offset の最上位ビットは LOFF の番号
+#   LOFF: u64 offset[...]（2GiB を超える offset があるときだけ）
+MIDX_NAME = "multi-pack-index"
+SIGNATURE = b"MIDX"
+MIDX_VERSION = 1
+OID_VERSION = 1
+HEADER_SIZE = 12
+CHUNK_ENTRY_SIZE = 12
+PNAM = 0x504E414D
+OIDF = 0x4F494446
+OIDL = 0x4F49444C
+OOFF = 0x4F4F4646
+LOFF = 0x4C4F4646
+
+
+def write_midx(
+    path: Path, pack_names: Iterable[str], entries: Iterable[tuple[bytes, str, int]]
+) -> int:
+    # entries は oid 順の (oid, idx 名, offset)。同じ oid は最初のものを採る
+    names = sorted(pack_names)
+    pack_ids = {name: i for i, name in enumerate(names)}
+    fanout = [0] * 256
+    oids = bytearray()
+    offsets = bytearray()
+    large = bytearray()
+    count = 0
+    last = None
+    for oid, name, offset in entries:
+        if oid == last:
+            continue
+        last = oid
+        count += 1
+        fanout[oid[0]] += 1
+        oids += oid
+        if offset >= LARGE_OFFSET:
+            large += struct.pack(">Q", offset)
+            offset = LARGE_OFFSET | (len(large) // 8 - 1)
+        offsets += struct.pack(">II", pack_ids[name], offset)
+    total = 0
+    for i, n in enumerate(fanout):
+        total += n
+        fanout[i] = total
+    pnam = b"".join(name.encode() + b"\0" for name in names)
+    pnam += b"\0" * (-len(pnam) % 4)
+    chunks = [
+        (PNAM, pnam),
+        (OIDF, struct.pack(">256I", *fanout)),
+        (OIDL, bytes(oids)),
+        (OOFF, bytes(offsets)),
+    ]
+    if large:
+        chunks.append((LOFF, bytes(large)))
+    header = SIGNATURE + struct.pack(
+        ">BBBBI", MIDX_VERSION, OID_VERSION, len(chunks), 0, len(names)
+    )
+    table = bytearray()
+    position = HEADER_SIZE + (len(chunks) + 1) * CHUNK_ENTRY_SIZE
+    for chunk_id, data in chunks:
+        table += struct.pack(">IQ", chunk_id, position)
+        position += len(data)
+    table += struct.pack(">IQ", 0, position)
+    body = header + bytes(table) + b"".join(data for _, data in chunks)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(body + hashlib.sha1(body).digest())
+    os.replace(tmp, path)
+    return count
+
+
+def merge_entries(
+    sources: Iterable[Iterable[tuple[bytes, str, int]]],
+) -> Iterator[tuple[bytes, str, int]]:
+    # oid 順の列を oid 順のまま合わせる。同じ oid は先に渡した列のものが先に出る
+    def ranked(rank: int, source: Iterable[tuple[bytes, str, int]]) -> Iterator:
+        for oid, name, offset in source:
+            yield oid, rank, name, offset
+
+    keyed = [ranked(rank, source) for rank, source in enumerate(sources)]
+    for oid, _, name, offset in heapq.merge(*keyed):
+        yield oid, name, offset
+
+
+def pack_entries(pack: PackFile) -> Iterator[tuple[bytes, str, int]]:
+    name = pack.idx_path.name
+    for oid, offset in pack.iter_entries():
+        yield oid, name, offset
+
+
+class MultiPackIndex:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self.data
+        if data[:4] != SIGNATURE:
+            self.data.close()
+            raise RuntimeError(f"multi-pack-index signature mismatch: {path}")
+        version, oid_version, chunk_count, _, pack_count = struct.unpack_from(
+            ">BBBBI", data, 4
+        )
+        if version != MIDX_VERSION or oid_version != OID_VERSION:
+            self.data.close()
+            raise RuntimeError(f"unsupported multi-pack-index version {version}")
+        self._chunks: dict[int, int] = {}
+        for i in range(chunk_count):
+            chunk_id, offset = struct.unpack_from(
+                ">IQ", data, HEADER_SIZE + i * CHUNK_ENTRY_SIZE
+            )
+            self._chunks[chunk_id] = offset
+        names = data[self._chunks[PNAM] : self._chunks[OIDF]].split(b"\0")
+        self.pack_names = [n.decode() for n in names if n][:pack_count]
+        self.fanout = struct.unpack_from(">256I", data, self._chunks[OIDF])
+        self.count = self.fanout[255]
+        self._oid_base = self._chunks[OIDL]
+        self._offset_base = self._chunks[OOFF]
+        self._large_base = self._chunks.get(LOFF)
+
+    @classmethod
+    def open(cls, pack_dir: Path) -> "MultiPackIndex | None":
+        try:
+            return cls(pack_dir / MIDX_NAME)
+        except (FileNotFoundError, ValueError):
+            # ValueError は空ファイルを mmap したとき
+            return None
+
+    def close(self) -> None:
+        self.data.close()
+
+    def _oid_at(self, i: int) -> bytes:
+        start = self._oid_base + i * HASH_LEN
+        return self.data[start : start + HASH_LEN]
+
+    def position(self, oid: str) -> int | None:
+        try:
+            key = bytes.fromhex(oid)
+        except ValueError:
+            return None
+        if len(key) != HASH_LEN:
+            return None
+        lo = self.fanout[key[0] - 1] if key[0] else 0
+        i = bisect.bisect_left(_OidView(self), key, lo, self.fanout[key[0]])
+        if i < self.count and self._oid_at(i) == key:
+            return i
+        return None
+
+    def entry(self, i: int) -> tuple[str, int]:
+        pack_id, offset = struct.unpack_from(
+            ">II", self.data, self._offset_base + i * 8
+        )
+        if offset & LARGE_OFFSET and self._large_base is not None:
+            start = self._large_base + (offset & ~LARGE_OFFSET) * 8
+            (offset,) = struct.unpack_from(">Q", self.data, start)
+        return self.pack_names[pack_id], offset
+
+    def lookup(self, oid: str) -> tuple[str, int] | None:
+        # (idx 名, pack 内の offset)
+        i = self.position(oid)
+        return None if i is None else self.entry(i)
+
+    def iter_entries(self) -> Iterator[tuple[bytes, str, int]]:
+        for i in range(self.count):
+            yield (self._oid_at(i), *self.entry(i))
+
+
+class _OidView:
+    def __init__(self, midx: MultiPackIndex) -> None:
+        self.midx = midx
+
+    def __getitem__(self, i: int) -> bytes:
+        return self.midx._oid_at(i)
+
+    def __len__(self) -> int:
+        return self.midx.count
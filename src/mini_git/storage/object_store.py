@@ -1,31 +1,369 @@
 import hashlib
+import os
 import zlib
+from collections.abc import Generator, Iterable, Iterator, Sequence
 from pathlib import Path
 from typing import Tuple
+from mini_git.storage.chunk_store import ChunkStore
+from mini_git.storage.compression import CompressionPolicy
+from mini_git.storage.midx import MultiPackIndex
+from mini_git.storage.pack import PackFile
 from mini_git.types import ObjectType
+from mini_git.utils.fs import Durability
+
+STREAM_BLOCK_SIZE = 64 * 1024
+MAX_ALTERNATE_DEPTH = 5
+
+
+def read_alternates(object_dir: Path) -> list[Path]:
+    # objects/info/alternates を再帰的に辿る（git と同じく深さ 5 まで）
+    result: list[Path] = []
+    seen = {object_dir.resolve()}
+
+    def visit(directory: Path, depth: int) -> None:
+        if depth > MAX_ALTERNATE_DEPTH:
+            return
+        try:
+            text = (directory / "info" / "alternates").read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            alt = (directory / line).resolve()
+            if alt in seen or not alt.is_dir():
+                continue
+            seen.add(alt)
+            result.append(alt)
+            visit(alt, depth + 1)
+
+    visit(object_dir, 1)
+    return result
 
 
 class ObjectStore:
-    def __init__(self, git_dir: Path) -> None:
-        self.object_dir = git_dir / "objects"
+    def __init__(
+        self,
+        git_dir: Path,
+        large_object_threshold: int | None = None,
+        alternates: Sequence["ObjectStore"] = (),
+        object_dir: Path | None = None,
+        compression: CompressionPolicy | None = None,
+        durability: Durability | None = None,
+    ) -> None:
+        self.object_dir = object_dir or git_dir / "objects"
+        # zlib の level を type と内容で決める（既定は level 1）
+        self.compression = compression or CompressionPolicy()
+        # fsync の方式。batch() の中の書き込みは抜けるときにまとめて永続化する
+        self.durability = durability or Durability()
+        # None なら無効。閾値以上の blob は chunk + manifest で保存する（opt-in）
+        self.large_object_threshold = large_object_threshold
+        self.chunk_store = ChunkStore(self.object_dir, durability=self.durability)
+        self.pack_dir = self.object_dir / "pack"
+        self._packs: list[PackFile] = []
+        self._packs_key: int | None = None
+        self._midx: MultiPackIndex | None = None
+        # multi-pack-index に載っている pack（idx 名 → PackFile）と載っていない pack
+        self._midx_packs: dict[str, PackFile] = {}
+        self._other_packs: list[PackFile] = []
+        # 読み取り専用のフォールバック先。書き込みは常にローカルにだけ行う
+        self.alternates = list(alternates)
+
+    @classmethod
+    def with_alternates(
+        cls,
+        git_dir: Path,
+        large_object_threshold: int | None = None,
+        compression: CompressionPolicy | None = None,
+        durability: Durability | None = None,
+    ) -> "ObjectStore":
+        alternates = [
+            cls(d.parent, object_dir=d) for d in read_alternates(git_dir / "objects")
+        ]
+        return cls(
+            git_dir,
+            large_object_threshold,
+            alternates,
+            compression=compression,
+            durability=durability,
+        )
+
+    def _object_path(self, oid: str) -> Path:
+        return self.object_dir / oid[:2] / oid[2:]
+
+    def _loose_path(self, oid: str) -> Path:
+        # batch 中でまだ rename していない object は一時ファイルを指す
+        return self.durability.resolve(self._object_path(oid))
+
+    def batch(self):
+        # 大量の object を書くときに使う。抜けるときに 1 回だけ同期する
+        return self.durability.batch()
+
+    # --- pack（pack ディレクトリの mtime が変わったときだけ開き直す） ---
+    def packs(self) -> list[PackFile]:
+        try:
+            key = os.stat(self.pack_dir).st_mtime_ns
+        except FileNotFoundError:
+            key = None
+        if key != self._packs_key:
+            # 開いたままの pack は使い回す（pack を書いている最中に読み直しても、
+            # 呼び出し側が持っている PackFile は閉じない）
+            opened = {p.idx_path: p for p in self._packs}
+            self._packs = []
+            if key is not None:
+                # 新しい pack ほど先に探す（直近の gc で作った pack に集まっている）
+                idx_paths = sorted(
+                    self.pack_dir.glob("pack-*.idx"),
+                    key=lambda p: p.stat().st_mtime_ns,
+                    reverse=True,
+                )
+                self._packs = [
+                    opened.pop(p, None) or PackFile(p)
+                    for p in idx_paths
+                    if p.with_suffix(".pack").is_file()
+                ]
+            for pack in opened.values():
+                pack.close()
+            self._load_midx()
+            self._packs_key = key
+        return self._packs
+
+    def _load_midx(self) -> None:
+        # 載っている pack がすべて揃っているときだけ使う
+        if self._midx is not None:
+            self._midx.close()
+        midx = MultiPackIndex.open(self.pack_dir) if self._packs else None
+        by_name = {p.idx_path.name: p for p in self._packs}
+        if midx is not None and not set(midx.pack_names) <= by_name.keys():
+            midx.close()
+            midx = None
+        self._midx = midx
+        covered = set(midx.pack_names) if midx is not None else set()
+        self._midx_packs = {n: by_name[n] for n in covered}
+        self._other_packs = [p for p in self._packs if p.idx_path.name not in covered]
+
+    @property
+    def midx(self) -> MultiPackIndex | None:
+        self.packs()
+        return self._midx
+
+    def close_packs(self) -> None:
+        for pack in self._packs:
+            pack.close()
+        if self._midx is not None:
+            self._midx.close()
+        self._packs = []
+        self._midx = None
+        self._midx_packs = {}
+        self._other_packs = []
+        self._packs_key = None
+
+    def _find_packed(self, oid: str) -> tuple[PackFile, int] | None:
+        # multi-pack-index で 1 回引き、載っていない pack だけを個別に探す
+        self.packs()
+        if self._midx is not None:
+            found = self._midx.lookup(oid)
+            if found is not None:
+                return self._midx_packs[found[0]], found[1]
+        for pack in self._other_packs:
+            i = pack.position(oid)
+            if i is not None:
+                return pack, pack.offset(i)
+        return None
+
+    def write_loose(self, type: str, raw: bytes) -> Path:
+        # pack や chunk の有無にかかわらず loose object として書く（gc が pack から
+        # 取り出すときに使う）
+        data = f"{type} {len(raw)}\0".encode() + raw
+        path = self._object_path(hashlib.sha1(data).hexdigest())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.durability.write(path, self.compression.compress_loose(type, raw, data))
+        return path
+
+    def is_loose(self, oid: str) -> bool:
+        return self._loose_path(oid).exists()
+
+    def is_local(self, oid: str) -> bool:
+        return self._has_local(oid)
+
+    def loose_objects(self) -> Iterator[tuple[str, Path]]:
+        # fan-out ディレクトリを走査してローカルの loose object を列挙する
+        for fanout in self.object_dir.iterdir():
+            if len(fanout.name) != 2 or not fanout.is_dir():
+                continue
+            for path in fanout.iterdir():
+                if len(path.name) == 38:
+                    yield fanout.name + path.name, path
+
+    @staticmethod
+    def hash_object(type: ObjectType, raw: bytes) -> str:
+        h = hashlib.sha1(f"{type.value} {len(raw)}\0".encode())
+        h.update(raw)
+        return h.hexdigest()
 
     def write(self, type: ObjectType, raw: bytes) -> str:
         header = f"{type.value} {len(raw)}\0".encode()
+        if (
+            type is ObjectType.BLOB
+            and self.large_object_threshold is not None
+            and len(raw) >= self.large_object_threshold
+        ):
+            # 巨大な連結バッファを作らずに oid を計算する
+            object_id = self.hash_object(type, raw)
+            if not self.exists(object_id):
+                level = self.compression.level(type.value, raw)
+                self.chunk_store.write(object_id, raw, level)
+            return object_id
         data = header + raw
         object_id = hashlib.sha1(data).hexdigest()
-        (self.object_dir / object_id[:2]).mkdir(parents=True, exist_ok=True)
-        (self.object_dir / object_id[:2] / object_id[2:]).write_bytes(
-            zlib.compress(data, level=1)
-        )
+        path = self._object_path(object_id)
+        # 既存の object は書き換えない（clone で hardlink 共有されている場合がある）
+        # alternates にある object もローカルには書かない
+        if self.exists(object_id):
+            return object_id
+        path.parent.mkdir(parents=True, exist_ok=True)
+        compressed = self.compression.compress_loose(type.value, raw, data)
+        self.durability.write(path, compressed)
         return object_id
 
+    def write_many(self, objects: Iterable[tuple[ObjectType, bytes]]) -> list[str]:
+        # まとめて書き込む。fan-out ディレクトリの作成と存在確認を 1 回ずつにする
+        oids = []
+        pending: dict[str, tuple[ObjectType, bytes, bytes]] = {}
+        for type, raw in objects:
+            if type is ObjectType.BLOB and self.large_object_threshold is not None:
+                oids.append(self.write(type, raw))
+                continue
+            data = f"{type.value} {len(raw)}\0".encode() + raw
+            object_id = hashlib.sha1(data).hexdigest()
+            oids.append(object_id)
+            if object_id not in pending:
+                pending[object_id] = (type, raw, data)
+        made: set[str] = set()
+        for object_id, (type, raw, data) in pending.items():
+            if self.exists(object_id):
+                continue
+            fanout = object_id[:2]
+            if fanout not in made:
+                (self.object_dir / fanout).mkdir(parents=True, exist_ok=True)
+                made.add(fanout)
+            compressed = self.compression.compress_loose(type.value, raw, data)
+            self.durability.write(self._object_path(object_id), compressed)
+        return oids
+
     def read(self, oid: str) -> Tuple[str, bytes]:
-        data = zlib.decompress((self.object_dir / oid[:2] / oid[2:]).read_bytes())
+        try:
+            compressed = self._loose_path(oid).read_bytes()
+        except FileNotFoundError:
+            packed = self._find_packed(oid)
+            if packed is not None:
+                return packed[0].read_at(packed[1])
+            if self.chunk_store.has(oid):
+                return ObjectType.BLOB.value, self.chunk_store.read(oid)
+            for alt in self.alternates:
+                if alt._has_local(oid):
+                    return alt.read(oid)
+            raise
+        data = zlib.decompress(compressed)
         i = data.index(b"\0")
         type_len = data[:i].decode()  # "blob 1234"
         type, _ = type_len.split(" ", 1)
         return type, data[i + 1 :]  # (type, raw-bytes)
 
+    def _has_local(self, oid: str) -> bool:
+        return (
+            self._loose_path(oid).exists()
+            or self._find_packed(oid) is not None
+            or self.chunk_store.has(oid)
+        )
+
+    def _find(self, oid: str) -> "ObjectStore":
+        if self._has_local(oid):
+            return self
+        for alt in self.alternates:
+            if alt._has_local(oid):
+                return alt
+        return self  # 見つからなければローカルで FileNotFoundError にする
+
+    def exists(self, oid: str) -> bool:
+        return self._has_local(oid) or any(
+            alt._has_local(oid) for alt in self.alternates
+        )
+
+    def iter_prefix(self, prefix: str) -> list[str]:
+        # 短縮 oid の解決用。fan-out ディレクトリ 1 つだけを走査する
+        if len(prefix) < 2:
+            return []
+        found: set[str] = set()
+        fanout = self.object_dir / prefix[:2]
+        if fanout.is_dir():
+            rest = prefix[2:]
+            found.update(
+                prefix[:2] + p.name
+                for p in fanout.iterdir()
+                if p.name.startswith(rest) and len(p.name) == 38
+            )
+        for pack in self.packs():
+            found.update(pack.iter_prefix(prefix))
+        for alt in self.alternates:
+            found.update(alt.iter_prefix(prefix))
+        return sorted(found)
+
     def stat(self, oid: str) -> Tuple[str, int]:
-        typ, raw = self.read(oid)
-        return typ, len(raw)  # cat-file -t / -s 相当
+        store = self._find(oid)
+        if store is not self:
+            return store.stat(oid)
+        if not self._loose_path(oid).exists():
+            packed = self._find_packed(oid)
+            if packed is not None:
+                return packed[0].stat_at(packed[1])
+        if not self._loose_path(oid).exists() and self.chunk_store.has(oid):
+            return ObjectType.BLOB.value, self.chunk_store.size(oid)
+        stream = self._iter_loose(oid)
+        typ, size = next(stream)  # ヘッダだけ伸長する
+        stream.close()
+        return typ, size  # cat-file -t / -s 相当
+
+    def iter_content(self, oid: str) -> Iterator[bytes]:
+        # 本体を一度に伸長せず、ブロック単位で返す
+        store = self._find(oid)
+        if store is not self:
+            yield from store.iter_content(oid)
+            return
+        if not self._loose_path(oid).exists():
+            packed = self._find_packed(oid)
+            if packed is not None:
+                # delta でなければブロック単位で伸長する。delta は base に適用する
+                # ために全体を伸長する
+                yield from packed[0].iter_at(packed[1], STREAM_BLOCK_SIZE)
+                return
+        if not self._loose_path(oid).exists() and self.chunk_store.has(oid):
+            yield from self.chunk_store.iter_content(oid)
+            return
+        stream = self._iter_loose(oid)
+        next(stream)
+        yield from stream
+
+    def _iter_loose(self, oid: str) -> Generator:
+        # 最初にヘッダ (type, size) を、以降は本体の断片を返す
+        d = zlib.decompressobj()
+        with self._loose_path(oid).open("rb") as f:
+            head = b""
+            while b"\0" not in head:
+                block = f.read(STREAM_BLOCK_SIZE)
+                if not block:
+                    raise RuntimeError(f"Corrupt object {oid}: missing header")
+                head += d.decompress(block)
+            i = head.index(b"\0")
+            type, size = head[:i].decode().split(" ", 1)
+            yield type, int(size)
+            if i + 1 < len(head):
+                yield head[i + 1 :]
+            while block := f.read(STREAM_BLOCK_SIZE):
+                out = d.decompress(block)
+                if out:
+                    yield out
+            tail = d.flush()
+            if tail:
+                yield tail
@@ -0,0 +1,640 @@
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Callable, Iterator
+from typing import BinaryIO, NamedTuple
+from pathlib import Path
+from mini_git.utils.delta import apply_delta, delta_result_size
+from mini_git.utils.fs import Durability
+
+# git の pack v2 と idx v2 をそのまま読み書きする
+#   .pack: "PACK" | u32 version | u32 object 数 | entry... | SHA-1
+#   entry: type(3bit) と伸長後サイズの varint | [delta の base] | zlib データ
+#   .idx:  "\377tOc" | u32 version | fan-out u32[256] | oid[n] | crc32[n]
+#          | offset u32[n] | 64bit offset u64[...] | pack の SHA-1 | SHA-1
+PACK_SIGNATURE = b"PACK"
+PACK_VERSION = 2
+IDX_SIGNATURE = b"\377tOc"
+IDX_VERSION = 2
+HASH_LEN = 20
+OFS_DELTA = 6
+REF_DELTA = 7
+TYPE_NUMBERS = {"commit": 1, "tree": 2, "blob": 3, "tag": 4}
+TYPE_NAMES = {v: k for k, v in TYPE_NUMBERS.items()}
+# delta の base として伸長済みの object を覚えておく数
+BASE_CACHE_SIZE = 256
+LARGE_OFFSET = 0x80000000
+
+
+def _entry_header(type_num: int, size: int) -> bytes:
+    out = bytearray()
+    byte = type_num << 4 | size & 0x0F
+    size >>= 4
+    while size:
+        out.append(byte | 0x80)
+        byte = size & 0x7F
+        size >>= 7
+    out.append(byte)
+    return bytes(out)
+
+
+def _ofs_encoding(distance: int) -> bytes:
+    # OFS_DELTA の base までの距離。git 独自の「続くたびに +1」する big-endian varint
+    out = bytearray([distance & 0x7F])
+    distance >>= 7
+    while distance:
+        distance -= 1
+        out.append(0x80 | distance & 0x7F)
+        distance >>= 7
+    return bytes(reversed(out))
+
+
+class PackStreamWriter:
+    # object を 1 つずつ pack 形式で出力（ファイルや pipe）に追記する。idx は
+    # 作らない。delta の base は先に書いておくか、REF_DELTA なら受け手が持っている
+    def __init__(self, out: BinaryIO, count: int) -> None:
+        self.out = out
+        self.count = count
+        self.hash = hashlib.sha1()
+        self.offset = 0
+        # oid → (offset, crc32)
+        self.entries: dict[str, tuple[int, int]] = {}
+        self._write(PACK_SIGNATURE + struct.pack(">II", PACK_VERSION, count))
+
+    def _write(self, data: bytes) -> None:
+        self.out.write(data)
+        self.hash.update(data)
+        self.offset += len(data)
+
+    def add(self, oid: str, type: str, raw: bytes, level: int = 6) -> None:
+        self._add(oid, _entry_header(TYPE_NUMBERS[type], len(raw)), raw, level)
+
+    def add_delta(self, oid: str, base: str, delta: bytes, level: int = 6) -> None:
+        distance = self.offset - self.entries[base][0]
+        header = _entry_header(OFS_DELTA, len(delta)) + _ofs_encoding(distance)
+        self._add(oid, header, delta, level)
+
+    def add_ref_delta(self, oid: str, base: str, delta: bytes, level: int = 6) -> None:
+        # base を oid で指す。thin pack では pack に無い（受け手にある）object を指す
+        header = _entry_header(REF_DELTA, len(delta)) + bytes.fromhex(base)
+        self._add(oid, header, delta, level)
+
+    def _add(self, oid: str, header: bytes, data: bytes, level: int) -> None:
+        entry = header + zlib.compress(data, level)
+        self.entries[oid] = (self.offset, zlib.crc32(entry))
+        self._write(entry)
+
+    def write_checksum(self) -> bytes:
+        # 末尾に pack 全体の SHA-1 を書き、それを返す
+        if len(self.entries) != self.count:
+            raise RuntimeError(
+                f"pack expected {self.count} objects but got {len(self.entries)}"
+            )
+        checksum = self.hash.digest()
+        self.out.write(checksum)
+        return checksum
+
+
+class PackWriter(PackStreamWriter):
+    # pack ディレクトリに pack-<SHA-1>.pack と .idx を置く
+    def __init__(
+        self, pack_dir: Path, count: int, durability: Durability | None = None
+    ) -> None:
+        pack_dir.mkdir(parents=True, exist_ok=True)
+        self.pack_dir = pack_dir
+        self.durability = durability or Durability()
+        self.tmp = pack_dir / f"tmp_pack_{os.getpid()}"
+        self.file = open(self.tmp, "wb")
+        super().__init__(self.file, count)
+
+    def finish(self) -> Path:
+        # idx を後に置くので、読み手が idx を見つけた時点で pack は揃っている
+        try:
+            checksum = self.write_checksum()
+        except RuntimeError:
+            self.abort()
+            raise
+        self.file.flush()
+        # pack は 1 ファイルなので batch でも溜めずにその場で fsync する
+        self.durability.sync_file(self.file.fileno())
+        self.file.close()
+        name = f"pack-{checksum.hex()}"
+        pack_path = self.pack_dir / f"{name}.pack"
+        os.replace(self.tmp, pack_path)
+        write_pack_index(
+            self.pack_dir / f"{name}.idx", self.entries, checksum, self.durability
+        )
+        return pack_path
+
+    def abort(self) -> None:
+        self.file.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+def write_pack_index(
+    path: Path,
+    entries: dict[str, tuple[int, int]],
+    pack_checksum: bytes,
+    durability: Durability | None = None,
+) -> None:
+    oids = sorted(entries)
+    fanout = [0] * 256
+    for oid in oids:
+        fanout[int(oid[:2], 16)] += 1
+    total = 0
+    for i, n in enumerate(fanout):
+        total += n
+        fanout[i] = total
+    offsets = bytearray()
+    large = bytearray()
+    for oid in oids:
+        offset = entries[oid][0]
+        if offset >= LARGE_OFFSET:
+            offsets += struct.pack(">I", LARGE_OFFSET | len(large) // 8)
+            large += struct.pack(">Q", offset)
+        else:
+            offsets += struct.pack(">I", offset)
+    body = b"".join(
+        [
+            IDX_SIGNATURE,
+            struct.pack(">I", IDX_VERSION),
+            struct.pack(">256I", *fanout),
+            b"".join(bytes.fromhex(oid) for oid in oids),
+            b"".join(struct.pack(">I", entries[oid][1]) for oid in oids),
+            bytes(offsets),
+            bytes(large),
+            pack_checksum,
+        ]
+    )
+    # idx が見えた時点で pack が揃っているよう、pack と idx の両方を永続化する
+    (durability or Durability()).publish(path, body + hashlib.sha1(body).digest())
+
+
+class PackFile:
+    # idx と pack を mmap し、oid は fan-out と二分探索で引く
+    def __init__(self, idx_path: Path) -> None:
+        self.idx_path = idx_path
+        self.pack_path = idx_path.with_suffix(".pack")
+        with open(idx_path, "rb") as f:
+            self.idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.idx[:4] != IDX_SIGNATURE or struct.unpack_from(">I", self.idx, 4) != (
+            IDX_VERSION,
+        ):
+            self.idx.close()
+            raise RuntimeError(f"Unsupported pack index: {idx_path}")
+        with open(self.pack_path, "rb") as f:
+            self.pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.fanout = struct.unpack_from(">256I", self.idx, 8)
+        self.count = self.fanout[255]
+        self._oid_base = 8 + 256 * 4
+        self._crc_base = self._oid_base + self.count * HASH_LEN
+        self._offset_base = self._crc_base + self.count * 4
+        self._large_base = self._offset_base + self.count * 4
+        self._cache: dict[int, tuple[int, bytes]] = {}
+
+    def close(self) -> None:
+        self.idx.close()
+        self.pack.close()
+
+    @property
+    def checksum(self) -> str:
+        return self.idx[-2 * HASH_LEN : -HASH_LEN].hex()
+
+    def _oid_at(self, i: int) -> bytes:
+        start = self._oid_base + i * HASH_LEN
+        return self.idx[start : start + HASH_LEN]
+
+    def _find(self, key: bytes) -> int:
+        # key 以上の最初の位置（fan-out で範囲を絞ってから二分探索）
+        lo = self.fanout[key[0] - 1] if key[0] else 0
+        hi = self.fanout[key[0]]
+        return bisect.bisect_left(_OidView(self), key, lo, hi)
+
+    def position(self, oid: str) -> int | None:
+        try:
+            key = bytes.fromhex(oid)
+        except ValueError:
+            return None
+        if len(key) != HASH_LEN:
+            return None
+        i = self._find(key)
+        if i < self.count and self._oid_at(i) == key:
+            return i
+        return None
+
+    def __contains__(self, oid: str) -> bool:
+        return self.position(oid) is not None
+
+    def oid(self, i: int) -> str:
+        return self._oid_at(i).hex()
+
+    def offset(self, i: int) -> int:
+        (value,) = struct.unpack_from(">I", self.idx, self._offset_base + i * 4)
+        if value & LARGE_OFFSET:
+            start = self._large_base + (value & ~LARGE_OFFSET) * 8
+            (value,) = struct.unpack_from(">Q", self.idx, start)
+        return value
+
+    def crc32(self, i: int) -> int:
+        return struct.unpack_from(">I", self.idx, self._crc_base + i * 4)[0]
+
+    def iter_oids(self) -> Iterator[str]:
+        for i in range(self.count):
+            yield self._oid_at(i).hex()
+
+    def iter_entries(self) -> Iterator[tuple[bytes, int]]:
+        # oid の順に (oid, offset)。multi-pack-index を作るときに使う
+        for i in range(self.count):
+            yield self._oid_at(i), self.offset(i)
+
+    def iter_prefix(self, prefix: str) -> Iterator[str]:
+        key = bytes.fromhex(prefix[: len(prefix) // 2 * 2])
+        if not key:
+            return
+        i = self._find(key)
+        while i < self.count:
+            oid = self._oid_at(i).hex()
+            if not oid.startswith(prefix[: len(key) * 2]):
+                return
+            if oid.startswith(prefix):
+                yield oid
+            i += 1
+
+    def _entry(self, offset: int) -> tuple[int, int, int]:
+        # (type, 伸長後サイズ, データの開始位置)
+        pack = self.pack
+        byte = pack[offset]
+        type_num = byte >> 4 & 0x07
+        size = byte & 0x0F
+        shift = 4
+        offset += 1
+        while byte & 0x80:
+            byte = pack[offset]
+            size |= (byte & 0x7F) << shift
+            shift += 7
+            offset += 1
+        return type_num, size, offset
+
+    def _base_offset(self, type_num: int, offset: int, pos: int) -> tuple[int, int]:
+        # delta の base の位置と、zlib データの開始位置
+        if type_num == REF_DELTA:
+            base = self.pack[pos : pos + HASH_LEN].hex()
+            i = self.position(base)
+            if i is None:
+                raise RuntimeError(f"Missing delta base {base} in {self.pack_path}")
+            return self.offset(i), pos + HASH_LEN
+        byte = self.pack[pos]
+        distance = byte & 0x7F
+        pos += 1
+        while byte & 0x80:
+            byte = self.pack[pos]
+            distance = ((distance + 1) << 7) | (byte & 0x7F)
+            pos += 1
+        return offset - distance, pos
+
+    def _inflate(self, pos: int, size: int) -> bytes:
+        # 圧縮後の長さは記録されていないので、足りなければ続きを読む
+        d = zlib.decompressobj()
+        step = size + 64
+        out = d.decompress(self.pack[pos : pos + step])
+        while not d.eof and pos + step < len(self.pack):
+            pos += step
+            out += d.decompress(self.pack[pos : pos + step])
+        if len(out) != size:
+            raise RuntimeError(f"Corrupt pack entry in {self.pack_path}")
+        return out
+
+    def _inflate_head(self, pos: int, n: int) -> bytes:
+        # 先頭 n byte だけを伸長する（dynamic Huffman のヘッダが長いと少し読み足す）
+        d = zlib.decompressobj()
+        out = b""
+        step = 256
+        while len(out) < n and not d.eof and pos < len(self.pack):
+            out += d.decompress(self.pack[pos : pos + step], n - len(out))
+            pos += step
+            if d.unconsumed_tail:
+                break
+        return out
+
+    def read_at(self, offset: int) -> tuple[str, bytes]:
+        # delta の連鎖は base 側へ辿ってから、戻りながら適用する（再帰しない）
+        chain: list[tuple[int, int, int]] = []
+        while True:
+            cached = self._cache.get(offset)
+            if cached is not None:
+                type_num, data = cached
+                break
+            type_num, size, pos = self._entry(offset)
+            if type_num in (OFS_DELTA, REF_DELTA):
+                base, pos = self._base_offset(type_num, offset, pos)
+                chain.append((offset, pos, size))
+                offset = base
+                continue
+            data = self._inflate(pos, size)
+            self._remember(offset, type_num, data)
+            break
+        for delta_offset, pos, size in reversed(chain):
+            data = apply_delta(data, self._inflate(pos, size))
+            self._remember(delta_offset, type_num, data)
+        return TYPE_NAMES[type_num], data
+
+    def iter_at(self, offset: int, block_size: int) -> Iterator[bytes]:
+        # delta でない entry は block_size ずつ伸長して返し、全体をメモリに載せない。
+        # delta は base に適用するために全体が要るので read_at で組み立てる
+        type_num, size, pos = self._entry(offset)
+        if type_num in (OFS_DELTA, REF_DELTA) or offset in self._cache:
+            yield self.read_at(offset)[1]
+            return
+        d = zlib.decompressobj()
+        total = 0
+        while not d.eof:
+            data = d.unconsumed_tail
+            if not data:
+                data = self.pack[pos : pos + block_size]
+                pos += len(data)
+            out = d.decompress(data, block_size)
+            if not out and not data:
+                break  # pack の末尾で途切れている
+            total += len(out)
+            if out:
+                yield out
+        if not d.eof or total != size:
+            raise RuntimeError(f"Corrupt pack entry in {self.pack_path}")
+
+    def _remember(self, offset: int, type_num: int, data: bytes) -> None:
+        if len(self._cache) >= BASE_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[offset] = (type_num, data)
+
+    def read(self, oid: str) -> tuple[str, bytes] | None:
+        i = self.position(oid)
+        return None if i is None else self.read_at(self.offset(i))
+
+    def stat(self, oid: str) -> tuple[str, int] | None:
+        i = self.position(oid)
+        return None if i is None else self.stat_at(self.offset(i))
+
+    def stat_at(self, offset: int) -> tuple[str, int]:
+        # type は base を辿って決まる。サイズは delta の先頭に書かれている
+        size = None
+        while True:
+            type_num, entry_size, pos = self._entry(offset)
+            if type_num not in (OFS_DELTA, REF_DELTA):
+                return TYPE_NAMES[type_num], entry_size if size is None else size
+            offset, pos = self._base_offset(type_num, offset, pos)
+            if size is None:
+                size = delta_result_size(self._inflate_head(pos, 32))
+
+
+class _OidView:
+    # bisect 用に idx の oid テーブルを列として見せる
+    def __init__(self, pack: PackFile) -> None:
+        self.pack = pack
+
+    def __getitem__(self, i: int) -> bytes:
+        return self.pack._oid_at(i)
+
+    def __len__(self) -> int:
+        return self.pack.count
+
+
+# --- 受け取った pack の取り込み（git index-pack --stdin --fix-thin） ---
+STREAM_READ_SIZE = 64 << 10
+
+
+class IndexPackResult(NamedTuple):
+    pack_path: Path
+    objects: int
+    deltas: int
+    # thin pack を自己完結させるために末尾へ足した base の数
+    thin_bases: int
+    # 受け取った pack の byte 数
+    received: int
+
+
+class _Entry(NamedTuple):
+    offset: int
+    type_num: int
+    size: int
+    # zlib データの開始位置
+    data_pos: int
+    # OFS_DELTA なら base の offset、REF_DELTA なら base の oid
+    base: int | str | None
+    crc: int
+
+
+class _PackInput:
+    # pipe から pack を読み、読んだ byte を SHA-1 と一時ファイルへそのまま流す
+    def __init__(self, src: BinaryIO, dst: BinaryIO) -> None:
+        self.src = src
+        self.dst = dst
+        self.hash = hashlib.sha1()
+        self.buffer = b""
+        self.offset = 0
+        self.crc = 0
+
+    def _fill(self) -> None:
+        read = getattr(self.src, "read1", self.src.read)
+        block = read(STREAM_READ_SIZE)
+        if not block:
+            raise RuntimeError("early EOF: pack stream ended unexpectedly")
+        self.buffer += block
+
+    def _consume(self, data: bytes) -> None:
+        self.dst.write(data)
+        self.hash.update(data)
+        self.crc = zlib.crc32(data, self.crc)
+        self.offset += len(data)
+
+    def read(self, n: int, consume: bool = True) -> bytes:
+        while len(self.buffer) < n:
+            self._fill()
+        data, self.buffer = self.buffer[:n], self.buffer[n:]
+        if consume:
+            self._consume(data)
+        return data
+
+    def inflate(self, size: int, hasher=None) -> None:
+        # 伸長した中身は持たず、hasher があれば流し込むだけにする
+        d = zlib.decompressobj()
+        total = 0
+        while not d.eof:
+            if not self.buffer:
+                self._fill()
+            chunk, self.buffer = self.buffer, b""
+            out = d.decompress(chunk)
+            total += len(out)
+            if hasher is not None:
+                hasher.update(out)
+            self.buffer = d.unused_data
+            self._consume(chunk[: len(chunk) - len(self.buffer)])
+        if total != size:
+            raise RuntimeError("Corrupt pack entry: size mismatch")
+
+
+def _read_entries(inp: _PackInput) -> tuple[list[_Entry], dict[int, str]]:
+    # 各 entry の位置と base を記録し、delta でない object の oid はその場で計算する
+    header = inp.read(12)
+    if header[:4] != PACK_SIGNATURE:
+        raise RuntimeError("protocol error: bad pack header")
+    version, count = struct.unpack(">II", header[4:])
+    if version != PACK_VERSION:
+        raise RuntimeError(f"unsupported pack version {version}")
+    entries: list[_Entry] = []
+    oids: dict[int, str] = {}
+    for _ in range(count):
+        offset = inp.offset
+        inp.crc = 0
+        byte = inp.read(1)[0]
+        type_num = byte >> 4 & 0x07
+        size = byte & 0x0F
+        shift = 4
+        while byte & 0x80:
+            byte = inp.read(1)[0]
+            size |= (byte & 0x7F) << shift
+            shift += 7
+        base: int | str | None = None
+        if type_num == OFS_DELTA:
+            byte = inp.read(1)[0]
+            distance = byte & 0x7F
+            while byte & 0x80:
+                byte = inp.read(1)[0]
+                distance = ((distance + 1) << 7) | (byte & 0x7F)
+            base = offset - distance
+        elif type_num == REF_DELTA:
+            base = inp.read(HASH_LEN).hex()
+        elif type_num not in TYPE_NAMES:
+            raise RuntimeError(f"Corrupt pack: unknown object type {type_num}")
+        data_pos = inp.offset
+        if base is None:
+            h = hashlib.sha1(f"{TYPE_NAMES[type_num]} {size}\0".encode())
+            inp.inflate(size, h)
+            oids[offset] = h.hexdigest()
+        else:
+            inp.inflate(size)
+        entries.append(_Entry(offset, type_num, size, data_pos, base, inp.crc))
+    trailer = inp.read(HASH_LEN, consume=False)
+    if trailer != inp.hash.digest():
+        raise RuntimeError("pack is corrupted (SHA1 mismatch)")
+    return entries, oids
+
+
+def index_pack(
+    src: BinaryIO,
+    pack_dir: Path,
+    read_base: Callable[[str], tuple[str, bytes] | None],
+    durability: Durability | None = None,
+) -> IndexPackResult:
+    # 受け取りながら一時ファイルに書き、delta を解いて oid を決めてから idx を作る。
+    # pack に無い base（thin pack）は read_base で手元から読み、pack の末尾に足す
+    durability = durability or Durability()
+    pack_dir.mkdir(parents=True, exist_ok=True)
+    tmp = pack_dir / f"tmp_pack_{os.getpid()}_in"
+    try:
+        with open(tmp, "w+b") as f:
+            inp = _PackInput(src, f)
+            entries, oids = _read_entries(inp)
+            received = inp.offset + HASH_LEN
+            f.flush()
+            added = _resolve_and_fix(f, entries, oids, read_base)
+            f.seek(0)
+            h = hashlib.sha1()
+            while block := f.read(STREAM_READ_SIZE):
+                h.update(block)
+            checksum = h.digest()
+            f.write(checksum)
+            f.flush()
+            durability.sync_file(f.fileno())
+        index: dict[str, tuple[int, int]] = {}
+        for e in entries:
+            index.setdefault(oids[e.offset], (e.offset, e.crc))
+        for oid, offset, crc in added:
+            index.setdefault(oid, (offset, crc))
+        name = f"pack-{checksum.hex()}"
+        pack_path = pack_dir / f"{name}.pack"
+        os.replace(tmp, pack_path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    write_pack_index(pack_dir / f"{name}.idx", index, checksum, durability)
+    deltas = sum(1 for e in entries if e.base is not None)
+    return IndexPackResult(pack_path, len(index), deltas, len(added), received)
+
+
+def _resolve_and_fix(
+    f: BinaryIO,
+    entries: list[_Entry],
+    oids: dict[int, str],
+    read_base: Callable[[str], tuple[str, bytes] | None],
+) -> list[tuple[str, int, int]]:
+    # base から delta へ深さ優先に解く（git の resolve_deltas と同じ順）。
+    # 戻り値は末尾に足した base の (oid, offset, crc32)
+    by_offset: dict[int, list[_Entry]] = {}
+    by_oid: dict[str, list[_Entry]] = {}
+    for e in entries:
+        if isinstance(e.base, int):
+            by_offset.setdefault(e.base, []).append(e)
+        elif isinstance(e.base, str):
+            by_oid.setdefault(e.base, []).append(e)
+    size = f.seek(0, os.SEEK_END)
+    data = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) if size else b""
+
+    def inflate(e: _Entry) -> bytes:
+        d = zlib.decompressobj()
+        out = d.decompress(data[e.data_pos : e.data_pos + e.size + 64])
+        pos = e.data_pos + e.size + 64
+        while not d.eof and pos < len(data):
+            out += d.decompress(data[pos : pos + STREAM_READ_SIZE])
+            pos += STREAM_READ_SIZE
+        return out
+
+    def resolve(oid: str, offset: int | None, type_num: int, raw: bytes) -> None:
+        stack = [(oid, offset, raw)]
+        while stack:
+            oid, offset, raw = stack.pop()
+            children = by_oid.pop(oid, [])
+            if offset is not None:
+                children += by_offset.pop(offset, [])
+            for child in children:
+                result = apply_delta(raw, inflate(child))
+                header = f"{TYPE_NAMES[type_num]} {len(result)}\0".encode()
+                child_oid = hashlib.sha1(header + result).hexdigest()
+                oids[child.offset] = child_oid
+                stack.append((child_oid, child.offset, result))
+
+    try:
+        for e in entries:
+            if e.base is None and (e.offset in by_offset or oids[e.offset] in by_oid):
+                resolve(oids[e.offset], e.offset, e.type_num, inflate(e))
+        missing = list(by_oid)
+        thin: list[tuple[str, int, bytes]] = []
+        for base in missing:
+            if base not in by_oid:
+                continue  # 先に足した base から辿り着いた
+            found = read_base(base)
+            if found is None:
+                raise RuntimeError(f"pack has unresolved delta base {base}")
+            typ, raw = found
+            thin.append((base, TYPE_NUMBERS[typ], raw))
+            resolve(base, None, TYPE_NUMBERS[typ], raw)
+        if by_oid or by_offset:
+            raise RuntimeError("pack has unresolved deltas")
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+    # --fix-thin: 足りなかった base を完全な object として末尾に足し、object 数を直す
+    added = []
+    f.seek(0, os.SEEK_END)
+    for oid, type_num, raw in thin:
+        offset = f.tell()
+        entry = _entry_header(type_num, len(raw)) + zlib.compress(raw)
+        f.write(entry)
+        added.append((oid, offset, zlib.crc32(entry)))
+    if added:
+        f.seek(8)
+        f.write(struct.pack(">I", len(entries) + len(added)))
+    f.flush()
+    return added
@@ -0,0 +1,112 @@
+import mmap
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+HEADER_PREFIX = b"# pack-refs with:"
+# 書き出す packed-refs は常にソート済み（peel 行は書かない）
+HEADER = b"# pack-refs with: sorted \n"
+OID_HEX_LEN = 40
+
+
+# packed-refs をメモリに展開せず、ソート済みの行を二分探索で引く
+class PackedRefs:
+    def __init__(self, data: mmap.mmap | bytes) -> None:
+        self.data = data
+        self.start = 0
+        traits: list[bytes] = []
+        if data[: len(HEADER_PREFIX)] == HEADER_PREFIX:
+            eol = data.find(b"\n")
+            traits = data[len(HEADER_PREFIX) : eol].split()
+            self.start = eol + 1
+        if data and b"sorted" not in traits:
+            # 古い形式はソートされている保証が無いので並べ直してから使う
+            self.data = _sort_records(data[self.start :])
+            self.start = 0
+
+    @classmethod
+    def open(cls, path: Path) -> "PackedRefs":
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return cls(b"")
+                return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return cls(b"")
+
+    # --- レコード境界（"^" で始まる peel 行は直前のレコードに属する） ---
+    def _record_start(self, lo: int, pos: int) -> int:
+        while True:
+            nl = self.data.rfind(b"\n", lo, pos)
+            start = nl + 1 if nl >= 0 else lo
+            if start == lo or self.data[start : start + 1] != b"^":
+                return start
+            pos = start - 1
+
+    def _record_end(self, start: int) -> int:
+        end = len(self.data)
+        pos = start
+        while pos < end:
+            nl = self.data.find(b"\n", pos)
+            pos = end if nl < 0 else nl + 1
+            if self.data[pos : pos + 1] != b"^":
+                break
+        return pos
+
+    def _name_at(self, start: int) -> bytes:
+        eol = self.data.find(b"\n", start)
+        if eol < 0:
+            eol = len(self.data)
+        return bytes(self.data[start + OID_HEX_LEN + 1 : eol])
+
+    def _locate(self, name: bytes) -> int:
+        # name 以上の最初のレコードの位置を返す
+        lo, hi = self.start, len(self.data)
+        while lo < hi:
+            rec = self._record_start(lo, (lo + hi) // 2)
+            probe = self._name_at(rec)
+            if probe < name:
+                lo = self._record_end(rec)
+            elif probe > name:
+                hi = rec
+            else:
+                return rec
+        return lo
+
+    # --- パブリックAPI ---
+    def get(self, name: str) -> str | None:
+        key = name.encode()
+        rec = self._locate(key)
+        if rec < len(self.data) and self._name_at(rec) == key:
+            return self.data[rec : rec + OID_HEX_LEN].decode()
+        return None
+
+    def iter_prefix(self, prefix: str = "") -> Iterator[tuple[str, str]]:
+        key = prefix.encode()
+        pos = self._locate(key)
+        while pos < len(self.data):
+            name = self._name_at(pos)
+            if not name.startswith(key):
+                return
+            yield name.decode(), self.data[pos : pos + OID_HEX_LEN].decode()
+            pos = self._record_end(pos)
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+
+def _sort_records(body: bytes) -> bytes:
+    records: list[tuple[bytes, bytes]] = []
+    for line in body.splitlines(keepends=True):
+        if line.startswith(b"^") and records:
+            name, text = records[-1]
+            records[-1] = (name, text + line)
+        elif line.strip() and not line.startswith(b"#"):
+            records.append((line[OID_HEX_LEN + 1 :].rstrip(b"\n"), line))
+    records.sort()
+    return b"".join(text for _, text in records)
+
+
+def serialize_packed_refs(refs: Iterable[tuple[str, str]]) -> bytes:
+    return HEADER + b"".join(f"{oid} {name}\n".encode() for name, oid in sorted(refs))
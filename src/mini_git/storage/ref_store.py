@@ -0,0 +1,364 @@
+import os
+from collections.abc import Set as AbstractSet
+from pathlib import Path
+from typing import Self
+from mini_git.storage.config_store import ConfigStore, identity
+from mini_git.storage.packed_refs import PackedRefs, serialize_packed_refs
+from mini_git.storage.reflog import ReflogStore
+from mini_git.utils.fs import Durability
+
+SYMREF_PREFIX = "ref: "
+LOCK_SUFFIX = ".lock"
+
+
+def _lock(path: Path) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock = path.with_name(path.name + LOCK_SUFFIX)
+    try:
+        return os.open(lock, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        raise RuntimeError(f"Unable to lock {path.name}: {lock} exists") from None
+
+
+def _unlock(path: Path) -> None:
+    try:
+        path.with_name(path.name + LOCK_SUFFIX).unlink()
+    except FileNotFoundError:
+        pass
+
+
+class RefTransaction:
+    # 複数の ref をまとめて更新する。全 ref の lock を取り、期待値を確認してから
+    # rename するので、途中で失敗したときはどの ref も変わらない
+    def __init__(self, store: "RefStore") -> None:
+        self.store = store
+        self.updates: dict[str, tuple[str | None, str | None]] = {}
+        self.messages: dict[str, str] = {}
+
+    def update(
+        self, name: str, new_oid: str, old_oid: str | None = None, message: str = ""
+    ) -> None:
+        self.updates[name] = (new_oid, old_oid)
+        self.messages[name] = message
+
+    def delete(self, name: str, old_oid: str | None = None, message: str = "") -> None:
+        self.updates[name] = (None, old_oid)
+        self.messages[name] = message
+
+    def commit(self) -> None:
+        store = self.store
+        durability = store.durability
+        # 新しい値が指す object を先に永続化する
+        durability.flush()
+        # HEAD が指す ref を更新するときは HEAD の reflog にも書く。その間は
+        # HEAD も lock しておく（HEAD 自体は書き換えない）
+        head_target = store.symbolic_target("HEAD")
+        log_head = (
+            head_target is not None
+            and self.updates.get(head_target, (None, None))[0] is not None
+            and "HEAD" not in self.updates
+        )
+        names = sorted(self.updates.keys() | ({"HEAD"} if log_head else set()))
+        locked: list[Path] = []
+        # reflog に書く更新前の値（lock を取った後に読んだもの）
+        previous: dict[str, str | None] = {}
+        try:
+            # lock は名前順に取る（同時に走るトランザクション同士のデッドロック回避）
+            for name in names:
+                path = store._path(name)
+                fd = _lock(path)
+                locked.append(path)
+                if name not in self.updates:
+                    os.close(fd)
+                    continue
+                new_oid, old_oid = self.updates[name]
+                try:
+                    if new_oid is not None:
+                        os.write(fd, f"{new_oid}\n".encode())
+                        durability.sync_file(fd)
+                finally:
+                    os.close(fd)
+                current = store.read_raw(name)
+                if current is None:
+                    current = store.packed_refs().get(name)
+                if old_oid is not None and current != old_oid:
+                    raise RuntimeError(
+                        f"cannot lock ref '{name}': is at {current} but expected"
+                        f" {old_oid}"
+                    )
+                if new_oid is None and current is None:
+                    raise RuntimeError(f"cannot delete ref '{name}': does not exist")
+                if current is not None and current.startswith(SYMREF_PREFIX):
+                    # 指す先を持つ HEAD を直接 oid に書き換える（detach）場合
+                    current = store.resolve(name)
+                previous[name] = current
+
+            deletes = [n for n, (new, _) in self.updates.items() if new is None]
+            packed = store.packed_refs()
+            if any(packed.get(n) is not None for n in deletes):
+                store._rewrite_packed(remove=set(deletes))
+            ident = store.identity()
+            # reflog は ref ごとに、その ref の lock を持ったまま書く
+            for path in locked:
+                name = path.relative_to(store.git_dir).as_posix()
+                if name not in self.updates:
+                    continue
+                lock = path.with_name(path.name + LOCK_SUFFIX)
+                new_oid = self.updates[name][0]
+                if new_oid is None:
+                    store.reflog.delete(name)
+                    if path.is_file():
+                        path.unlink()
+                    lock.unlink()
+                    store._prune_empty_dirs(path.parent)
+                else:
+                    self._log(
+                        name,
+                        previous[name],
+                        new_oid,
+                        ident,
+                        log_head and name == head_target,
+                    )
+                    os.replace(lock, path)
+            if log_head:
+                _unlock(store._path("HEAD"))
+            for directory in {path.parent for path in locked}:
+                if directory.is_dir():
+                    durability.sync_dir(directory)
+            locked.clear()
+        finally:
+            for path in locked:
+                _unlock(path)
+        self.updates.clear()
+        self.messages.clear()
+
+    def _log(
+        self, name: str, old_oid: str | None, new_oid: str, ident: str, head: bool
+    ) -> None:
+        # 値が変わったときだけ書く。head なら HEAD の reflog にも
+        if old_oid == new_oid:
+            return
+        reflog = self.store.reflog
+        message = self.messages.get(name, "")
+        if reflog.should_log(name):
+            reflog.append(name, old_oid, new_oid, ident, message)
+        if head:
+            reflog.append("HEAD", old_oid, new_oid, ident, message)
+
+    def abort(self) -> None:
+        self.updates.clear()
+        self.messages.clear()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+class RefStore:
+    def __init__(
+        self,
+        git_dir: Path,
+        config: ConfigStore | None = None,
+        durability: Durability | None = None,
+    ) -> None:
+        self.git_dir = git_dir
+        self.config = config if config is not None else ConfigStore(git_dir)
+        self.durability = durability or Durability()
+        self.reflog = ReflogStore(git_dir)
+        self.packed_path = git_dir / "packed-refs"
+        self._packed: PackedRefs | None = None
+        self._packed_stat: tuple[int, int, int] | None = None
+
+    def _path(self, name: str) -> Path:
+        return self.git_dir / name
+
+    # --- packed-refs（stat が変わったときだけ開き直す） ---
+    def packed_refs(self) -> PackedRefs:
+        try:
+            st = os.stat(self.packed_path)
+            key = (st.st_ino, st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            key = None
+        if self._packed is None or key != self._packed_stat:
+            if self._packed is not None:
+                self._packed.close()
+            self._packed = PackedRefs.open(self.packed_path)
+            self._packed_stat = key
+        return self._packed
+
+    def _rewrite_packed(
+        self, add: dict[str, str] | None = None, remove: AbstractSet[str] = frozenset()
+    ) -> None:
+        fd = _lock(self.packed_path)
+        lock = self.packed_path.with_name(self.packed_path.name + LOCK_SUFFIX)
+        try:
+            refs = dict(self.packed_refs().iter_prefix())
+            refs.update(add or {})
+            for name in remove:
+                refs.pop(name, None)
+            os.write(fd, serialize_packed_refs(refs.items()))
+            self.durability.sync_file(fd)
+            os.close(fd)
+            fd = -1
+            os.replace(lock, self.packed_path)
+            self.durability.sync_dir(self.git_dir)
+        except BaseException:
+            if fd >= 0:
+                os.close(fd)
+            _unlock(self.packed_path)
+            raise
+
+    def _prune_empty_dirs(self, directory: Path) -> None:
+        refs_root = self.git_dir / "refs"
+        while directory != refs_root and refs_root in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                return
+            directory = directory.parent
+
+    # --- 読み込み ---
+    def read_raw(self, name: str) -> str | None:
+        try:
+            return self._path(name).read_text(encoding="utf-8").strip()
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            return None
+
+    def symbolic_target(self, name: str) -> str | None:
+        raw = self.read_raw(name)
+        if raw is not None and raw.startswith(SYMREF_PREFIX):
+            return raw[len(SYMREF_PREFIX) :]
+        return None
+
+    def resolve(self, name: str) -> str | None:
+        # シンボリック ref を辿って oid を返す（未作成のブランチなら None）
+        for _ in range(10):
+            raw = self.read_raw(name)
+            if raw is None:
+                return self.packed_refs().get(name)
+            if not raw.startswith(SYMREF_PREFIX):
+                return raw
+            name = raw[len(SYMREF_PREFIX) :]
+        raise RuntimeError(f"Too many levels of symbolic refs: {name}")
+
+    def exists(self, name: str) -> bool:
+        return (
+            self.read_raw(name) is not None or self.packed_refs().get(name) is not None
+        )
+
+    def iter_refs(self, prefix: str = "refs/") -> list[tuple[str, str]]:
+        # packed-refs は prefix の範囲だけを読み、loose ref は prefix のディレクトリ
+        # だけを走査する。loose ref が packed-refs より優先される
+        refs = dict(self.packed_refs().iter_prefix(prefix))
+        base = self._path(prefix.rstrip("/") if prefix.endswith("/") else prefix)
+        if not prefix.endswith("/"):
+            base = base.parent
+        if base.is_dir():
+            for dirpath, _, filenames in os.walk(base):
+                for filename in filenames:
+                    if filename.endswith(LOCK_SUFFIX):
+                        continue
+                    name = (Path(dirpath) / filename).relative_to(self.git_dir)
+                    name = name.as_posix()
+                    if not name.startswith(prefix):
+                        continue
+                    oid = self.resolve(name)
+                    if oid is not None:
+                        refs[name] = oid
+        return sorted(refs.items())
+
+    def dwim(self, short: str) -> str | None:
+        # git の rev-parse と同じ順序で短縮名を完全な ref 名に解決する
+        for name in (
+            short,
+            f"refs/{short}",
+            f"refs/tags/{short}",
+            f"refs/heads/{short}",
+            f"refs/remotes/{short}",
+        ):
+            if self.exists(name):
+                return name
+        return None
+
+    # --- 書き込み（lock ファイル経由の原子的更新） ---
+    def _write(self, name: str, content: str) -> None:
+        path = self._path(name)
+        self.durability.flush()
+        fd = _lock(path)
+        try:
+            os.write(fd, content.encode())
+            self.durability.sync_file(fd)
+        finally:
+            os.close(fd)
+        os.replace(path.with_name(path.name + LOCK_SUFFIX), path)
+        self.durability.sync_dir(path.parent)
+
+    def transaction(self) -> RefTransaction:
+        return RefTransaction(self)
+
+    def update(
+        self, name: str, oid: str, old_oid: str | None = None, message: str = ""
+    ) -> None:
+        with self.transaction() as tx:
+            tx.update(name, oid, old_oid, message)
+
+    def delete(self, name: str, old_oid: str | None = None, message: str = "") -> None:
+        with self.transaction() as tx:
+            tx.delete(name, old_oid, message)
+
+    def set_symbolic(self, name: str, target: str, message: str | None = None) -> None:
+        # message があれば、指す先が変わったことを name の reflog に残す（checkout）
+        old_oid = self.resolve(name) if message is not None else None
+        self._write(name, f"{SYMREF_PREFIX}{target}\n")
+        if message is not None:
+            new_oid = self.resolve(name)
+            if new_oid is not None:
+                self.reflog.append(name, old_oid, new_oid, self.identity(), message)
+
+    def identity(self) -> str:
+        # reflog の書き手。user.name などが無くても ref の更新は止めない
+        return identity("committer", self.config, strict=False)
+
+    def pack_refs(self, all_refs: bool = False, prune: bool = True) -> int:
+        # tag と既に packed の ref を詰める（all_refs ならブランチなども）
+        packed = self.packed_refs()
+        loose: dict[str, str] = {}
+        refs_dir = self.git_dir / "refs"
+        for dirpath, _, filenames in os.walk(refs_dir):
+            for filename in filenames:
+                if filename.endswith(LOCK_SUFFIX):
+                    continue
+                path = Path(dirpath) / filename
+                name = path.relative_to(self.git_dir).as_posix()
+                raw = self.read_raw(name)
+                if raw is None or raw.startswith(SYMREF_PREFIX):
+                    continue
+                if (
+                    all_refs
+                    or name.startswith("refs/tags/")
+                    or packed.get(name) is not None
+                ):
+                    loose[name] = raw
+        if loose:
+            self._rewrite_packed(add=loose)
+        if prune:
+            for name, oid in loose.items():
+                path = self._path(name)
+                # lock を取り、詰めた後に書き換えられていない ref だけを消す
+                try:
+                    fd = _lock(path)
+                except RuntimeError:
+                    continue
+                os.close(fd)
+                try:
+                    if self.read_raw(name) == oid:
+                        path.unlink()
+                finally:
+                    _unlock(path)
+                self._prune_empty_dirs(path.parent)
+        return len(loose)
@@ -0,0 +1,107 @@
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+ZERO_OID = "0" * 40
+# 末尾から読むときの 1 回の読み込み量
+BLOCK_SIZE = 8192
+# core.logAllRefUpdates の既定と同じく、これらの ref は log が無くても作る
+LOGGED_PREFIXES = ("refs/heads/", "refs/remotes/", "refs/notes/")
+
+
+class ReflogEntry(NamedTuple):
+    # logs/<ref> の 1 行: "<old> <new> <name> <email> <time> <tz>\t<message>"
+    old: str
+    new: str
+    ident: str
+    message: str
+
+
+def _parse(line: bytes) -> ReflogEntry:
+    head, _, message = line.partition(b"\t")
+    old, new, ident = head.decode().split(" ", 2)
+    return ReflogEntry(old, new, ident, message.decode())
+
+
+class ReflogStore:
+    def __init__(self, git_dir: Path) -> None:
+        self.git_dir = git_dir
+        self.root = git_dir / "logs"
+
+    def path(self, ref: str) -> Path:
+        return self.root / ref
+
+    def should_log(self, ref: str) -> bool:
+        return (
+            ref == "HEAD" or ref.startswith(LOGGED_PREFIXES) or self.path(ref).is_file()
+        )
+
+    def append(
+        self, ref: str, old: str | None, new: str | None, ident: str, message: str
+    ) -> None:
+        # 1 行を O_APPEND の 1 回の write で書く。並行して書かれても行は混ざらない
+        message = " ".join(message.split())
+        line = f"{old or ZERO_OID} {new or ZERO_OID} {ident}\t{message}\n"
+        path = self.path(ref)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+    def iter_reverse(self, ref: str) -> Iterator[ReflogEntry]:
+        # 新しい順に返す。末尾から BLOCK_SIZE ずつ読み、必要な分しか読まない
+        try:
+            f = open(self.path(ref), "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            pos = f.seek(0, os.SEEK_END)
+            partial = b""
+            while pos > 0:
+                size = min(BLOCK_SIZE, pos)
+                pos -= size
+                f.seek(pos)
+                lines = (f.read(size) + partial).split(b"\n")
+                # 先頭は前のブロックにまたがっているかもしれない行
+                partial = lines[0]
+                for line in reversed(lines[1:]):
+                    if line:
+                        yield _parse(line)
+            if partial:
+                yield _parse(partial)
+
+    def read(self, ref: str) -> list[ReflogEntry]:
+        return list(self.iter_reverse(ref))[::-1]
+
+    def nth(self, ref: str, n: int) -> str | None:
+        # <ref>@{n}: n 回前の更新後の値。最古の更新より前なら最古の更新前の値
+        last = None
+        count = 0
+        for entry in self.iter_reverse(ref):
+            if count == n:
+                return entry.new
+            last = entry
+            count += 1
+        if last is not None and n == count and last.old != ZERO_OID:
+            return last.old
+        return None
+
+    def count(self, ref: str) -> int:
+        return sum(1 for _ in self.iter_reverse(ref))
+
+    def delete(self, ref: str) -> None:
+        path = self.path(ref)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        directory = path.parent
+        while directory != self.root and self.root in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                return
+            directory = directory.parent
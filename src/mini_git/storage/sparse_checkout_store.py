@@ -0,0 +1,105 @@
+from collections.abc import Iterable
+from enum import Enum
+from pathlib import Path, PurePosixPath
+
+
+class ConeState(str, Enum):
+    IN = "in"  # 再帰的に含まれるディレクトリ（またはその配下）
+    PARENT = "parent"  # 直下のファイルだけ含まれる親ディレクトリ
+    OUT = "out"  # cone の外（sparse index では 1 エントリに畳める）
+
+
+class SparseCheckoutStore:
+    def __init__(self, git_dir: Path) -> None:
+        self.path = git_dir / "info" / "sparse-checkout"
+        self._cone: tuple[frozenset[str], frozenset[str]] | None = None
+        self._enabled = False
+
+    def is_enabled(self) -> bool:
+        return self.path.is_file()
+
+    # --- cone mode パターンの読み書き ---
+    def _load(self) -> tuple[frozenset[str], frozenset[str]]:
+        if self._cone is not None:
+            return self._cone
+        recursive: set[str] = set()
+        parents: set[str] = set()
+        self._enabled = self.is_enabled()
+        if self._enabled:
+            lines = [
+                line.strip()
+                for line in self.path.read_text(encoding="utf-8").splitlines()
+                if line.strip() and not line.startswith("#")
+            ]
+            negated = {line[1:] for line in lines if line.startswith("!")}
+            for line in lines:
+                if line.startswith("!") or line == "/*":
+                    continue
+                if not (line.startswith("/") and line.endswith("/")):
+                    raise RuntimeError(f"Not a cone-mode pattern: {line}")
+                d = line.strip("/")
+                if f"/{d}/*/" in negated:
+                    parents.add(d)
+                else:
+                    recursive.add(d)
+        self._cone = (frozenset(recursive), frozenset(parents))
+        return self._cone
+
+    def directories(self) -> list[str]:
+        return sorted(self._load()[0])
+
+    def set(self, dirs: Iterable[str]) -> None:
+        recursive = {PurePosixPath(d).as_posix().strip("/") for d in dirs}
+        recursive.discard("")
+        recursive.discard(".")
+        # 他の cone ディレクトリ配下にあるものは冗長なので落とす
+        recursive = {
+            d
+            for d in recursive
+            if not any(d.startswith(f"{other}/") for other in recursive)
+        }
+        parents = {
+            str(p) for d in recursive for p in PurePosixPath(d).parents if str(p) != "."
+        }
+        lines = ["/*", "!/*/"]
+        for d in sorted(parents | recursive):
+            lines.append(f"/{d}/")
+            if d in parents:
+                lines.append(f"!/{d}/*/")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        self._cone = (frozenset(recursive), frozenset(parents))
+        self._enabled = True
+
+    def disable(self) -> None:
+        self.path.unlink(missing_ok=True)
+        self._cone = None
+
+    # --- 判定 ---
+    def dir_state(self, directory: str) -> ConeState:
+        recursive, parents = self._load()
+        if not self._enabled:
+            return ConeState.IN
+        # 祖先を辿るだけなので cone ディレクトリ数に依存しない
+        d = directory
+        while d:
+            if d in recursive:
+                return ConeState.IN
+            d = d.rpartition("/")[0]
+        if directory in parents:
+            return ConeState.PARENT
+        return ConeState.OUT
+
+    def collapse_root(self, path: str) -> str | None:
+        # path を含む最も浅い cone 外ディレクトリ。cone 内なら None
+        parts = path.split("/")[:-1]
+        for i in range(1, len(parts) + 1):
+            state = self.dir_state("/".join(parts[:i]))
+            if state is ConeState.IN:
+                return None
+            if state is ConeState.OUT:
+                return "/".join(parts[:i])
+        return None
+
+    def contains(self, path: str) -> bool:
+        return self.collapse_root(path) is None
@@ -3,3 +3,5 @@ from enum import Enum
 
 class ObjectType(str, Enum):
     BLOB = "blob"
+    TREE = "tree"
+    COMMIT = "commit"
@@ -0,0 +1,101 @@
+import math
+from collections.abc import Iterable
+from typing import NamedTuple
+
+# git の changed-path Bloom filter と同じパラメータ
+SEED0 = 0x293AE76F
+SEED1 = 0x7E646E2C
+BITS_PER_WORD = 8
+MAX_CHANGED_PATHS = 512
+MASK32 = 0xFFFFFFFF
+
+
+class BloomSettings(NamedTuple):
+    # version 1 は git の実装に合わせて非 ASCII バイトを符号拡張して hash する
+    hash_version: int = 1
+    num_hashes: int = 7
+    bits_per_entry: int = 10
+
+
+# 変更パスが多すぎる commit は 1 バイトの全ビット立ちフィルタにする
+TOO_LARGE_FILTER = b"\xff"
+
+
+def _rotl(x: int, r: int) -> int:
+    return ((x << r) | (x >> (32 - r))) & MASK32
+
+
+def murmur3(seed: int, data: bytes, signed: bool = False) -> int:
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    vals = [b - 256 if signed and b > 127 else b for b in data]
+    h = seed
+    n4 = len(vals) // 4
+    for i in range(n4):
+        b0, b1, b2, b3 = vals[4 * i : 4 * i + 4]
+        k = (b0 | (b1 << 8) | (b2 << 16) | (b3 << 24)) & MASK32
+        k = (_rotl((k * c1) & MASK32, 15) * c2) & MASK32
+        h ^= k
+        h = (_rotl(h, 13) * 5 + 0xE6546B64) & MASK32
+    tail = vals[n4 * 4 :]
+    k1 = 0
+    if len(tail) == 3:
+        k1 ^= tail[2] << 16
+    if len(tail) >= 2:
+        k1 ^= tail[1] << 8
+    if tail:
+        k1 ^= tail[0]
+        k1 &= MASK32
+        k1 = (_rotl((k1 * c1) & MASK32, 15) * c2) & MASK32
+        h ^= k1
+    h ^= len(vals)
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & MASK32
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & MASK32
+    h ^= h >> 16
+    return h
+
+
+def bloom_key(path: str, settings: BloomSettings) -> list[int]:
+    data = path.encode()
+    signed = settings.hash_version == 1
+    h0 = murmur3(SEED0, data, signed)
+    h1 = murmur3(SEED1, data, signed)
+    return [(h0 + i * h1) & MASK32 for i in range(settings.num_hashes)]
+
+
+def with_leading_dirs(paths: Iterable[str]) -> set[str]:
+    # "a/b/c" が変わったら "a/b" と "a" も変わったものとして登録する
+    out: set[str] = set()
+    for p in paths:
+        while p and p not in out:
+            out.add(p)
+            p = p.rpartition("/")[0]
+    return out
+
+
+def create_filter(changed_files: list[str], settings: BloomSettings) -> bytes:
+    if len(changed_files) > MAX_CHANGED_PATHS:
+        return TOO_LARGE_FILTER
+    paths = with_leading_dirs(changed_files)
+    length = max(1, math.ceil(len(paths) * settings.bits_per_entry / BITS_PER_WORD))
+    data = bytearray(length)
+    nbits = length * BITS_PER_WORD
+    for p in paths:
+        for h in bloom_key(p, settings):
+            pos = h % nbits
+            data[pos // BITS_PER_WORD] |= 1 << (pos % BITS_PER_WORD)
+    return bytes(data)
+
+
+def maybe_contains(data: bytes, path: str, settings: BloomSettings) -> bool:
+    # False なら確実に変更なし。True は偽陽性を含む
+    if not data:
+        return True
+    nbits = len(data) * BITS_PER_WORD
+    for p in with_leading_dirs([path]):
+        for h in bloom_key(p, settings):
+            pos = h % nbits
+            if not data[pos // BITS_PER_WORD] & (1 << (pos % BITS_PER_WORD)):
+                return False
+    return True
@@ -0,0 +1,173 @@
+# git の pack で使う delta 形式:
+#   varint 元のサイズ | varint 結果のサイズ | 命令...
+#   copy:   1oooossss のあとに offset（最大 4 byte）と size（最大 3 byte）の非 0 byte
+#   insert: 0nnnnnnn（1〜127）のあとに n byte のデータ
+BLOCK = 16
+# 古い git との互換のため 1 つの copy 命令は 64KiB まで
+MAX_COPY = 0x10000
+MAX_INSERT = 0x7F
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def delta_index(base: bytes) -> dict[bytes, int]:
+    # base を BLOCK byte ごとに区切った断片 → 最初の位置。target 側は 1 byte ずつ
+    # ずらして引くので、2 * BLOCK - 1 byte 以上の一致は必ず見つかる
+    index: dict[bytes, int] = {}
+    for i in range(len(base) - BLOCK, -1, -BLOCK):
+        index[base[i : i + BLOCK]] = i
+    return index
+
+
+def _match_forward(a: bytes, i: int, b: bytes, j: int, limit: int) -> int:
+    # a[i:] と b[j:] の共通部分の長さ（最大 limit）。スライスの比較で倍々に伸ばす
+    done, step = 0, 64
+    while done < limit:
+        size = min(step, limit - done)
+        if a[i + done : i + done + size] == b[j + done : j + done + size]:
+            done += size
+            step *= 2
+            continue
+        while size > 1:
+            half = size // 2
+            if a[i + done : i + done + half] == b[j + done : j + done + half]:
+                done += half
+                size -= half
+            else:
+                size = half
+        break
+    return done
+
+
+def _insert(out: bytearray, data: bytes) -> None:
+    for start in range(0, len(data), MAX_INSERT):
+        chunk = data[start : start + MAX_INSERT]
+        out.append(len(chunk))
+        out += chunk
+
+
+def _copy(out: bytearray, offset: int, size: int) -> None:
+    while size:
+        n = min(size, MAX_COPY)
+        op = 0x80
+        args = bytearray()
+        for bit in range(4):
+            byte = offset >> (8 * bit) & 0xFF
+            if byte:
+                op |= 1 << bit
+                args.append(byte)
+        # 0x10000 は size の byte を省いて表す
+        for bit in range(3 if n != MAX_COPY else 0):
+            byte = n >> (8 * bit) & 0xFF
+            if byte:
+                op |= 0x10 << bit
+                args.append(byte)
+        out.append(op)
+        out += args
+        offset += n
+        size -= n
+
+
+def create_delta(
+    base: bytes,
+    target: bytes,
+    index: dict[bytes, int] | None = None,
+    max_size: int | None = None,
+) -> bytes | None:
+    # max_size を超えた時点で諦めて None を返す（候補の比較を早く打ち切るため）
+    if index is None:
+        index = delta_index(base)
+    out = bytearray(_varint(len(base)) + _varint(len(target)))
+    n = len(target)
+    # 未出力の insert だけで残りの上限を超えたら打ち切る
+    limit = max_size - len(out) if max_size is not None else None
+    pending = 0
+    i = 0
+    while i <= n - BLOCK:
+        j = index.get(target[i : i + BLOCK])
+        if j is None:
+            i += 1
+            if limit is not None and i - pending > limit:
+                return None
+            continue
+        # 一致を前後に伸ばす。前は未出力の insert の範囲まで
+        back = 0
+        while (
+            back < i - pending
+            and back < j
+            and base[j - back - 1] == target[i - back - 1]
+        ):
+            back += 1
+        length = BLOCK + _match_forward(
+            base, j + BLOCK, target, i + BLOCK, min(len(base) - j, n - i) - BLOCK
+        )
+        _insert(out, target[pending : i - back])
+        _copy(out, j - back, length + back)
+        i += length
+        pending = i
+        if max_size is not None:
+            limit = max_size - len(out)
+            if limit < 0:
+                return None
+    _insert(out, target[pending:])
+    if max_size is not None and len(out) > max_size:
+        return None
+    return bytes(out)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def delta_result_size(delta: bytes) -> int:
+    _, pos = _read_varint(delta, 0)
+    return _read_varint(delta, pos)[0]
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    base_size, pos = _read_varint(delta, 0)
+    if base_size != len(base):
+        raise RuntimeError("Corrupt delta: base size mismatch")
+    size, pos = _read_varint(delta, pos)
+    out = bytearray()
+    view = memoryview(base)
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = length = 0
+            for bit in range(4):
+                if op & (1 << bit):
+                    offset |= delta[pos] << (8 * bit)
+                    pos += 1
+            for bit in range(3):
+                if op & (0x10 << bit):
+                    length |= delta[pos] << (8 * bit)
+                    pos += 1
+            out += view[offset : offset + (length or MAX_COPY)]
+        elif op:
+            out += delta[pos : pos + op]
+            pos += op
+        else:
+            raise RuntimeError("Corrupt delta: reserved opcode 0")
+    if len(out) != size:
+        raise RuntimeError("Corrupt delta: result size mismatch")
+    return bytes(out)
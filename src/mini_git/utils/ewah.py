@@ -0,0 +1,73 @@
+import struct
+from collections.abc import Buffer
+
+# git の ewah_io.c と同じ直列化形式:
+#   u32 bit_size | u32 word 数 | u64 word[] | u32 最後の RLW の位置（すべて big endian）
+# RLW は bit0 が連続部分のビット、bit1-32 が連続 word 数、bit33-63 がリテラル word 数
+WORD_BITS = 64
+WORD_MASK = (1 << 64) - 1
+MAX_RUN = (1 << 32) - 1
+MAX_LITERALS = (1 << 31) - 1
+
+
+def _words(bits: int, bit_size: int) -> tuple[int, ...]:
+    count = (bit_size + WORD_BITS - 1) // WORD_BITS
+    return struct.unpack(f"<{count}Q", bits.to_bytes(count * 8, "little"))
+
+
+def ewah_encode(bits: int, bit_size: int) -> bytes:
+    buf = [0]
+    rlw = 0
+    run_bit = run_len = literals = 0
+
+    def flush() -> None:
+        buf[rlw] = run_bit | (run_len << 1) | (literals << 33)
+
+    for w in _words(bits, bit_size):
+        clean = w == 0 or w == WORD_MASK
+        bit = 1 if w == WORD_MASK else 0
+        if (
+            clean
+            and literals == 0
+            and (run_len == 0 or run_bit == bit)
+            and run_len < MAX_RUN
+        ):
+            run_bit = bit
+            run_len += 1
+        elif not clean and literals < MAX_LITERALS:
+            buf.append(w)
+            literals += 1
+        else:
+            flush()
+            rlw = len(buf)
+            buf.append(0)
+            run_bit = run_len = literals = 0
+            if clean:
+                run_bit, run_len = bit, 1
+            else:
+                buf.append(w)
+                literals = 1
+    flush()
+    return (
+        struct.pack(">II", bit_size, len(buf))
+        + struct.pack(f">{len(buf)}Q", *buf)
+        + struct.pack(">I", rlw)
+    )
+
+
+def ewah_decode(data: Buffer, offset: int = 0) -> tuple[int, int, int]:
+    # (ビット集合を表す int, bit_size, 直後のオフセット) を返す
+    bit_size, count = struct.unpack_from(">II", data, offset)
+    words = struct.unpack_from(f">{count}Q", data, offset + 8)
+    out = bytearray()
+    pos = 0
+    while pos < count:
+        marker = words[pos]
+        run_len = (marker >> 1) & MAX_RUN
+        literals = marker >> 33
+        out += (b"\xff" if marker & 1 else b"\0") * (8 * run_len)
+        lit = words[pos + 1 : pos + 1 + literals]
+        out += struct.pack(f"<{len(lit)}Q", *lit)
+        pos += 1 + literals
+    bits = int.from_bytes(out, "little") & ((1 << bit_size) - 1)
+    return bits, bit_size, offset + 8 + count * 8 + 4
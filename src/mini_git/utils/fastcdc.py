@@ -0,0 +1,66 @@
+import hashlib
+from collections.abc import Iterator
+
+# FastCDC (Xia et al.) の Gear ハッシュによる content-defined chunking
+_MASK64 = (1 << 64) - 1
+GEAR = tuple(
+    int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "big") for i in range(256)
+)
+
+DEFAULT_MIN_SIZE = 16 * 1024
+DEFAULT_AVG_SIZE = 64 * 1024
+DEFAULT_MAX_SIZE = 256 * 1024
+
+
+def _high_mask(bits: int) -> int:
+    # 左シフトの Gear ハッシュでは上位ビットほど長い窓に依存するので上位ビットを使う
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+def _cut_point(
+    data: bytes | memoryview,
+    start: int,
+    limit: int,
+    min_size: int,
+    avg_size: int,
+    mask_s: int,
+    mask_l: int,
+) -> int:
+    if limit - start <= min_size:
+        return limit
+    gear = GEAR
+    fp = 0
+    i = start + min_size
+    normal = min(start + avg_size, limit)
+    # normalized chunking: 平均サイズまでは厳しいマスク、それ以降は緩いマスク
+    while i < normal:
+        fp = ((fp << 1) + gear[data[i]]) & _MASK64
+        i += 1
+        if not fp & mask_s:
+            return i
+    while i < limit:
+        fp = ((fp << 1) + gear[data[i]]) & _MASK64
+        i += 1
+        if not fp & mask_l:
+            return i
+    return limit
+
+
+def iter_chunk_bounds(
+    data: bytes | memoryview,
+    min_size: int = DEFAULT_MIN_SIZE,
+    avg_size: int = DEFAULT_AVG_SIZE,
+    max_size: int = DEFAULT_MAX_SIZE,
+) -> Iterator[tuple[int, int]]:
+    if not 0 < min_size <= avg_size <= max_size:
+        raise ValueError("chunk sizes must satisfy 0 < min <= avg <= max")
+    bits = avg_size.bit_length() - 1
+    mask_s = _high_mask(bits + 2)
+    mask_l = _high_mask(max(bits - 2, 1))
+    n = len(data)
+    start = 0
+    while start < n:
+        limit = min(n, start + max_size)
+        end = _cut_point(data, start, limit, min_size, avg_size, mask_s, mask_l)
+        yield start, end
+        start = end
@@ -0,0 +1,177 @@
+import ctypes
+import os
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+# core.fsyncMethod の値
+#   none:  fsync しない（既定）
+#   fsync: ファイルごとに fsync してから rename する
+#   batch: batch() の中で書いたファイルは fsync も rename もせずに溜め、
+#          最後に syncfs 1 回で書き出してからまとめて rename する
+FSYNC_METHODS = ("none", "fsync", "batch")
+
+
+def _load_syncfs():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return ctypes.CDLL(None, use_errno=True).syncfs
+    except (OSError, AttributeError):
+        return None
+
+
+_syncfs = _load_syncfs()
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+
+def is_tmp_file(name: str) -> bool:
+    # 書き込み途中で残りうる一時ファイル（_tmp_path と PackWriter の tmp_pack_*）
+    return name.endswith(".tmp") or name.startswith("tmp_")
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    # 一時ファイルに書いてから rename する（hardlink 先を途中で切り詰めない）
+    tmp = _tmp_path(path)
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def prune_tmp_files(directory: Path, expire: float, recursive: bool = True) -> int:
+    # 途中で落ちたプロセスが残した一時ファイルのうち、expire より古いものを消す。
+    # 新しいものは他のプロセスが書いている最中かもしれないので残す
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(directory):
+        if not recursive:
+            dirnames.clear()
+        for name in filenames:
+            if not is_tmp_file(name):
+                continue
+            path = Path(dirpath) / name
+            try:
+                if path.stat().st_mtime < expire:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def fsync_dir(directory: Path) -> None:
+    # rename したエントリそのものを永続化する
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_barrier(directory: Path) -> None:
+    # directory を含むファイルシステムだけを syncfs で書き出す。使えなければ全体を sync
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        if _syncfs is None or _syncfs(fd) != 0:
+            os.sync()
+    finally:
+        os.close(fd)
+
+
+class Durability:
+    # object・index・ref の書き込みをいつ永続化するかを決める。RepoContext が
+    # 1 つ作って ObjectStore / IndexStore / RefStore で共有する
+    def __init__(self, method: str = "none") -> None:
+        if method not in FSYNC_METHODS:
+            raise RuntimeError(f"unknown core.fsyncMethod '{method}'")
+        self.method = method
+        # batch 中に書いたファイル: 本来の path → 一時ファイル
+        self.pending: dict[Path, Path] = {}
+        self._depth = 0
+        self.barriers = 0
+
+    @classmethod
+    def from_config(cls, config) -> "Durability":
+        if config is None:
+            return cls()
+        # core.fsync = none はどの method でも fsync を止める（git と同じ）
+        if (config.get("core.fsync") or "").strip().lower() == "none":
+            return cls()
+        return cls((config.get("core.fsyncMethod") or "none").strip().lower())
+
+    def resolve(self, path: Path) -> Path:
+        # batch 中でまだ rename していないファイルは一時ファイルから読む
+        return self.pending.get(path, path) if self.pending else path
+
+    def write(self, path: Path, data: bytes) -> None:
+        # object などの内容で名前が決まるファイル
+        tmp = _tmp_path(path)
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+                if self.method == "fsync" or (
+                    self.method == "batch" and not self._depth
+                ):
+                    f.flush()
+                    os.fsync(f.fileno())
+            if self.method == "batch" and self._depth:
+                self.pending[path] = tmp
+                return
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def publish(self, path: Path, data: bytes) -> None:
+        # index や ref のように他のファイルを指すもの。指す先を先に永続化し、
+        # 自身も fsync してから rename し、ディレクトリも fsync する
+        self.flush()
+        tmp = _tmp_path(path)
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+                if self.method != "none":
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        if self.method != "none":
+            fsync_dir(path.parent)
+
+    def sync_file(self, fd: int) -> None:
+        # 呼び出し側が自分で書いた lock ファイルなど
+        if self.method != "none":
+            os.fsync(fd)
+
+    def sync_dir(self, directory: Path) -> None:
+        if self.method != "none":
+            fsync_dir(directory)
+
+    def flush(self) -> None:
+        # 溜めたファイルを syncfs 1 回で書き出してから本来の名前に rename する
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        sync_barrier(next(iter(pending)).parent)
+        self.barriers += 1
+        for path, tmp in pending.items():
+            os.replace(tmp, path)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        # 入れ子にできる。いちばん外側を抜けるときに flush する
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self.flush()
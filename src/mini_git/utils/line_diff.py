@@ -0,0 +1,581 @@
+from array import array
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import NamedTuple
+
+# histogram diff で目印に使う行の出現回数の上限（jgit / git と同じ）
+MAX_CHAIN = 64
+# git の既定の関数名ヘッダの最大長
+FUNC_LINE_MAX = 80
+# Myers の探索の打ち切りや、探索前に除く行の判定に使う値（git の xdiff と同じ）
+MAX_COST_MIN = 256
+HEUR_MIN_COST = 256
+SNAKE_CNT = 20
+K_HEUR = 4
+MAX_EQLIMIT = 1024
+SIMSCAN_WINDOW = 100
+KPDIS_RUN = 4
+LINE_MAX = (1 << 63) - 1
+
+
+class Edit(NamedTuple):
+    # a[a_start:a_end] を b[b_start:b_end] に置き換える変更（片方は空でもよい）
+    a_start: int
+    a_end: int
+    b_start: int
+    b_end: int
+
+
+def split_lines(data: bytes) -> list[bytes]:
+    # git と同じく \n だけで区切り、改行を残したまま行に分ける
+    lines = data.split(b"\n")
+    last = lines.pop()
+    lines = [line + b"\n" for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def intern_lines(a: Sequence[bytes], b: Sequence[bytes]) -> tuple[array, array]:
+    # 同じ内容の行に同じ整数 id を振り、以降の比較は整数の比較だけにする
+    ids: dict[bytes, int] = {}
+    a_ids = array("I", (ids.setdefault(line, len(ids)) for line in a))
+    b_ids = array("I", (ids.setdefault(line, len(ids)) for line in b))
+    return a_ids, b_ids
+
+
+def _common_prefix(a: Sequence[int], i: int, b: Sequence[int], j: int, n: int) -> int:
+    # a[i:] と b[j:] の共通部分の長さ（最大 n）。長い一致はスライスの比較で
+    # まとめて飛ばし、Python の 1 要素ずつの比較を避ける
+    if n <= 0 or a[i] != b[j]:
+        return 0
+    done, step = 1, 8
+    while done < n:
+        size = min(step, n - done)
+        if a[i + done : i + done + size] == b[j + done : j + done + size]:
+            done += size
+            step *= 2
+            continue
+        # 不一致を含む窓を二分する
+        while size > 1:
+            half = size // 2
+            if a[i + done : i + done + half] == b[j + done : j + done + half]:
+                done += half
+                size -= half
+            else:
+                size = half
+        break
+    return done
+
+
+def _common_suffix(a: Sequence[int], i: int, b: Sequence[int], j: int, n: int) -> int:
+    # a[:i] と b[:j] の末尾の共通部分の長さ（最大 n）
+    if n <= 0 or a[i - 1] != b[j - 1]:
+        return 0
+    done, step = 1, 8
+    while done < n:
+        size = min(step, n - done)
+        if a[i - done - size : i - done] == b[j - done - size : j - done]:
+            done += size
+            step *= 2
+            continue
+        while size > 1:
+            half = size // 2
+            if a[i - done - half : i - done] == b[j - done - half : j - done]:
+                done += half
+                size -= half
+            else:
+                size = half
+        break
+    return done
+
+
+def _trim(
+    a: Sequence[int], a0: int, a1: int, b: Sequence[int], b0: int, b1: int
+) -> tuple[int, int, int, int]:
+    # 共通の先頭と末尾を取り除く
+    n = _common_prefix(a, a0, b, b0, min(a1 - a0, b1 - b0))
+    a0 += n
+    b0 += n
+    n = _common_suffix(a, a1, b, b1, min(a1 - a0, b1 - b0))
+    return a0, a1 - n, b0, b1 - n
+
+
+def _bogosqrt(n: int) -> int:
+    # xdiff と同じ、2 のべきで近似した平方根
+    i = 1
+    while n > 0:
+        i <<= 1
+        n >>= 2
+    return i
+
+
+def myers_diff(a: Sequence[int], b: Sequence[int]) -> Iterator[Edit]:
+    return compact(a, b, _myers(a, 0, len(a), b, 0, len(b)))
+
+
+def _myers(
+    a: Sequence[int], a0: int, a1: int, b: Sequence[int], b0: int, b1: int
+) -> Iterator[Edit]:
+    # git の xdiff と同じ手順の Myers。経路の選び方まで揃えないと、同じ入力でも
+    # git と違う位置に変更が出て、merge や blame の結果が食い違う
+    xa, xb = a[a0:a1], b[b0:b1]
+    n, m = len(xa), len(xb)
+    a_chg = bytearray(n + 2)
+    b_chg = bytearray(m + 2)
+    # 共通の先頭と末尾は探索の対象から外す
+    head = _common_prefix(xa, 0, xb, 0, min(n, m))
+    tail = _common_suffix(xa, n, xb, m, min(n, m) - head)
+    ha1, idx1 = _discard(xa, xb, head, n - tail, a_chg)
+    ha2, idx2 = _discard(xb, xa, head, m - tail, b_chg)
+    _recs_cmp(ha1, idx1, a_chg, ha2, idx2, b_chg)
+    for e in _marked_edits(a_chg, b_chg, n, m):
+        yield Edit(e.a_start + a0, e.a_end + a0, e.b_start + b0, e.b_end + b0)
+
+
+def _discard(
+    x: Sequence[int], other: Sequence[int], start: int, end: int, chg: bytearray
+) -> tuple[array, list[int]]:
+    # 相手に無い行は探索するまでもなく変更なので印をつけて除く。相手に何度も
+    # 出てくる行も、除いた行の並びの中にあるなら除く（xdl_cleanup_records）
+    counts = Counter(other)
+    limit = min(_bogosqrt(len(x)), MAX_EQLIMIT)
+    dis = bytearray(len(x))
+    for i in range(start, end):
+        found = counts.get(x[i], 0)
+        dis[i] = 0 if found == 0 else 2 if found >= limit else 1
+    kept: list[int] = []
+    for i in range(start, end):
+        if dis[i] == 1 or (dis[i] == 2 and not _clean_mmatch(dis, i, start, end - 1)):
+            kept.append(i)
+        else:
+            chg[i + 1] = 1
+    return array("I", (x[i] for i in kept)), kept
+
+
+def _clean_mmatch(dis: bytearray, i: int, s: int, e: int) -> bool:
+    # 何度も出てくる行 i の前後で、相手に無い行が十分な割合を占めていれば除く。
+    # 前後の「1 つだけ対応する行」までの並びを数える
+    s = max(s, i - SIMSCAN_WINDOW)
+    e = min(e, i + SIMSCAN_WINDOW)
+    lo = dis.rfind(1, s, i) + 1 or s
+    none_before = dis.count(0, lo, i)
+    if none_before == 0:
+        return False
+    hi = dis.find(1, i + 1, e + 1)
+    if hi < 0:
+        hi = e + 1
+    none_after = dis.count(0, i + 1, hi)
+    if none_after == 0:
+        return False
+    none = none_before + none_after
+    many = (i - lo) + (hi - i - 1) - none + 2
+    return many * KPDIS_RUN < many + none
+
+
+def _recs_cmp(
+    ha1: array,
+    idx1: list[int],
+    chg1: bytearray,
+    ha2: array,
+    idx2: list[int],
+    chg2: bytearray,
+) -> None:
+    # 区間を中央の snake で分割しながら、どちらかが空になった区間の行に印をつける
+    max_cost = max(_bogosqrt(len(ha1) + len(ha2) + 3), MAX_COST_MIN)
+    stack = [(0, len(ha1), 0, len(ha2), False)]
+    while stack:
+        off1, lim1, off2, lim2, need_min = stack.pop()
+        n = _common_prefix(ha1, off1, ha2, off2, min(lim1 - off1, lim2 - off2))
+        off1 += n
+        off2 += n
+        n = _common_suffix(ha1, lim1, ha2, lim2, min(lim1 - off1, lim2 - off2))
+        lim1 -= n
+        lim2 -= n
+        if off1 == lim1:
+            for k in range(off2, lim2):
+                chg2[idx2[k] + 1] = 1
+        elif off2 == lim2:
+            for k in range(off1, lim1):
+                chg1[idx1[k] + 1] = 1
+        else:
+            i1, i2, min_lo, min_hi = _split(
+                ha1, off1, lim1, ha2, off2, lim2, need_min, max_cost
+            )
+            stack.append((i1, lim1, i2, lim2, min_hi))
+            stack.append((off1, i1, off2, i2, min_lo))
+
+
+def _split(
+    ha1: array,
+    off1: int,
+    lim1: int,
+    ha2: array,
+    off2: int,
+    lim2: int,
+    need_min: bool,
+    max_cost: int,
+) -> tuple[int, int, bool, bool]:
+    # 前後から同時に最短編集経路を伸ばし、両者が重なった点で分割する（xdl_split）。
+    # 最短でなくてよい区間では、コストが嵩んだら良さそうな点で打ち切る
+    dmin, dmax = off1 - lim2, lim1 - off2
+    fmid, bmid = off1 - off2, lim1 - lim2
+    odd = (fmid - bmid) & 1
+    fmin = fmax = fmid
+    bmin = bmax = bmid
+    kvdf = {fmid: off1}
+    kvdb = {bmid: lim1}
+    ec = 0
+    while True:
+        ec += 1
+        got_snake = False
+        # 対角線の範囲を 1 つ広げる。外側には番兵を置く
+        if fmin > dmin:
+            fmin -= 1
+            kvdf[fmin - 1] = -1
+        else:
+            fmin += 1
+        if fmax < dmax:
+            fmax += 1
+            kvdf[fmax + 1] = -1
+        else:
+            fmax -= 1
+        for d in range(fmax, fmin - 1, -2):
+            if kvdf[d - 1] >= kvdf[d + 1]:
+                i1 = kvdf[d - 1] + 1
+            else:
+                i1 = kvdf[d + 1]
+            i2 = i1 - d
+            snake = _common_prefix(ha1, i1, ha2, i2, min(lim1 - i1, lim2 - i2))
+            if snake > SNAKE_CNT:
+                got_snake = True
+            i1 += snake
+            i2 += snake
+            kvdf[d] = i1
+            if odd and bmin <= d <= bmax and kvdb[d] <= i1:
+                return i1, i2, True, True
+        if bmin > dmin:
+            bmin -= 1
+            kvdb[bmin - 1] = LINE_MAX
+        else:
+            bmin += 1
+        if bmax < dmax:
+            bmax += 1
+            kvdb[bmax + 1] = LINE_MAX
+        else:
+            bmax -= 1
+        for d in range(bmax, bmin - 1, -2):
+            if kvdb[d - 1] < kvdb[d + 1]:
+                i1 = kvdb[d - 1]
+            else:
+                i1 = kvdb[d + 1] - 1
+            i2 = i1 - d
+            snake = _common_suffix(ha1, i1, ha2, i2, min(i1 - off1, i2 - off2))
+            if snake > SNAKE_CNT:
+                got_snake = True
+            i1 -= snake
+            i2 -= snake
+            kvdb[d] = i1
+            if not odd and fmin <= d <= fmax and i1 <= kvdf[d]:
+                return i1, i2, True, True
+        if need_min:
+            continue
+        if got_snake and ec > HEUR_MIN_COST:
+            # 長い snake の先まで届いた経路があれば、そこで分割する
+            best = 0
+            split = (0, 0)
+            for d in range(fmax, fmin - 1, -2):
+                i1 = kvdf[d]
+                i2 = i1 - d
+                v = (i1 - off1) + (i2 - off2) - abs(d - fmid)
+                if (
+                    v > K_HEUR * ec
+                    and v > best
+                    and off1 + SNAKE_CNT <= i1 < lim1
+                    and off2 + SNAKE_CNT <= i2 < lim2
+                    and ha1[i1 - SNAKE_CNT : i1] == ha2[i2 - SNAKE_CNT : i2]
+                ):
+                    best, split = v, (i1, i2)
+            if best > 0:
+                return split[0], split[1], True, False
+            for d in range(bmax, bmin - 1, -2):
+                i1 = kvdb[d]
+                i2 = i1 - d
+                v = (lim1 - i1) + (lim2 - i2) - abs(d - bmid)
+                if (
+                    v > K_HEUR * ec
+                    and v > best
+                    and off1 < i1 <= lim1 - SNAKE_CNT
+                    and off2 < i2 <= lim2 - SNAKE_CNT
+                    and ha1[i1 : i1 + SNAKE_CNT] == ha2[i2 : i2 + SNAKE_CNT]
+                ):
+                    best, split = v, (i1, i2)
+            if best > 0:
+                return split[0], split[1], False, True
+        if ec >= max_cost:
+            # 探索を打ち切り、前後どちらかで最も遠くまで届いた点で分割する
+            fbest = fbest1 = -1
+            for d in range(fmax, fmin - 1, -2):
+                i1 = min(kvdf[d], lim1)
+                i2 = i1 - d
+                if lim2 < i2:
+                    i1, i2 = lim2 + d, lim2
+                if fbest < i1 + i2:
+                    fbest, fbest1 = i1 + i2, i1
+            bbest = bbest1 = LINE_MAX
+            for d in range(bmax, bmin - 1, -2):
+                i1 = max(off1, kvdb[d])
+                i2 = i1 - d
+                if i2 < off2:
+                    i1, i2 = off2 + d, off2
+                if i1 + i2 < bbest:
+                    bbest, bbest1 = i1 + i2, i1
+            if (lim1 + lim2) - bbest < fbest - (off1 + off2):
+                return fbest1, fbest - fbest1, True, False
+            return bbest1, bbest - bbest1, False, True
+
+
+def histogram_diff(a: Sequence[int], b: Sequence[int]) -> Iterator[Edit]:
+    return compact(a, b, _histogram(a, b))
+
+
+def _histogram(a: Sequence[int], b: Sequence[int]) -> Iterator[Edit]:
+    # a の中で出現回数の少ない行を目印に区間を分割する。目印が無ければ Myers に任せる
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        a0, a1, b0, b1 = stack.pop()
+        a0, a1, b0, b1 = _trim(a, a0, a1, b, b0, b1)
+        if a0 == a1 or b0 == b1:
+            if a0 < a1 or b0 < b1:
+                yield Edit(a0, a1, b0, b1)
+            continue
+        anchor = _find_anchor(a, a0, a1, b, b0, b1)
+        if anchor is None:
+            yield from _myers(a, a0, a1, b, b0, b1)
+            continue
+        sa, ea, sb, eb = anchor
+        stack.append((ea, a1, eb, b1))
+        stack.append((a0, sa, b0, sb))
+
+
+def _find_anchor(
+    a: Sequence[int], a0: int, a1: int, b: Sequence[int], b0: int, b1: int
+) -> tuple[int, int, int, int] | None:
+    # 共通区間のうち、含まれる行の a での出現回数の最小値が最も小さいもの
+    # （同じなら長いもの）を選ぶ
+    region = a[a0:a1]
+    counts = Counter(region)
+    # 行 id → a での最初の位置（後ろから入れて先頭の位置を残す）
+    first = dict(zip(reversed(region), range(a1 - 1, a0 - 1, -1)))
+    best: tuple[int, int, int, int] | None = None
+    best_count = MAX_CHAIN + 1
+    best_len = 0
+    j = b0
+    while j < b1:
+        line = b[j]
+        count = counts.get(line, 0)
+        next_j = j + 1
+        if count == 0 or count > MAX_CHAIN or count > best_count:
+            j = next_j
+            continue
+        i = first[line]
+        for n in range(count):
+            if n:
+                i = a.index(line, i + 1, a1)
+            back = _common_suffix(a, i, b, j, min(i - a0, j - b0))
+            ahead = _common_prefix(a, i + 1, b, j + 1, min(a1 - i, b1 - j) - 1)
+            sa, ea, sb, eb = i - back, i + 1 + ahead, j - back, j + 1 + ahead
+            lowest = count if count == 1 else min(map(counts.__getitem__, a[sa:ea]))
+            next_j = max(next_j, eb)
+            if lowest < best_count or (lowest == best_count and ea - sa > best_len):
+                best, best_count, best_len = (sa, ea, sb, eb), lowest, ea - sa
+        j = next_j
+    return best
+
+
+def compact(
+    a: Sequence[int], b: Sequence[int], edits: Iterable[Edit]
+) -> Iterator[Edit]:
+    # 同じ内容の行が続く所では変更の位置に自由度がある。git の xdl_change_compact と
+    # 同じく、変更を取れるだけ下へずらしてから、相手側の変更と揃う位置まで戻す。
+    # 同じ変更はどの経路で見つけても同じ位置になるので、3-way merge で両側の同じ
+    # 削除がずれて二重に適用されることがない
+    a_chg = bytearray(len(a) + 2)
+    b_chg = bytearray(len(b) + 2)
+    for e in edits:
+        a_chg[e.a_start + 1 : e.a_end + 1] = b"\1" * (e.a_end - e.a_start)
+        b_chg[e.b_start + 1 : e.b_end + 1] = b"\1" * (e.b_end - e.b_start)
+    _compact_side(a, a_chg, b_chg)
+    _compact_side(b, b_chg, a_chg)
+    return _marked_edits(a_chg, b_chg, len(a), len(b))
+
+
+def _marked_edits(a_chg: bytearray, b_chg: bytearray, n: int, m: int) -> Iterator[Edit]:
+    # 変更行の印（1 つずらしてある）から、両側の対応する区間を組にして返す
+    i = j = 0
+    while i < n or j < m:
+        if a_chg[i + 1] or b_chg[j + 1]:
+            i0, j0 = i, j
+            while a_chg[i + 1]:
+                i += 1
+            while b_chg[j + 1]:
+                j += 1
+            yield Edit(i0, i, j0, j)
+            continue
+        # 変更の無い行は両側で 1 対 1 に対応するので、次の変更まで飛ばす
+        ni = a_chg.find(1, i + 2)
+        nj = b_chg.find(1, j + 2)
+        step = min((ni - 1 if ni >= 0 else n) - i, (nj - 1 if nj >= 0 else m) - j)
+        i += step
+        j += step
+
+
+def _compact_side(x: Sequence[int], chg: bytearray, other: bytearray) -> None:
+    # chg は x の変更行の印（1 つずらして前後に番兵を置く）。x の変更の塊ごとに、
+    # 塊を上下に動かせる範囲を調べて位置を決める。other は相手側の印で、x の各塊に
+    # 対応する相手側の塊（その間にある変更の無い行の数が同じもの）を並行して辿る
+    n = len(x)
+    start = end = 0
+    while chg[end + 1]:
+        end += 1
+    o_start = o_end = 0
+    while other[o_end + 1]:
+        o_end += 1
+    while True:
+        if end != start:
+            while True:
+                size = end - start
+                end_matching_other = -1
+                # 上へ動かせるだけ動かす（前の塊とつながればまとめる）
+                while start > 0 and x[start - 1] == x[end - 1]:
+                    start -= 1
+                    end -= 1
+                    chg[start + 1] = 1
+                    chg[end + 1] = 0
+                    while chg[start]:
+                        start -= 1
+                    o_end = o_start - 1
+                    o_start = o_end
+                    while other[o_start]:
+                        o_start -= 1
+                earliest_end = end
+                if o_end > o_start:
+                    end_matching_other = end
+                # 下へ動かせるだけ動かす
+                while end < n and x[start] == x[end]:
+                    chg[start + 1] = 0
+                    chg[end + 1] = 1
+                    start += 1
+                    end += 1
+                    while chg[end + 1]:
+                        end += 1
+                    o_start = o_end + 1
+                    o_end = o_start
+                    while other[o_end + 1]:
+                        o_end += 1
+                    if o_end > o_start:
+                        end_matching_other = end
+                # 前後の塊とつながって大きくなったら、もう一度動かし直す
+                if size == end - start:
+                    break
+            if end != earliest_end and end_matching_other != -1:
+                # 相手側の変更と向かい合う最後の位置まで戻す
+                while o_end == o_start:
+                    start -= 1
+                    end -= 1
+                    chg[start + 1] = 1
+                    chg[end + 1] = 0
+                    while chg[start]:
+                        start -= 1
+                    o_end = o_start - 1
+                    o_start = o_end
+                    while other[o_start]:
+                        o_start -= 1
+        if end == n:
+            return
+        start = end + 1
+        end = start
+        while chg[end + 1]:
+            end += 1
+        o_start = o_end + 1
+        o_end = o_start
+        while other[o_end + 1]:
+            o_end += 1
+
+
+DiffAlgorithm = Callable[[Sequence[int], Sequence[int]], Iterator[Edit]]
+ALGORITHMS: dict[str, DiffAlgorithm] = {
+    "myers": myers_diff,
+    "histogram": histogram_diff,
+}
+
+
+def _range(start: int, count: int) -> str:
+    # git と同じく、1 行なら行数を省き、0 行なら直前の行番号を示す
+    if count == 1:
+        return str(start + 1)
+    return f"{start if count == 0 else start + 1},{count}"
+
+
+def _func_name(line: bytes) -> bytes | None:
+    # git の既定の funcname: 英字・_・$ で始まる行
+    if not line or not (line[:1].isalpha() or line[:1] in (b"_", b"$")):
+        return None
+    return line[:FUNC_LINE_MAX].rstrip()
+
+
+def _body_line(sign: bytes, line: bytes) -> bytes:
+    if line.endswith(b"\n"):
+        return sign + line
+    return sign + line + b"\n\\ No newline at end of file\n"
+
+
+def unified_hunks(
+    a_lines: Sequence[bytes],
+    b_lines: Sequence[bytes],
+    edits: Iterable[Edit],
+    context: int = 3,
+) -> Iterator[bytes]:
+    # 変更を前から順に受け取り、前後 context 行をつけた hunk を 1 行ずつ返す
+    func_line: bytes | None = None
+    func_searched = 0
+
+    def emit(hunk: list[Edit]) -> Iterator[bytes]:
+        nonlocal func_line, func_searched
+        first, last = hunk[0], hunk[-1]
+        a_start = max(0, first.a_start - context)
+        a_end = min(len(a_lines), last.a_end + context)
+        b_start = first.b_start - (first.a_start - a_start)
+        b_end = last.b_end + (a_end - last.a_end)
+        # hunk は前から進むので、前回探した位置より後ろだけを探す
+        for i in range(a_start - 1, func_searched - 1, -1):
+            name = _func_name(a_lines[i])
+            if name is not None:
+                func_line = name
+                break
+        func_searched = max(func_searched, a_start)
+        header = (
+            f"@@ -{_range(a_start, a_end - a_start)}"
+            f" +{_range(b_start, b_end - b_start)} @@".encode()
+        )
+        yield header + (b" " + func_line if func_line else b"") + b"\n"
+        pos = a_start
+        for e in hunk:
+            for i in range(pos, e.a_start):
+                yield _body_line(b" ", a_lines[i])
+            for i in range(e.a_start, e.a_end):
+                yield _body_line(b"-", a_lines[i])
+            for i in range(e.b_start, e.b_end):
+                yield _body_line(b"+", b_lines[i])
+            pos = e.a_end
+        for i in range(pos, a_end):
+            yield _body_line(b" ", a_lines[i])
+
+    hunk: list[Edit] = []
+    for e in edits:
+        if hunk and e.a_start - hunk[-1].a_end > 2 * context:
+            yield from emit(hunk)
+            hunk = []
+        hunk.append(e)
+    if hunk:
+        yield from emit(hunk)
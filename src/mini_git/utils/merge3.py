@@ -0,0 +1,164 @@
+import re
+from typing import NamedTuple
+from mini_git.utils.line_diff import Edit, intern_lines, myers_diff, split_lines
+
+MARKER_SIZE = 7
+# これ以下の行数しか離れていない衝突は 1 つにまとめる（git の xdl_simplify_non_conflicts）
+JOIN_GAP = 3
+_ALNUM = re.compile(rb"[0-9A-Za-z]")
+# 塊ごとにどちらを採るか
+OURS = 1
+THEIRS = 2
+CONFLICT = 0
+
+
+class MergeLinesResult(NamedTuple):
+    content: bytes
+    conflicts: int
+
+
+class _Region(NamedTuple):
+    # ours[o_start:o_end] と theirs[t_start:t_end] が base の同じ部分に対応する
+    o_start: int
+    o_end: int
+    t_start: int
+    t_end: int
+    take: int
+
+
+def _terminated(lines: list[bytes]) -> list[bytes]:
+    # 衝突マーカーが行の途中に付かないよう、最後の行に改行を補う
+    if lines and not lines[-1].endswith(b"\n"):
+        return lines[:-1] + [lines[-1] + b"\n"]
+    return lines
+
+
+def merge_lines(
+    base: bytes,
+    ours: bytes,
+    theirs: bytes,
+    ours_label: str = "ours",
+    theirs_label: str = "theirs",
+) -> MergeLinesResult:
+    # base からの両側の変更を base 上の位置で並べ、重なる（接する）変更どうしを
+    # 1 つの塊にまとめる。片側だけの塊はその側を採る。両側の塊は git merge-file
+    # （XDL_MERGE_ZEALOUS_ALNUM）と同じく、ours と theirs の塊どうしを diff して
+    # 違う部分だけを衝突にし、近い衝突どうしは 1 つにまとめる
+    b_lines = split_lines(base)
+    o_lines = split_lines(ours)
+    t_lines = split_lines(theirs)
+    b_ids, o_ids = intern_lines(b_lines, o_lines)
+    _, t_ids = intern_lines(b_lines, t_lines)
+    ours_edits = list(myers_diff(b_ids, o_ids))
+    theirs_edits = list(myers_diff(b_ids, t_ids))
+    tagged = sorted(
+        [(e, 0) for e in ours_edits] + [(e, 1) for e in theirs_edits],
+        key=lambda x: (x[0].a_start, x[0].a_end),
+    )
+
+    # ours 上の区間と theirs 上の区間の組。採る側か衝突かを添える
+    regions: list[_Region] = []
+    # それぞれの側で、これまでの塊による行数のずれ
+    shift = [0, 0]
+    i = 0
+    while i < len(tagged):
+        lo, hi = tagged[i][0].a_start, tagged[i][0].a_end
+        group: list[list[Edit]] = [[], []]
+        while i < len(tagged) and tagged[i][0].a_start <= hi:
+            e, side = tagged[i]
+            group[side].append(e)
+            hi = max(hi, e.a_end)
+            i += 1
+        spans = []
+        for side in (0, 1):
+            start = lo + shift[side]
+            end = hi + shift[side]
+            for e in group[side]:
+                end += (e.b_end - e.b_start) - (e.a_end - e.a_start)
+            shift[side] = end - hi
+            spans.append((start, end))
+        (o0, o1), (t0, t1) = spans
+        if not group[1]:
+            regions.append(_Region(o0, o1, t0, t1, OURS))
+        elif not group[0]:
+            regions.append(_Region(o0, o1, t0, t1, THEIRS))
+        elif _same_change(group[0], group[1]) and o_lines[o0:o1] == t_lines[t0:t1]:
+            # 両側の同じ変更は 1 つの変更として扱う
+            regions.append(_Region(o0, o1, t0, t1, OURS))
+        else:
+            regions += _refine(o_lines, t_lines, _Region(o0, o1, t0, t1, CONFLICT))
+    regions = _join_conflicts(o_lines, regions)
+
+    out: list[bytes] = []
+    conflicts = 0
+    pos = 0
+    for r in regions:
+        # 変更の無い行は ours から写す
+        out += o_lines[pos : r.o_start]
+        pos = r.o_end
+        if r.take == OURS:
+            out += o_lines[r.o_start : r.o_end]
+        elif r.take == THEIRS:
+            out += t_lines[r.t_start : r.t_end]
+        else:
+            conflicts += 1
+            out.append(f"{'<' * MARKER_SIZE} {ours_label}\n".encode())
+            out += _terminated(o_lines[r.o_start : r.o_end])
+            out.append(b"=" * MARKER_SIZE + b"\n")
+            out += _terminated(t_lines[r.t_start : r.t_end])
+            out.append(f"{'>' * MARKER_SIZE} {theirs_label}\n".encode())
+    out += o_lines[pos:]
+    return MergeLinesResult(b"".join(out), conflicts)
+
+
+def _same_change(ours: list[Edit], theirs: list[Edit]) -> bool:
+    # base の同じ範囲を同じ行数に置き換えているか（中身は呼び出し側で比べる）
+    return [(e.a_start, e.a_end, e.b_end - e.b_start) for e in ours] == [
+        (e.a_start, e.a_end, e.b_end - e.b_start) for e in theirs
+    ]
+
+
+def _refine(o_lines: list[bytes], t_lines: list[bytes], r: _Region) -> list[_Region]:
+    # 両側が変えた塊を ours と theirs の間で diff し、一致する行は衝突の外に出す。
+    # 差が無ければ同じ変更なので衝突にしない。片側が削除だけなら塊のまま衝突
+    if r.o_start == r.o_end or r.t_start == r.t_end:
+        return [r]
+    o_ids, t_ids = intern_lines(
+        o_lines[r.o_start : r.o_end], t_lines[r.t_start : r.t_end]
+    )
+    edits = list(myers_diff(o_ids, t_ids))
+    if not edits:
+        return [r._replace(take=OURS)]
+    return [
+        _Region(
+            r.o_start + e.a_start,
+            r.o_start + e.a_end,
+            r.t_start + e.b_start,
+            r.t_start + e.b_end,
+            CONFLICT,
+        )
+        for e in edits
+    ]
+
+
+def _join_conflicts(o_lines: list[bytes], regions: list[_Region]) -> list[_Region]:
+    # 間が JOIN_GAP 行以下か、英数字を含まない行（空行や括弧だけの行）しか無い
+    # 衝突どうしは、間の行ごと 1 つの衝突にする
+    joined: list[_Region] = []
+    for r in regions:
+        prev = joined[-1] if joined else None
+        if (
+            prev is not None
+            and prev.take == CONFLICT
+            and r.take == CONFLICT
+            and (
+                r.o_start - prev.o_end <= JOIN_GAP
+                or not any(
+                    _ALNUM.search(line) for line in o_lines[prev.o_end : r.o_start]
+                )
+            )
+        ):
+            joined[-1] = prev._replace(o_end=r.o_end, t_end=r.t_end)
+        else:
+            joined.append(r)
+    return joined
@@ -0,0 +1,30 @@
+import zlib
+
+# git の diffcore-delta と同じく、改行か 64 バイトごとに区切った断片を hash して
+# hash ごとのバイト数を数える
+MAX_CHUNK = 64
+
+
+def fingerprint(data: bytes) -> dict[int, int]:
+    counts: dict[int, int] = {}
+    i = 0
+    n = len(data)
+    while i < n:
+        nl = data.find(b"\n", i, i + MAX_CHUNK)
+        end = nl + 1 if nl >= 0 else min(i + MAX_CHUNK, n)
+        h = zlib.crc32(data[i:end])
+        counts[h] = counts.get(h, 0) + (end - i)
+        i = end
+    return counts
+
+
+def copied_bytes(src: dict[int, int], dst: dict[int, int]) -> int:
+    if len(src) > len(dst):
+        src, dst = dst, src
+    return sum(min(cnt, dst.get(h, 0)) for h, cnt in src.items())
+
+
+def similarity_score(copied: int, src_size: int, dst_size: int) -> int:
+    # 0-100。大きい方のサイズに対する共通部分の割合
+    largest = max(src_size, dst_size)
+    return 100 if largest == 0 else copied * 100 // largest
@@ -2,8 +2,11 @@ import pytest
 from pathlib import Path
 from pytest_mock import MockerFixture
 from mini_git.services.add_service import AddService
+from mini_git.storage.index_store import IndexStore
 from mini_git.storage.object_store import ObjectStore
 from mini_git.types import ObjectType
+from mini_git.utils import fs
+from mini_git.utils.fs import Durability
 
 
 def test_add_service_initialization(mocker: MockerFixture):
@@ -144,3 +147,73 @@ def test_add_object_handles_large_file(mocker: MockerFixture, tmp_path: Path):
     assert len(oid) == 40
     assert oid == expected_oid
     mock_object_store_write.assert_called_once_with(ObjectType.BLOB, large_content)
+
+
+def test_stage_records_entry_in_index(tmp_path: Path):
+    """stageがworktree相対パスとstat情報をindexに記録することをテスト"""
+    worktree = tmp_path.resolve()
+    (worktree / "bin").mkdir()
+    script = worktree / "bin" / "run.sh"
+    script.write_text("#!/bin/sh\n")
+    script.chmod(0o755)
+    index_store = IndexStore(worktree / ".git")
+    service = AddService(ObjectStore(worktree / ".git"))
+
+    oid = service.add_object(script)
+    entry = service.stage(script, oid, worktree, index_store)
+
+    assert entry.path == Path("bin/run.sh")
+    assert entry.mode == 100755
+    assert entry.size == len("#!/bin/sh\n")
+    assert list(index_store.all()) == [entry]
+
+
+def test_add_directory_syncs_once_under_batch(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """batchではファイル数によらず同期1回とindexの置き換え1回で追加することをテスト"""
+    worktree = tmp_path.resolve()
+    for i in range(20):
+        (worktree / "src" / f"d{i % 3}").mkdir(parents=True, exist_ok=True)
+        (worktree / "src" / f"d{i % 3}" / f"{i}.txt").write_text(f"{i}\n")
+    barriers: list[Path] = []
+    fsyncs: list[int] = []
+    real = fs.os.fsync
+    monkeypatch.setattr(fs, "sync_barrier", lambda d: barriers.append(d))
+    monkeypatch.setattr(fs.os, "fsync", lambda fd: fsyncs.append(fd) or real(fd))
+    durability = Durability("batch")
+    index_store = IndexStore(worktree / ".git", durability=durability)
+    object_store = ObjectStore(worktree / ".git", durability=durability)
+
+    entries, removed = AddService(object_store).add_directory(
+        worktree / "src", worktree, index_store
+    )
+
+    assert len(entries) == 20 and removed == []
+    assert len(barriers) == 1
+    # index のファイルとディレクトリの 2 回だけ。object は個別に fsync しない
+    assert len(fsyncs) == 2
+    assert durability.pending == {}
+    assert list(index_store.all()) == sorted(entries, key=lambda e: e.path.as_posix())
+    assert object_store.read(entries[0].oid)[0] == "blob"
+
+
+def test_add_directory_stages_deletions(tmp_path: Path):
+    """ディレクトリの追加で、消えたファイルをindexから外すことをテスト"""
+    worktree = tmp_path.resolve()
+    (worktree / "src").mkdir()
+    (worktree / "src" / "a.txt").write_text("a\n")
+    (worktree / "src" / "b.txt").write_text("b\n")
+    (worktree / "top.txt").write_text("t\n")
+    index_store = IndexStore(worktree / ".git")
+    service = AddService(ObjectStore(worktree / ".git"))
+    service.add_directory(worktree, worktree, index_store)
+    (worktree / "src" / "b.txt").unlink()
+    (worktree / "top.txt").unlink()
+
+    entries, removed = service.add_directory(worktree / "src", worktree, index_store)
+
+    assert [e.path for e in entries] == [Path("src/a.txt")]
+    assert removed == ["src/b.txt"]
+    # 対象のディレクトリの外は触らない
+    assert [e.path for e in index_store.all()] == [Path("src/a.txt"), Path("top.txt")]
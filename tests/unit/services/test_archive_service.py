@@ -0,0 +1,110 @@
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from mini_git.models import TreeEntry
+from mini_git.services import archive_service
+from mini_git.services.archive_service import ArchiveService, format_for
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.types import ObjectType
+
+MTIME = 1700000000
+LARGE = bytes(range(256)) * 64
+
+
+@pytest.fixture
+def archive(tmp_path: Path) -> tuple[ArchiveService, str]:
+    store = ObjectStore(tmp_path)
+    trees = TreeStore(store)
+
+    def blob(data: bytes) -> str:
+        return store.write(ObjectType.BLOB, data)
+
+    sub = trees.write_tree(
+        [
+            TreeEntry("large.bin", 100644, blob(LARGE)),
+            TreeEntry("run.sh", 100755, blob(b"#!/bin/sh\n")),
+        ]
+    )
+    root = trees.write_tree(
+        [
+            TreeEntry("README", 100644, blob(b"hello\n")),
+            TreeEntry("bin", 40000, sub),
+            TreeEntry("link", 120000, blob(b"README")),
+        ]
+    )
+    return ArchiveService(store, trees, workers=2), root
+
+
+def test_iter_entries_lists_directories_before_contents(archive):
+    """ディレクトリのエントリを中身より先にtreeの順で並べることをテスト"""
+    service, root = archive
+    paths = [e.path for e in service.iter_entries(root, "p/")]
+    assert paths == ["p/README", "p/bin/", "p/bin/large.bin", "p/bin/run.sh", "p/link"]
+
+
+def test_tar_contains_modes_links_and_contents(archive, monkeypatch):
+    """tarにmode・symlink・大きなblobの内容をそのまま書くことをテスト"""
+    # 大きな blob を先読みせずに流す経路も通す
+    monkeypatch.setattr(archive_service, "PREFETCH_MAX_SIZE", 1024)
+    service, root = archive
+    out = io.BytesIO()
+    result = service.write(root, out, "tar", mtime=MTIME, commit_oid="a" * 40)
+
+    assert result.files == 4
+    out.seek(0)
+    with tarfile.open(fileobj=out) as tar:
+        assert tar.pax_headers is not None
+        assert tar.pax_headers["comment"] == "a" * 40
+        members = {m.name: m for m in tar.getmembers()}
+        assert members["bin"].isdir()
+        assert members["bin/run.sh"].mode == 0o775
+        assert members["README"].mode == 0o664
+        assert members["link"].issym() and members["link"].linkname == "README"
+        assert {m.mtime for m in members.values()} == {MTIME}
+        large = tar.extractfile("bin/large.bin")
+        assert large is not None
+        assert large.read() == LARGE
+
+
+def test_archive_is_deterministic(archive):
+    """同じtreeとmtimeからは同じバイト列のtar.gzとzipを作ることをテスト"""
+    service, root = archive
+    for fmt in ("tar.gz", "zip"):
+        first, second = io.BytesIO(), io.BytesIO()
+        service.write(root, first, fmt, mtime=MTIME)
+        service.write(root, second, fmt, mtime=MTIME)
+        assert first.getvalue() == second.getvalue()
+
+
+def test_zip_contains_contents_and_unix_modes(archive):
+    """zipに内容とUnixのmodeを書くことをテスト"""
+    service, root = archive
+    out = io.BytesIO()
+    service.write(root, out, "zip", prefix="pkg/", mtime=MTIME)
+
+    with zipfile.ZipFile(out) as zf:
+        assert zf.testzip() is None
+        assert zf.read("pkg/bin/large.bin") == LARGE
+        assert zf.getinfo("pkg/bin/run.sh").external_attr >> 16 == 0o100775
+        assert zf.getinfo("pkg/link").external_attr >> 16 == 0o120777
+        assert zf.getinfo("pkg/bin/").is_dir()
+
+
+def test_unknown_format_raises(archive):
+    """未知の形式ではRuntimeErrorを送出することをテスト"""
+    service, root = archive
+    with pytest.raises(RuntimeError, match="unknown archive format"):
+        service.write(root, io.BytesIO(), "rar")
+
+
+def test_format_for_uses_extension():
+    """出力ファイル名の拡張子から形式を決めることをテスト"""
+    assert format_for("release.tar.gz") == "tar.gz"
+    assert format_for("release.tgz") == "tar.gz"
+    assert format_for("release.zip") == "zip"
+    assert format_for("release.bin") is None
@@ -0,0 +1,118 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mini_git.models import Commit, IndexEntry
+from mini_git.services import blame_service
+from mini_git.services.blame_service import BlameService
+from mini_git.services.commit_service import CommitService
+from mini_git.services.commit_store import CommitStore
+from mini_git.storage.blame_cache import BlameCache, BlameHunk
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.ref_store import RefStore
+from mini_git.types import ObjectType
+
+
+class _History:
+    def __init__(self, tmp_path: Path) -> None:
+        git_dir = tmp_path / ".git"
+        self.commits = CommitService(
+            CommitStore(ObjectStore(git_dir)), RefStore(git_dir)
+        )
+        self.git_dir = git_dir
+        self.time = 0
+
+    def commit(self, files: dict[str, str], *parents: str) -> str:
+        store = self.commits.object_store
+        tree = self.commits.tree_store.write_index_tree(
+            IndexEntry(
+                path=Path(p), mode=100644, oid=store.write(ObjectType.BLOB, c.encode())
+            )
+            for p, c in files.items()
+        )
+        self.time += 1
+        ident = f"a <a@x> {self.time} +0000"
+        return self.commits.commit_store.write_commit(
+            Commit(tree, parents, ident, ident, "m\n")
+        )
+
+
+def _owners(hunks: list[BlameHunk], commits: dict[str, str]) -> list[str]:
+    names = {oid: name for name, oid in commits.items()}
+    return [names[h.commit] for h in hunks for _ in range(h.num_lines)]
+
+
+@pytest.fixture
+def history(tmp_path: Path) -> tuple[_History, dict[str, str]]:
+    h = _History(tmp_path)
+    c: dict[str, str] = {}
+    c["root"] = h.commit({"f": "a\nb\nc\nd\n", "g": "x\n"})
+    c["edit"] = h.commit({"f": "a\nB\nc\nd\n", "g": "x\n"}, c["root"])
+    c["other"] = h.commit({"f": "a\nB\nc\nd\n", "g": "y\n"}, c["edit"])
+    c["side"] = h.commit({"f": "a\nb\nc\nd\ne\n", "g": "x\n"}, c["root"])
+    c["merge"] = h.commit({"f": "a\nB\nc\nd\ne\n", "g": "y\n"}, c["other"], c["side"])
+    return h, c
+
+
+def test_blame_follows_lines_through_merges(history):
+    """各行が最後に変更したcommitに割り当てられ、mergeでは両方の親へ辿ることをテスト"""
+    h, c = history
+    service = BlameService(h.commits, None)
+
+    hunks = service.blame(c["merge"], "f")
+
+    assert _owners(hunks, c) == ["root", "edit", "root", "root", "side"]
+    assert hunks[0] == BlameHunk(c["root"], 0, 0, 1)
+    assert hunks[-1] == BlameHunk(c["side"], 4, 4, 1)
+
+
+def test_commits_not_touching_path_are_not_diffed(history):
+    """パスに触れていないcommitでは行の比較をしないことをテスト"""
+    h, c = history
+    service = BlameService(h.commits, None)
+
+    with patch.object(
+        blame_service, "myers_diff", wraps=blame_service.myers_diff
+    ) as diff:
+        service.blame(c["other"], "f")
+
+    # edit と root の間の 1 回だけ
+    assert diff.call_count == 1
+
+
+def test_cached_blame_is_reused_by_descendants(history):
+    """保存したblameは再利用され、子孫のblameでも途中のcommitで打ち切れることをテスト"""
+    h, c = history
+    cache = BlameCache(h.git_dir)
+    first = BlameService(h.commits, cache).blame(c["other"], "f")
+    child = h.commit({"f": "a\nB\nc\nd\nz\n", "g": "y\n"}, c["other"])
+
+    service = BlameService(h.commits, cache)
+    with patch.object(
+        blame_service, "myers_diff", wraps=blame_service.myers_diff
+    ) as diff:
+        again = service.blame(c["other"], "f")
+        hunks = service.blame(child, "f")
+
+    assert again == first
+    # child と other の比較だけで、other から先は cache で決まる
+    assert diff.call_count == 1
+    assert _owners(hunks, {**c, "child": child}) == [
+        "root",
+        "edit",
+        "root",
+        "root",
+        "child",
+    ]
+
+
+def test_moved_lines_are_attributed_like_git(tmp_path: Path):
+    """同じ内容の行がある所でも、git blameと同じ行を変更したcommitに割り当てることをテスト"""
+    h = _History(tmp_path)
+    c = {"root": h.commit({"f": "a\na\nb\n"})}
+    c["edit"] = h.commit({"f": "b\na\n"}, c["root"])
+
+    hunks = BlameService(h.commits, None).blame(c["edit"], "f")
+
+    assert _owners(hunks, c) == ["root", "edit"]
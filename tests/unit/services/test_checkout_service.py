@@ -0,0 +1,129 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from mini_git.models import IndexEntry
+from mini_git.services.checkout_service import CheckoutService
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.sparse_checkout_store import SparseCheckoutStore
+from mini_git.types import ObjectType
+
+
+def _service(tmp_path: Path) -> CheckoutService:
+    git_dir = tmp_path / ".git"
+    return CheckoutService(
+        tmp_path,
+        IndexStore(git_dir),
+        TreeStore(ObjectStore(git_dir)),
+        SparseCheckoutStore(git_dir),
+        workers=4,
+    )
+
+
+def _tree(service: CheckoutService, files: dict[str, bytes], exe=()) -> str:
+    entries = []
+    for path, data in files.items():
+        oid = service.object_store.write(ObjectType.BLOB, data)
+        mode = 100755 if path in exe else 100644
+        entries.append(IndexEntry(path=Path(path), mode=mode, oid=oid))
+    return service.tree_store.write_index_tree(entries)
+
+
+def test_checkout_materializes_tree_and_records_stat(tmp_path: Path):
+    """treeをworktreeに書き出し、indexにstat情報を記録することをテスト"""
+    service = _service(tmp_path)
+    tree = _tree(service, {"a.txt": b"a\n", "d/e/c.sh": b"c\n"}, exe={"d/e/c.sh"})
+
+    result = service.checkout_tree(tree)
+
+    assert result.written == 2
+    assert (tmp_path / "a.txt").read_bytes() == b"a\n"
+    assert os.access(tmp_path / "d/e/c.sh", os.X_OK)
+    entries = {e.path.as_posix(): e for e in service.index_store.all()}
+    st = (tmp_path / "a.txt").stat()
+    assert entries["a.txt"].mtime_ns == st.st_mtime_ns
+    assert entries["a.txt"].size == 2
+    assert entries["d/e/c.sh"].mode == 100755
+
+
+def test_checkout_touches_only_changed_paths(tmp_path: Path):
+    """差分のあるパスだけが書き換えられることをテスト"""
+    service = _service(tmp_path)
+    one = _tree(service, {"a.txt": b"a\n", "b.txt": b"b\n", "d/c.txt": b"c\n"})
+    two = _tree(service, {"a.txt": b"a2\n", "b.txt": b"b\n", "n/new.txt": b"n\n"})
+    service.checkout_tree(one)
+    before = (tmp_path / "b.txt").stat().st_mtime_ns
+    os.utime(tmp_path / "b.txt", ns=(before - 10**9, before - 10**9))
+    service.index_store.write_all(
+        e.model_copy(update={"mtime_ns": before - 10**9})
+        if e.path.as_posix() == "b.txt"
+        else e
+        for e in service.index_store.all()
+    )
+
+    result = service.checkout_tree(two)
+
+    assert (result.written, result.removed) == (2, 1)
+    assert (tmp_path / "b.txt").stat().st_mtime_ns == before - 10**9
+    assert not (tmp_path / "d").exists()
+    assert (tmp_path / "n/new.txt").read_bytes() == b"n\n"
+
+
+def test_checkout_refuses_to_overwrite_local_changes(tmp_path: Path):
+    """ローカル変更がある場合はcheckoutを拒否することをテスト"""
+    service = _service(tmp_path)
+    one = _tree(service, {"a.txt": b"a\n"})
+    two = _tree(service, {"a.txt": b"a2\n"})
+    service.checkout_tree(one)
+    (tmp_path / "a.txt").write_bytes(b"local\n")
+
+    with pytest.raises(RuntimeError, match="would be overwritten"):
+        service.checkout_tree(two)
+
+    service.checkout_tree(two, force=True)
+    assert (tmp_path / "a.txt").read_bytes() == b"a2\n"
+
+
+def test_checkout_keeps_directories_outside_cone_collapsed(tmp_path: Path):
+    """cone外のディレクトリはworktreeに書かずsparseエントリにすることをテスト"""
+    service = _service(tmp_path)
+    service.sparse_store.set(["src"])
+    tree = _tree(service, {"src/a.py": b"a\n", "vendor/v.c": b"v\n"})
+
+    service.checkout_tree(tree)
+
+    assert (tmp_path / "src/a.py").exists()
+    assert not (tmp_path / "vendor").exists()
+    modes = {e.path.as_posix(): e.mode for e in service.index_store.all()}
+    assert modes == {"src/a.py": 100644, "vendor": 40000}
+
+
+def test_restore_rewrites_modified_and_missing_files(tmp_path: Path):
+    """restoreで変更・削除されたファイルだけが戻ることをテスト"""
+    service = _service(tmp_path)
+    tree = _tree(service, {"a.txt": b"a\n", "b.txt": b"b\n", "c.txt": b"c\n"})
+    service.checkout_tree(tree)
+    (tmp_path / "a.txt").write_bytes(b"changed\n")
+    (tmp_path / "b.txt").unlink()
+
+    assert service.restore([Path("a.txt")]) == 1
+    assert service.restore() == 1
+    assert (tmp_path / "a.txt").read_bytes() == b"a\n"
+    assert (tmp_path / "b.txt").read_bytes() == b"b\n"
+    assert service.restore() == 0
+
+
+def test_restore_from_source_tree_leaves_index(tmp_path: Path):
+    """--source指定時はworktreeだけを書き換えることをテスト"""
+    service = _service(tmp_path)
+    one = _tree(service, {"a.txt": b"a\n"})
+    two = _tree(service, {"a.txt": b"a2\n"})
+    service.checkout_tree(one)
+    before = list(service.index_store.all())
+
+    assert service.restore(source_tree=two) == 1
+    assert (tmp_path / "a.txt").read_bytes() == b"a2\n"
+    assert list(service.index_store.all()) == before
@@ -0,0 +1,116 @@
+import errno
+import os
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from mini_git.models import IndexEntry
+from mini_git.services.clone_service import CloneService, find_git_dir
+from mini_git.services.repo_context import RepoContext
+from mini_git.types import ObjectType
+
+
+def _source_repo(tmp_path: Path) -> tuple[Path, str]:
+    src = tmp_path / "src"
+    repo = RepoContext.open_or_init_repo(src, default_branch="main")
+    entries = []
+    for path, data in {"a.txt": b"a\n", "d/b.txt": b"b\n"}.items():
+        oid = repo.object_store.write(ObjectType.BLOB, data)
+        entries.append(IndexEntry(path=Path(path), mode=100644, oid=oid))
+    tree = repo.tree_store.write_index_tree(entries)
+    commit = repo.object_store.write(
+        ObjectType.COMMIT,
+        f"tree {tree}\nauthor a <a> 0 +0000\ncommitter a <a> 0 +0000\n\nm\n".encode(),
+    )
+    repo.ref_store.update("refs/heads/main", commit)
+    repo.ref_store.update("refs/heads/topic", commit)
+    repo.ref_store.update("refs/tags/v1", commit)
+    return src, commit
+
+
+def test_clone_hardlinks_objects_and_checks_out(tmp_path: Path):
+    """objectをhardlinkで共有し、worktreeとrefを作成することをテスト"""
+    src, commit = _source_repo(tmp_path)
+    dest = tmp_path / "dest"
+
+    result = CloneService().clone(src, dest)
+
+    assert result.linked > 0 and result.copied == 0
+    src_obj = src / ".git" / "objects" / commit[:2] / commit[2:]
+    dst_obj = dest / ".git" / "objects" / commit[:2] / commit[2:]
+    assert os.stat(src_obj).st_ino == os.stat(dst_obj).st_ino
+    assert (dest / "d" / "b.txt").read_bytes() == b"b\n"
+    refs = result.repo.ref_store
+    assert refs.symbolic_target("HEAD") == "refs/heads/main"
+    assert refs.resolve("HEAD") == commit
+    assert refs.resolve("refs/remotes/origin/topic") == commit
+    assert refs.resolve("refs/tags/v1") == commit
+    assert result.repo.config.get("remote.origin.url") == str(src.resolve())
+    assert len(list(result.repo.index_store.all())) == 2
+
+
+def test_clone_without_hardlinks_copies(tmp_path: Path, mocker: MockerFixture):
+    """--no-hardlinksでreflink不可の場合はコピーすることをテスト"""
+    src, commit = _source_repo(tmp_path)
+    mocker.patch("mini_git.services.clone_service._reflink", return_value=False)
+
+    result = CloneService(hardlinks=False).clone(src, tmp_path / "dest")
+
+    assert result.linked == 0 and result.copied > 0
+    dst_obj = tmp_path / "dest" / ".git" / "objects" / commit[:2] / commit[2:]
+    assert os.stat(dst_obj).st_nlink == 1
+
+
+def test_clone_falls_back_when_hardlink_fails(tmp_path: Path, mocker: MockerFixture):
+    """別ファイルシステムでhardlinkできない場合にフォールバックすることをテスト"""
+    src, _ = _source_repo(tmp_path)
+    mocker.patch(
+        "mini_git.services.clone_service.os.link",
+        side_effect=OSError(errno.EXDEV, "cross-device link"),
+    )
+
+    def fake_reflink(src: Path, dst: Path) -> bool:
+        dst.write_bytes(src.read_bytes())
+        return True
+
+    reflink = mocker.patch(
+        "mini_git.services.clone_service._reflink", side_effect=fake_reflink
+    )
+
+    result = CloneService().clone(src, tmp_path / "dest")
+
+    assert result.linked == 0
+    assert result.reflinked == reflink.call_count > 0
+
+
+def test_clone_refuses_non_empty_destination(tmp_path: Path):
+    """空でない既存ディレクトリへのcloneを拒否することをテスト"""
+    src, _ = _source_repo(tmp_path)
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    (dest / "x").write_text("x")
+
+    with pytest.raises(FileExistsError):
+        CloneService().clone(src, dest)
+
+
+def test_find_git_dir_rejects_non_repository(tmp_path: Path):
+    """gitリポジトリでないパスで例外を発生させることをテスト"""
+    with pytest.raises(FileNotFoundError):
+        find_git_dir(tmp_path)
+
+
+def test_shared_clone_uses_alternates(tmp_path: Path):
+    """--sharedでobjectをコピーせずalternatesで参照することをテスト"""
+    src, commit = _source_repo(tmp_path)
+
+    result = CloneService(shared=True).clone(src, tmp_path / "dest")
+
+    objects = tmp_path / "dest" / ".git" / "objects"
+    assert (objects / "info" / "alternates").read_text().strip() == str(
+        src.resolve() / ".git" / "objects"
+    )
+    assert not (objects / commit[:2]).exists()
+    assert (tmp_path / "dest" / "a.txt").read_bytes() == b"a\n"
+    assert result.repo.object_store.exists(commit)
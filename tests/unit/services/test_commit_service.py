@@ -0,0 +1,182 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mini_git.models import Commit, IndexEntry
+from mini_git.services.commit_service import BloomStats, CommitService
+from mini_git.services.commit_store import CommitStore
+from mini_git.storage.commit_graph import GENERATION_INFINITY
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.ref_store import RefStore
+from mini_git.types import ObjectType
+
+TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+
+def _service(tmp_path: Path) -> CommitService:
+    git_dir = tmp_path / ".git"
+    refs = RefStore(git_dir)
+    refs.set_symbolic("HEAD", "refs/heads/main")
+    return CommitService(CommitStore(ObjectStore(git_dir)), refs)
+
+
+def _commit(service: CommitService, parents: tuple[str, ...], time: int) -> str:
+    ident = f"a <a@x> {time} +0000"
+    return service.commit_store.write_commit(
+        Commit(TREE, parents, ident, ident, f"{time}\n")
+    )
+
+
+def _fork(service: CommitService) -> dict[str, str]:
+    # base ← left, base ← right ← tip
+    base = _commit(service, (), 1)
+    left = _commit(service, (base,), 2)
+    right = _commit(service, (base,), 3)
+    tip = _commit(service, (right,), 4)
+    service.ref_store.update("refs/heads/left", left)
+    service.ref_store.update("refs/heads/main", tip)
+    return {"base": base, "left": left, "right": right, "tip": tip}
+
+
+def test_commit_advances_branch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """commitがHEADの指すブランチを親にして進めることをテスト"""
+    for kind in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{kind}_NAME", "A")
+        monkeypatch.setenv(f"GIT_{kind}_EMAIL", "a@x")
+        monkeypatch.setenv(f"GIT_{kind}_DATE", "1700000001 +0900")
+    service = _service(tmp_path)
+
+    first = service.commit(TREE, "one")
+    second = service.commit(TREE, "two")
+
+    assert service.ref_store.resolve("refs/heads/main") == second
+    commit = service.commit_store.read_commit(second)
+    assert commit.parents == (first,)
+    assert commit.author == "A <a@x> 1700000001 +0900"
+    assert commit.message == "two\n"
+
+
+def test_walk_orders_by_commit_date(tmp_path: Path):
+    """祖先をcommit日時の新しい順に列挙することをテスト"""
+    service = _service(tmp_path)
+    c = _fork(service)
+
+    order = list(service.walk([c["tip"], c["left"]]))
+
+    assert order == [c["tip"], c["right"], c["left"], c["base"]]
+
+
+def test_walk_uses_commit_graph_without_reading_objects(tmp_path: Path):
+    """commit-graphがあればobjectを読まずに履歴を辿れることをテスト"""
+    service = _service(tmp_path)
+    c = _fork(service)
+    assert service.write_graph() == 4
+
+    with patch.object(service.object_store, "read") as read:
+        order = list(service.walk([c["tip"]]))
+        assert service.info(c["tip"]).generation == 3
+    read.assert_not_called()
+    assert order == [c["tip"], c["right"], c["base"]]
+
+
+@pytest.mark.parametrize("with_graph", [False, True])
+def test_ancestry_queries(tmp_path: Path, with_graph: bool):
+    """is_ancestorとmerge_basesがgraphの有無で同じ結果になることをテスト"""
+    service = _service(tmp_path)
+    c = _fork(service)
+    if with_graph:
+        service.write_graph()
+    else:
+        assert service.info(c["tip"]).generation == GENERATION_INFINITY
+
+    assert service.is_ancestor(c["base"], c["tip"])
+    assert service.is_ancestor(c["right"], c["tip"])
+    assert not service.is_ancestor(c["left"], c["tip"])
+    assert not service.is_ancestor(c["tip"], c["base"])
+    assert service.merge_bases(c["left"], c["tip"]) == [c["base"]]
+    assert service.merge_bases(c["right"], c["tip"]) == [c["right"]]
+
+
+def test_is_ancestor_stops_below_generation(tmp_path: Path):
+    """generationがancestorより小さいcommitの先は辿らないことをテスト"""
+    service = _service(tmp_path)
+    root = _commit(service, (), 0)
+    base = _commit(service, (root,), 1)
+    left = _commit(service, (base,), 2)
+    tip = _commit(service, (_commit(service, (base,), 3),), 4)
+    service.write_graph([left, tip])
+
+    with patch.object(service, "info", wraps=service.info) as info:
+        assert not service.is_ancestor(left, tip)
+    # left(gen 3) より generation の小さい base の先にある root は調べない
+    assert root not in {call.args[0] for call in info.call_args_list}
+
+
+def _file_history(service: CommitService) -> list[str]:
+    # 各 commit で dir<i % 3>/f.txt を書き換える
+    tree_store = service.tree_store
+    files: dict[str, str] = {}
+    oids: list[str] = []
+    for i in range(9):
+        blob = service.object_store.write(ObjectType.BLOB, f"{i}\n".encode())
+        files[f"dir{i % 3}/f.txt"] = blob
+        tree = tree_store.write_index_tree(
+            IndexEntry(path=Path(p), mode=100644, oid=o) for p, o in files.items()
+        )
+        ident = f"a <a@x> {i} +0000"
+        oids.append(
+            service.commit_store.write_commit(
+                Commit(tree, tuple(oids[-1:]), ident, ident, f"{i}\n")
+            )
+        )
+    service.ref_store.update("refs/heads/main", oids[-1])
+    return oids
+
+
+@pytest.mark.parametrize("changed_paths", [False, True])
+def test_walk_paths_lists_commits_touching_path(tmp_path: Path, changed_paths: bool):
+    """path指定の履歴がBloom filterの有無で同じ結果になることをテスト"""
+    service = _service(tmp_path)
+    oids = _file_history(service)
+    service.write_graph(changed_paths=changed_paths)
+    stats = BloomStats()
+
+    result = list(service.walk_paths([oids[-1]], ["dir1"], stats))
+
+    assert result == [oids[7], oids[4], oids[1]]
+    if changed_paths:
+        assert stats.filter_not_present == 0
+        assert stats.maybe - stats.false_positive == 3
+        assert stats.definitely_not + stats.false_positive == 6
+    else:
+        assert stats.filter_not_present == 9
+
+
+def test_walk_paths_skips_tree_reads_for_filtered_commits(tmp_path: Path):
+    """ "確実に変更なし"のcommitではtreeを読まないことをテスト"""
+    service = _service(tmp_path)
+    oids = _file_history(service)
+    service.write_graph(changed_paths=True)
+    stats = BloomStats()
+
+    with patch.object(
+        service.tree_store, "lookup_path", wraps=service.tree_store.lookup_path
+    ) as lookup:
+        list(service.walk_paths([oids[-1]], ["dir1/f.txt"], stats))
+
+    # filter を通過した commit だけ、commit と親の 2 回ずつ調べる
+    assert lookup.call_count == 2 * stats.maybe
+    assert stats.definitely_not > 0
+
+
+def test_write_graph_keeps_existing_filters(tmp_path: Path):
+    """changed_paths未指定なら既存graphのfilterを引き継ぐことをテスト"""
+    service = _service(tmp_path)
+    _file_history(service)
+    service.write_graph(changed_paths=True)
+
+    service.write_graph()
+
+    graph = service.graph
+    assert graph is not None and graph.bloom_settings is not None
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+
+from mini_git.models import Commit
+from mini_git.services.commit_store import CommitStore, LazyCommit, parse_commit
+from mini_git.storage.object_store import ObjectStore
+from mini_git.types import ObjectType
+
+# git commit で作成した commit の期待値
+TREE_OID = "5659689b2214e9ed03d6ad3a44a6bdeb8492369d"
+COMMIT_OID = "565d801a617e03deb0ad9f10ea7bc96c0f4de013"
+IDENT = "A <a@x> 1700000001 +0900"
+
+
+def test_write_commit_matches_git(tmp_path: Path):
+    """commit oidがgitと一致し、読み戻せることをテスト"""
+    store = CommitStore(ObjectStore(tmp_path / ".git"))
+    commit = Commit(TREE_OID, (), IDENT, IDENT, "c1\n")
+
+    assert store.write_commit(commit) == COMMIT_OID
+    assert store.read_commit(COMMIT_OID) == commit
+    assert commit.commit_time == 1700000001
+
+
+def test_parse_commit_skips_multiline_headers():
+    """gpgsigなどの継続行を持つヘッダを読み飛ばすことをテスト"""
+    raw = (
+        f"tree {TREE_OID}\nparent {COMMIT_OID}\nauthor {IDENT}\ncommitter {IDENT}\n"
+        "gpgsig -----BEGIN PGP SIGNATURE-----\n abc\n -----END PGP SIGNATURE-----\n"
+        "\nmsg\n"
+    ).encode()
+
+    commit = parse_commit(raw)
+
+    assert commit.parents == (COMMIT_OID,)
+    assert commit.committer == IDENT
+    assert commit.message == "msg\n"
+
+
+def test_read_commit_rejects_non_commit(tmp_path: Path):
+    """commit以外のobjectを読もうとすると例外を発生させることをテスト"""
+    object_store = ObjectStore(tmp_path / ".git")
+    oid = object_store.write(ObjectType.BLOB, b"hello\n")
+
+    with pytest.raises(RuntimeError, match="not a commit"):
+        CommitStore(object_store).read_commit(oid)
+
+
+def test_lazy_commit_reads_only_requested_fields():
+    """LazyCommitがヘッダと件名を個別に取り出せることをテスト"""
+    raw = (
+        f"tree {TREE_OID}\nparent {COMMIT_OID}\nparent {TREE_OID}\n"
+        f"author {IDENT}\ncommitter {IDENT}\n"
+        "gpgsig -----BEGIN PGP SIGNATURE-----\n parent x\n -----END-----\n"
+        "\nsubject\ncontinued\n\nbody\n"
+    ).encode()
+
+    commit = LazyCommit(raw)
+
+    assert commit.tree == TREE_OID
+    assert commit.parents == (COMMIT_OID, TREE_OID)
+    assert commit.committer == IDENT
+    assert commit.commit_time == 1700000001
+    assert commit.subject == "subject continued"
+    assert commit.body == "body\n"
+    assert commit.message == "subject\ncontinued\n\nbody\n"
@@ -0,0 +1,39 @@
+import random
+from pathlib import Path
+
+from mini_git.services.compression_service import (
+    CompressionService,
+    LevelStats,
+    suggest,
+)
+from mini_git.storage.object_store import ObjectStore
+from mini_git.types import ObjectType
+
+
+def test_benchmark_measures_levels_and_suggests_media_rule(tmp_path: Path):
+    """リポジトリのobjectでlevelごとに測り、圧縮済みblobには無圧縮を勧めることをテスト"""
+    store = ObjectStore(tmp_path / ".git")
+    text = "".join(f"line {i}\n" for i in range(500)).encode()
+    store.write(ObjectType.BLOB, text)
+    store.write(ObjectType.BLOB, b"PK\x03\x04" + random.Random(0).randbytes(8000))
+
+    result = CompressionService(store).benchmark(levels=(0, 1, 9))
+
+    assert [s.level for s in result.overall] == [0, 1, 9]
+    assert result.overall[0].objects == 2
+    assert result.overall[0].ratio > 1.0 > result.overall[1].ratio
+    assert result.media[1].ratio > 0.97
+    assert result.suggestions["compression.media.level"] == "0"
+
+
+def test_suggest_prefers_fast_levels_within_tolerance():
+    """最小サイズに近いlevelのうち、looseは速さを、packは大きさを優先することをテスト"""
+    stats = [
+        LevelStats(1, 10, 1000, 410, 0.001),
+        LevelStats(6, 10, 1000, 375, 0.004),
+        LevelStats(9, 10, 1000, 370, 0.010),
+    ]
+
+    suggestions = suggest(stats, [])
+
+    assert suggestions == {"core.looseCompression": "1", "pack.compression": "6"}
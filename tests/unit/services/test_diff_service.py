@@ -0,0 +1,257 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from mini_git.models import IndexEntry
+from mini_git.services.diff_service import DiffEntry, DiffService
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.types import ObjectType
+
+
+def _tree(store: TreeStore, files: dict[str, tuple[int, str]]) -> str:
+    return store.write_index_tree(
+        IndexEntry(path=Path(p), mode=mode, oid=oid) for p, (mode, oid) in files.items()
+    )
+
+
+def _setup(tmp_path: Path) -> tuple[DiffService, dict[str, str]]:
+    store = TreeStore(ObjectStore(tmp_path / ".git"))
+    blobs = {
+        name: store.object_store.write(ObjectType.BLOB, f"{name}\n".encode())
+        for name in ("one", "two", "three")
+    }
+    return DiffService(store), blobs
+
+
+def test_diff_trees_reports_name_status(tmp_path: Path):
+    """追加・削除・変更・型変更がgitの順序で得られることをテスト"""
+    service, b = _setup(tmp_path)
+    old = _tree(
+        service.tree_store,
+        {
+            "keep.txt": (100644, b["one"]),
+            "edit.txt": (100644, b["one"]),
+            "gone.txt": (100644, b["one"]),
+            "link": (100644, b["one"]),
+            "dir/a.txt": (100644, b["one"]),
+            "script": (100644, b["one"]),
+        },
+    )
+    new = _tree(
+        service.tree_store,
+        {
+            "keep.txt": (100644, b["one"]),
+            "edit.txt": (100644, b["two"]),
+            "link": (120000, b["one"]),
+            "dir/a.txt": (100644, b["one"]),
+            "dir/b.txt": (100644, b["three"]),
+            "script": (100755, b["one"]),
+        },
+    )
+
+    result = [(d.status, d.path) for d in service.diff_trees(old, new)]
+
+    assert result == [
+        ("A", "dir/b.txt"),
+        ("M", "edit.txt"),
+        ("D", "gone.txt"),
+        ("T", "link"),
+        ("M", "script"),
+    ]
+
+
+def test_file_replaced_by_directory(tmp_path: Path):
+    """ファイルとディレクトリの入れ替えが削除と追加になることをテスト"""
+    service, b = _setup(tmp_path)
+    old = _tree(service.tree_store, {"x": (100644, b["one"])})
+    new = _tree(service.tree_store, {"x/y": (100644, b["two"])})
+
+    assert list(service.diff_trees(old, new)) == [
+        DiffEntry("D", "x", 100644, b["one"], None, None),
+        DiffEntry("A", "x/y", None, None, 100644, b["two"]),
+    ]
+
+
+def test_unchanged_subtrees_are_not_read(tmp_path: Path):
+    """oidが同じsubtreeは読まず、変更のあるパス上のtreeだけを読むことをテスト"""
+    service, b = _setup(tmp_path)
+    files = {
+        f"pkg{i}/mod{j}/f.txt": (100644, b["one"]) for i in range(5) for j in range(5)
+    }
+    old = _tree(service.tree_store, files)
+    files["pkg1/mod2/f.txt"] = (100644, b["two"])
+    files["pkg3/mod0/f.txt"] = (100644, b["two"])
+    files["pkg3/mod4/f.txt"] = (100644, b["three"])
+    new = _tree(service.tree_store, files)
+
+    with patch.object(
+        service.tree_store, "iter_tree", wraps=service.tree_store.iter_tree
+    ) as iter_tree:
+        changed = service.changed_paths(old, new)
+
+    assert changed == ["pkg1/mod2/f.txt", "pkg3/mod0/f.txt", "pkg3/mod4/f.txt"]
+    # ルート、pkg1、pkg1/mod2、pkg3、pkg3/mod0、pkg3/mod4 の各 2 側
+    assert iter_tree.call_count == 12
+
+
+def test_pathspec_limits_descent(tmp_path: Path):
+    """pathspecに関係ないディレクトリへ降りないことをテスト"""
+    service, b = _setup(tmp_path)
+    old = _tree(
+        service.tree_store,
+        {"a/x.txt": (100644, b["one"]), "b/y.txt": (100644, b["one"])},
+    )
+    new = _tree(
+        service.tree_store,
+        {"a/x.txt": (100644, b["two"]), "b/y.txt": (100644, b["two"])},
+    )
+
+    with patch.object(
+        service.tree_store, "iter_tree", wraps=service.tree_store.iter_tree
+    ) as iter_tree:
+        result = [d.path for d in service.diff_trees(old, new, ["b/y.txt"])]
+
+    assert result == ["b/y.txt"]
+    assert iter_tree.call_count == 4
+    assert list(service.diff_trees(old, old)) == []
+
+
+def _blob(service: DiffService, text: str) -> str:
+    return service.tree_store.object_store.write(ObjectType.BLOB, text.encode())
+
+
+def _lines(tag: str, count: int = 20) -> str:
+    return "".join(f"{tag} line {i}\n" for i in range(count))
+
+
+def test_find_renames_exact_and_similar(tmp_path: Path):
+    """完全一致と類似度によるrenameが検出され、残りは追加・削除のままであることをテスト"""
+    service, b = _setup(tmp_path)
+    moved = _blob(service, _lines("moved"))
+    edited_old = _blob(service, _lines("edited"))
+    edited_new = _blob(service, _lines("edited").replace("line 3\n", "LINE\n"))
+    old = _tree(
+        service.tree_store,
+        {
+            "a.txt": (100644, moved),
+            "b.txt": (100644, edited_old),
+            "gone.txt": (100644, b["one"]),
+        },
+    )
+    new = _tree(
+        service.tree_store,
+        {
+            "dir/a.txt": (100644, moved),
+            "c.txt": (100644, edited_new),
+            "new.txt": (100644, b["two"]),
+        },
+    )
+
+    result = service.find_renames(service.diff_trees(old, new))
+
+    assert [(d.status, d.old_path, d.path, d.score) for d in result] == [
+        ("R", "b.txt", "c.txt", 95),
+        ("R", "a.txt", "dir/a.txt", 100),
+        ("D", None, "gone.txt", None),
+        ("A", None, "new.txt", None),
+    ]
+
+
+def test_find_copies_from_modified_source(tmp_path: Path):
+    """変更されたファイルを元にしたコピーがCになることをテスト"""
+    service, b = _setup(tmp_path)
+    src = _blob(service, _lines("src"))
+    old = _tree(service.tree_store, {"src.txt": (100644, src)})
+    new = _tree(
+        service.tree_store,
+        {
+            "src.txt": (100644, _blob(service, _lines("src") + "more\n")),
+            "copy.txt": (100644, src),
+        },
+    )
+
+    renames = service.find_renames(service.diff_trees(old, new))
+    copies = service.find_renames(service.diff_trees(old, new), copies=True)
+
+    assert [d.status for d in renames] == ["A", "M"]
+    assert [(d.status, d.old_path, d.path) for d in copies] == [
+        ("C", "src.txt", "copy.txt"),
+        ("M", None, "src.txt"),
+    ]
+
+
+def test_size_ratio_rejects_without_reading(tmp_path: Path):
+    """サイズ比で届かない組は内容を読まず、組数が上限を超えると類似度を調べないことをテスト"""
+    service, _ = _setup(tmp_path)
+    old = _tree(service.tree_store, {"small.txt": (100644, _blob(service, "x\n"))})
+    new = _tree(
+        service.tree_store,
+        {"big.txt": (100644, _blob(service, _lines("big", 100)))},
+    )
+    store = service.tree_store.object_store
+
+    with patch.object(store, "read", wraps=store.read) as read:
+        result = service.find_renames(service.diff_trees(old, new))
+        read_blobs = read.call_count - 2  # ルート tree の 2 回
+        limited = service.find_renames(service.diff_trees(old, new), rename_limit=0)
+
+    assert [d.status for d in result] == ["A", "D"]
+    assert read_blobs == 0
+    assert [d.status for d in limited] == ["A", "D"]
+
+
+def test_mass_move_stays_linear(tmp_path: Path):
+    """大量のファイル移動が完全一致の段階だけで対になり、blobを読まないことをテスト"""
+    service, _ = _setup(tmp_path)
+    store = service.tree_store.object_store
+    blobs = [_blob(service, f"file {i}\n") for i in range(2000)]
+    old = _tree(
+        service.tree_store, {f"old/f{i}.txt": (100644, o) for i, o in enumerate(blobs)}
+    )
+    new = _tree(
+        service.tree_store, {f"new/f{i}.txt": (100644, o) for i, o in enumerate(blobs)}
+    )
+
+    with patch.object(store, "read", wraps=store.read) as read:
+        result = service.find_renames(service.diff_trees(old, new), rename_limit=10)
+        reads = read.call_count
+
+    assert len(result) == 2000
+    assert all(d.status == "R" and d.score == 100 for d in result)
+    assert result[0].old_path == "old/f0.txt"
+    assert reads == 4  # tree の読み込みだけ
+
+
+def test_iter_patch_matches_git_format(tmp_path: Path):
+    """変更・追加・rename・バイナリのpatchがgit diffと同じ形式で出ることをテスト"""
+    service, b = _setup(tmp_path)
+    binary = service.tree_store.object_store.write(ObjectType.BLOB, b"\0\1")
+    old = _tree(
+        service.tree_store,
+        {"a.txt": (100644, b["one"]), "old.txt": (100644, b["two"])},
+    )
+    new = _tree(
+        service.tree_store,
+        {
+            "a.txt": (100755, b["three"]),
+            "bin": (100644, binary),
+            "new.txt": (100644, b["two"]),
+        },
+    )
+
+    entries = service.find_renames(service.diff_trees(old, new))
+    patch = b"".join(service.iter_patch(entries)).decode()
+
+    assert patch == (
+        "diff --git a/a.txt b/a.txt\n"
+        "old mode 100644\nnew mode 100755\n"
+        f"index {b['one'][:7]}..{b['three'][:7]}\n"
+        "--- a/a.txt\n+++ b/a.txt\n"
+        "@@ -1 +1 @@\n-one\n+three\n"
+        "diff --git a/bin b/bin\n"
+        "new file mode 100644\n"
+        f"index 0000000..{binary[:7]}\n"
+        "Binary files /dev/null and b/bin differ\n"
+        "diff --git a/old.txt b/new.txt\n"
+        "similarity index 100%\nrename from old.txt\nrename to new.txt\n"
+    )
@@ -0,0 +1,138 @@
+import zlib
+from pathlib import Path
+
+import pytest
+
+from mini_git.models import IndexEntry, TreeEntry
+from mini_git.services.commit_service import CommitService
+from mini_git.services.commit_store import CommitStore
+from mini_git.services.fsck_service import (
+    FsckProgress,
+    FsckService,
+    check_commit,
+    check_tree,
+)
+from mini_git.services.gc_service import GcService
+from mini_git.services.tree_store import serialize_tree
+from mini_git.storage.config_store import ConfigStore
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.ref_store import RefStore
+from mini_git.types import ObjectType
+
+OID = "5659689b2214e9ed03d6ad3a44a6bdeb8492369d"
+IDENT = "A <a@x> 1700000001 +0900"
+
+
+@pytest.fixture(autouse=True)
+def _identity(monkeypatch: pytest.MonkeyPatch):
+    for kind in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{kind}_NAME", "A")
+        monkeypatch.setenv(f"GIT_{kind}_EMAIL", "a@x")
+
+
+def _repo(tmp_path: Path) -> tuple[FsckService, dict[str, str]]:
+    git_dir = tmp_path / ".git"
+    refs = RefStore(git_dir)
+    refs.set_symbolic("HEAD", "refs/heads/main")
+    service = CommitService(
+        CommitStore(ObjectStore(git_dir)), refs, ConfigStore(git_dir)
+    )
+    store = service.object_store
+    oids = {
+        "a": store.write(ObjectType.BLOB, b"a\n"),
+        "b": store.write(ObjectType.BLOB, b"b\n"),
+    }
+    oids["tree"] = service.tree_store.write_index_tree(
+        [
+            IndexEntry(path=Path("a.txt"), mode=100644, oid=oids["a"]),
+            IndexEntry(path=Path("dir/b.txt"), mode=100644, oid=oids["b"]),
+        ]
+    )
+    oids["commit"] = service.commit(oids["tree"], "c1")
+    return FsckService(service, IndexStore(git_dir), workers=2), oids
+
+
+def test_fsck_clean_repository_with_progress(tmp_path: Path):
+    """正常なリポジトリでは問題が無く、進捗が全object数まで進むことをテスト"""
+    fsck, _ = _repo(tmp_path)
+    seen: list[FsckProgress] = []
+
+    result = fsck.fsck(seen.append)
+
+    assert result.issues == []
+    assert result.counts == {"blob": 2, "tree": 2, "commit": 1}
+    assert result.reachable == 5
+    assert seen[-1].checked == seen[-1].total == 5
+
+
+def test_fsck_reports_hash_mismatch(tmp_path: Path):
+    """中身がoidと一致しないloose objectを報告することをテスト"""
+    fsck, oids = _repo(tmp_path)
+    path = fsck.object_store.object_dir / oids["a"][:2] / oids["a"][2:]
+    path.chmod(0o644)
+    path.write_bytes(zlib.compress(b"blob 2\0x\n"))
+
+    result = fsck.fsck(connectivity=False)
+
+    assert [i.oid for i in result.issues] == [oids["a"]]
+    assert "hash mismatch" in result.issues[0].message
+
+
+def test_fsck_reports_missing_objects(tmp_path: Path):
+    """refから辿れるのに存在しないobjectを報告することをテスト"""
+    fsck, oids = _repo(tmp_path)
+    (fsck.object_store.object_dir / oids["b"][:2] / oids["b"][2:]).unlink()
+
+    result = fsck.fsck()
+
+    assert f"missing blob {oids['b']}" in [i.message for i in result.issues]
+
+
+def test_fsck_checks_packed_objects(tmp_path: Path):
+    """gcでpackにまとめたobjectもhashと構造を検査することをテスト"""
+    fsck, _ = _repo(tmp_path)
+    GcService(fsck.commit_service, fsck.index_store).gc()
+
+    result = fsck.fsck()
+
+    assert result.issues == []
+    assert result.checked == 5
+
+
+def test_fsck_reports_pack_crc_mismatch(tmp_path: Path):
+    """idxに記録されたCRC32がpack内のデータと一致しなければ報告することをテスト"""
+    fsck, _ = _repo(tmp_path)
+    GcService(fsck.commit_service, fsck.index_store).gc()
+    (idx,) = (fsck.object_store.object_dir / "pack").glob("*.idx")
+    data = bytearray(idx.read_bytes())
+    # 先頭のentryのCRC32 (fan-outとoid表の直後) を壊す
+    count = int.from_bytes(data[8 + 255 * 4 : 8 + 256 * 4], "big")
+    data[8 + 256 * 4 + count * 20] ^= 0xFF
+    idx.chmod(0o644)
+    idx.write_bytes(bytes(data))
+
+    result = fsck.fsck(connectivity=False)
+
+    assert len(result.issues) == 1
+    assert "index CRC mismatch" in result.issues[0].message
+
+
+def test_check_tree_and_commit_structure():
+    """treeの並び順やmode、commitのヘッダの不備を検出することをテスト"""
+    good = serialize_tree([TreeEntry("a", 100644, OID), TreeEntry("b", 40000, OID)])
+    unsorted = b"100644 b\0" + bytes.fromhex(OID) + b"100644 a\0" + bytes.fromhex(OID)
+    bad_mode = b"100664 a\0" + bytes.fromhex(OID)
+
+    assert check_tree(good) is None
+    assert (check_tree(unsorted) or "").startswith("treeNotSorted")
+    assert (check_tree(bad_mode) or "").startswith("badFilemode")
+    assert (check_tree(b"100644 a\0" + b"short") or "").startswith("badTree")
+    for name in (b".git", b".GIT", b".git.", b"git~1"):
+        tree = b"40000 " + name + b"\0" + bytes.fromhex(OID)
+        assert (check_tree(tree) or "").startswith("hasDotgit")
+    commit = f"tree {OID}\nauthor {IDENT}\ncommitter {IDENT}\n\nmsg\n".encode()
+    assert check_commit(commit) is None
+    no_author = f"tree {OID}\ncommitter {IDENT}\n\nmsg\n".encode()
+    assert (check_commit(no_author) or "").startswith("missingAuthor")
+    assert (check_commit(b"parent x\n\n") or "").startswith("missingTree")
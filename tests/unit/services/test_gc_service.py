@@ -0,0 +1,230 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from mini_git.models import IndexEntry
+from mini_git.services.commit_service import CommitService
+from mini_git.services.commit_store import CommitStore
+from mini_git.services.gc_service import (
+    GcService,
+    geometric_split,
+    name_hash,
+    parse_expire,
+)
+from mini_git.storage.blame_cache import BlameCache, BlameHunk
+from mini_git.storage.config_store import ConfigStore
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.ref_store import RefStore
+from mini_git.types import ObjectType
+
+
+@pytest.fixture(autouse=True)
+def _identity(monkeypatch: pytest.MonkeyPatch):
+    for kind in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{kind}_NAME", "A")
+        monkeypatch.setenv(f"GIT_{kind}_EMAIL", "a@x")
+
+
+def _repo(tmp_path: Path) -> tuple[GcService, list[str]]:
+    git_dir = tmp_path / ".git"
+    refs = RefStore(git_dir)
+    refs.set_symbolic("HEAD", "refs/heads/main")
+    service = CommitService(
+        CommitStore(ObjectStore(git_dir)), refs, ConfigStore(git_dir)
+    )
+    store = service.object_store
+    commits = []
+    content = "".join(f"line {i}\n" for i in range(200))
+    for i in range(5):
+        content += f"change {i}\n"
+        blob = store.write(ObjectType.BLOB, content.encode())
+        tree = service.tree_store.write_index_tree(
+            [IndexEntry(path=Path("file.txt"), mode=100644, oid=blob)]
+        )
+        commits.append(service.commit(tree, f"c{i}"))
+    return GcService(service, IndexStore(git_dir)), commits
+
+
+def test_gc_packs_reachable_objects_with_deltas(tmp_path: Path):
+    """到達可能なobjectをdelta付きのpackにまとめ、looseを消すことをテスト"""
+    gc, commits = _repo(tmp_path)
+    store = gc.object_store
+
+    result = gc.gc()
+
+    assert result.packed == 15
+    assert result.deltas >= 4
+    assert list(store.loose_objects()) == []
+    assert len(store.packs()) == 1
+    assert result.size_after < result.size_before
+    assert gc.commit_service.commit_store.read_commit(commits[0]).message == "c0\n"
+
+
+def test_gc_prunes_only_expired_unreachable(tmp_path: Path):
+    """猶予期間を過ぎた到達不能なloose objectだけを消すことをテスト"""
+    gc, _ = _repo(tmp_path)
+    store = gc.object_store
+    old = store.write(ObjectType.BLOB, b"old garbage\n")
+    new = store.write(ObjectType.BLOB, b"new garbage\n")
+    past = time.time() - 30 * 86400
+    os.utime(store.object_dir / old[:2] / old[2:], (past, past))
+
+    result = gc.gc()
+
+    assert result.pruned == 1
+    assert not store.exists(old)
+    assert store.exists(new)
+
+
+def test_gc_removes_stale_tmp_files(tmp_path: Path):
+    """落ちたプロセスが残した古い一時ファイルだけを消すことをテスト"""
+    gc, _ = _repo(tmp_path)
+    store = gc.object_store
+    (store.object_dir / "ab").mkdir(exist_ok=True)
+    store.pack_dir.mkdir(parents=True, exist_ok=True)
+    stale = [
+        store.object_dir / "ab" / ("c" * 38 + ".123.tmp"),
+        store.pack_dir / "tmp_pack_123",
+        gc.index_store.git_dir / "index.json.123.tmp",
+    ]
+    fresh = gc.index_store.git_dir / "index.json.456.tmp"
+    past = time.time() - 30 * 86400
+    for path in [*stale, fresh]:
+        path.write_bytes(b"partial")
+    for path in stale:
+        os.utime(path, (past, past))
+
+    gc.gc()
+
+    assert [p for p in stale if p.exists()] == []
+    assert fresh.exists()
+
+
+def test_gc_keeps_reflog_objects(tmp_path: Path):
+    """ブランチから外れてもreflogに残るcommitは消さないことをテスト"""
+    gc, commits = _repo(tmp_path)
+    gc.ref_store.update("refs/heads/main", commits[1], message="reset")
+
+    gc.gc(prune_expire="now")
+
+    assert gc.object_store.exists(commits[4])
+
+
+def test_parse_expire_and_name_hash():
+    """猶予期間の書式とgitと同じ名前ハッシュを計算することをテスト"""
+    assert parse_expire("now", now=100.0) == 100.0
+    assert parse_expire("never") is None
+    assert parse_expire("2.weeks.ago", now=2_000_000.0) == 2_000_000.0 - 1_209_600
+    with pytest.raises(RuntimeError, match="invalid prune expiry"):
+        parse_expire("yesterday")
+    # 末尾の文字ほど重く効くので、拡張子が同じなら近い値になる
+    near = abs(name_hash("src/a.c") - name_hash("lib/b.c"))
+    assert near < abs(name_hash("src/a.c") - name_hash("src/a.py"))
+
+
+def test_geometric_split():
+    """pack数が等比数列になるまで小さい方からまとめる数を求めることをテスト"""
+    # 既に 2 倍ずつ
+    assert geometric_split([1, 2, 4, 8], 2) == 0
+    # 崩れている組の大きい方までまとめる
+    assert geometric_split([5, 6, 100], 2) == 2
+    # まとめた合計が次の pack の半分を超えるなら、それも取り込む
+    assert geometric_split([3, 4, 12, 100], 2) == 3
+    assert geometric_split([], 2) == 0
+    # loose object はまとめる側に入るので、その分だけ大きい pack まで取り込む
+    assert geometric_split([1, 15], 2) == 0
+    assert geometric_split([1, 15], 2, extra=1) == 1
+    with pytest.raises(RuntimeError, match="at least 2"):
+        geometric_split([1], 1)
+
+
+def test_geometric_repack_rolls_up_only_small_packs(tmp_path: Path):
+    """大きいpackは残し、小さいpackとloose objectだけを1つにまとめることをテスト"""
+    gc, commits = _repo(tmp_path)
+    store = gc.object_store
+    gc.gc()
+    (big,) = store.packs()
+    blob = store.write(ObjectType.BLOB, b"new\n")
+    small = gc.write_pack(gc._candidates({blob: ("blob", "new.txt")}))[0]
+    loose = store.write(ObjectType.BLOB, b"loose\n")
+
+    result = gc.geometric_repack(2)
+
+    assert (result.rolled, result.kept, result.packed) == (1, 1, 2)
+    assert not small.exists()
+    assert big.pack_path.exists()
+    assert list(store.loose_objects()) == []
+    assert result.midx_objects == 17
+    midx = store.midx
+    assert midx is not None and len(midx.pack_names) == 2
+    assert store.read(loose)[1] == b"loose\n"
+    assert gc.commit_service.commit_store.read_commit(commits[0]).message == "c0\n"
+    # 揃っていればもう何も書き直さない
+    assert gc.geometric_repack(2).packed == 0
+
+
+def test_gc_prunes_blame_cache_of_unreachable_commits(tmp_path: Path):
+    """gcで到達できないcommitのblame結果を消すことをテスト"""
+    gc, commits = _repo(tmp_path)
+    cache = BlameCache(tmp_path / ".git")
+    gc.blame_cache = cache
+    hunks = [BlameHunk(commits[-1], 0, 0, 1)]
+    cache.put(commits[-1], "file.txt", hunks)
+    cache.put("0" * 40, "file.txt", hunks)
+
+    gc.gc()
+
+    assert cache.get(commits[-1], "file.txt") == hunks
+    assert cache.get("0" * 40, "file.txt") is None
+
+
+def test_gc_prunes_unreachable_chunked_blobs(tmp_path: Path):
+    """到達不能な巨大blobのmanifestと、他から使われないchunkを消すことをテスト"""
+    gc, _ = _repo(tmp_path)
+    store = gc.object_store
+    store.large_object_threshold = 1024
+    shared = os.urandom(200_000)
+    garbage = store.write(ObjectType.BLOB, shared + os.urandom(200_000))
+    kept = store.write(ObjectType.BLOB, shared)
+    gc.index_store.add_or_update(
+        IndexEntry(path=Path("big.bin"), mode=100644, oid=kept)
+    )
+    chunks = store.chunk_store.chunk_ids(garbage)
+    past = time.time() - 30 * 86400
+    for path in tmp_path.joinpath(".git/objects").rglob("*"):
+        if path.is_file() and path.parent.parent.name in ("chunks", "manifests"):
+            os.utime(path, (past, past))
+
+    result = gc.gc()
+
+    assert result.pruned == 1
+    assert not store.exists(garbage)
+    assert store.read(kept)[1] == shared
+    used = set(store.chunk_store.chunk_ids(kept))
+    remaining = {
+        p.parent.name + p.name
+        for p in store.chunk_store.chunk_dir.rglob("*")
+        if p.is_file()
+    }
+    assert remaining == used
+    assert set(chunks) - used
+
+
+def test_gc_counts_objects_dropped_with_expired_packs(tmp_path: Path):
+    """猶予期間を過ぎたpackと一緒に消えた到達不能なobjectも数えることをテスト"""
+    gc, _ = _repo(tmp_path)
+    store = gc.object_store
+    garbage = store.write(ObjectType.BLOB, b"garbage\n")
+    gc.write_pack(gc._candidates({garbage: ("blob", "g")}))
+    (store.object_dir / garbage[:2] / garbage[2:]).unlink()
+    past = time.time() - 30 * 86400
+    for pack in store.packs():
+        os.utime(pack.pack_path, (past, past))
+
+    result = gc.gc()
+
+    assert (result.pruned, result.loosened) == (1, 0)
+    assert not store.exists(garbage)
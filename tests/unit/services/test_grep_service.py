@@ -0,0 +1,123 @@
+from pathlib import Path
+
+import pytest
+
+from mini_git.models import IndexEntry, TreeEntry
+from mini_git.services import grep_service
+from mini_git.services.grep_service import (
+    GrepMatch,
+    GrepPattern,
+    GrepService,
+    GrepTarget,
+    display_path,
+    is_binary,
+)
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.types import ObjectType
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> tuple[GrepService, str, IndexStore]:
+    worktree = tmp_path.resolve()
+    store = ObjectStore(worktree / ".git")
+    trees = TreeStore(store)
+    files = {
+        "a.txt": b"alpha\nbeta\nalpha beta\n",
+        "src/b.py": b"def beta():\n    return 1\n",
+        "img.bin": b"beta\0\x01\x02",
+    }
+    index_store = IndexStore(worktree / ".git")
+    entries = []
+    for path, data in files.items():
+        (worktree / path).parent.mkdir(parents=True, exist_ok=True)
+        (worktree / path).write_bytes(data)
+        oid = store.write(ObjectType.BLOB, data)
+        entries.append(IndexEntry(path=Path(path), mode=100644, oid=oid))
+    index_store.write_all(entries)
+    src = trees.write_tree([TreeEntry("b.py", 100644, entries[1].oid)])
+    root = trees.write_tree(
+        [
+            TreeEntry("a.txt", 100644, entries[0].oid),
+            TreeEntry("img.bin", 100644, entries[2].oid),
+            TreeEntry("src", 40000, src),
+        ]
+    )
+    return GrepService(store, trees, worktree, workers=2), root, index_store
+
+
+def test_pattern_search_reports_each_line_once():
+    """一致した行を行番号付きで1回ずつ返すことをテスト"""
+    pattern = GrepPattern("a")
+    assert pattern.search(b"xa a\nb\nab") == [
+        GrepMatch(1, b"xa a"),
+        GrepMatch(3, b"ab"),
+    ]
+
+
+def test_pattern_search_does_not_cross_lines():
+    """改行にも一致しうるpatternでも行をまたいで一致させないことをテスト"""
+    assert GrepPattern(r"hello\sthere").search(b"hello\nthere\n") == []
+    assert GrepPattern(r"a[^x]*b").search(b"a\nb\nab\n") == [GrepMatch(3, b"ab")]
+    assert GrepPattern(r"o\s*t").search(b"no\n\nnot\n") == [GrepMatch(3, b"not")]
+
+
+def test_literal_prefilter_skips_regex():
+    """固定文字列は部分文字列検索で候補を絞ることをテスト"""
+    assert GrepPattern("beta").literal == b"beta"
+    assert GrepPattern("be.a").literal is None
+    assert GrepPattern("be.a", fixed=True).literal == b"be.a"
+    pattern = GrepPattern("BETA", ignore_case=True)
+    assert pattern.might_match(b"alpha beta")
+    assert not pattern.might_match(b"alpha")
+
+
+def test_is_binary_sniffs_nul():
+    """先頭にNULを含むものをbinaryとみなすことをテスト"""
+    assert is_binary(b"a\0b")
+    assert not is_binary(b"text\n")
+
+
+def test_grep_tree_skips_binary_and_keeps_path_order(repo):
+    """treeを検索するとbinaryを飛ばし、パス順に結果を返すことをテスト"""
+    service, root, _ = repo
+    results = list(service.grep(GrepPattern("beta"), service.tree_targets(root)))
+    assert results == [
+        ("a.txt", [GrepMatch(2, b"beta"), GrepMatch(3, b"alpha beta")]),
+        ("src/b.py", [GrepMatch(1, b"def beta():")]),
+    ]
+
+
+def test_grep_tree_limits_to_pathspecs(repo):
+    """pathspecで指定したディレクトリ配下だけを検索することをテスト"""
+    service, root, _ = repo
+    targets = list(service.tree_targets(root, ["src"]))
+    assert [t.path for t in targets] == ["src/b.py"]
+
+
+def test_display_path_is_relative_to_cwd():
+    """サブディレクトリから実行したときはcwdからの相対パスで表示することをテスト"""
+    assert display_path("src/b.py", "") == "src/b.py"
+    assert display_path("src/b.py", "src") == "b.py"
+    assert display_path("a.txt", "src/sub") == "../../a.txt"
+
+
+def test_grep_worktree_reads_files_on_disk(repo, tmp_path: Path):
+    """worktreeを検索するとindexのパスをディスクから読むことをテスト"""
+    service, _, index_store = repo
+    (tmp_path / "a.txt").write_bytes(b"gamma\n")
+    worktree = service.grep(GrepPattern("gamma"), service.index_targets(index_store))
+    assert [path for path, _ in worktree] == ["a.txt"]
+    cached = service.index_targets(index_store, cached=True)
+    assert list(service.grep(GrepPattern("gamma"), cached)) == []
+
+
+def test_grep_many_paths_across_batches(repo, monkeypatch):
+    """batchに分けて並列に検索しても順序が保たれることをテスト"""
+    monkeypatch.setattr(grep_service, "BATCH_SIZE", 2)
+    service, root, _ = repo
+    oid = next(t.oid for t in service.tree_targets(root) if t.path == "a.txt")
+    targets = [GrepTarget(f"f{i:03}", oid) for i in range(50)]
+    results = list(service.grep(GrepPattern("alpha", fixed=True), targets))
+    assert [path for path, _ in results] == [f"f{i:03}" for i in range(50)]
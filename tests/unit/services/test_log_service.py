@@ -0,0 +1,91 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mini_git.models import Commit
+from mini_git.services.commit_service import CommitService
+from mini_git.services.commit_store import CommitStore
+from mini_git.services.log_service import LogService, parse_format
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.ref_store import RefStore
+
+TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+
+def _history(tmp_path: Path, n: int) -> tuple[CommitService, list[str]]:
+    git_dir = tmp_path / ".git"
+    service = CommitService(CommitStore(ObjectStore(git_dir)), RefStore(git_dir))
+    oids: list[str] = []
+    for i in range(n):
+        ident = f"A <a@x> {1700000000 + i} +0900"
+        oids.append(
+            service.commit_store.write_commit(
+                Commit(TREE, tuple(oids[-1:]), ident, ident, f"c{i}\n\nbody {i}\n")
+            )
+        )
+    return service, oids
+
+
+def test_iter_log_oneline_and_max_count(tmp_path: Path):
+    """新しい順に件名だけの1行を返し、max_countで打ち切ることをテスト"""
+    service, oids = _history(tmp_path, 5)
+
+    lines = list(LogService(service).iter_log([oids[-1]], "%h %s", max_count=2))
+
+    assert lines == [f"{oids[4][:7]} c4", f"{oids[3][:7]} c3"]
+
+
+def test_iter_log_medium_format(tmp_path: Path):
+    """既定の書式がgit logと同じ形になることをテスト"""
+    service, oids = _history(tmp_path, 1)
+
+    (entry,) = LogService(service).iter_log(oids)
+
+    assert entry == (
+        f"commit {oids[0]}\nAuthor: A <a@x>\n"
+        "Date:   Wed Nov 15 07:13:20 2023 +0900\n\n    c0\n    \n    body 0"
+    )
+
+
+def test_graph_fields_do_not_read_objects(tmp_path: Path):
+    """commit-graphにある項目だけの書式ではobjectを読まないことをテスト"""
+    service, oids = _history(tmp_path, 3)
+    service.write_graph([oids[-1]])
+
+    with patch.object(
+        service.commit_store, "read_raw", side_effect=AssertionError
+    ) as read_raw:
+        lines = list(LogService(service).iter_log([oids[-1]], "%H %p %ct"))
+
+    assert lines[-1] == f"{oids[0]}  1700000000"
+    read_raw.assert_not_called()
+
+
+def test_compile_format_placeholders(tmp_path: Path):
+    """名前やメールなどのプレースホルダを展開し、未知のものはそのまま残すことをテスト"""
+    service, oids = _history(tmp_path, 2)
+
+    (entry,) = LogService(service).iter_log([oids[1]], "%an|%ae|%at|%s|%b%%|%x", 1)
+
+    assert entry == "A|a@x|1700000001|c1|body 1\n%|%x"
+
+
+def test_negative_max_count_is_unlimited(tmp_path: Path):
+    """負のmax_countは件数を制限しないことをテスト"""
+    service, oids = _history(tmp_path, 3)
+
+    lines = list(LogService(service).iter_log([oids[-1]], "%s", max_count=-1))
+
+    assert lines == ["c2", "c1", "c0"]
+
+
+def test_parse_format_rejects_unknown_names():
+    """%を含まない知らない書式名は断り、format:などの区切りを決めることをテスト"""
+    assert parse_format("medium") == ("medium", "\n", "\n")
+    assert parse_format("oneline") == ("oneline", "", "\n")
+    assert parse_format("format:%h") == ("%h", "\n", "")
+    assert parse_format("tformat:plain") == ("plain", "", "\n")
+    assert parse_format("%h %s") == ("%h %s", "", "\n")
+    with pytest.raises(RuntimeError, match="invalid --pretty format: fuller"):
+        parse_format("fuller")
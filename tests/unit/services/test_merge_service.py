@@ -0,0 +1,114 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from mini_git.models import Commit, IndexEntry
+from mini_git.services.commit_service import CommitService
+from mini_git.services.commit_store import CommitStore
+from mini_git.services.merge_service import MergeService
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.ref_store import RefStore
+from mini_git.types import ObjectType
+
+
+def _service(tmp_path: Path) -> MergeService:
+    git_dir = tmp_path / ".git"
+    return MergeService(
+        CommitService(CommitStore(ObjectStore(git_dir)), RefStore(git_dir))
+    )
+
+
+def _tree(service: MergeService, files: dict[str, str]) -> str:
+    write = service.object_store.write
+    return service.tree_store.write_index_tree(
+        IndexEntry(path=Path(p), mode=100644, oid=write(ObjectType.BLOB, c.encode()))
+        for p, c in files.items()
+    )
+
+
+def _files(service: MergeService, tree: str) -> dict[str, str]:
+    return {
+        e.path.as_posix(): service.object_store.read(e.oid)[1].decode()
+        for e in service.tree_store.iter_files(tree)
+    }
+
+
+def test_merge_trees_combines_independent_changes(tmp_path: Path):
+    """片側だけの変更と、両側で変わったファイルの行単位のmergeが取り込まれることをテスト"""
+    service = _service(tmp_path)
+    text = "".join(f"{i}\n" for i in range(10))
+    base = _tree(service, {"a.txt": text, "lib/x": "x\n", "gone": "g\n"})
+    ours = _tree(
+        service,
+        {"a.txt": text.replace("1\n", "one\n"), "lib/x": "x\n", "new": "n\n"},
+    )
+    theirs = _tree(
+        service,
+        {"a.txt": text.replace("8\n", "eight\n"), "lib/x": "X\n", "gone": "g\n"},
+    )
+
+    result = service.merge_trees(base, ours, theirs)
+
+    assert result.clean
+    assert _files(service, result.tree) == {
+        "a.txt": text.replace("1\n", "one\n").replace("8\n", "eight\n"),
+        "lib/x": "X\n",
+        "new": "n\n",
+    }
+
+
+def test_unchanged_subtrees_are_resolved_without_reading(tmp_path: Path):
+    """oidが揃うか片側だけが変わったsubtreeは読まずに決まることをテスト"""
+    service = _service(tmp_path)
+    files = {f"pkg{i}/mod{j}/f": f"{i}{j}\n" for i in range(4) for j in range(4)}
+    base = _tree(service, files)
+    ours = _tree(service, {**files, "pkg0/mod0/f": "ours\n"})
+    theirs = _tree(service, {**files, "pkg3/mod3/f": "theirs\n"})
+
+    with patch.object(
+        service.tree_store, "iter_tree", wraps=service.tree_store.iter_tree
+    ) as iter_tree:
+        result = service.merge_trees(base, ours, theirs)
+
+    assert result.clean
+    # ルートの 3 側だけを読み、pkg0 と pkg3 は片側の変更なのでそのまま採る
+    assert iter_tree.call_count == 3
+    assert _files(service, result.tree)["pkg0/mod0/f"] == "ours\n"
+    assert _files(service, result.tree)["pkg3/mod3/f"] == "theirs\n"
+
+
+def test_conflicts_are_reported_and_written_with_markers(tmp_path: Path):
+    """内容の衝突と変更・削除の衝突が報告され、結果のtreeに残ることをテスト"""
+    service = _service(tmp_path)
+    base = _tree(service, {"c": "base\n", "m": "m\n"})
+    ours = _tree(service, {"c": "ours\n"})
+    theirs = _tree(service, {"c": "theirs\n", "m": "changed\n"})
+
+    result = service.merge_trees(base, ours, theirs, ("HEAD", "topic"))
+
+    assert [(c.path, c.kind) for c in result.conflicts] == [
+        ("c", "content"),
+        ("m", "modify/delete"),
+    ]
+    assert _files(service, result.tree) == {
+        "c": "<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> topic\n",
+        "m": "changed\n",
+    }
+
+
+def test_merge_commits_uses_merge_base(tmp_path: Path):
+    """merge baseのtreeを基準に2つのcommitがmergeされることをテスト"""
+    service = _service(tmp_path)
+    store = service.commit_service.commit_store
+
+    def commit(tree: str, parents: tuple[str, ...]) -> str:
+        ident = "a <a@x> 1 +0000"
+        return store.write_commit(Commit(tree, parents, ident, ident, "m\n"))
+
+    base = commit(_tree(service, {"a": "1\n", "b": "1\n"}), ())
+    ours = commit(_tree(service, {"a": "2\n", "b": "1\n"}), (base,))
+    theirs = commit(_tree(service, {"a": "1\n", "b": "2\n"}), (base,))
+
+    result = service.merge_commits(ours, theirs)
+
+    assert result.clean
+    assert _files(service, result.tree) == {"a": "2\n", "b": "2\n"}
@@ -0,0 +1,103 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mini_git.models import Commit, IndexEntry
+from mini_git.services.commit_service import CommitService
+from mini_git.services.commit_store import CommitStore
+from mini_git.services.reachability_service import ReachabilityService
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.ref_store import RefStore
+from mini_git.types import ObjectType
+
+
+def _history(tmp_path: Path, count: int = 12) -> tuple[ReachabilityService, list[str]]:
+    # 各 commit で dir<i % 3>/f<i>.txt を追加する直線の履歴
+    git_dir = tmp_path / ".git"
+    refs = RefStore(git_dir)
+    service = CommitService(CommitStore(ObjectStore(git_dir)), refs)
+    files: dict[str, str] = {}
+    commits: list[str] = []
+    for i in range(count):
+        blob = service.object_store.write(ObjectType.BLOB, f"{i}\n".encode())
+        files[f"dir{i % 3}/f{i}.txt"] = blob
+        tree = service.tree_store.write_index_tree(
+            IndexEntry(path=Path(p), mode=100644, oid=o) for p, o in files.items()
+        )
+        ident = f"a <a@x> {i} +0000"
+        commits.append(
+            service.commit_store.write_commit(
+                Commit(tree, tuple(commits[-1:]), ident, ident, f"{i}\n")
+            )
+        )
+    refs.update("refs/heads/main", commits[-1])
+    return ReachabilityService(service), commits
+
+
+@pytest.mark.parametrize("tip", [0, 4, 11])
+def test_bitmaps_match_full_walk(tmp_path: Path, tip: int):
+    """bitmapを使った結果が全走査と一致することをテスト"""
+    service, commits = _history(tmp_path)
+    expected = service.reachable([commits[tip]], use_bitmaps=False).oids()
+
+    service.write_bitmaps(interval=4)
+
+    result = service.reachable([commits[tip]])
+    assert result.oids() == expected
+    assert len(result) == len(expected)
+
+
+def test_bitmapped_tip_needs_no_walk(tmp_path: Path):
+    """bitmapのあるcommitはtreeを読まずにORだけで求まることをテスト"""
+    service, commits = _history(tmp_path)
+    # commit, blob, ルート tree, dir の tree がそれぞれ 12 ずつ
+    assert service.write_bitmaps(interval=4) == (48, 3)
+
+    with patch.object(service.tree_store, "read_tree") as read_tree:
+        result = service.reachable([commits[-1]])
+    read_tree.assert_not_called()
+    assert len(result) == 48
+
+
+def test_walk_stops_at_nearest_bitmap(tmp_path: Path):
+    """bitmap作成後のcommitからは最寄りのbitmapまでだけ辿ることをテスト"""
+    service, commits = _history(tmp_path)
+    service.write_bitmaps(interval=4)
+    more, extended = _history(tmp_path, 14)  # 同じ内容の 12 commit の後に 2 つ追加
+    more._index = service.index
+    more._index_loaded = True
+
+    with patch.object(
+        more.commit_service, "info", wraps=more.commit_service.info
+    ) as info:
+        result = more.reachable([extended[-1]])
+
+    assert {call.args[0] for call in info.call_args_list} == set(extended[-2:])
+    assert result.oids() == more.reachable([extended[-1]], use_bitmaps=False).oids()
+
+
+def test_incremental_bitmaps_keep_existing_positions(tmp_path: Path):
+    """差分更新では既存の位置とbitmapを残し、新しいcommitだけを辿ることをテスト"""
+    service, commits = _history(tmp_path)
+    service.write_bitmaps(interval=4)
+    old = service.index
+    assert old is not None
+    old_oids = [old.oid(pos) for pos in range(len(old))]
+    more, extended = _history(tmp_path, 14)
+    more.commit_service.ref_store.update("refs/heads/main", extended[-1])
+
+    with patch.object(
+        more.commit_service, "info", wraps=more.commit_service.info
+    ) as info:
+        objects, bitmaps = more.write_bitmaps(interval=4, incremental=True)
+
+    assert {call.args[0] for call in info.call_args_list} == set(extended[-2:])
+    index = more.index
+    assert index is not None
+    assert [index.oid(pos) for pos in range(len(old_oids))] == old_oids
+    assert (objects, bitmaps) == (56, 4)
+    with patch.object(more.tree_store, "read_tree") as read_tree:
+        result = more.reachable([extended[-1]])
+    read_tree.assert_not_called()
+    assert result.oids() == more.reachable([extended[-1]], use_bitmaps=False).oids()
@@ -104,3 +104,21 @@ def test_require_repo_without_start_uses_cwd(tmp_path: Path, monkeypatch):
 
     assert repo.worktree == tmp_path.resolve()
     assert repo.git_path == tmp_path / ".git"
+
+
+def test_large_object_threshold_is_read_from_config(tmp_path: Path):
+    """configのmgit.largeObjectThresholdがObjectStoreに渡されることをテスト"""
+    GitDir.ensure_layout(tmp_path)
+    (tmp_path / ".git" / "config").write_text("[mgit]\n\tlargeObjectThreshold = 1k\n")
+
+    repo = RepoContext.require_repo(tmp_path)
+
+    assert repo.object_store.large_object_threshold == 1024
+
+
+def test_open_or_init_repo_writes_head(tmp_path: Path):
+    """初期化時にHEADがデフォルトブランチを指すことをテスト"""
+    repo = RepoContext.open_or_init_repo(tmp_path, default_branch="develop")
+
+    assert (repo.git_path / "HEAD").read_text() == "ref: refs/heads/develop\n"
+    assert repo.ref_store.symbolic_target("HEAD") == "refs/heads/develop"
@@ -0,0 +1,107 @@
+from pathlib import Path
+
+import pytest
+
+from mini_git.models import TreeEntry
+from mini_git.services.rev_parse_service import RevParseService
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.ref_store import RefStore
+from mini_git.types import ObjectType
+
+
+def _setup(tmp_path: Path) -> tuple[RevParseService, str, str]:
+    git_dir = tmp_path / ".git"
+    object_store = ObjectStore(git_dir)
+    blob = object_store.write(ObjectType.BLOB, b"hello\n")
+    tree = TreeStore(object_store).write_tree([TreeEntry("hello.txt", 100644, blob)])
+    commit = object_store.write(
+        ObjectType.COMMIT,
+        f"tree {tree}\nauthor a <a> 0 +0000\ncommitter a <a> 0 +0000\n\nmsg\n".encode(),
+    )
+    refs = RefStore(git_dir)
+    refs.set_symbolic("HEAD", "refs/heads/main")
+    refs.update("refs/heads/main", commit)
+    return RevParseService(refs, object_store), tree, commit
+
+
+def test_resolve_branch_and_head(tmp_path: Path):
+    """ブランチ名とHEADがcommit oidに解決されることをテスト"""
+    service, _, commit = _setup(tmp_path)
+
+    assert service.resolve("HEAD") == commit
+    assert service.resolve("main") == commit
+
+
+def test_resolve_abbreviated_oid(tmp_path: Path):
+    """短縮oidが完全なoidに解決されることをテスト"""
+    service, tree, commit = _setup(tmp_path)
+
+    assert service.resolve(commit[:8]) == commit
+    assert service.resolve(tree[:8]) == tree
+
+
+def test_resolve_tree_peels_commit(tmp_path: Path):
+    """commitからtree oidを取り出せることをテスト"""
+    service, tree, commit = _setup(tmp_path)
+
+    assert service.resolve_tree("main") == tree
+    assert service.resolve_tree(tree) == tree
+
+
+def test_peel_follows_annotated_tags(tmp_path: Path):
+    """annotated tag (tagのtagも) を辿ってcommitとtreeに行き着くことをテスト"""
+    service, tree, commit = _setup(tmp_path)
+    store = service.object_store
+
+    def tag(target: str, typ: str) -> str:
+        body = f"object {target}\ntype {typ}\ntag v1\ntagger a <a> 0 +0000\n\nm\n"
+        path = store.write_loose("tag", body.encode())
+        return path.parent.name + path.name
+
+    outer = tag(tag(commit, "commit"), "tag")
+
+    assert service.peel(outer) == (commit, "commit")
+    assert service.peel(tree) == (tree, "tree")
+    assert service.peel_to_tree(outer) == tree
+
+
+def test_resolve_unknown_revision_raises(tmp_path: Path):
+    """存在しないリビジョンで例外を発生させることをテスト"""
+    service, _, _ = _setup(tmp_path)
+
+    with pytest.raises(RuntimeError, match="unknown revision"):
+        service.resolve("no-such-branch")
+
+
+def test_resolve_ancestor_suffixes(tmp_path: Path):
+    """~Nと^Nで祖先のcommitを辿れることをテスト"""
+    service, tree, first = _setup(tmp_path)
+    ident = "a <a> 0 +0000"
+    second = service.object_store.write(
+        ObjectType.COMMIT,
+        f"tree {tree}\nparent {first}\nauthor {ident}\ncommitter {ident}\n\nb\n".encode(),
+    )
+    service.ref_store.update("refs/heads/main", second)
+
+    assert service.resolve("main~1") == first
+    assert service.resolve("HEAD^") == first
+    assert service.resolve("HEAD^0") == second
+    assert service.resolve(f"{second[:8]}~") == first
+    with pytest.raises(RuntimeError, match="unknown revision"):
+        service.resolve("main~2")
+
+
+def test_resolve_reflog_entries(tmp_path: Path):
+    """ref@{n}がreflogのn回前の値に解決されることをテスト"""
+    service, _, commit = _setup(tmp_path)
+    refs = service.ref_store
+    other = "1" * 40
+    refs.update("refs/heads/main", other, message="commit: two")
+
+    assert service.resolve("main@{0}") == other
+    assert service.resolve("main@{1}") == commit
+    assert service.resolve("@{1}") == commit
+    assert service.resolve("HEAD@{1}") == commit
+    with pytest.raises(RuntimeError, match="only has 2 entries"):
+        service.resolve("main@{2}")
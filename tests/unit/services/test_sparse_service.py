@@ -0,0 +1,108 @@
+from pathlib import Path
+
+from mini_git.models import IndexEntry, TREE_MODE
+from mini_git.services.sparse_service import SparseService
+from mini_git.services.tree_store import TreeStore
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.sparse_checkout_store import SparseCheckoutStore
+from mini_git.types import ObjectType
+
+FILES = {
+    "README.md": b"readme\n",
+    "src/app/main.py": b"main\n",
+    "src/lib/util.py": b"util\n",
+    "src/setup.py": b"setup\n",
+    "vendor/a/a.c": b"a\n",
+    "vendor/b/b.c": b"b\n",
+}
+
+
+def _service(tmp_path: Path) -> tuple[SparseService, ObjectStore]:
+    git_dir = tmp_path / ".git"
+    object_store = ObjectStore(git_dir)
+    index_store = IndexStore(git_dir)
+    entries = []
+    for path, data in FILES.items():
+        oid = object_store.write(ObjectType.BLOB, data)
+        entries.append(IndexEntry(path=Path(path), mode=100644, oid=oid))
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_bytes(data)
+    index_store.write_all(entries)
+    service = SparseService(
+        index_store, TreeStore(object_store), SparseCheckoutStore(git_dir)
+    )
+    return service, object_store
+
+
+def test_sparsify_collapses_directories_outside_cone(tmp_path: Path):
+    """cone外のディレクトリが1エントリに畳まれることをテスト"""
+    service, _ = _service(tmp_path)
+    service.sparse_store.set(["src/app"])
+
+    count = service.sparsify()
+
+    entries = {e.path.as_posix(): e for e in service.index_store.all()}
+    assert count == len(entries) == 5
+    assert entries["vendor"].mode == TREE_MODE
+    assert entries["src/lib"].mode == TREE_MODE
+    assert "src/app/main.py" in entries
+    assert service.index_store.is_sparse()
+
+
+def test_sparsify_preserves_root_tree(tmp_path: Path):
+    """sparse化してもindex全体のtree oidが変わらないことをテスト"""
+    service, _ = _service(tmp_path)
+    before = service.tree_store.write_index_tree(service.index_store.all())
+    service.sparse_store.set(["src/app"])
+
+    service.sparsify()
+
+    after = service.tree_store.write_index_tree(service.index_store.all())
+    assert before == after
+
+
+def test_expand_restores_full_index(tmp_path: Path):
+    """expandで全ファイルのエントリに戻ることをテスト"""
+    service, _ = _service(tmp_path)
+    service.sparse_store.set(["src/app"])
+    service.sparsify()
+
+    service.expand()
+
+    paths = sorted(e.path.as_posix() for e in service.index_store.all())
+    assert paths == sorted(FILES)
+    assert not service.index_store.is_sparse()
+
+
+def test_expand_path_expands_only_containing_directory(tmp_path: Path):
+    """指定パスを含むsparseディレクトリだけが展開されることをテスト"""
+    service, _ = _service(tmp_path)
+    service.sparse_store.set(["src/app"])
+    service.sparsify()
+
+    assert service.expand_path(Path("vendor/a/a.c"))
+
+    paths = {e.path.as_posix() for e in service.index_store.all()}
+    assert "vendor/a/a.c" in paths
+    assert "src/lib" in paths
+
+
+def test_apply_updates_worktree(tmp_path: Path):
+    """applyでcone外のファイルが削除され、cone内のファイルが復元されることをテスト"""
+    service, object_store = _service(tmp_path)
+    (tmp_path / "vendor/b/b.c").write_bytes(b"locally modified\n")
+    service.sparse_store.set(["src/app"])
+
+    written, removed = service.apply(tmp_path, object_store)
+
+    assert (written, removed) == (0, 2)
+    assert not (tmp_path / "vendor/a").exists()
+    assert (tmp_path / "vendor/b/b.c").exists()  # 変更があるので残す
+    assert (tmp_path / "src/app/main.py").exists()
+
+    service.sparse_store.set(["vendor"])
+    written, _ = service.apply(tmp_path, object_store)
+
+    assert written == 1
+    assert (tmp_path / "vendor/a/a.c").read_bytes() == b"a\n"
@@ -0,0 +1,162 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from mini_git.models import IndexEntry
+from mini_git.services.commit_service import CommitService
+from mini_git.services.repo_context import RepoContext
+from mini_git.services.transport_service import (
+    Refspec,
+    TransportService,
+    commit_range,
+    negotiate,
+    parse_refspec,
+)
+from mini_git.types import ObjectType
+
+LARGE = random.Random(0).randbytes(20000)
+
+
+def _commit(
+    repo: RepoContext, files: dict[str, bytes], parent: str | None, when: int
+) -> str:
+    entries = []
+    for path, data in files.items():
+        oid = repo.object_store.write(ObjectType.BLOB, data)
+        entries.append(IndexEntry(path=Path(path), mode=100644, oid=oid))
+    tree = repo.tree_store.write_index_tree(entries)
+    header = f"tree {tree}\n" + (f"parent {parent}\n" if parent else "")
+    sig = f"a <a> {when} +0000"
+    commit = repo.object_store.write(
+        ObjectType.COMMIT, f"{header}author {sig}\ncommitter {sig}\n\nm\n".encode()
+    )
+    repo.ref_store.update("refs/heads/main", commit)
+    return commit
+
+
+@pytest.fixture
+def repos(tmp_path: Path) -> tuple[RepoContext, RepoContext, list[str]]:
+    # src に 2 commit、dst は空のリポジトリ
+    src = RepoContext.open_or_init_repo(tmp_path / "src", default_branch="main")
+    dst = RepoContext.open_or_init_repo(tmp_path / "dst", default_branch="main")
+    first = _commit(src, {"big.bin": LARGE, "d/a.txt": b"a\n"}, None, 1)
+    second = _commit(src, {"big.bin": LARGE + b"x", "d/a.txt": b"a\n"}, first, 2)
+    return src, dst, [first, second]
+
+
+def test_parse_refspec_and_map():
+    """refspecの+と*を解釈し、ref名を対応する名前に写すことをテスト"""
+    spec = parse_refspec("+refs/heads/*:refs/remotes/origin/*")
+    assert spec == Refspec("refs/heads/*", "refs/remotes/origin/*", True)
+    assert spec.map("refs/heads/a/b") == "refs/remotes/origin/a/b"
+    assert spec.map("refs/tags/v1") is None
+    assert parse_refspec("main") == Refspec("main", "", False)
+    assert parse_refspec(":old") == Refspec("", "old", False)
+    with pytest.raises(RuntimeError, match="invalid refspec"):
+        parse_refspec("refs/heads/*:refs/remotes/x")
+
+
+def test_fetch_into_empty_repo_then_one_commit_behind(repos):
+    """1commit遅れのfetchでは新しいobjectだけをthin deltaで送ることをテスト"""
+    src, dst, (first, second) = repos
+    service = TransportService(dst)
+    spec = "+refs/heads/*:refs/remotes/origin/*"
+    # 空のリポジトリには全部を送る
+    result = service.fetch(str(src.worktree), [spec])
+    assert result.updates[0].status == "new"
+    assert result.stats.objects == 8
+    assert dst.ref_store.resolve("refs/remotes/origin/main") == second
+
+    third = _commit(src, {"big.bin": LARGE + b"xy", "d/a.txt": b"a\n"}, second, 3)
+    result = service.fetch(str(src.worktree), [spec])
+
+    assert result.updates[0].status == "fast-forward"
+    # commit・root tree・big.bin の 3 つだけ。big.bin は手元の版への delta
+    assert result.stats.objects == 3
+    assert result.stats.thin_bases >= 1
+    assert result.stats.bytes < len(LARGE) // 10
+    assert dst.object_store.read(third)[0] == "commit"
+    assert dst.ref_store.resolve("refs/remotes/origin/main") == third
+    assert (dst.git_path / "FETCH_HEAD").read_text().startswith(third)
+
+
+def test_fetch_up_to_date_sends_nothing(repos):
+    """相手と同じ状態ならpackを送らないことをテスト"""
+    src, dst, _ = repos
+    service = TransportService(dst)
+    service.fetch(str(src.worktree), ["refs/heads/main:refs/heads/main"])
+
+    result = service.fetch(str(src.worktree), ["refs/heads/main:refs/heads/main"])
+
+    assert result.stats.objects == 0
+    assert result.updates[0].status == "up to date"
+
+
+def test_push_fast_forward_and_reject(repos):
+    """fast-forwardのpushは受け入れ、そうでないものはforceが無ければ断ることをテスト"""
+    src, dst, (first, second) = repos
+    TransportService(dst).fetch(str(src.worktree), ["main:refs/heads/main"])
+    # src は checkout 中のブランチを守るので、別のブランチに push する
+    third = _commit(dst, {"d/a.txt": b"b\n"}, second, 3)
+    service = TransportService(dst)
+
+    result = service.push(str(src.worktree), ["main:refs/heads/topic"])
+    assert result.updates[0].status == "new"
+    assert src.ref_store.resolve("refs/heads/topic") == third
+
+    diverged = _commit(dst, {"d/a.txt": b"c\n"}, first, 4)
+    result = service.push(str(src.worktree), ["main:refs/heads/topic"])
+    assert result.updates[0].status == "rejected"
+    assert result.updates[0].reason == "non-fast-forward"
+    assert src.ref_store.resolve("refs/heads/topic") == third
+
+    result = service.push(str(src.worktree), ["main:refs/heads/topic"], force=True)
+    assert result.updates[0].status == "forced"
+    assert src.ref_store.resolve("refs/heads/topic") == diverged
+
+
+def test_push_refuses_checked_out_branch(repos):
+    """worktree付きの相手でcheckout中のブランチへのpushは断ることをテスト"""
+    src, dst, (_, second) = repos
+    TransportService(dst).fetch(str(src.worktree), ["main:refs/heads/main"])
+    _commit(dst, {"d/a.txt": b"b\n"}, second, 3)
+
+    result = TransportService(dst).push(str(src.worktree))
+
+    assert result.updates[0].status == "rejected"
+    assert src.ref_store.resolve("refs/heads/main") == second
+
+
+def test_negotiate_and_commit_range(repos):
+    """haveのやり取りで共通のcommitを見つけ、その先だけを送る範囲にすることをテスト"""
+    src, dst, (first, second) = repos
+    src.ref_store.update("refs/heads/old", first)
+    TransportService(dst).fetch(str(src.worktree), ["old:refs/heads/old"])
+    dst_commits = CommitService(dst.commit_store, dst.ref_store)
+
+    common, haves = negotiate(dst_commits, src.object_store)
+
+    assert first in common and haves >= 1
+    src_commits = CommitService(src.commit_store, src.ref_store)
+    commits, edges = commit_range(src_commits, [second], common)
+    assert commits == [second]
+    assert edges == {first}
+
+
+def test_commit_range_stops_before_deep_common_history(repos, monkeypatch):
+    """興味のあるcommitが無くなれば共通の履歴の奥までは読まないことをテスト"""
+    src, _, (_, second) = repos
+    chain = [second]
+    for i in range(30):
+        chain.append(_commit(src, {"d/a.txt": f"{i}\n".encode()}, chain[-1], 3 + i))
+    commits = CommitService(src.commit_store, src.ref_store)
+    read: list[str] = []
+    info = commits.info
+    monkeypatch.setattr(commits, "info", lambda oid: read.append(oid) or info(oid))
+
+    result, edges = commit_range(commits, [chain[-1]], {chain[-3]})
+
+    assert result == [chain[-1], chain[-2]]
+    assert edges == {chain[-3]}
+    assert second not in read
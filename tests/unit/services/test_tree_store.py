@@ -0,0 +1,145 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mini_git.models import IndexEntry, TreeEntry, TREE_MODE
+from mini_git.services.tree_store import TreeStore, parse_tree, serialize_tree
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.types import ObjectType
+
+HELLO_OID = "ce013625030ba8dba906f756967f9e9ca394464a"
+# git mktree で求めた期待値
+HELLO_TREE_OID = "aaa96ced2d9a1c8e72c56b253a0e2fe78393feb7"
+NESTED_TREE_OID = "c530075a1a1262e8aaa0db7eb0b4db9d1548d1cd"
+
+
+def test_write_tree_matches_git(tmp_path: Path):
+    """単一階層のtree oidがgitと一致することをテスト"""
+    store = TreeStore(ObjectStore(tmp_path / ".git"))
+
+    oid = store.write_tree([TreeEntry("hello.txt", 100644, HELLO_OID)])
+
+    assert oid == HELLO_TREE_OID
+
+
+def test_tree_entries_use_git_sort_order():
+    """ディレクトリ名が"name/"として並べられることをテスト"""
+    raw = serialize_tree(
+        [
+            TreeEntry("dir", TREE_MODE, HELLO_TREE_OID),
+            TreeEntry("dir.txt", 100644, HELLO_OID),
+            TreeEntry("hello.txt", 100644, HELLO_OID),
+        ]
+    )
+
+    assert [e.name for e in parse_tree(raw)] == ["dir.txt", "dir", "hello.txt"]
+    assert ObjectStore.hash_object(ObjectType.TREE, raw) == NESTED_TREE_OID
+
+
+def test_write_index_tree_builds_nested_trees(tmp_path: Path):
+    """indexエントリから入れ子のtreeを作成できることをテスト"""
+    store = TreeStore(ObjectStore(tmp_path / ".git"))
+    entries = [
+        IndexEntry(path=Path("hello.txt"), mode=100644, oid=HELLO_OID),
+        IndexEntry(path=Path("dir.txt"), mode=100644, oid=HELLO_OID),
+        IndexEntry(path=Path("dir/hello.txt"), mode=100644, oid=HELLO_OID),
+    ]
+
+    assert store.write_index_tree(entries) == NESTED_TREE_OID
+
+    def key(e: IndexEntry) -> str:
+        return e.path.as_posix()
+
+    assert sorted(store.iter_files(NESTED_TREE_OID), key=key) == sorted(
+        entries, key=key
+    )
+
+
+def test_write_index_tree_keeps_sparse_directory_entries(tmp_path: Path):
+    """mode 40000のエントリをsubtreeとしてそのまま使うことをテスト"""
+    store = TreeStore(ObjectStore(tmp_path / ".git"))
+    store.write_tree([TreeEntry("hello.txt", 100644, HELLO_OID)])
+    entries = [
+        IndexEntry(path=Path("hello.txt"), mode=100644, oid=HELLO_OID),
+        IndexEntry(path=Path("dir.txt"), mode=100644, oid=HELLO_OID),
+        IndexEntry(path=Path("dir"), mode=TREE_MODE, oid=HELLO_TREE_OID),
+    ]
+
+    assert store.write_index_tree(entries) == NESTED_TREE_OID
+
+
+def test_read_tree_rejects_non_tree(tmp_path: Path):
+    """tree以外のobjectを読もうとすると例外を発生させることをテスト"""
+    object_store = ObjectStore(tmp_path / ".git")
+    oid = object_store.write(ObjectType.BLOB, b"hello\n")
+
+    with pytest.raises(RuntimeError, match="not a tree"):
+        TreeStore(object_store).read_tree(oid)
+
+
+def test_write_index_reuses_cached_subtrees(tmp_path: Path):
+    """変更のないディレクトリはcache treeを使い、treeを作り直さないことをテスト"""
+    git_dir = tmp_path / ".git"
+    object_store = ObjectStore(git_dir)
+    index_store = IndexStore(git_dir)
+    store = TreeStore(object_store)
+    for path in ("hello.txt", "dir.txt", "dir/hello.txt", "other/a/hello.txt"):
+        index_store.add_or_update(
+            IndexEntry(path=Path(path), mode=100644, oid=HELLO_OID)
+        )
+
+    first = store.write_index(index_store)
+    _, cache_tree = index_store.snapshot()
+    assert set(cache_tree) == {"", "dir", "other", "other/a"}
+
+    index_store.add_or_update(
+        IndexEntry(path=Path("dir/new.txt"), mode=100644, oid=HELLO_OID)
+    )
+    _, cache_tree = index_store.snapshot()
+    assert set(cache_tree) == {"other", "other/a"}
+
+    with patch.object(
+        object_store, "write_many", wraps=object_store.write_many
+    ) as write_many:
+        second = store.write_index(index_store)
+
+    written = write_many.call_args.args[0]
+    assert len(written) == 2  # "dir" とルートだけ
+    assert second != first
+    assert second == store.write_index_tree(index_store.all())
+
+
+def test_write_index_returns_cached_root(tmp_path: Path):
+    """index に変更が無ければ object を書かずにルートの oid を返すことをテスト"""
+    git_dir = tmp_path / ".git"
+    object_store = ObjectStore(git_dir)
+    index_store = IndexStore(git_dir)
+    index_store.add_or_update(
+        IndexEntry(path=Path("dir/hello.txt"), mode=100644, oid=HELLO_OID)
+    )
+    store = TreeStore(object_store)
+    oid = store.write_index(index_store)
+
+    with patch.object(object_store, "write_many") as write_many:
+        assert store.write_index(index_store) == oid
+    write_many.assert_not_called()
+
+
+def test_lookup_path(tmp_path: Path):
+    """パス指定でエントリを探せることをテスト"""
+    store = TreeStore(ObjectStore(tmp_path / ".git"))
+    tree = store.write_index_tree(
+        [
+            IndexEntry(path=Path("a/b/hello.txt"), mode=100644, oid=HELLO_OID),
+            IndexEntry(path=Path("file"), mode=100644, oid=HELLO_OID),
+        ]
+    )
+
+    hello = store.lookup_path(tree, "a/b/hello.txt")
+    assert hello is not None and hello.oid == HELLO_OID
+    directory = store.lookup_path(tree, "a/b")
+    assert directory is not None and directory.is_tree
+    assert store.lookup_path(tree, "file/x") is None
+    assert store.lookup_path(tree, "missing") is None
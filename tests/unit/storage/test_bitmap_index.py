@@ -0,0 +1,39 @@
+import hashlib
+from pathlib import Path
+
+from mini_git.storage.bitmap_index import BitmapIndex, write_bitmap_index
+from mini_git.types import ObjectType
+
+OIDS = [hashlib.sha1(str(i).encode()).hexdigest() for i in range(200)]
+
+
+def test_bitmap_index_round_trip(tmp_path: Path):
+    """object表・type bitmap・commit bitmapを読み戻せることをテスト"""
+    path = tmp_path / "reachability.bitmap"
+    types = {ObjectType.COMMIT: 0b11, ObjectType.BLOB: (1 << 200) - 4}
+    bitmaps = {OIDS[0]: 0b1, OIDS[1]: (1 << 150) - 1}
+
+    assert write_bitmap_index(path, OIDS, types, bitmaps) == 2
+    index = BitmapIndex.open(path)
+
+    assert index is not None and len(index) == 200
+    assert index.position(OIDS[42]) == 42 and index.oid(42) == OIDS[42]
+    assert index.position("0" * 40) is None
+    assert index.types[ObjectType.COMMIT] == 0b11
+    assert index.types[ObjectType.TREE] == 0
+    assert index.bitmap(OIDS[1]) == (1 << 150) - 1
+    assert index.bitmap(OIDS[2]) is None
+    assert sorted(index.commits()) == sorted(bitmaps)
+    assert list(index.iter_oids(0b101 | 1 << 199)) == [OIDS[0], OIDS[2], OIDS[199]]
+    index.close()
+
+
+def test_bitmap_index_has_checksum(tmp_path: Path):
+    """末尾にSHA-1チェックサムが付くことをテスト"""
+    path = tmp_path / "reachability.bitmap"
+    write_bitmap_index(path, OIDS[:3], {}, {})
+    data = path.read_bytes()
+
+    assert data[:4] == b"BITM"
+    assert hashlib.sha1(data[:-20]).digest() == data[-20:]
+    assert BitmapIndex.open(tmp_path / "missing") is None
@@ -0,0 +1,39 @@
+import os
+import time
+from pathlib import Path
+
+from mini_git.storage.blame_cache import BlameCache, BlameHunk
+
+
+def test_blame_cache_round_trip(tmp_path: Path):
+    """(commit, path)ごとに保存した結果がそのまま読み戻せることをテスト"""
+    cache = BlameCache(tmp_path)
+    hunks = [
+        BlameHunk("a" * 40, 0, 0, 3),
+        BlameHunk("b" * 40, 3, 1, 2),
+        BlameHunk("a" * 40, 5, 3, 1),
+    ]
+
+    cache.put("c" * 40, "dir/file.txt", hunks)
+
+    assert cache.get("c" * 40, "dir/file.txt") == hunks
+    assert cache.get("c" * 40, "other.txt") is None
+    assert cache.get("d" * 40, "dir/file.txt") is None
+
+
+def test_blame_cache_prune(tmp_path: Path):
+    """到達できないcommitの結果と長く使われていない結果だけを消すことをテスト"""
+    cache = BlameCache(tmp_path)
+    hunks = [BlameHunk("a" * 40, 0, 0, 1)]
+    for commit in ("a" * 40, "b" * 40):
+        cache.put(commit, "f", hunks)
+        cache.put(commit, "g", hunks)
+    past = time.time() - 30 * 86400
+    os.utime(cache._path("a" * 40, "g"), (past, past))
+
+    removed = cache.prune({"a" * 40}, time.time() - 86400)
+
+    assert removed == 3
+    assert cache.get("a" * 40, "f") == hunks
+    assert cache.get("a" * 40, "g") is None
+    assert not (tmp_path / "blame-cache" / ("b" * 40)).exists()
@@ -0,0 +1,57 @@
+import hashlib
+import random
+from pathlib import Path
+
+from mini_git.storage.chunk_store import ChunkStore
+
+
+def _store(tmp_path: Path) -> ChunkStore:
+    return ChunkStore(tmp_path / "objects", 1024, 4096, 16384)
+
+
+def _oid(raw: bytes) -> str:
+    return hashlib.sha1(f"blob {len(raw)}\0".encode() + raw).hexdigest()
+
+
+def test_write_and_read_roundtrip(tmp_path: Path):
+    """chunk分割して保存した内容を復元できることをテスト"""
+    store = _store(tmp_path)
+    raw = random.Random(0).randbytes(100_000)
+
+    store.write(_oid(raw), raw)
+
+    assert store.has(_oid(raw))
+    assert store.read(_oid(raw)) == raw
+    assert store.size(_oid(raw)) == len(raw)
+
+
+def test_iter_content_streams_chunks(tmp_path: Path):
+    """iter_contentがchunk単位で内容を返すことをテスト"""
+    store = _store(tmp_path)
+    raw = random.Random(1).randbytes(100_000)
+    store.write(_oid(raw), raw)
+
+    pieces = list(store.iter_content(_oid(raw)))
+
+    assert len(pieces) > 1
+    assert all(len(p) <= 16384 for p in pieces)
+    assert b"".join(pieces) == raw
+
+
+def test_identical_chunks_are_deduplicated(tmp_path: Path):
+    """版をまたいで同一のchunkが再利用されることをテスト"""
+    store = _store(tmp_path)
+    v1 = random.Random(2).randbytes(100_000)
+    v2 = v1[:50_000] + b"patched" + v1[50_000:]
+
+    first = store.write(_oid(v1), v1)
+    second = store.write(_oid(v2), v2)
+
+    assert second < first
+    assert len(set(store.chunk_ids(_oid(v1))) & set(store.chunk_ids(_oid(v2)))) > 0
+    assert store.read(_oid(v2)) == v2
+
+
+def test_has_returns_false_for_unknown_oid(tmp_path: Path):
+    """manifestが無いoidに対してhasがFalseを返すことをテスト"""
+    assert not _store(tmp_path).has("0" * 40)
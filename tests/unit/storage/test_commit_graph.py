@@ -0,0 +1,97 @@
+import hashlib
+from pathlib import Path
+
+from mini_git.storage.commit_graph import CommitGraph, GraphCommit, write_commit_graph
+from mini_git.utils.bloom import BloomSettings
+
+TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+
+def _oid(name: str) -> str:
+    return hashlib.sha1(name.encode()).hexdigest()
+
+
+def _history() -> list[GraphCommit]:
+    # base ← x, y, z ← octopus merge
+    base, x, y, z, merge = (_oid(n) for n in ("base", "x", "y", "z", "merge"))
+    return [
+        GraphCommit(base, TREE, (), 100),
+        GraphCommit(x, TREE, (base,), 200),
+        GraphCommit(y, TREE, (base,), 300),
+        GraphCommit(z, TREE, (base,), 400),
+        GraphCommit(merge, TREE, (x, y, z), 2**33 + 5),
+    ]
+
+
+def test_commit_graph_round_trip(tmp_path: Path):
+    """書き込んだ親・tree・日時・generationを読み戻せることをテスト"""
+    path = tmp_path / "commit-graph"
+    commits = _history()
+
+    assert write_commit_graph(path, commits) == 5
+    graph = CommitGraph.open(path)
+    assert graph is not None
+    assert graph is not None and len(graph) == 5
+
+    gens = {"base": 1, "x": 2, "y": 2, "z": 2, "merge": 3}
+    for c in commits:
+        pos = graph.lookup(c.oid)
+        assert pos is not None and graph.oid(pos) == c.oid
+        assert graph.tree(pos) == TREE
+        assert tuple(graph.oid(p) for p in graph.parents(pos)) == c.parents
+        assert graph.commit_time(pos) == c.commit_time
+    positions = {n: graph.lookup(_oid(n)) for n in gens}
+    generations = {
+        n: graph.generation(pos) for n, pos in positions.items() if pos is not None
+    }
+    assert generations == gens
+    assert b"EDGE" in graph.chunks
+    graph.close()
+
+
+def test_commit_graph_file_has_valid_checksum(tmp_path: Path):
+    """末尾にSHA-1チェックサムが付くことをテスト"""
+    path = tmp_path / "commit-graph"
+    write_commit_graph(path, _history())
+    data = path.read_bytes()
+
+    assert data[:4] == b"CGPH"
+    assert hashlib.sha1(data[:-20]).digest() == data[-20:]
+
+
+def test_lookup_missing_commit(tmp_path: Path):
+    """graphに無いcommitはNoneになることをテスト"""
+    path = tmp_path / "commit-graph"
+    write_commit_graph(path, _history())
+    graph = CommitGraph.open(path)
+    assert graph is not None
+
+    assert graph.lookup(_oid("missing")) is None
+    assert CommitGraph.open(tmp_path / "nothing") is None
+
+
+def test_bloom_filters_round_trip(tmp_path: Path):
+    """BIDX/BDAT chunkに書いたfilterを読み戻せることをテスト"""
+    path = tmp_path / "commit-graph"
+    commits = _history()
+    filters = {c.oid: bytes([i]) * (i + 1) for i, c in enumerate(commits)}
+
+    write_commit_graph(path, commits, filters, BloomSettings(2, 7, 10))
+    graph = CommitGraph.open(path)
+    assert graph is not None
+
+    assert graph.bloom_settings == BloomSettings(2, 7, 10)
+    for c in commits:
+        pos = graph.lookup(c.oid)
+        assert pos is not None and graph.bloom_filter(pos) == filters[c.oid]
+
+
+def test_graph_without_bloom_chunks(tmp_path: Path):
+    """Bloom chunkが無いgraphではfilterがNoneになることをテスト"""
+    path = tmp_path / "commit-graph"
+    write_commit_graph(path, _history())
+    graph = CommitGraph.open(path)
+    assert graph is not None
+
+    assert graph.bloom_settings is None
+    assert graph.bloom_filter(0) is None
@@ -0,0 +1,74 @@
+import random
+import zlib
+from pathlib import Path
+
+import pytest
+
+from mini_git.storage.compression import CompressionPolicy, looks_compressed
+from mini_git.storage.config_store import ConfigStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.types import ObjectType
+
+PNG = b"\x89PNG\r\n\x1a\n" + random.Random(0).randbytes(4000)
+
+
+def _config(tmp_path: Path, text: str) -> ConfigStore:
+    git_dir = tmp_path / ".git"
+    git_dir.mkdir()
+    (git_dir / "config").write_text(text)
+    return ConfigStore(git_dir)
+
+
+def test_policy_levels_follow_git_config(tmp_path: Path):
+    """core.compressionがlooseとpackの既定になり、個別の設定が優先されることをテスト"""
+    assert CompressionPolicy.from_config(None).loose_level == 1
+    config = _config(tmp_path, "[core]\n\tcompression = 4\n[pack]\n\tcompression = 9\n")
+
+    policy = CompressionPolicy.from_config(config)
+
+    assert (policy.loose_level, policy.pack_level) == (4, 9)
+    assert policy.level("blob", b"text") == 4
+    assert policy.level("blob", b"text", packed=True) == 9
+
+
+def test_rules_match_type_size_and_content(tmp_path: Path):
+    """規則が上から順にtype、サイズ、圧縮済みの内容で当てはまることをテスト"""
+    config = _config(
+        tmp_path,
+        '[compression "media"]\n\ttype = blob\n\tcontent = compressed\n\tlevel = 0\n'
+        '[compression "huge"]\n\tminSize = 1k\n\tlevel = 9\n',
+    )
+
+    policy = CompressionPolicy.from_config(config)
+
+    assert [r.name for r in policy.rules] == ["media", "huge"]
+    assert looks_compressed(PNG)
+    assert policy.level("blob", PNG, packed=True) == 0
+    assert policy.level("tree", PNG) == 9
+    assert policy.level("blob", b"x" * 2048) == 9
+    assert policy.level("blob", b"small") == 1
+
+
+def test_bad_level_is_rejected(tmp_path: Path):
+    """範囲外のlevelを設定するとエラーにすることをテスト"""
+    config = _config(tmp_path, "[core]\n\tlooseCompression = 12\n")
+
+    with pytest.raises(RuntimeError, match="bad zlib compression level 12"):
+        CompressionPolicy.from_config(config)
+
+
+def test_object_store_stores_media_uncompressed(tmp_path: Path):
+    """level 0の規則に当たるblobを無圧縮のzlibで書き、読み戻せることをテスト"""
+    config = _config(
+        tmp_path, '[compression "media"]\n\tcontent = compressed\n\tlevel = 0\n'
+    )
+    store = ObjectStore(
+        tmp_path / ".git", compression=CompressionPolicy.from_config(config)
+    )
+
+    oid = store.write(ObjectType.BLOB, PNG)
+
+    stored = (store.object_dir / oid[:2] / oid[2:]).read_bytes()
+    assert PNG in stored
+    assert zlib.decompress(stored).endswith(PNG)
+    assert store.read(oid) == ("blob", PNG)
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import pytest
+
+from mini_git.storage.config_store import ConfigStore
+
+GIT_CONFIG = """\
+[core]
+\trepositoryformatversion = 0
+\tfilemode = true
+\tbare = false
+\tCompression = 5 ; comment
+[mgit]
+\tlargeObjectThreshold = 4m
+[remote "origin"]
+\turl = "/srv/repo # not a comment"
+"""
+
+
+def _store(tmp_path: Path, text: str = GIT_CONFIG) -> ConfigStore:
+    git_dir = tmp_path / ".git"
+    git_dir.mkdir()
+    (git_dir / "config").write_text(text)
+    return ConfigStore(git_dir)
+
+
+def test_get_reads_git_style_config(tmp_path: Path):
+    """git形式のconfigから値を読めることをテスト"""
+    store = _store(tmp_path)
+
+    assert store.get("core.repositoryformatversion") == "0"
+    assert store.get("core.compression") == "5"
+    assert store.get("remote.origin.url") == "/srv/repo # not a comment"
+
+
+def test_keys_are_case_insensitive(tmp_path: Path):
+    """sectionと変数名が大文字小文字を区別しないことをテスト"""
+    store = _store(tmp_path)
+
+    assert store.get("CORE.Compression") == "5"
+    assert store.get_int("mgit.largeobjectthreshold") == 4 * 1024 * 1024
+
+
+def test_get_bool_and_defaults(tmp_path: Path):
+    """真偽値の解釈とデフォルト値をテスト"""
+    store = _store(tmp_path)
+
+    assert store.get_bool("core.filemode") is True
+    assert store.get_bool("core.bare") is False
+    assert store.get_bool("core.missing", default=True) is True
+    assert store.get_int("core.missing") is None
+
+
+def test_missing_config_file_is_empty(tmp_path: Path):
+    """configファイルが無い場合は空として扱うことをテスト"""
+    store = ConfigStore(tmp_path / ".git")
+
+    assert store.get("core.compression") is None
+
+
+def test_bad_bool_raises(tmp_path: Path):
+    """不正な真偽値で例外を発生させることをテスト"""
+    store = _store(tmp_path, "[core]\n\tbare = maybe\n")
+
+    with pytest.raises(ValueError):
+        store.get_bool("core.bare")
+
+
+def test_set_updates_existing_and_adds_new_keys(tmp_path: Path):
+    """setで既存キーの更新と新規section/キーの追加ができることをテスト"""
+    store = _store(tmp_path)
+
+    store.set("core.compression", "9")
+    store.set("core.autocrlf", "false")
+    store.set("remote.upstream.url", "/srv/other")
+
+    reloaded = ConfigStore(tmp_path / ".git")
+    assert reloaded.get("core.compression") == "9"
+    assert reloaded.get("core.autocrlf") == "false"
+    assert reloaded.get("core.bare") == "false"
+    assert reloaded.get("remote.origin.url") == "/srv/repo # not a comment"
+    assert reloaded.get("remote.upstream.url") == "/srv/other"
+    assert '[remote "upstream"]' in store.config_path.read_text()
@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 from mini_git.storage.index_store import IndexStore
 from mini_git.models import IndexEntry
@@ -144,3 +145,42 @@ def test_atomic_updates(tmp_path: Path):
 
     # インデックスファイルが存在することを確認
     assert store.index_path.exists()
+
+
+def test_sparse_directory_entry_roundtrip(tmp_path: Path):
+    """sparseディレクトリエントリが末尾"/"付きで保存されることをテスト"""
+    store = IndexStore(tmp_path / ".git")
+    file_entry = IndexEntry(path=Path("a.txt"), mode=100644, oid="abc123")
+    dir_entry = IndexEntry(path=Path("vendor"), mode=40000, oid="def456")
+
+    store.write_all([file_entry, dir_entry])
+
+    assert store.is_sparse()
+    assert "vendor/" in store._load()
+    assert sorted(store.all(), key=lambda e: str(e.path)) == [file_entry, dir_entry]
+
+
+def test_add_or_update_invalidates_ancestor_cache_tree(tmp_path: Path):
+    """エントリの変更で祖先ディレクトリのcache treeだけが破棄されることをテスト"""
+    store = IndexStore(tmp_path / ".git")
+    store.write_all(
+        [IndexEntry(path=Path("a/b/c.txt"), mode=100644, oid="abc123")],
+        {"": "r", "a": "1", "a/b": "2", "x": "3"},
+    )
+
+    store.add_or_update(IndexEntry(path=Path("a/d.txt"), mode=100644, oid="def456"))
+
+    assert store.snapshot()[1] == {"a/b": "2", "x": "3"}
+
+
+def test_reads_legacy_flat_index(tmp_path: Path):
+    """versionを持たない旧形式のindexも読めることをテスト"""
+    store = IndexStore(tmp_path / ".git")
+    store.index_path.write_text(
+        json.dumps({"test.txt": {"mode": 100644, "oid": "abc123"}}), encoding="utf-8"
+    )
+
+    assert list(store.all()) == [
+        IndexEntry(path=Path("test.txt"), mode=100644, oid="abc123")
+    ]
+    assert store.snapshot()[1] == {}
@@ -0,0 +1,90 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from mini_git.storage.midx import (
+    MIDX_NAME,
+    MultiPackIndex,
+    merge_entries,
+    pack_entries,
+    write_midx,
+)
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.pack import PackFile, PackWriter
+from mini_git.types import ObjectType
+
+
+def _pack(pack_dir: Path, blobs: list[bytes]) -> PackFile:
+    writer = PackWriter(pack_dir, len(blobs))
+    for raw in blobs:
+        writer.add(ObjectStore.hash_object(ObjectType.BLOB, raw), "blob", raw)
+    return PackFile(writer.finish().with_suffix(".idx"))
+
+
+def _write(pack_dir: Path) -> tuple[PackFile, PackFile]:
+    # "shared" は両方の pack に入っている
+    old = _pack(pack_dir, [b"a\n", b"b\n", b"shared\n"])
+    new = _pack(pack_dir, [b"c\n", b"shared\n"])
+    names = [old.idx_path.name, new.idx_path.name]
+    entries = merge_entries([pack_entries(new), pack_entries(old)])
+    assert write_midx(pack_dir / MIDX_NAME, names, entries) == 4
+    return old, new
+
+
+def test_midx_round_trip_prefers_first_source(tmp_path: Path):
+    """multi-pack-indexから各objectのpackとoffsetを引け、重複は先の列を採ることをテスト"""
+    old, new = _write(tmp_path)
+    midx = MultiPackIndex.open(tmp_path)
+
+    assert midx is not None
+    assert midx.pack_names == sorted([old.idx_path.name, new.idx_path.name])
+    for pack, raw in [(old, b"a\n"), (new, b"c\n"), (new, b"shared\n")]:
+        oid = ObjectStore.hash_object(ObjectType.BLOB, raw)
+        i = pack.position(oid)
+        assert i is not None
+        assert midx.lookup(oid) == (pack.idx_path.name, pack.offset(i))
+    assert midx.lookup("0" * 40) is None
+    assert [e[0] for e in midx.iter_entries()] == sorted(
+        e[0] for e in midx.iter_entries()
+    )
+    midx.close()
+
+
+def test_object_store_reads_through_midx(tmp_path: Path):
+    """ObjectStoreがmulti-pack-index経由でpack内のobjectを読めることをテスト"""
+    store = ObjectStore(tmp_path / ".git")
+    _write(store.pack_dir)
+    oid = ObjectStore.hash_object(ObjectType.BLOB, b"shared\n")
+
+    assert store.midx is not None
+    assert store.read(oid) == ("blob", b"shared\n")
+    assert store.stat(oid) == ("blob", 7)
+
+
+def test_midx_ignored_when_pack_is_missing(tmp_path: Path):
+    """載っているpackが欠けたmulti-pack-indexは使わないことをテスト"""
+    store = ObjectStore(tmp_path / ".git")
+    old, _ = _write(store.pack_dir)
+    old.close()
+    old.idx_path.unlink()
+    old.pack_path.unlink()
+
+    assert store.midx is None
+    assert store.read(ObjectStore.hash_object(ObjectType.BLOB, b"c\n"))[1] == b"c\n"
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_midx_is_valid_for_git(tmp_path: Path):
+    """書いたmulti-pack-indexをgit multi-pack-index verifyが受け付けることをテスト"""
+    object_dir = tmp_path / "objects"
+    _write(object_dir / "pack")
+
+    result = subprocess.run(
+        ["git", "multi-pack-index", "--object-dir", str(object_dir), "verify"],
+        capture_output=True,
+        check=False,
+    )
+
+    assert result.returncode == 0, result.stderr
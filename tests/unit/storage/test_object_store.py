@@ -56,3 +56,113 @@ def test_read_missing_object_raises(tmp_path: Path):
     store = ObjectStore(tmp_path / ".git")
     with pytest.raises(FileNotFoundError):
         store.read("0" * 40)
+
+
+def test_stat_reads_only_header(tmp_path: Path):
+    """statがヘッダからサイズを返すことをテスト"""
+    store = ObjectStore(tmp_path / ".git")
+    oid = store.write(ObjectType.BLOB, b"x" * 200_000)
+
+    assert store.stat(oid) == ("blob", 200_000)
+
+
+def test_iter_content_streams_loose_object(tmp_path: Path):
+    """iter_contentがloose objectの本体を返すことをテスト"""
+    store = ObjectStore(tmp_path / ".git")
+    raw = bytes(range(256)) * 1000
+    oid = store.write(ObjectType.BLOB, raw)
+
+    assert b"".join(store.iter_content(oid)) == raw
+
+
+def test_large_object_mode_keeps_blob_oid(tmp_path: Path):
+    """large-object modeでもblobのoidが変わらないことをテスト"""
+    raw = bytes(range(256)) * 2000
+    plain = ObjectStore(tmp_path / "a" / ".git")
+    chunked = ObjectStore(tmp_path / "b" / ".git", large_object_threshold=1024)
+
+    oid = chunked.write(ObjectType.BLOB, raw)
+
+    assert oid == plain.write(ObjectType.BLOB, raw)
+    assert not (chunked.object_dir / oid[:2] / oid[2:]).exists()
+    assert chunked.read(oid) == ("blob", raw)
+    assert chunked.stat(oid) == ("blob", len(raw))
+    assert b"".join(chunked.iter_content(oid)) == raw
+
+
+def test_large_object_mode_ignores_small_blobs(tmp_path: Path):
+    """閾値未満のblobは通常のloose objectとして保存されることをテスト"""
+    store = ObjectStore(tmp_path / ".git", large_object_threshold=1024)
+
+    oid = store.write(ObjectType.BLOB, BLOB_RAW)
+
+    assert (store.object_dir / oid[:2] / oid[2:]).read_bytes() == BLOB_COMPRESSED_L1
+
+
+def _store_with_alternate(tmp_path: Path) -> tuple[ObjectStore, ObjectStore]:
+    shared = ObjectStore(tmp_path / "shared" / ".git")
+    shared.object_dir.mkdir(parents=True)
+    local_git = tmp_path / "local" / ".git"
+    info = local_git / "objects" / "info"
+    info.mkdir(parents=True)
+    (info / "alternates").write_text("# shared store\n../../../shared/.git/objects\n")
+    return ObjectStore.with_alternates(local_git), shared
+
+
+def test_alternates_are_read_relative_to_objects_dir(tmp_path: Path):
+    """alternatesの相対パスがobjectsディレクトリ基準で解決されることをテスト"""
+    local, shared = _store_with_alternate(tmp_path)
+
+    assert [alt.object_dir for alt in local.alternates] == [shared.object_dir.resolve()]
+
+
+def test_read_falls_through_to_alternates(tmp_path: Path):
+    """ローカルに無いobjectをalternatesから読めることをテスト"""
+    local, shared = _store_with_alternate(tmp_path)
+    oid = shared.write(ObjectType.BLOB, BLOB_RAW)
+
+    assert local.exists(oid)
+    assert local.read(oid) == ("blob", BLOB_RAW)
+    assert local.stat(oid) == ("blob", len(BLOB_RAW))
+    assert b"".join(local.iter_content(oid)) == BLOB_RAW
+    assert local.iter_prefix(oid[:6]) == [oid]
+
+
+def test_write_skips_objects_in_alternates(tmp_path: Path):
+    """alternatesにあるobjectはローカルに書かないことをテスト"""
+    local, shared = _store_with_alternate(tmp_path)
+    oid = shared.write(ObjectType.BLOB, BLOB_RAW)
+
+    assert local.write(ObjectType.BLOB, BLOB_RAW) == oid
+    assert not (local.object_dir / oid[:2] / oid[2:]).exists()
+
+    new_oid = local.write(ObjectType.BLOB, b"only local\n")
+    assert (local.object_dir / new_oid[:2] / new_oid[2:]).exists()
+    assert not shared.exists(new_oid)
+
+
+def test_alternate_cycles_are_ignored(tmp_path: Path):
+    """循環するalternatesでも無限ループしないことをテスト"""
+    a = tmp_path / "a" / ".git" / "objects"
+    b = tmp_path / "b" / ".git" / "objects"
+    for here, there in ((a, b), (b, a)):
+        (here / "info").mkdir(parents=True)
+        (here / "info" / "alternates").write_text(f"{there}\n")
+
+    store = ObjectStore.with_alternates(tmp_path / "a" / ".git")
+
+    assert [alt.object_dir for alt in store.alternates] == [b.resolve()]
+
+
+def test_write_many_matches_write(tmp_path: Path):
+    """write_manyがwriteと同じoidで複数objectを書き込むことをテスト"""
+    store = ObjectStore(tmp_path / ".git")
+    existing = store.write(ObjectType.BLOB, BLOB_RAW)
+
+    oids = store.write_many(
+        [(ObjectType.BLOB, BLOB_RAW), (ObjectType.BLOB, b"other\n")]
+    )
+
+    assert oids[0] == existing == BLOB_OID
+    assert oids[1] == ObjectStore.hash_object(ObjectType.BLOB, b"other\n")
+    assert store.read(oids[1]) == ("blob", b"other\n")
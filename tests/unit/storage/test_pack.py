@@ -0,0 +1,163 @@
+import io
+import random
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from mini_git.storage import object_store
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.pack import PackFile, PackStreamWriter, PackWriter, index_pack
+from mini_git.types import ObjectType
+from mini_git.utils.delta import create_delta
+
+
+def _objects() -> list[tuple[str, bytes]]:
+    rnd = random.Random(0)
+    base = rnd.randbytes(5000)
+    return [
+        ("blob", base),
+        ("blob", base[:2000] + b"changed" + base[2000:]),
+        ("blob", b"small\n"),
+        ("tree", b""),
+    ]
+
+
+def _delta(base: bytes, target: bytes) -> bytes:
+    delta = create_delta(base, target)
+    assert delta is not None
+    return delta
+
+
+def _write(pack_dir: Path) -> tuple[Path, list[str]]:
+    objects = _objects()
+    oids = [ObjectStore.hash_object(ObjectType(t), raw) for t, raw in objects]
+    writer = PackWriter(pack_dir, len(objects))
+    writer.add(oids[0], "blob", objects[0][1])
+    writer.add_delta(oids[1], oids[0], _delta(objects[0][1], objects[1][1]))
+    writer.add(oids[2], "blob", objects[2][1])
+    writer.add(oids[3], "tree", objects[3][1])
+    return writer.finish(), oids
+
+
+def test_pack_round_trip_with_delta(tmp_path: Path):
+    """書いたpackからdeltaを含むobjectを読み戻せることをテスト"""
+    pack_path, oids = _write(tmp_path / "pack")
+    pack = PackFile(pack_path.with_suffix(".idx"))
+
+    for oid, (typ, raw) in zip(oids, _objects()):
+        assert pack.read(oid) == (typ, raw)
+        assert pack.stat(oid) == (typ, len(raw))
+    assert sorted(pack.iter_oids()) == sorted(oids)
+    assert list(pack.iter_prefix(oids[2][:6])) == [oids[2]]
+    assert pack.read("0" * 40) is None
+    pack.close()
+
+
+def test_object_store_reads_packed_objects(tmp_path: Path):
+    """ObjectStoreがloose objectの無いpack内のobjectを読めることをテスト"""
+    git_dir = tmp_path / ".git"
+    store = ObjectStore(git_dir)
+    _, oids = _write(store.pack_dir)
+
+    assert store.exists(oids[1])
+    assert store.read(oids[1])[1] == _objects()[1][1]
+    assert store.stat(oids[1]) == ("blob", len(_objects()[1][1]))
+    assert b"".join(store.iter_content(oids[2])) == b"small\n"
+    assert store.iter_prefix(oids[0][:5]) == [oids[0]]
+
+
+def test_object_store_streams_packed_blobs(tmp_path: Path, monkeypatch):
+    """packにあるdeltaでないblobをiter_contentが複数の断片で返すことをテスト"""
+    monkeypatch.setattr(object_store, "STREAM_BLOCK_SIZE", 1000)
+    store = ObjectStore(tmp_path / ".git")
+    _, oids = _write(store.pack_dir)
+
+    pieces = list(store.iter_content(oids[0]))
+
+    assert len(pieces) > 1 and max(len(p) for p in pieces) <= 1000
+    assert b"".join(pieces) == _objects()[0][1]
+
+
+def test_iter_at_streams_non_delta_entries(tmp_path: Path):
+    """deltaでないentryはブロックごとに伸長し、deltaは全体を返すことをテスト"""
+    pack_path, oids = _write(tmp_path / "pack")
+    pack = PackFile(pack_path.with_suffix(".idx"))
+    base, changed = _objects()[0][1], _objects()[1][1]
+
+    (i,) = [i for i in range(pack.count) if pack.oid(i) == oids[0]]
+    pieces = list(pack.iter_at(pack.offset(i), 1024))
+    assert len(pieces) == 5 and all(len(p) <= 1024 for p in pieces)
+    assert b"".join(pieces) == base
+    (i,) = [i for i in range(pack.count) if pack.oid(i) == oids[1]]
+    assert list(pack.iter_at(pack.offset(i), 1024)) == [changed]
+    pack.close()
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_pack_is_valid_for_git(tmp_path: Path):
+    """書いたpackとidxをgit verify-packが受け付けることをテスト"""
+    pack_path, _ = _write(tmp_path / "pack")
+
+    result = subprocess.run(
+        ["git", "verify-pack", str(pack_path.with_suffix(".idx"))],
+        capture_output=True,
+        check=False,
+    )
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_index_pack_from_stream(tmp_path: Path):
+    """ストリームで受け取ったpackからidxを作り、deltaを解いて読めることをテスト"""
+    objects = _objects()
+    oids = [ObjectStore.hash_object(ObjectType(t), raw) for t, raw in objects]
+    out = io.BytesIO()
+    writer = PackStreamWriter(out, 2)
+    writer.add(oids[0], "blob", objects[0][1])
+    writer.add_delta(oids[1], oids[0], _delta(objects[0][1], objects[1][1]))
+    writer.write_checksum()
+
+    result = index_pack(io.BytesIO(out.getvalue()), tmp_path, lambda oid: None)
+
+    assert (result.objects, result.deltas, result.thin_bases) == (2, 1, 0)
+    assert result.received == len(out.getvalue())
+    pack = PackFile(result.pack_path.with_suffix(".idx"))
+    assert pack.read(oids[1]) == ("blob", objects[1][1])
+    pack.close()
+
+
+def test_index_pack_fixes_thin_pack(tmp_path: Path):
+    """pack外のbaseを参照するdeltaはbaseを末尾に足して自己完結させることをテスト"""
+    objects = _objects()
+    oids = [ObjectStore.hash_object(ObjectType(t), raw) for t, raw in objects]
+    out = io.BytesIO()
+    writer = PackStreamWriter(out, 1)
+    delta = _delta(objects[0][1], objects[1][1])
+    writer.add_ref_delta(oids[1], oids[0], delta)
+    writer.write_checksum()
+    external = {oids[0]: ("blob", objects[0][1])}
+
+    result = index_pack(io.BytesIO(out.getvalue()), tmp_path, external.get)
+
+    assert (result.objects, result.thin_bases) == (2, 1)
+    external.clear()
+    pack = PackFile(result.pack_path.with_suffix(".idx"))
+    assert pack.read(oids[1]) == ("blob", objects[1][1])
+    assert pack.read(oids[0]) == ("blob", objects[0][1])
+    pack.close()
+
+
+def test_index_pack_rejects_missing_base(tmp_path: Path):
+    """手元にもbaseが無いthin packはRuntimeErrorにし、一時ファイルを残さないことをテスト"""
+    objects = _objects()
+    oids = [ObjectStore.hash_object(ObjectType(t), raw) for t, raw in objects]
+    out = io.BytesIO()
+    writer = PackStreamWriter(out, 1)
+    writer.add_ref_delta(oids[1], oids[0], _delta(objects[0][1], objects[1][1]))
+    writer.write_checksum()
+
+    with pytest.raises(RuntimeError):
+        index_pack(io.BytesIO(out.getvalue()), tmp_path, lambda oid: None)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+from mini_git.storage.packed_refs import PackedRefs, serialize_packed_refs
+
+OID_A = "a" * 40
+OID_B = "b" * 40
+
+
+def _write(tmp_path: Path, content: bytes) -> PackedRefs:
+    path = tmp_path / "packed-refs"
+    path.write_bytes(content)
+    return PackedRefs.open(path)
+
+
+def test_get_uses_sorted_records(tmp_path: Path):
+    """ソート済みのpacked-refsから二分探索でrefを引けることをテスト"""
+    refs = [(f"refs/tags/v{i:04d}", OID_A) for i in range(500)]
+    packed = _write(
+        tmp_path, serialize_packed_refs(refs + [("refs/heads/main", OID_B)])
+    )
+
+    assert packed.get("refs/heads/main") == OID_B
+    assert packed.get("refs/tags/v0000") == OID_A
+    assert packed.get("refs/tags/v0499") == OID_A
+    assert packed.get("refs/tags/v0500") is None
+    assert packed.get("refs/a") is None
+    assert packed.get("refs/zzz") is None
+
+
+def test_peeled_lines_belong_to_previous_record(tmp_path: Path):
+    """ "^"で始まるpeel行を読み飛ばすことをテスト"""
+    packed = _write(
+        tmp_path,
+        b"# pack-refs with: peeled fully-peeled sorted \n"
+        + f"{OID_A} refs/tags/a\n^{OID_B}\n{OID_B} refs/tags/b\n^{OID_A}\n".encode()
+        + f"{OID_A} refs/tags/c\n".encode(),
+    )
+
+    assert [packed.get(f"refs/tags/{n}") for n in "abc"] == [OID_A, OID_B, OID_A]
+    assert list(packed.iter_prefix("refs/tags/b")) == [("refs/tags/b", OID_B)]
+
+
+def test_iter_prefix_returns_only_matching_range(tmp_path: Path):
+    """prefixに一致する範囲だけを列挙することをテスト"""
+    packed = _write(
+        tmp_path,
+        serialize_packed_refs(
+            [
+                ("refs/heads/main", OID_A),
+                ("refs/tags/v1", OID_A),
+                ("refs/tags/v2", OID_B),
+                ("refs/tagsx", OID_B),
+            ]
+        ),
+    )
+
+    assert list(packed.iter_prefix("refs/tags/")) == [
+        ("refs/tags/v1", OID_A),
+        ("refs/tags/v2", OID_B),
+    ]
+
+
+def test_unsorted_file_is_sorted_on_load(tmp_path: Path):
+    """sorted traitの無いファイルは並べ直して読むことをテスト"""
+    packed = _write(
+        tmp_path, f"{OID_B} refs/tags/z\n{OID_A} refs/heads/main\n".encode()
+    )
+
+    assert packed.get("refs/heads/main") == OID_A
+    assert list(packed.iter_prefix()) == [
+        ("refs/heads/main", OID_A),
+        ("refs/tags/z", OID_B),
+    ]
+
+
+def test_missing_file_is_empty(tmp_path: Path):
+    """packed-refsが無い場合は空として扱うことをテスト"""
+    packed = PackedRefs.open(tmp_path / "packed-refs")
+
+    assert packed.get("refs/heads/main") is None
+    assert list(packed.iter_prefix()) == []
@@ -0,0 +1,172 @@
+from pathlib import Path
+
+import pytest
+
+from mini_git.storage.ref_store import RefStore
+
+OID = "ce013625030ba8dba906f756967f9e9ca394464a"
+
+
+def test_update_and_resolve_branch(tmp_path: Path):
+    """ブランチを書き込み、HEAD経由で解決できることをテスト"""
+    store = RefStore(tmp_path / ".git")
+    store.set_symbolic("HEAD", "refs/heads/main")
+    store.update("refs/heads/main", OID)
+
+    assert store.symbolic_target("HEAD") == "refs/heads/main"
+    assert store.resolve("HEAD") == OID
+    assert (tmp_path / ".git" / "refs" / "heads" / "main").read_text() == OID + "\n"
+
+
+def test_resolve_unborn_branch_returns_none(tmp_path: Path):
+    """未作成のブランチを指すHEADがNoneに解決されることをテスト"""
+    store = RefStore(tmp_path / ".git")
+    store.set_symbolic("HEAD", "refs/heads/main")
+
+    assert store.resolve("HEAD") is None
+    assert store.resolve("refs/heads/missing") is None
+
+
+def test_dwim_prefers_tags_over_branches(tmp_path: Path):
+    """短縮名がgitと同じ優先順位で解決されることをテスト"""
+    store = RefStore(tmp_path / ".git")
+    store.update("refs/heads/v1", OID)
+    store.update("refs/tags/v1", OID)
+    store.update("refs/heads/dev", OID)
+
+    assert store.dwim("v1") == "refs/tags/v1"
+    assert store.dwim("dev") == "refs/heads/dev"
+    assert store.dwim("nope") is None
+
+
+def test_update_fails_when_locked(tmp_path: Path):
+    """lockファイルがある場合に更新が失敗することをテスト"""
+    store = RefStore(tmp_path / ".git")
+    lock = tmp_path / ".git" / "refs" / "heads" / "main.lock"
+    lock.parent.mkdir(parents=True)
+    lock.write_text("")
+
+    with pytest.raises(RuntimeError, match="Unable to lock"):
+        store.update("refs/heads/main", OID)
+
+
+OTHER = "a" * 40
+
+
+def test_pack_refs_moves_tags_and_prunes_loose(tmp_path: Path):
+    """pack-refsがtagを詰めてloose refを消すことをテスト"""
+    git_dir = tmp_path / ".git"
+    store = RefStore(git_dir)
+    store.update("refs/heads/main", OID)
+    store.update("refs/tags/v1", OID)
+    store.update("refs/tags/nested/v2", OTHER)
+
+    assert store.pack_refs() == 2
+
+    assert not (git_dir / "refs" / "tags").exists()
+    assert (git_dir / "refs" / "heads" / "main").is_file()
+    assert store.resolve("refs/tags/nested/v2") == OTHER
+    assert store.iter_refs("refs/tags/") == [
+        ("refs/tags/nested/v2", OTHER),
+        ("refs/tags/v1", OID),
+    ]
+    assert store.pack_refs(all_refs=True) == 1
+    assert store.dwim("main") == "refs/heads/main"
+
+
+def test_loose_ref_overrides_packed(tmp_path: Path):
+    """packed-refsより新しいloose refが優先されることをテスト"""
+    store = RefStore(tmp_path / ".git")
+    store.update("refs/heads/main", OID)
+    store.pack_refs(all_refs=True)
+
+    store.update("refs/heads/main", OTHER)
+
+    assert store.resolve("refs/heads/main") == OTHER
+    assert store.iter_refs() == [("refs/heads/main", OTHER)]
+
+
+def test_transaction_updates_all_refs(tmp_path: Path):
+    """トランザクションで複数のrefを更新・削除できることをテスト"""
+    store = RefStore(tmp_path / ".git")
+    store.update("refs/tags/old", OID)
+    store.pack_refs()
+
+    with store.transaction() as tx:
+        tx.update("refs/heads/a", OID)
+        tx.update("refs/heads/b", OTHER, old_oid=None)
+        tx.delete("refs/tags/old", old_oid=OID)
+
+    assert store.iter_refs() == [("refs/heads/a", OID), ("refs/heads/b", OTHER)]
+    assert list(store.packed_refs().iter_prefix()) == []
+    assert not list((tmp_path / ".git" / "refs").rglob("*.lock"))
+
+
+def test_transaction_is_all_or_nothing(tmp_path: Path):
+    """期待値が一致しないrefがあると、どのrefも更新されないことをテスト"""
+    store = RefStore(tmp_path / ".git")
+    store.update("refs/heads/main", OID)
+
+    tx = store.transaction()
+    tx.update("refs/heads/feature", OTHER)
+    tx.update("refs/heads/main", OTHER, old_oid=OTHER)
+    with pytest.raises(RuntimeError, match="expected"):
+        tx.commit()
+
+    assert store.iter_refs() == [("refs/heads/main", OID)]
+    assert not list((tmp_path / ".git" / "refs").rglob("*.lock"))
+
+
+def test_delete_missing_ref_fails(tmp_path: Path):
+    """存在しないrefの削除が失敗することをテスト"""
+    store = RefStore(tmp_path / ".git")
+
+    with pytest.raises(RuntimeError, match="does not exist"):
+        store.delete("refs/heads/nope")
+
+
+def test_update_logs_branch_and_head(tmp_path: Path):
+    """ブランチの更新がブランチとHEADのreflogに残ることをテスト"""
+    store = RefStore(tmp_path / ".git")
+    store.set_symbolic("HEAD", "refs/heads/main")
+    store.update("refs/heads/main", OID, message="commit (initial): one")
+    store.update("refs/tags/v1", OID)
+
+    for name in ("HEAD", "refs/heads/main"):
+        (entry,) = store.reflog.read(name)
+        assert (entry.old, entry.new) == ("0" * 40, OID)
+        assert entry.message == "commit (initial): one"
+    assert not store.reflog.path("refs/tags/v1").exists()
+
+    store.delete("refs/heads/main")
+    assert not store.reflog.path("refs/heads/main").exists()
+
+
+def test_reflog_is_appended_while_ref_is_locked(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """reflogの追記がrefとHEADのlockを持ったまま行われることをテスト"""
+    git_dir = tmp_path / ".git"
+    store = RefStore(git_dir)
+    store.set_symbolic("HEAD", "refs/heads/main")
+    locked_at_append = []
+    append = store.reflog.append
+
+    def checked(ref: str, *args) -> None:
+        locked_at_append.append(
+            (
+                ref,
+                (git_dir / "refs/heads/main.lock").exists(),
+                (git_dir / "HEAD.lock").exists(),
+            )
+        )
+        append(ref, *args)
+
+    monkeypatch.setattr(store.reflog, "append", checked)
+    store.update("refs/heads/main", OID)
+
+    assert locked_at_append == [
+        ("refs/heads/main", True, True),
+        ("HEAD", True, True),
+    ]
+    assert not (git_dir / "HEAD.lock").exists()
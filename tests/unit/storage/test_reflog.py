@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from mini_git.storage import reflog as reflog_module
+from mini_git.storage.reflog import ZERO_OID, ReflogStore
+
+IDENT = "a <a@example.com> 0 +0000"
+
+
+def _oid(i: int) -> str:
+    return f"{i:040x}"
+
+
+def test_append_writes_git_format_line(tmp_path: Path):
+    """reflogがgitと同じ形式の行で追記されることをテスト"""
+    store = ReflogStore(tmp_path / ".git")
+    store.append("refs/heads/main", None, _oid(1), IDENT, "commit (initial): one")
+    store.append("refs/heads/main", _oid(1), _oid(2), IDENT, "commit: two\nbody")
+
+    lines = store.path("refs/heads/main").read_text().splitlines()
+    assert lines == [
+        f"{ZERO_OID} {_oid(1)} {IDENT}\tcommit (initial): one",
+        f"{_oid(1)} {_oid(2)} {IDENT}\tcommit: two body",
+    ]
+
+
+def test_iter_reverse_across_blocks(tmp_path: Path, monkeypatch):
+    """ブロック境界をまたぐ行も末尾から新しい順に読めることをテスト"""
+    monkeypatch.setattr(reflog_module, "BLOCK_SIZE", 37)
+    store = ReflogStore(tmp_path / ".git")
+    for i in range(1, 30):
+        store.append("HEAD", _oid(i - 1), _oid(i), IDENT, f"commit: {i}")
+
+    entries = list(store.iter_reverse("HEAD"))
+
+    assert [e.new for e in entries] == [_oid(i) for i in range(29, 0, -1)]
+    assert entries[0].message == "commit: 29"
+    assert store.read("HEAD")[0].message == "commit: 1"
+
+
+def test_nth_counts_back_from_newest(tmp_path: Path):
+    """@{n}が新しい方からn番目の値を返し、足りなければNoneになることをテスト"""
+    store = ReflogStore(tmp_path / ".git")
+    store.append("refs/heads/main", None, _oid(1), IDENT, "one")
+    store.append("refs/heads/main", _oid(1), _oid(2), IDENT, "two")
+
+    assert store.nth("refs/heads/main", 0) == _oid(2)
+    assert store.nth("refs/heads/main", 1) == _oid(1)
+    assert store.nth("refs/heads/main", 2) is None
+    assert store.nth("refs/heads/missing", 0) is None
+    assert store.count("refs/heads/main") == 2
+
+
+def test_delete_prunes_empty_dirs(tmp_path: Path):
+    """reflogの削除で空になったディレクトリも消えることをテスト"""
+    store = ReflogStore(tmp_path / ".git")
+    store.append("refs/heads/feature/x", None, _oid(1), IDENT, "branch")
+
+    store.delete("refs/heads/feature/x")
+
+    assert not store.path("refs/heads/feature/x").exists()
+    assert not (tmp_path / ".git" / "logs" / "refs" / "heads" / "feature").exists()
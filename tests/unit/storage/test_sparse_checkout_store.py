@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from mini_git.storage.sparse_checkout_store import ConeState, SparseCheckoutStore
+
+
+def test_disabled_store_contains_everything(tmp_path: Path):
+    """sparse-checkoutが無効なら全パスを含むことをテスト"""
+    store = SparseCheckoutStore(tmp_path / ".git")
+
+    assert not store.is_enabled()
+    assert store.contains("a/b/c.txt")
+
+
+def test_set_writes_cone_patterns(tmp_path: Path):
+    """cone modeのパターンがgitと同じ形式で書かれることをテスト"""
+    store = SparseCheckoutStore(tmp_path / ".git")
+
+    store.set(["src/app", "docs"])
+
+    assert store.path.read_text().splitlines() == [
+        "/*",
+        "!/*/",
+        "/docs/",
+        "/src/",
+        "!/src/*/",
+        "/src/app/",
+    ]
+    assert store.directories() == ["docs", "src/app"]
+
+
+def test_patterns_are_reloaded_from_file(tmp_path: Path):
+    """書き込んだパターンを別インスタンスで読み戻せることをテスト"""
+    SparseCheckoutStore(tmp_path / ".git").set(["src/app", "src/app/sub"])
+
+    store = SparseCheckoutStore(tmp_path / ".git")
+
+    assert store.directories() == ["src/app"]
+    assert store.dir_state("src") is ConeState.PARENT
+    assert store.dir_state("src/app/deep") is ConeState.IN
+    assert store.dir_state("lib") is ConeState.OUT
+
+
+def test_collapse_root_and_contains(tmp_path: Path):
+    """cone外の最も浅いディレクトリが求まることをテスト"""
+    store = SparseCheckoutStore(tmp_path / ".git")
+    store.set(["src/app"])
+
+    assert store.contains("README.md")
+    assert store.contains("src/setup.py")
+    assert store.contains("src/app/x/y.py")
+    assert store.collapse_root("src/lib/z.py") == "src/lib"
+    assert store.collapse_root("vendor/a/b.c") == "vendor"
+
+
+def test_disable_removes_pattern_file(tmp_path: Path):
+    """disableでパターンファイルが削除されることをテスト"""
+    store = SparseCheckoutStore(tmp_path / ".git")
+    store.set(["src"])
+
+    store.disable()
+
+    assert not store.path.exists()
+    assert store.contains("vendor/a.c")
@@ -0,0 +1 @@
+# utils test package
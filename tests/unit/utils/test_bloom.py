@@ -0,0 +1,59 @@
+import pytest
+
+from mini_git.utils.bloom import (
+    TOO_LARGE_FILTER,
+    BloomSettings,
+    create_filter,
+    maybe_contains,
+    murmur3,
+)
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        (b"", 0x00000000),
+        (b"Hello world!", 0x627B0C2C),
+        (b"The quick brown fox jumps over the lazy dog", 0x2E4FF723),
+    ],
+)
+def test_murmur3_matches_git(data: bytes, expected: int):
+    """git の t0095 と同じ murmur3 の値になることをテスト"""
+    assert murmur3(0, data) == expected
+
+
+def test_murmur3_sign_extends_high_bytes_in_version_1():
+    """version 1 では非ASCIIバイトを符号拡張して hash することをテスト"""
+    data = b"\x99\xaa\xbb\xcc\xdd\xee\xff"
+
+    assert murmur3(0, data) == 0xA183CCFD
+    assert murmur3(0, data, signed=True) != murmur3(0, data)
+
+
+def test_filter_contains_changed_paths_and_leading_dirs():
+    """変更パスとその親ディレクトリがfilterに含まれることをテスト"""
+    settings = BloomSettings()
+    data = create_filter(["src/mini_git/cli.py", "README.md"], settings)
+
+    # パス 4 つ × 10 bit → 5 バイト
+    assert len(data) == 5
+    for path in ("src/mini_git/cli.py", "src/mini_git", "src", "README.md"):
+        assert maybe_contains(data, path, settings)
+
+
+def test_filter_rejects_unchanged_path():
+    """変更の無いパスは"確実に無い"と判定されることをテスト"""
+    settings = BloomSettings()
+    data = create_filter(["file.txt"], settings)
+
+    assert data == bytes.fromhex("a54a")
+    assert not maybe_contains(data, "other.txt", settings)
+
+
+def test_too_many_changes_give_all_ones_filter():
+    """変更パスが512を超えると全ビットが立ったfilterになることをテスト"""
+    settings = BloomSettings()
+    data = create_filter([f"f{i}" for i in range(513)], settings)
+
+    assert data == TOO_LARGE_FILTER
+    assert maybe_contains(data, "anything", settings)
@@ -0,0 +1,45 @@
+import random
+
+from mini_git.utils.delta import (
+    apply_delta,
+    create_delta,
+    delta_result_size,
+)
+
+
+def test_delta_round_trip_random_edits():
+    """ランダムに編集したデータのdeltaを適用すると元に戻ることをテスト"""
+    rnd = random.Random(0)
+    for _ in range(300):
+        base = bytes(rnd.choice(b"abcd\n") for _ in range(rnd.randint(0, 300)))
+        target = bytearray(base)
+        for _ in range(rnd.randint(0, 4)):
+            pos = rnd.randint(0, len(target))
+            target[pos : pos + rnd.randint(0, 20)] = bytes(
+                rnd.choice(b"xyz\n") for _ in range(rnd.randint(0, 20))
+            )
+        delta = create_delta(base, bytes(target))
+
+        assert delta is not None
+        assert apply_delta(base, delta) == target
+        assert delta_result_size(delta) == len(target)
+
+
+def test_delta_copies_long_matches():
+    """大きな共通部分がcopy命令になり、deltaが小さくなることをテスト"""
+    rnd = random.Random(1)
+    base = rnd.randbytes(200_000)
+    target = base[:1000] + b"inserted" + base[1000:150_000] + base[160_000:]
+
+    delta = create_delta(base, target)
+
+    assert delta is not None
+    assert len(delta) < 100
+    assert apply_delta(base, delta) == target
+
+
+def test_delta_gives_up_over_max_size():
+    """max_sizeを超えるdeltaは作らずNoneを返すことをテスト"""
+    rnd = random.Random(2)
+
+    assert create_delta(rnd.randbytes(4096), rnd.randbytes(4096), max_size=100) is None
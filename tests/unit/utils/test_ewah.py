@@ -0,0 +1,44 @@
+import pytest
+
+from mini_git.utils.ewah import ewah_decode, ewah_encode
+
+
+@pytest.mark.parametrize(
+    ("bits", "size"),
+    [
+        (0, 0),
+        (0, 1000),
+        ((1 << 1000) - 1, 1000),
+        (0b1011, 4),
+        ((1 << 5000) - 1 ^ (1 << 77) | (1 << 6000), 6500),
+        (sum(1 << i for i in range(0, 10000, 3)), 10000),
+    ],
+)
+def test_round_trip(bits: int, size: int):
+    """エンコードしたbitmapが元のビット集合に戻ることをテスト"""
+    data = ewah_encode(bits, size)
+
+    assert ewah_decode(data) == (bits, size, len(data))
+
+
+def test_runs_are_compressed():
+    """連続した0/1のwordがRLWにまとめられることをテスト"""
+    data = ewah_encode((1 << 64 * 1000) - 1, 64 * 2000)
+
+    # bit_size + word 数 + RLW 2 つ（1 の連続と 0 の連続）+ 最後の RLW 位置
+    assert len(data) == 4 + 4 + 8 * 2 + 4
+
+
+def test_decode_git_serialization():
+    """gitのewah_serialize形式を読めることをテスト"""
+    # 64 ビットの 0 の連続 2 word、その後にリテラル 1 word (0b101)
+    rlw = (2 << 1) | (1 << 33)
+    data = (
+        (131).to_bytes(4, "big")
+        + (2).to_bytes(4, "big")
+        + rlw.to_bytes(8, "big")
+        + (0b101).to_bytes(8, "big")
+        + (0).to_bytes(4, "big")
+    )
+
+    assert ewah_decode(data)[0] == (1 << 128) | (1 << 130)
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from mini_git.utils.fastcdc import iter_chunk_bounds
+
+
+def _random_bytes(n: int, seed: int = 0) -> bytes:
+    return random.Random(seed).randbytes(n)
+
+
+def test_chunk_bounds_cover_whole_input():
+    """チャンク境界が入力全体を隙間なく覆うことをテスト"""
+    data = _random_bytes(300_000)
+    bounds = list(iter_chunk_bounds(data, 2048, 8192, 32768))
+
+    assert bounds[0][0] == 0
+    assert bounds[-1][1] == len(data)
+    for (_, end), (start, _) in zip(bounds, bounds[1:]):
+        assert end == start
+
+
+def test_chunk_sizes_respect_limits():
+    """最後以外のチャンクがmin/maxの範囲に収まることをテスト"""
+    data = _random_bytes(300_000, seed=1)
+    bounds = list(iter_chunk_bounds(data, 2048, 8192, 32768))
+
+    for start, end in bounds[:-1]:
+        assert 2048 <= end - start <= 32768
+
+
+def test_insertion_only_changes_nearby_chunks():
+    """先頭付近への挿入で後続のチャンク境界が再同期することをテスト"""
+    data = _random_bytes(300_000, seed=2)
+    edited = data[:1000] + b"inserted bytes" + data[1000:]
+
+    original = {data[s:e] for s, e in iter_chunk_bounds(data, 2048, 8192, 32768)}
+    changed = [edited[s:e] for s, e in iter_chunk_bounds(edited, 2048, 8192, 32768)]
+
+    shared = sum(1 for c in changed if c in original)
+    assert shared >= len(changed) - 2
+
+
+def test_small_input_is_single_chunk():
+    """min未満の入力が1チャンクになることをテスト"""
+    assert list(iter_chunk_bounds(b"abc", 2048, 8192, 32768)) == [(0, 3)]
+    assert list(iter_chunk_bounds(b"", 2048, 8192, 32768)) == []
+
+
+def test_invalid_sizes_raise():
+    """不正なサイズ指定で例外を発生させることをテスト"""
+    with pytest.raises(ValueError):
+        list(iter_chunk_bounds(b"abc", 8192, 2048, 32768))
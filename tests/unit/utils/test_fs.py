@@ -0,0 +1,137 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from mini_git.storage.config_store import ConfigStore
+from mini_git.storage.index_store import IndexStore
+from mini_git.storage.object_store import ObjectStore
+from mini_git.storage.ref_store import RefStore
+from mini_git.types import ObjectType
+from mini_git.utils import fs
+from mini_git.utils.fs import Durability
+
+
+@pytest.fixture
+def fsyncs(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    calls: list[int] = []
+    real = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: calls.append(fd) or real(fd))
+    return calls
+
+
+@pytest.fixture
+def barriers(monkeypatch: pytest.MonkeyPatch) -> list[Path]:
+    calls: list[Path] = []
+    monkeypatch.setattr(fs, "sync_barrier", lambda d: calls.append(d))
+    return calls
+
+
+def _write_blobs(store: ObjectStore, n: int) -> list[str]:
+    return [store.write(ObjectType.BLOB, f"blob {i}\n".encode()) for i in range(n)]
+
+
+def test_durability_from_config(tmp_path: Path):
+    """core.fsyncMethodとcore.fsync=noneから方式を決めることをテスト"""
+    config = ConfigStore(tmp_path)
+    assert Durability.from_config(config).method == "none"
+    config.set("core.fsyncMethod", "batch")
+    assert Durability.from_config(config).method == "batch"
+    config.set("core.fsync", "none")
+    assert Durability.from_config(config).method == "none"
+    with pytest.raises(RuntimeError, match="core.fsyncMethod"):
+        Durability("writeout-only")
+
+
+def test_none_method_never_fsyncs(tmp_path: Path, fsyncs: list[int]):
+    """noneではobjectもindexもfsyncしないことをテスト"""
+    durability = Durability()
+    store = ObjectStore(tmp_path, durability=durability)
+    _write_blobs(store, 3)
+    IndexStore(tmp_path, durability=durability).clear()
+    assert fsyncs == []
+
+
+def test_fsync_method_syncs_every_object(tmp_path: Path, fsyncs: list[int]):
+    """fsyncではobjectを書くたびにfsyncすることをテスト"""
+    store = ObjectStore(tmp_path, durability=Durability("fsync"))
+    with store.batch():
+        _write_blobs(store, 3)
+    assert len(fsyncs) == 3
+
+
+def test_batch_defers_rename_until_barrier(
+    tmp_path: Path, fsyncs: list[int], barriers: list[Path]
+):
+    """batchでは書いたobjectを読めるが、同期までは本来の名前に置かないことをテスト"""
+    store = ObjectStore(tmp_path, durability=Durability("batch"))
+    with store.batch():
+        oids = _write_blobs(store, 5)
+        assert store.read(oids[0]) == ("blob", b"blob 0\n")
+        assert store.exists(oids[4])
+        assert not (store.object_dir / oids[0][:2] / oids[0][2:]).exists()
+        assert barriers == []
+    assert len(barriers) == 1
+    assert fsyncs == []
+    for oid in oids:
+        assert (store.object_dir / oid[:2] / oid[2:]).is_file()
+    assert not list(store.object_dir.glob("*/*.tmp"))
+
+
+def test_batch_nested_flushes_once(tmp_path: Path, barriers: list[Path]):
+    """入れ子のbatchはいちばん外側を抜けるときだけ同期することをテスト"""
+    store = ObjectStore(tmp_path, durability=Durability("batch"))
+    with store.batch():
+        _write_blobs(store, 2)
+        with store.batch():
+            _write_blobs(store, 4)
+        assert barriers == []
+    assert len(barriers) == 1
+
+
+def test_index_publish_flushes_pending_objects(
+    tmp_path: Path, fsyncs: list[int], barriers: list[Path]
+):
+    """indexを置き換える前に溜めたobjectを同期することをテスト"""
+    durability = Durability("batch")
+    store = ObjectStore(tmp_path, durability=durability)
+    index_store = IndexStore(tmp_path, durability=durability)
+    with store.batch():
+        oid = _write_blobs(store, 1)[0]
+        index_store.clear()
+        assert len(barriers) == 1
+        assert (store.object_dir / oid[:2] / oid[2:]).is_file()
+    # index 本体と .git ディレクトリの fsync
+    assert len(fsyncs) == 2
+
+
+def test_ref_update_syncs_lock_and_directory(tmp_path: Path, fsyncs: list[int]):
+    """fsyncではrefのlockファイルとディレクトリをfsyncすることをテスト"""
+    refs = RefStore(tmp_path, durability=Durability("fsync"))
+    refs.update("refs/heads/main", "1" * 40)
+    assert refs.resolve("refs/heads/main") == "1" * 40
+    assert len(fsyncs) == 2
+
+
+def test_batch_outside_context_syncs_each_file(tmp_path: Path, fsyncs: list[int]):
+    """batch方式でもbatch()の外で書いたobjectはその場でfsyncすることをテスト"""
+    store = ObjectStore(tmp_path, durability=Durability("batch"))
+    oid = _write_blobs(store, 1)[0]
+    assert len(fsyncs) == 1
+    assert (store.object_dir / oid[:2] / oid[2:]).is_file()
+
+
+def test_failed_write_removes_tmp_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """renameに失敗しても一時ファイルを残さないことをテスト"""
+
+    def fail(src, dst):
+        raise OSError("rename failed")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        Durability("fsync").write(tmp_path / "obj", b"x")
+    with pytest.raises(OSError):
+        Durability().publish(tmp_path / "index", b"x")
+    with pytest.raises(OSError):
+        fs.write_atomic(tmp_path / "graph", b"x")
+    assert list(tmp_path.iterdir()) == []
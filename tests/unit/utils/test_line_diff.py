@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from mini_git.utils.line_diff import (
+    ALGORITHMS,
+    Edit,
+    intern_lines,
+    myers_diff,
+    split_lines,
+    unified_hunks,
+)
+
+
+def _apply(a: list[int], b: list[int], edits: list[Edit]) -> list[int]:
+    out: list[int] = []
+    pos = 0
+    for e in edits:
+        out += a[pos : e.a_start] + b[e.b_start : e.b_end]
+        pos = e.a_end
+    return out + a[pos:]
+
+
+def _lcs(a: list[int], b: list[int]) -> int:
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return prev[-1]
+
+
+def test_split_and_intern_lines():
+    """改行を残して分割し、同じ行に同じidが振られることをテスト"""
+    a = split_lines(b"x\ny\nx")
+    b = split_lines(b"y\nz\n")
+
+    assert a == [b"x\n", b"y\n", b"x"]
+    a_ids, b_ids = intern_lines(a, b)
+    assert list(a_ids) == [0, 1, 2]
+    assert list(b_ids) == [1, 3]
+
+
+@pytest.mark.parametrize("algorithm", sorted(ALGORITHMS))
+def test_edits_transform_a_into_b(algorithm: str):
+    """ランダムな入力で、得られた変更をaに適用するとbになることをテスト"""
+    rng = random.Random(0)
+    diff = ALGORITHMS[algorithm]
+    for _ in range(300):
+        a = [rng.randrange(4) for _ in range(rng.randrange(30))]
+        b = [rng.randrange(4) for _ in range(rng.randrange(30))]
+        edits = list(diff(a, b))
+
+        assert _apply(a, b, edits) == b
+        # 変更は重ならず、隣接するものはまとめられている
+        for prev, cur in zip(edits, edits[1:]):
+            assert prev.a_end < cur.a_start or prev.b_end < cur.b_start
+
+
+def test_myers_is_minimal():
+    """Myersの変更量が最長共通部分列から求まる最小値と一致することをテスト"""
+    rng = random.Random(1)
+    for _ in range(300):
+        a = [rng.randrange(3) for _ in range(rng.randrange(25))]
+        b = [rng.randrange(3) for _ in range(rng.randrange(25))]
+        edits = list(myers_diff(a, b))
+        cost = sum(e.a_end - e.a_start + e.b_end - e.b_start for e in edits)
+
+        assert cost == len(a) + len(b) - 2 * _lcs(a, b)
+
+
+def test_histogram_anchors_on_unique_lines():
+    """histogramが出現回数の少ない行を目印にして変更を分けることをテスト"""
+    a = [1, 9, 1, 2, 1]
+    b = [1, 2, 1, 9, 1]
+
+    assert list(ALGORITHMS["histogram"](a, b)) == [
+        Edit(1, 3, 1, 1),
+        Edit(5, 5, 3, 5),
+    ]
+
+
+def test_unified_hunks_format():
+    """文脈行のまとめ方と関数名・改行なしの表示がgitと同じことをテスト"""
+    a = split_lines(b"int main()\n" + b"".join(b"  %d\n" % i for i in range(20)))
+    b = list(a)
+    b[2] = b"  changed\n"
+    b[-1] = b"  19"
+    hunks = unified_hunks(a, b, myers_diff(*intern_lines(a, b)), context=2)
+
+    assert b"".join(hunks) == (
+        b"@@ -1,5 +1,5 @@\n int main()\n   0\n-  1\n+  changed\n   2\n   3\n"
+        b"@@ -19,3 +19,3 @@ int main()\n   17\n   18\n-  19\n"
+        b"+  19\n\\ No newline at end of file\n"
+    )
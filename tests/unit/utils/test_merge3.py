@@ -0,0 +1,66 @@
+from mini_git.utils.merge3 import merge_lines
+
+BASE = b"".join(b"%d\n" % i for i in range(1, 11))
+
+
+def _edit(data: bytes, old: bytes, new: bytes) -> bytes:
+    return data.replace(old, new, 1)
+
+
+def test_changes_on_both_sides_merge_cleanly():
+    """離れた位置の変更が両方とも取り込まれることをテスト"""
+    ours = _edit(BASE, b"2\n", b"two\n")
+    theirs = _edit(BASE, b"9\n", b"nine\n") + b"11\n"
+
+    result = merge_lines(BASE, ours, theirs)
+
+    assert result.conflicts == 0
+    assert result.content == _edit(_edit(BASE, b"2\n", b"two\n"), b"9\n", b"nine\n") + (
+        b"11\n"
+    )
+
+
+def test_identical_changes_are_not_conflicts():
+    """両側で同じ変更をした場合は衝突にならないことをテスト"""
+    both = _edit(BASE, b"5\n", b"five\n")
+
+    assert merge_lines(BASE, both, both) == (both, 0)
+
+
+def test_overlapping_changes_conflict_with_common_lines_outside():
+    """重なる変更が衝突マーカーで囲まれ、共通の行はマーカーの外に出ることをテスト"""
+    ours = _edit(BASE, b"4\n5\n6\n", b"4\nsame\nours\n")
+    theirs = _edit(BASE, b"4\n5\n6\n", b"4\nsame\ntheirs\n")
+
+    result = merge_lines(BASE, ours, theirs, "HEAD", "topic")
+
+    assert result.conflicts == 1
+    assert result.content == (
+        b"1\n2\n3\n4\nsame\n"
+        b"<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> topic\n"
+        b"7\n8\n9\n10\n"
+    )
+
+
+def test_same_deletion_on_both_sides_is_applied_once():
+    """繰り返す行の中の同じ削除が、両側でずれた位置に見つかっても1回だけ適用されることをテスト"""
+    base = b"d\nd\nc\nc\ne\nb\nb\nb\nb\na\n"
+    ours = b"d\nd\nc\ne\nb\nb\nb\na\n"
+    theirs = b"d\nd\nc\nc\ne\nb\nb\nb\na\n"
+
+    assert merge_lines(base, ours, theirs) == (b"d\nd\nc\ne\nb\nb\nb\na\n", 0)
+
+
+def test_nearby_conflicts_are_joined():
+    """間が数行しかない衝突どうしは、間の行ごと1つの衝突にまとめることをテスト"""
+    ours = _edit(BASE, b"4\n5\n6\n7\n", b"x\n5\nsame\ny\n")
+    theirs = _edit(BASE, b"4\n5\n6\n7\n", b"z\n5\nsame\nw\n")
+
+    result = merge_lines(BASE, ours, theirs)
+
+    assert result.conflicts == 1
+    assert result.content == (
+        b"1\n2\n3\n"
+        b"<<<<<<< ours\nx\n5\nsame\ny\n=======\nz\n5\nsame\nw\n>>>>>>> theirs\n"
+        b"8\n9\n10\n"
+    )
@@ -0,0 +1,26 @@
+from mini_git.utils.similarity import (
+    MAX_CHUNK,
+    copied_bytes,
+    fingerprint,
+    similarity_score,
+)
+
+
+def test_fingerprint_counts_bytes_per_chunk():
+    """改行ごとの断片のバイト数がhashごとに合算されることをテスト"""
+    fp = fingerprint(b"a\nbb\na\n")
+
+    assert sorted(fp.values()) == [3, 4]
+    assert sum(fingerprint(b"x" * (MAX_CHUNK * 2 + 5)).values()) == MAX_CHUNK * 2 + 5
+
+
+def test_similarity_of_edited_content():
+    """共通部分のバイト数を大きい方のサイズで割った値になることをテスト"""
+    src = b"".join(b"line %d\n" % i for i in range(10))
+    dst = src.replace(b"line 3\n", b"other\n")
+
+    copied = copied_bytes(fingerprint(src), fingerprint(dst))
+
+    assert copied == len(src) - 7
+    assert similarity_score(copied, len(src), len(dst)) == 90
+    assert similarity_score(0, 0, 0) == 100